@@ -29,47 +29,74 @@ ERROR_MESSAGE = (
     "(Windows 10.0.17763) or later.\n"
 )
 
-if platform.system().lower().strip() != "windows":
-    sys.exit(ERROR_MESSAGE)
-version_info_list = list(map(int, platform.version().split(".")))
-# Windows 10 Version 1809 Build 17763 (Windows 10.0.17763) Check
-if not (
-    version_info_list[0] >= 10
-    and version_info_list[1] >= 0
-    and version_info_list[2] >= 17763
-):
-    sys.exit(ERROR_MESSAGE)
+MSVC_COMPILE_ARGS = [
+    "/O2",
+    "/GL",
+    "/EHsc",
+    "/D_UNICODE",
+    "/DUNICODE",
+    "/experimental:c11atomics",
+    "/std:c17",
+    "/external:anglebrackets",
+    "/external:W0",
+    "/Wall",
+    "/WX",
+    # Heuristic Inline Expansion
+    "/wd4711",
+    # Spectre Mitigation
+    "/wd5045",
+    # For testing only:
+    # "/Zi",
+    # "/fsanitize=address",
+]
+# For testing:
+# MSVC_LINK_ARGS = ["/PROFILE", "/DEBUG:FULL", "/LTCG"]
+# For release:
+MSVC_LINK_ARGS = ["/DEBUG:NONE", "/LTCG"]
 
-setup(
-    ext_modules=[
+ext_modules = []
+
+if platform.system().lower().strip() == "windows":
+    version_info_list = list(map(int, platform.version().split(".")))
+    # Windows 10 Version 1809 Build 17763 (Windows 10.0.17763) Check
+    if not (
+        version_info_list[0] >= 10
+        and version_info_list[1] >= 0
+        and version_info_list[2] >= 17763
+    ):
+        sys.exit(ERROR_MESSAGE)
+    ext_modules.append(
         Extension(
             "_pyconptyinternal",
-            sources=["src/pyconpty/_pyconptyinternal.c"],
-            language="c",
-            extra_compile_args=[
-                "/O2",
-                "/GL",
-                "/EHsc",
-                "/D_UNICODE",
-                "/DUNICODE",
-                "/experimental:c11atomics",
-                "/std:c17",
-                "/external:anglebrackets",
-                "/external:W0",
-                "/Wall",
-                "/WX",
-                # Heuristic Inline Expansion
-                "/wd4711",
-                # Spectre Mitigation
-                "/wd5045",
-                # For testing only:
-                # "/Zi",
-                # "/fsanitize=address",
+            sources=[
+                "src/pyconpty/_pyconptyinternal.c",
+                "src/pyconpty/_pyconptyvts.c",
             ],
-            # For testing:
-            # extra_link_args=["/PROFILE", "/DEBUG:FULL", "/LTCG"],
-            # For release:
-            extra_link_args=["/DEBUG:NONE", "/LTCG"],
+            depends=["src/pyconpty/_pyconptyvts.h"],
+            language="c",
+            extra_compile_args=MSVC_COMPILE_ARGS,
+            extra_link_args=MSVC_LINK_ARGS,
         )
-    ]
+    )
+    stripper_compile_args = MSVC_COMPILE_ARGS
+    stripper_link_args = MSVC_LINK_ARGS
+else:
+    # Only the standalone VTStripper is available on other platforms.
+    stripper_compile_args = ["-O2", "-std=c17", "-Wall"]
+    stripper_link_args = []
+
+ext_modules.append(
+    Extension(
+        "_pyconptystripper",
+        sources=[
+            "src/pyconpty/_pyconptystripper.c",
+            "src/pyconpty/_pyconptyvts.c",
+        ],
+        depends=["src/pyconpty/_pyconptyvts.h"],
+        language="c",
+        extra_compile_args=stripper_compile_args,
+        extra_link_args=stripper_link_args,
+    )
 )
+
+setup(ext_modules=ext_modules)
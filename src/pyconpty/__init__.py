@@ -36,12 +36,19 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 For queries, contact me at: melwyncarlo@gmail.com
 ------------------------------------------------------------------------------
 
-This package contains only one module: pyconpty
-This module contains only one class: ConPTY
+This package contains two modules: pyconpty and vtstripper
+The pyconpty module contains only one class: ConPTY (Windows only)
+The vtstripper module contains only one class: VTStripper
 
-Usage: from pyconpty import ConPTY
+Usage: from pyconpty import ConPTY, VTStripper
 """
 
-from .pyconpty import ConPTY
+import platform
+from .vtstripper import VTStripper
 
-__all__ = ["ConPTY"]
+if platform.system().lower().strip() == "windows":
+    from .pyconpty import ConPTY
+
+    __all__ = ["ConPTY", "VTStripper"]
+else:
+    __all__ = ["VTStripper"]
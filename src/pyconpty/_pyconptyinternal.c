@@ -35,6 +35,8 @@ For queries, contact me at: melwyncarlo@gmail.com
 #include <windows.h>
 #include <stdatomic.h>
 
+#include "_pyconptyvts.h"
+
 /* ######################################################################## */
 /*  PRIVATE GLOBAL VARIABLES                                                */
 /* ######################################################################## */
@@ -43,7 +45,16 @@ For queries, contact me at: melwyncarlo@gmail.com
 #define STDIN_PIPE_BUFFER_SIZE 8192
 
 static const DWORD MAX_READ_BUFFER_SIZE = STDOUT_PIPE_BUFFER_SIZE;
-static const DWORD MAX_WRITE_BUFFER_SIZE = STDIN_PIPE_BUFFER_SIZE;
+static const size_t MAX_SCREEN_BUFFER_SIZE = STDOUT_PIPE_BUFFER_SIZE;
+static const DWORD MIN_ADAPTIVE_READ_SIZE = 4096;
+static const DWORD MAX_ADAPTIVE_READ_SIZE = 4194304;
+static const int ADAPTIVE_READ_GROW_STREAK = 2;
+static const int ADAPTIVE_READ_SHRINK_STREAK = -16;
+static const ULONGLONG RESIZE_COALESCE_INTERVAL = 100;
+static const ULONGLONG REPAINT_EXPECTED_INTERVAL = 500;
+static const DWORD LEARNED_QUIET_PERIOD = (DWORD)-1;
+static const DWORD MIN_QUIET_PERIOD = 50;
+static const DWORD MAX_QUIET_PERIOD = 1000;
 static const size_t WAIT_NAMED_PIPE_TIMEOUT_MILLIS = 500;
 
 typedef enum {
@@ -56,23 +67,53 @@ typedef enum {
 } ProcessStatus;
 
 typedef enum {
-    VTSMODE_NONE,
-    VTSMODE_ESCAPE,
-    VTSMODE_OPENING_SQUARE_BRACKET,
-    VTSMODE_CLOSING_SQUARE_BRACKET,
-    VTSMODE_OPENING_SQUARE_BRACKET_DIGIT,
-    VTSMODE_SKIP_1,
-    VTSMODE_SEARCH_ST,
-    VTSMODE_SEARCH_LETTER,
-    VTSMODE_SEARCH_Hf
-} VTSMode;
+    QUERYMODE_NONE,
+    QUERYMODE_ESCAPE,
+    QUERYMODE_CSI,
+    QUERYMODE_STRING,
+    QUERYMODE_STRING_ESCAPE
+} QueryMode;
+
+/* Bytes Alignment Padding */
+__pragma(warning(disable: 4820))
+typedef struct {
+    QueryMode mode;
+    int params[2];
+    size_t param_count;
+    char private_marker;
+    bool has_intermediate;
+    bool is_wrap_pending;
+    SHORT cursorx;
+    SHORT cursory;
+} ConPTYQueryTracker;
+__pragma(warning(default: 4820))
+
+/* Bytes Alignment Padding */
+__pragma(warning(disable: 4820))
+typedef struct {
+    size_t input_position;
+    VTSMode input_vts_mode;
+    VTSMode output_vts_mode;
+    bool is_matching;
+} ConPTYEchoMatcher;
+__pragma(warning(default: 4820))
 
+/* Bytes Alignment Padding */
+__pragma(warning(disable: 4820))
 typedef struct {
-    char *data;
-    size_t cursor_position;
-    size_t data_length;
-    size_t max_size;
-} ConPTYIOBuffer;
+    ConPTYIOBuffer twspaces_buffer;
+    ConPTYIOBuffer line_buffer;
+    ConPTYIOBuffer stripped_buffer;
+    ConPTYMarkCollector mark_collector;
+    size_t cursorx;
+    size_t cursory;
+    size_t line_column;
+    VTSMode vts_mode;
+    bool collapse_lines;
+    bool keep_raw_data;
+    bool is_enabled;
+} ConPTYEagerStripper;
+__pragma(warning(default: 4820))
 
 /* Bytes Alignment Padding */
 __pragma(warning(disable: 4820))
@@ -80,22 +121,68 @@ typedef struct {
     PyObject_HEAD
     STARTUPINFOEXW si;
     ConPTYIOBuffer read_buffer;
+    ConPTYIOBuffer raw_buffer;
+    ConPTYIOBuffer taken_buffer;
+    ConPTYIOBuffer stripped_buffer;
+    ConPTYIOBuffer twspaces_buffer;
+    ConPTYIOBuffer line_buffer;
     ConPTYIOBuffer write_buffer;
     ConPTYIOBuffer strip_input_buffer;
     ConPTYIOBuffer strip_repeat_buffer;
+    ConPTYIOBuffer strip_repeat_vts_flags;
+    ConPTYIOBuffer screen_buffer;
+    ConPTYIOBuffer screen_vts_flags;
+    ConPTYIOBuffer response_buffer;
+    ConPTYMarkCollector mark_collector;
+    ConPTYStyleCollector style_collector;
+    ConPTYEchoMatcher echo_matcher;
+    ConPTYEagerStripper eager_stripper;
     PROCESS_INFORMATION pi;
     HPCON hPC;
     HANDLE client_stdout_pipe_handle;
     HANDLE client_stdin_pipe_handle;
     HANDLE kill_lock;
     HANDLE destroy_lock;
+    HANDLE resize_lock;
+    HANDLE response_lock;
     _Atomic ProcessStatus process_status;
     COORD pseudo_console_size;
+    COORD applied_console_size;
+    ULONGLONG last_resize_tick;
+    _Atomic ULONGLONG repaint_deadline_tick;
+    atomic_int screen_height;
     DWORD post_end_delay;
+    DWORD quiet_period;
+    _Atomic DWORD learned_quiet_period;
+    _Atomic ULONGLONG last_output_tick;
+    size_t output_line_count;
+    /* Counts the (re)allocations of every buffer owned by this instance */
+    atomic_size_t allocation_count;
+    DWORD stdout_pipe_size;
+    DWORD stdin_pipe_size;
+    _Atomic DWORD read_chunk_size;
+    bool is_read_size_adaptive;
+    size_t read_buffer_high_mark;
+    size_t read_buffer_low_mark;
     DWORD time_delta;
     volatile DWORD process_exit_code;
-    atomic_bool is_read_buffer_available;
-    atomic_bool is_write_buffer_available;
+    SRWLOCK read_buffer_lock;
+    SRWLOCK write_buffer_lock;
+    SRWLOCK stdin_pipe_lock;
+    SRWLOCK reader_lock;
+    CONDITION_VARIABLE stdin_wakeup_condition;
+    CONDITION_VARIABLE input_sent_condition;
+    CONDITION_VARIABLE output_line_condition;
+    CONDITION_VARIABLE read_drain_condition;
+    atomic_bool is_input_pending;
+    atomic_bool is_input_discard_pending;
+    atomic_bool is_interrupt_pending;
+    atomic_bool is_output_paused;
+    atomic_bool is_resize_pending;
+    atomic_bool is_repaint_expected;
+    atomic_bool is_response_pending;
+    bool answer_queries;
+    bool plain_strip;
     bool has_any_process_run_yet;
 } ConPTYBriefcase;
 __pragma(warning(default: 4820))
@@ -119,15 +206,29 @@ static PyObject *get_has_process_ended(ConPTYBriefcase*, PyObject*);
 static PyObject *get_is_input_sent(ConPTYBriefcase*, PyObject*);
 static PyObject *kill_process(ConPTYBriefcase*, PyObject*);
 static PyObject *get_process_exit_code(ConPTYBriefcase*, PyObject*);
+static PyObject *get_is_output_quiet(ConPTYBriefcase*, PyObject* const*,
+                                                       Py_ssize_t);
 static PyObject *set_vts_display(ConPTYBriefcase*, PyObject* const*,
                                              Py_ssize_t);
+static PyObject *get_allocation_count(ConPTYBriefcase*, PyObject*);
+static PyObject *wait_for_input_sent(ConPTYBriefcase*, PyObject* const*,
+                                                       Py_ssize_t);
+static PyObject *get_output_line_count(ConPTYBriefcase*, PyObject*);
+static PyObject *get_read_chunk_size(ConPTYBriefcase*, PyObject*);
+static PyObject *get_buffered_byte_count(ConPTYBriefcase*, PyObject*);
+static PyObject *get_is_output_paused(ConPTYBriefcase*, PyObject*);
+static PyObject *send_interrupt(ConPTYBriefcase*, PyObject* const*,
+                                                  Py_ssize_t);
+static PyObject *wait_for_output_lines(ConPTYBriefcase*, PyObject* const*,
+                                                         Py_ssize_t);
 static void pyconptyinternal_dealloc(ConPTYBriefcase*);
 
 /* Private Functions */
-static bool initialize_iobuffer(ConPTYIOBuffer*, bool);
-static void free_iobuffer(ConPTYIOBuffer*);
-static bool extend_iobuffer(ConPTYIOBuffer*, size_t);
+static bool append_to_iobuffer(ConPTYIOBuffer*, const char* const, size_t);
 static bool shrink_iobuffer(ConPTYIOBuffer*, size_t, size_t);
+static bool load_iobuffer(ConPTYIOBuffer*, const char* const, size_t);
+static bool take_from_iobuffer(ConPTYIOBuffer*, ConPTYIOBuffer*, size_t);
+static void release_excess_iobuffer(ConPTYIOBuffer*, size_t);
 static bool set_up_pseudo_console(ConPTYBriefcase*);
 static HRESULT create_process(ConPTYBriefcase*, LPWSTR);
 static HRESULT prepare_startup_info(HPCON, STARTUPINFOEXW*);
@@ -137,15 +238,49 @@ static DWORD WINAPI listen_for_stdout_stream(LPVOID);
 static HRESULT create_listener_thread(ConPTYBriefcase*,
                                       LPTHREAD_START_ROUTINE);
 static HRESULT launch_io_listeners(ConPTYBriefcase*);
-static bool strip_vts_from_data(const char* const, size_t*, char **, VTSMode*,
-                ConPTYIOBuffer*, const SHORT* const, const SHORT* const,
-                                            size_t*, size_t*, bool*);
-static bool extend_write_data_buffer(char**, char**, size_t*,
-                                    const size_t* const);
-static bool append_to_twspaces_buffer(ConPTYIOBuffer*, char);
-static int get_number_from_twspaces_buffer(ConPTYIOBuffer*);
-static int strstr_internal(char*, char*, size_t, size_t, bool**, bool **,
-                size_t*, size_t*, size_t*, ConPTYIOBuffer*, VTSMode*);
+static bool apply_pseudoconsole_size(ConPTYBriefcase*);
+static void apply_pending_resize(ConPTYBriefcase*);
+static bool append_to_screen_buffer(ConPTYIOBuffer*, ConPTYIOBuffer*,
+                    const char* const, const bool* const, size_t, int);
+static bool classify_vts_bytes(const char* const, size_t, ConPTYIOBuffer*,
+                               VTSMode*, ConPTYIOBuffer*);
+static void learn_quiet_period(ConPTYBriefcase*, ULONGLONG, bool);
+static void adapt_read_chunk_size(ConPTYBriefcase*, DWORD, int*);
+static size_t get_buffered_length_internal(ConPTYBriefcase*);
+static void wait_for_read_buffer_drain(ConPTYBriefcase*);
+static bool is_output_quiet_internal(ConPTYBriefcase*, DWORD, ULONGLONG);
+static void initialize_query_tracker(ConPTYQueryTracker*);
+static bool answer_vts_queries(ConPTYBriefcase*, ConPTYQueryTracker*,
+                               const char* const, size_t);
+static bool dispatch_vts_query(ConPTYBriefcase*, ConPTYQueryTracker*,
+                               char, COORD);
+static bool send_pending_response(ConPTYBriefcase*);
+static bool write_into_stdin_pipe(ConPTYBriefcase*, const char* const,
+                                  size_t, DWORD*);
+static bool write_into_idle_stdin_pipe(ConPTYBriefcase*, const char* const,
+                                       size_t, size_t*);
+static PyObject *get_marks_as_list(ConPTYMarkCollector*, const char* const);
+static PyObject *get_style_runs_as_bytes(ConPTYStyleCollector*,
+                                         const char* const, size_t);
+static int strstr_internal(const char* const, const char* const, size_t,
+                size_t, const bool* const, const bool* const, size_t*,
+                size_t*);
+static int strrepaint_internal(const char* const, const char* const, size_t,
+                size_t, const bool* const, const bool* const, size_t*,
+                size_t*);
+static bool is_blank_in_repaint(char, bool);
+static void reset_echo_matcher(ConPTYEchoMatcher*, ConPTYIOBuffer*);
+static size_t match_echoed_input(ConPTYEchoMatcher*, ConPTYIOBuffer*,
+                                 const char* const, size_t);
+static bool is_significant_echo_byte(VTSMode*, char);
+static bool initialize_eager_stripper(ConPTYEagerStripper*, bool,
+                                      atomic_size_t*);
+static void free_eager_stripper(ConPTYEagerStripper*);
+static bool strip_into_read_buffer(ConPTYBriefcase*, const char* const,
+                                   size_t);
+static bool flush_eager_line_buffer(ConPTYBriefcase*);
+static void rebase_mark_records(ConPTYIOBuffer*, size_t, size_t);
+static bool take_eager_marks(ConPTYIOBuffer*, ConPTYIOBuffer*, size_t);
 static void close_client_io_pipes(ConPTYBriefcase*);
 static bool kill_process_internal(ConPTYBriefcase*);
 static void destroy_pseudoconsole(ConPTYBriefcase*);
@@ -182,10 +317,43 @@ static PyMethodDef pyconptyinternal_methods[] = {
         "get_process_exit_code", (PyCFunction) get_process_exit_code,
         METH_NOARGS, NULL
     },
+    {
+        "get_is_output_quiet", (PyCFunction) get_is_output_quiet,
+        METH_FASTCALL, NULL
+    },
     {
         "set_vts_display", (PyCFunction) set_vts_display,
         METH_FASTCALL, NULL
     },
+    {
+        "get_allocation_count", (PyCFunction) get_allocation_count,
+        METH_NOARGS, NULL
+    },
+    {
+        "wait_for_input_sent", (PyCFunction) wait_for_input_sent,
+        METH_FASTCALL, NULL
+    },
+    {
+        "get_output_line_count", (PyCFunction) get_output_line_count,
+        METH_NOARGS, NULL
+    },
+    {
+        "wait_for_output_lines", (PyCFunction) wait_for_output_lines,
+        METH_FASTCALL, NULL
+    },
+    {"send_interrupt",   (PyCFunction) send_interrupt,   METH_FASTCALL, NULL},
+    {
+        "get_read_chunk_size", (PyCFunction) get_read_chunk_size,
+        METH_NOARGS, NULL
+    },
+    {
+        "get_buffered_byte_count", (PyCFunction) get_buffered_byte_count,
+        METH_NOARGS, NULL
+    },
+    {
+        "get_is_output_paused", (PyCFunction) get_is_output_paused,
+        METH_NOARGS, NULL
+    },
     {NULL, NULL, 0, NULL}
 };
 __pragma(warning(default: 4191))
@@ -257,23 +425,88 @@ static int pyconptyinternal_init(
     self->process_exit_code = (DWORD)-1;
     self->has_any_process_run_yet = false;
     self->process_status = NOT_RUNNING;
-    self->is_read_buffer_available = false;
-    self->is_write_buffer_available = false;
+    InitializeSRWLock(&self->read_buffer_lock);
+    InitializeSRWLock(&self->write_buffer_lock);
+    InitializeSRWLock(&self->stdin_pipe_lock);
+    InitializeSRWLock(&self->reader_lock);
+    InitializeConditionVariable(&self->stdin_wakeup_condition);
+    InitializeConditionVariable(&self->input_sent_condition);
+    InitializeConditionVariable(&self->output_line_condition);
+    InitializeConditionVariable(&self->read_drain_condition);
+    self->is_input_pending = false;
+    self->is_input_discard_pending = false;
+    self->is_interrupt_pending = false;
+    self->is_output_paused = false;
+    self->is_resize_pending = false;
+    self->is_repaint_expected = false;
+    self->is_response_pending = false;
+    self->answer_queries = true;
+    self->plain_strip = false;
     self->client_stdout_pipe_handle = NULL;
     self->client_stdin_pipe_handle = NULL;
     self->pseudo_console_size.X = width;
     self->pseudo_console_size.Y = height;
+    self->applied_console_size = self->pseudo_console_size;
+    self->last_resize_tick = 0;
+    self->repaint_deadline_tick = 0;
+    self->screen_height = height;
     self->post_end_delay = (DWORD)-1;
+    self->quiet_period = 0;
+    self->learned_quiet_period = MIN_QUIET_PERIOD;
+    self->last_output_tick = 0;
+    self->output_line_count = 0;
+    self->allocation_count = 0;
+    self->stdout_pipe_size = STDOUT_PIPE_BUFFER_SIZE;
+    self->stdin_pipe_size = STDIN_PIPE_BUFFER_SIZE;
+    self->read_chunk_size = STDOUT_PIPE_BUFFER_SIZE;
+    self->is_read_size_adaptive = false;
+    self->read_buffer_high_mark = 0;
+    self->read_buffer_low_mark = 0;
     self->time_delta = 100;
-    if ((!initialize_iobuffer(&self->read_buffer, true))
-     || (!initialize_iobuffer(&self->write_buffer, true))
-     || (!initialize_iobuffer(&self->strip_input_buffer, true))
-     || (!initialize_iobuffer(&self->strip_repeat_buffer, true))
+    if ((!initialize_counted_iobuffer(
+            &self->read_buffer, &self->allocation_count))
+     || (!initialize_counted_iobuffer(
+            &self->raw_buffer, &self->allocation_count))
+     || (!initialize_counted_iobuffer(
+            &self->taken_buffer, &self->allocation_count))
+     || (!initialize_counted_iobuffer(
+            &self->stripped_buffer, &self->allocation_count))
+     || (!initialize_counted_iobuffer(
+            &self->twspaces_buffer, &self->allocation_count))
+     || (!initialize_counted_iobuffer(
+            &self->line_buffer, &self->allocation_count))
+     || (!initialize_counted_iobuffer(
+            &self->write_buffer, &self->allocation_count))
+     || (!initialize_counted_iobuffer(
+            &self->strip_input_buffer, &self->allocation_count))
+     || (!initialize_counted_iobuffer(
+            &self->strip_repeat_buffer, &self->allocation_count))
+     || (!initialize_counted_iobuffer(
+            &self->strip_repeat_vts_flags, &self->allocation_count))
+     || (!initialize_counted_iobuffer(
+            &self->screen_buffer, &self->allocation_count))
+     || (!initialize_counted_iobuffer(
+            &self->screen_vts_flags, &self->allocation_count))
+     || (!initialize_counted_iobuffer(
+            &self->response_buffer, &self->allocation_count))
+     || (!initialize_counted_iobuffer(
+            &self->mark_collector.payload, &self->allocation_count))
+     || (!initialize_counted_iobuffer(
+            &self->mark_collector.records, &self->allocation_count))
+     || (!initialize_counted_iobuffer(
+            &self->style_collector.records, &self->allocation_count))
+     || (!initialize_eager_stripper(
+            &self->eager_stripper, true, &self->allocation_count))
     ) {
         return -1;
     }
+    self->mark_collector.is_collecting = false;
+    reset_style_collector(&self->style_collector);
+    reset_echo_matcher(&self->echo_matcher, NULL);
     self->kill_lock = CreateMutex(NULL, FALSE, NULL);
     self->destroy_lock = CreateMutex(NULL, FALSE, NULL);
+    self->resize_lock = CreateMutex(NULL, FALSE, NULL);
+    self->response_lock = CreateMutex(NULL, FALSE, NULL);
     return 0;
 }
 
@@ -283,7 +516,7 @@ static PyObject *run_process(
     static const HRESULT E_FILENOTFOUND = 0x80070002L;
     static const HRESULT E_PATHNOTFOUND = 0x80070003L;
     static const HRESULT E_FILENAMETOOLONG = 0x800700CEL;
-    if (nargs != 4) {
+    if (nargs != 15) {
         return NULL;
     }
     if ((self->process_status != NOT_RUNNING)
@@ -323,14 +556,107 @@ static PyObject *run_process(
         return NULL;
     }
     self->post_end_delay = post_end_delay;
+    const int answer_queries = PyLong_AsInt(args[4]);
+    if (((answer_queries != 0) && (answer_queries != 1)) || PyErr_Occurred()) {
+        return NULL;
+    }
+    self->answer_queries = answer_queries;
+    const DWORD quiet_period = PyLong_AsUnsignedLong(args[5]);
+    if ((quiet_period == (DWORD)-1) && PyErr_Occurred()) {
+        return NULL;
+    }
+    self->quiet_period = quiet_period;
+    const int eager_strip = PyLong_AsInt(args[6]);
+    if (((eager_strip != 0) && (eager_strip != 1)) || PyErr_Occurred()) {
+        return NULL;
+    }
+    const int collapse_lines = PyLong_AsInt(args[7]);
+    if (((collapse_lines != 0) && (collapse_lines != 1)) || PyErr_Occurred()) {
+        return NULL;
+    }
+    const int keep_raw_data = PyLong_AsInt(args[8]);
+    if (((keep_raw_data != 0) && (keep_raw_data != 1)) || PyErr_Occurred()) {
+        return NULL;
+    }
+    const int plain_strip = PyLong_AsInt(args[9]);
+    if (((plain_strip != 0) && (plain_strip != 1)) || PyErr_Occurred()) {
+        return NULL;
+    }
+    const DWORD stdout_pipe_size = PyLong_AsUnsignedLong(args[10]);
+    if ((stdout_pipe_size == (DWORD)-1) && PyErr_Occurred()) {
+        return NULL;
+    }
+    const DWORD stdin_pipe_size = PyLong_AsUnsignedLong(args[11]);
+    if ((stdin_pipe_size == (DWORD)-1) && PyErr_Occurred()) {
+        return NULL;
+    }
+    const int adaptive_reads = PyLong_AsInt(args[12]);
+    if (((adaptive_reads != 0) && (adaptive_reads != 1)) || PyErr_Occurred()) {
+        return NULL;
+    }
+    const size_t read_buffer_high_mark = PyLong_AsSize_t(args[13]);
+    if ((read_buffer_high_mark == (size_t)-1) && PyErr_Occurred()) {
+        return NULL;
+    }
+    const size_t read_buffer_low_mark = PyLong_AsSize_t(args[14]);
+    if ((read_buffer_low_mark == (size_t)-1) && PyErr_Occurred()) {
+        return NULL;
+    }
+    /* A read of the previous output may still be using the reader state */
+    Py_BEGIN_ALLOW_THREADS
+    AcquireSRWLockExclusive(&self->reader_lock);
+    Py_END_ALLOW_THREADS
     if ((!initialize_iobuffer(&self->write_buffer, false)) || 
         (!initialize_iobuffer(&self->read_buffer, false)) || 
-        (!initialize_iobuffer(&self->strip_repeat_buffer, false))
+        (!initialize_iobuffer(&self->raw_buffer, false)) || 
+        (!initialize_iobuffer(&self->taken_buffer, false)) || 
+        (!initialize_iobuffer(&self->stripped_buffer, false)) || 
+        (!initialize_iobuffer(&self->twspaces_buffer, false)) || 
+        (!initialize_iobuffer(&self->line_buffer, false)) || 
+        (!initialize_iobuffer(&self->strip_repeat_buffer, false)) || 
+        (!initialize_iobuffer(&self->strip_repeat_vts_flags, false)) || 
+        (!initialize_iobuffer(&self->screen_buffer, false)) || 
+        (!initialize_iobuffer(&self->screen_vts_flags, false)) || 
+        (!initialize_iobuffer(&self->response_buffer, false)) || 
+        (!initialize_iobuffer(&self->mark_collector.payload, false)) || 
+        (!initialize_iobuffer(&self->mark_collector.records, false)) || 
+        (!initialize_iobuffer(&self->style_collector.records, false)) || 
+        (!initialize_eager_stripper(
+            &self->eager_stripper, false, &self->allocation_count))
     ) {
+        ReleaseSRWLockExclusive(&self->reader_lock);
         destroy_pseudoconsole(self);
         atomic_store(&self->process_status, NOT_RUNNING);
         return PyLong_FromLong(1);
     }
+    self->is_input_pending = false;
+    self->is_input_discard_pending = false;
+    self->is_interrupt_pending = false;
+    self->is_output_paused = false;
+    self->is_resize_pending = false;
+    self->is_repaint_expected = false;
+    self->is_response_pending = false;
+    self->mark_collector.is_collecting = false;
+    reset_style_collector(&self->style_collector);
+    ReleaseSRWLockExclusive(&self->reader_lock);
+    reset_echo_matcher(&self->echo_matcher, NULL);
+    self->eager_stripper.is_enabled = (eager_strip == 1);
+    self->eager_stripper.collapse_lines = (collapse_lines == 1);
+    self->eager_stripper.keep_raw_data = (keep_raw_data == 1);
+    self->plain_strip = (plain_strip == 1);
+    self->stdout_pipe_size = stdout_pipe_size;
+    self->stdin_pipe_size = stdin_pipe_size;
+    self->is_read_size_adaptive = (adaptive_reads == 1);
+    self->read_buffer_high_mark = read_buffer_high_mark;
+    self->read_buffer_low_mark = read_buffer_low_mark;
+    /* Adaptive reads start small, so that idle consoles stay small */
+    atomic_store(&self->read_chunk_size, self->is_read_size_adaptive ?
+        MIN_ADAPTIVE_READ_SIZE : stdout_pipe_size);
+    self->applied_console_size = self->pseudo_console_size;
+    self->screen_height = self->pseudo_console_size.Y;
+    atomic_store(&self->learned_quiet_period, MIN_QUIET_PERIOD);
+    atomic_store(&self->last_output_tick, GetTickCount64());
+    self->output_line_count = 0;
     if (!set_up_pseudo_console(self)) {
         destroy_pseudoconsole(self);
         PyMem_Free(unicode_command);
@@ -357,8 +683,6 @@ static PyObject *run_process(
     }
     PyMem_Free(unicode_command);
     unicode_command = NULL;
-    self->is_read_buffer_available = true;
-    self->is_write_buffer_available = true;
     if (launch_io_listeners(self) != S_OK) {
         kill_process_internal(self);
         return PyLong_FromLong(1);
@@ -385,25 +709,34 @@ static PyObject *resize_pseudoconsole(
     ) {
         return NULL;
     }
+    bool is_resize_successful = true;
+    WaitForSingleObject(self->resize_lock, INFINITE);
     self->pseudo_console_size.X = (SHORT)width;
     self->pseudo_console_size.Y = (SHORT)height;
     if (self->process_status == RUNNING) {
-        if (ResizePseudoConsole(self->hPC, self->pseudo_console_size)
-                == S_OK
+        const ULONGLONG current_tick = GetTickCount64();
+        if (atomic_load(&self->is_resize_pending)
+         || ((current_tick - self->last_resize_tick)
+                < RESIZE_COALESCE_INTERVAL)
         ) {
-            Py_RETURN_TRUE;
+            atomic_store(&self->is_resize_pending, true);
         } else {
-            Py_RETURN_FALSE;
+            is_resize_successful = apply_pseudoconsole_size(self);
         }
-    } else {
+        self->last_resize_tick = current_tick;
+    }
+    ReleaseMutex(self->resize_lock);
+    if (is_resize_successful) {
         Py_RETURN_TRUE;
+    } else {
+        Py_RETURN_FALSE;
     }
 }
 
 static PyObject *read_from_buffer(
     ConPTYBriefcase *self, PyObject *const *args, Py_ssize_t nargs
 ) {
-    if (nargs != 8) {
+    if (nargs != 12) {
         return NULL;
     }
     const int read_lines = PyLong_AsInt(args[0]);
@@ -423,7 +756,9 @@ static PyObject *read_from_buffer(
         return NULL;
     }
     const int vts_mode_int = PyLong_AsInt(args[4]);
-    if ((vts_mode_int < 0) || PyErr_Occurred()) {
+    if ((vts_mode_int < 0) || (vts_mode_int >= VTSMODE_COUNT)
+     || PyErr_Occurred()
+    ) {
         return NULL;
     }
     VTSMode vts_mode = (VTSMode)vts_mode_int;
@@ -434,12 +769,6 @@ static PyObject *read_from_buffer(
     if (twspaces_ref_pointer == NULL) {
         return NULL;
     }
-    const size_t twspaces_length = strlen(twspaces_ref_pointer);
-    char *twspaces = (char *)malloc((twspaces_length + 1));
-    if (twspaces == NULL) {
-        Py_RETURN_NONE;
-    }
-    twspaces[twspaces_length] = '\0';
     size_t cursorx = PyLong_AsSize_t(args[6]);
     if ((cursorx == (size_t)-1) && PyErr_Occurred()) {
         return NULL;
@@ -448,99 +777,157 @@ static PyObject *read_from_buffer(
     if ((cursory == (size_t)-1) && PyErr_Occurred()) {
         return NULL;
     }
+    const bool collapse_lines = (args[8] != Py_None);
+    if (collapse_lines && !PyBytes_Check(args[8])) {
+        return NULL;
+    }
+    size_t line_column = PyLong_AsSize_t(args[9]);
+    if ((line_column == (size_t)-1) && PyErr_Occurred()) {
+        return NULL;
+    }
+    const int with_styles = PyLong_AsInt(args[10]);
+    if (((with_styles != 0) && (with_styles != 1)) || PyErr_Occurred()) {
+        return NULL;
+    }
+    const int count_chars = PyLong_AsInt(args[11]);
+    if (((count_chars != 0) && (count_chars != 1)) || PyErr_Occurred()) {
+        return NULL;
+    }
+    /* The reused per-instance buffers are guarded until decoded */
+    /* The GIL is released meanwhile, as the holder may be awaiting it */
+    Py_BEGIN_ALLOW_THREADS
+    AcquireSRWLockExclusive(&self->reader_lock);
+    Py_END_ALLOW_THREADS
+    ConPTYIOBuffer *twspaces_buffer = &self->twspaces_buffer;
+    ConPTYIOBuffer *line_buffer = &self->line_buffer;
+    if ((!load_iobuffer(twspaces_buffer, twspaces_ref_pointer,
+            strlen(twspaces_ref_pointer)))
+     || (collapse_lines
+      && (!load_iobuffer(line_buffer, PyBytes_AS_STRING(args[8]),
+            (size_t)PyBytes_GET_SIZE(args[8]))))
+    ) {
+        ReleaseSRWLockExclusive(&self->reader_lock);
+        Py_RETURN_NONE;
+    }
 
-    char *c_data_to_read = NULL;
-    char *c_data_to_write = NULL;
-    ConPTYIOBuffer twspaces_buffer = {
-        twspaces, 0, twspaces_length, twspaces_length + 1
-    };
+    const char *c_data_to_write = NULL;
 
     bool should_kill_process = false;
+    bool is_data_consumed = false;
+    ConPTYStyleCollector *style_collector = NULL;
+    if (with_styles && (!raw_data) && (!self->eager_stripper.is_enabled)
+     && (!collapse_lines)
+    ) {
+        style_collector = &self->style_collector;
+    }
 
     Py_BEGIN_ALLOW_THREADS
 
-    memcpy(&twspaces[0], &twspaces_ref_pointer[0], twspaces_length);
-
-    const DWORD time_delta = self->time_delta;
-    while (1) {
-        bool expected_value = true;
-        if (atomic_compare_exchange_strong(
-                &self->is_read_buffer_available,
-                &expected_value, false)
-        ) {
-            if (read_lines) {
-                bool is_process_running =
-                    get_is_console_running_internal(self);
-                const char *new_line_pointer = self->read_buffer.data;
-                if (max_lines_to_read == (size_t)-1) {
-                    if (is_process_running) {
-                        new_line_pointer =
-                            strrchr(self->read_buffer.data, '\n');
-                        if (new_line_pointer == NULL) {
-                            max_bytes_to_read = 0;
-                        } else {
-                            max_bytes_to_read = ++new_line_pointer
-                                              - self->read_buffer.data;
-                        }
-                    } else {
-                        max_bytes_to_read = (size_t)-1;
-                    }
-                } else {
-                    size_t n = 0;
+    self->mark_collector.records.data_length = 0;
+    const bool is_raw_view = (raw_data && self->eager_stripper.keep_raw_data);
+    ConPTYIOBuffer *source_buffer =
+        (is_raw_view ? &self->raw_buffer : &self->read_buffer);
+    AcquireSRWLockExclusive(&self->read_buffer_lock);
+    const bool is_process_running = get_is_console_running_internal(self);
+    if (read_lines) {
+        const char *new_line_pointer = source_buffer->data;
+        if (max_lines_to_read == (size_t)-1) {
+            if (is_process_running) {
+                new_line_pointer = strrchr(source_buffer->data, '\n');
+                if (new_line_pointer == NULL) {
                     max_bytes_to_read = 0;
-                    while ((new_line_pointer = strchr(new_line_pointer, '\n'))
-                                != NULL
-                    ) {
-                        max_bytes_to_read = ++new_line_pointer
-                                          - self->read_buffer.data;
-                        if (++n == max_lines_to_read) {
-                            break;
-                        }
-                    }
-                    if ((max_bytes_to_read == 0) && !is_process_running) {
-                        max_bytes_to_read = (size_t)-1;
-                    }
+                } else {
+                    max_bytes_to_read = ++new_line_pointer
+                                      - source_buffer->data;
                 }
+            } else {
+                max_bytes_to_read = (size_t)-1;
             }
-            if (max_bytes_to_read > self->read_buffer.data_length) {
-                max_bytes_to_read = self->read_buffer.data_length;
-            }
-            if (max_bytes_to_read != 0) {
-                if ((c_data_to_read = (char *)malloc(max_bytes_to_read + 1))
-                        == NULL
-                ) {
-                    should_kill_process = true;
-                    atomic_store(&self->is_read_buffer_available, true);
-                    break;
-                }
-                c_data_to_read[max_bytes_to_read] = '\0';
-                memcpy(c_data_to_read, self->read_buffer.data,
-                        max_bytes_to_read);
-                if (!shrink_iobuffer(&self->read_buffer, max_bytes_to_read,
-                        MAX_READ_BUFFER_SIZE)
-                ) {
-                    free((void *)c_data_to_read);
-                    c_data_to_read = NULL;
-                    should_kill_process = true;
-                    atomic_store(&self->is_read_buffer_available, true);
+        } else {
+            size_t n = 0;
+            max_bytes_to_read = 0;
+            while ((new_line_pointer = strchr(new_line_pointer, '\n'))
+                    != NULL
+            ) {
+                max_bytes_to_read = ++new_line_pointer
+                                  - source_buffer->data;
+                if (++n == max_lines_to_read) {
                     break;
                 }
             }
-            atomic_store(&self->is_read_buffer_available, true);
-            break;
+            if ((max_bytes_to_read == 0) && !is_process_running) {
+                max_bytes_to_read = (size_t)-1;
+            }
+        }
+    } else if (count_chars) {
+        max_bytes_to_read = get_utf8_byte_count(source_buffer->data,
+            source_buffer->data_length, max_bytes_to_read);
+    }
+    if (max_bytes_to_read > source_buffer->data_length) {
+        max_bytes_to_read = source_buffer->data_length;
+    }
+    /* A trailing incomplete sequence is left for the next read */
+    if ((max_bytes_to_read < source_buffer->data_length)
+     || is_process_running
+    ) {
+        size_t boundary = get_utf8_boundary(source_buffer->data,
+            max_bytes_to_read);
+        if ((boundary == 0) && (max_bytes_to_read != 0)) {
+            /* The first character is taken whole */
+            boundary = get_utf8_byte_count(source_buffer->data,
+                source_buffer->data_length, 1);
+            if ((boundary == source_buffer->data_length)
+             && is_process_running
+            ) {
+                boundary = get_utf8_boundary(source_buffer->data, boundary);
+            }
+        }
+        max_bytes_to_read = boundary;
+    }
+    if (max_bytes_to_read != 0) {
+        if ((self->eager_stripper.is_enabled && (!is_raw_view)
+          && (!take_eager_marks(
+                &self->eager_stripper.mark_collector.records,
+                &self->mark_collector.records, max_bytes_to_read)))
+         || (!take_from_iobuffer(source_buffer, &self->taken_buffer,
+                max_bytes_to_read))
+        ) {
+            should_kill_process = true;
+        } else {
+            is_data_consumed = true;
         }
-        Sleep(time_delta);
+    }
+    ReleaseSRWLockExclusive(&self->read_buffer_lock);
+    if (is_data_consumed && atomic_load(&self->is_output_paused)) {
+        WakeAllConditionVariable(&self->read_drain_condition);
     }
 
-    if ((c_data_to_read != NULL) && (max_bytes_to_read != 0) && (!raw_data)) {
-        if (!strip_vts_from_data(c_data_to_read, &max_bytes_to_read,
-                &c_data_to_write, &vts_mode, &twspaces_buffer,
+    const char *const c_data_to_read = self->taken_buffer.data;
+    if (is_data_consumed && (self->eager_stripper.is_enabled || raw_data)) {
+        c_data_to_write = c_data_to_read;
+    } else if (is_data_consumed && self->plain_strip) {
+        if (((style_collector != NULL)
+          && (!begin_style_records(style_collector)))
+         || (!plain_strip_vts_from_data(c_data_to_read, &max_bytes_to_read,
+                &self->stripped_buffer, &vts_mode, &self->mark_collector,
+                style_collector))
+        ) {
+            should_kill_process = true;
+        }
+        c_data_to_write = self->stripped_buffer.data;
+    } else if (is_data_consumed) {
+        if (((style_collector != NULL)
+          && (!begin_style_records(style_collector)))
+         || (!strip_vts_from_data(c_data_to_read, &max_bytes_to_read,
+                &self->stripped_buffer, &vts_mode, twspaces_buffer,
                 &self->pseudo_console_size.X, &self->pseudo_console_size.Y,
-                &cursorx, &cursory, NULL)
+                &cursorx, &cursory, NULL,
+                (collapse_lines ? line_buffer : NULL), &line_column,
+                &self->mark_collector, style_collector))
         ) {
-            free((void *)c_data_to_read);
-            c_data_to_read = NULL;
+            should_kill_process = true;
         }
+        c_data_to_write = self->stripped_buffer.data;
     }
 
     if (should_kill_process) {
@@ -550,27 +937,46 @@ static PyObject *read_from_buffer(
     Py_END_ALLOW_THREADS
 
     if (should_kill_process) {
-        free((void *)twspaces_buffer.data);
+        ReleaseSRWLockExclusive(&self->reader_lock);
         Py_RETURN_NONE;
-    } else if (max_bytes_to_read == 0) {
-        free((void *)c_data_to_read);
-        free((void *)c_data_to_write);
-        free((void *)twspaces_buffer.data);
+    } else if (!is_data_consumed) {
+        ReleaseSRWLockExclusive(&self->reader_lock);
         return PyLong_FromLong(0);
     } else {
-        PyObject *py_result_bundle = PyTuple_New(5);
-        PyObject *py_data_to_read = PyUnicode_FromStringAndSize(
-            &c_data_to_write[0], max_bytes_to_read);
+        PyObject *py_result_bundle = PyTuple_New(9);
+        PyObject *py_data_to_read = PyUnicode_DecodeUTF8(
+            &c_data_to_write[0], (Py_ssize_t)max_bytes_to_read, "replace");
         PyObject *py_vts_mode = PyLong_FromLong(vts_mode);
         PyObject *py_twspaces = PyUnicode_FromStringAndSize(
-            &twspaces_buffer.data[0], twspaces_buffer.data_length);
+            &twspaces_buffer->data[0], twspaces_buffer->data_length);
         PyObject *py_cursorx = PyLong_FromSize_t(cursorx);
         PyObject *py_cursory = PyLong_FromSize_t(cursory);
+        PyObject *py_line_buffer = NULL;
+        if (collapse_lines) {
+            py_line_buffer = PyBytes_FromStringAndSize(
+                line_buffer->data, line_buffer->data_length);
+        } else {
+            py_line_buffer = Py_NewRef(Py_None);
+        }
+        PyObject *py_line_column = PyLong_FromSize_t(line_column);
+        PyObject *py_marks = get_marks_as_list(
+            &self->mark_collector, c_data_to_write);
+        PyObject *py_style_runs = NULL;
+        if (style_collector != NULL) {
+            py_style_runs = get_style_runs_as_bytes(
+                style_collector, c_data_to_write, max_bytes_to_read);
+        } else {
+            py_style_runs = Py_NewRef(Py_None);
+        }
         if ((py_result_bundle == NULL) || (py_data_to_read == NULL)
                                        || (py_vts_mode == NULL)
                                        || (py_twspaces == NULL)
                                        || (py_cursorx == NULL)
                                        || (py_cursory == NULL)
+                                       || (py_line_buffer == NULL)
+                                       || (py_line_column == NULL)
+                                       || (py_marks == NULL)
+                                       || (py_style_runs == NULL)
         ) {
             Py_XDECREF(py_result_bundle);
             Py_XDECREF(py_data_to_read);
@@ -578,20 +984,26 @@ static PyObject *read_from_buffer(
             Py_XDECREF(py_twspaces);
             Py_XDECREF(py_cursorx);
             Py_XDECREF(py_cursory);
-            free((void *)c_data_to_read);
-            free((void *)c_data_to_write);
-            free((void *)twspaces_buffer.data);
+            Py_XDECREF(py_line_buffer);
+            Py_XDECREF(py_line_column);
+            Py_XDECREF(py_marks);
+            Py_XDECREF(py_style_runs);
+            ReleaseSRWLockExclusive(&self->reader_lock);
             kill_process_internal(self);
             Py_RETURN_NONE;
         }
-        free((void *)c_data_to_read);
-        free((void *)c_data_to_write);
-        free((void *)twspaces_buffer.data);
+        release_excess_iobuffer(&self->taken_buffer, MAX_READ_BUFFER_SIZE);
+        release_excess_iobuffer(&self->stripped_buffer, MAX_READ_BUFFER_SIZE);
+        ReleaseSRWLockExclusive(&self->reader_lock);
         PyTuple_SET_ITEM(py_result_bundle, 0, py_data_to_read);
         PyTuple_SET_ITEM(py_result_bundle, 1, py_vts_mode);
         PyTuple_SET_ITEM(py_result_bundle, 2, py_twspaces);
         PyTuple_SET_ITEM(py_result_bundle, 3, py_cursorx);
         PyTuple_SET_ITEM(py_result_bundle, 4, py_cursory);
+        PyTuple_SET_ITEM(py_result_bundle, 5, py_line_buffer);
+        PyTuple_SET_ITEM(py_result_bundle, 6, py_line_column);
+        PyTuple_SET_ITEM(py_result_bundle, 7, py_marks);
+        PyTuple_SET_ITEM(py_result_bundle, 8, py_style_runs);
         return py_result_bundle;
     }
 }
@@ -614,45 +1026,49 @@ static PyObject *write_to_buffer(
         return PyLong_FromLong(1);
     }
 
-    char *data_to_write = (char *)malloc((data_to_write_length + 1));
-    if (data_to_write == NULL) {
-        return NULL;
-    }
-    data_to_write[data_to_write_length] = '\0';
-    memcpy(&data_to_write[0], &data_to_write_ref_pointer[0],
-            data_to_write_length);
-
+    /* The UTF-8 data is owned by args[0], which outlives this call */
     int result_code = 1;
 
     Py_BEGIN_ALLOW_THREADS
 
-    const DWORD time_delta = self->time_delta;
-    while (1) {
-        bool expected_value = true;
-        if (atomic_compare_exchange_strong(
-                &self->is_write_buffer_available,
-                &expected_value, false)
+    /* With nothing queued, the data is written into the pipe directly */
+    size_t sent_length = 0;
+    const bool is_pipe_idle =
+        TryAcquireSRWLockExclusive(&self->stdin_pipe_lock);
+    AcquireSRWLockExclusive(&self->write_buffer_lock);
+    if (is_pipe_idle) {
+        if ((self->write_buffer.data_length == 0)
+         && (!atomic_load(&self->is_input_pending))
+         && (atomic_load(&self->process_status) == RUNNING)
         ) {
-            if (!extend_iobuffer(&self->write_buffer, data_to_write_length)
+            if (!write_into_idle_stdin_pipe(self, data_to_write_ref_pointer,
+                    data_to_write_length, &sent_length)
             ) {
                 result_code = 0;
-                free((void *)data_to_write);
-                kill_process_internal(self);
-                break;
             }
-            self->write_buffer.cursor_position = 
+        }
+        ReleaseSRWLockExclusive(&self->stdin_pipe_lock);
+    }
+    const size_t queued_length = data_to_write_length - sent_length;
+    if ((result_code != 0) && (queued_length != 0)) {
+        if (extend_iobuffer(&self->write_buffer, queued_length)) {
+            self->write_buffer.cursor_position =
                 self->write_buffer.data_length;
             memcpy(
                 &self->write_buffer.data[self->write_buffer.cursor_position],
-                &data_to_write[0], data_to_write_length
-            );
-            free((void *)data_to_write);
-            self->write_buffer.data_length += data_to_write_length;
+                &data_to_write_ref_pointer[sent_length], queued_length);
+            self->write_buffer.data_length += queued_length;
             self->write_buffer.data[self->write_buffer.data_length] = '\0';
-            self->is_write_buffer_available = true;
-            break;
+        } else {
+            result_code = 0;
         }
-        Sleep(time_delta);
+    }
+    ReleaseSRWLockExclusive(&self->write_buffer_lock);
+    if (result_code == 0) {
+        kill_process_internal(self);
+    } else if (queued_length != 0) {
+        /* Wakes the stdin listener instead of waiting for its next poll */
+        WakeConditionVariable(&self->stdin_wakeup_condition);
     }
 
     Py_END_ALLOW_THREADS
@@ -687,24 +1103,9 @@ static PyObject *get_has_process_ended(
 static PyObject *get_is_input_sent(
         ConPTYBriefcase *self, PyObject *Py_UNUSED(args)
 ) {
-    bool is_input_sent = false;
-    bool expected_value = true;
-    const DWORD time_delta = self->time_delta;
-    while (1) {
-        if (atomic_compare_exchange_strong(
-                &self->is_write_buffer_available,
-                &expected_value, false)
-        ) {
-            if (self->write_buffer.data_length == 0) {
-                is_input_sent = true;
-            }
-            self->is_write_buffer_available = true;
-            break;
-        } else if (atomic_load(&self->process_status) != RUNNING) {
-            break;
-        }
-        Sleep(time_delta);
-    }
+    AcquireSRWLockShared(&self->write_buffer_lock);
+    const bool is_input_sent = (self->write_buffer.data_length == 0);
+    ReleaseSRWLockShared(&self->write_buffer_lock);
     if (is_input_sent) {
         Py_RETURN_TRUE;
     } else {
@@ -744,6 +1145,25 @@ static PyObject *get_process_exit_code(
     return PyLong_FromUnsignedLong(self->process_exit_code);
 }
 
+static PyObject *get_is_output_quiet(
+        ConPTYBriefcase *self, PyObject *const *args, Py_ssize_t nargs
+) {
+    if (nargs != 1) {
+        return NULL;
+    }
+    const DWORD quiet_period = PyLong_AsUnsignedLong(args[0]);
+    if ((quiet_period == (DWORD)-1) && PyErr_Occurred()) {
+        return NULL;
+    }
+    if ((!get_is_console_running_internal(self))
+     || is_output_quiet_internal(self, quiet_period, 0)
+    ) {
+        Py_RETURN_TRUE;
+    } else {
+        Py_RETURN_FALSE;
+    }
+}
+
 static PyObject *set_vts_display(
         ConPTYBriefcase *self, PyObject *const *args, Py_ssize_t nargs
 ) {
@@ -784,86 +1204,257 @@ static PyObject *set_vts_display(
     Py_RETURN_TRUE;
 }
 
-static void pyconptyinternal_dealloc(ConPTYBriefcase *self) {
-    kill_process_internal(self);
-    free_iobuffer(&self->read_buffer);
-    free_iobuffer(&self->write_buffer);
-    free_iobuffer(&self->strip_input_buffer);
-    free_iobuffer(&self->strip_repeat_buffer);
-    WaitForSingleObject(self->kill_lock, INFINITE);
-    CloseHandle(self->kill_lock);
-    WaitForSingleObject(self->destroy_lock, INFINITE);
-    CloseHandle(self->destroy_lock);
-    Py_TYPE(self)->tp_free((PyObject *) self);
+static PyObject *get_allocation_count(
+        ConPTYBriefcase *self, PyObject *Py_UNUSED(args)
+) {
+    return PyLong_FromSize_t(atomic_load(&self->allocation_count));
 }
 
-/* ######################################################################## */
-/*  PRIVATE FUNCTIONS                                                       */
-/* ######################################################################## */
-
-static bool initialize_iobuffer(
-    ConPTYIOBuffer *iobuffer, bool first_initialization
+static PyObject *wait_for_input_sent(
+        ConPTYBriefcase *self, PyObject *const *args, Py_ssize_t nargs
 ) {
-    if (first_initialization) {
-        iobuffer->data = NULL;
-    } else {
-        free_iobuffer(iobuffer);
+    if (nargs != 1) {
+        return NULL;
     }
-    iobuffer->data = (char *)malloc(1);
-    if (iobuffer->data == NULL) {
-        return false;
+    const DWORD wait_period = PyLong_AsUnsignedLong(args[0]);
+    if ((wait_period == (DWORD)-1) && PyErr_Occurred()) {
+        return NULL;
     }
-    iobuffer->data[0] = '\0';
-    iobuffer->cursor_position = 0;
-    iobuffer->data_length = 0;
-    iobuffer->max_size = 1;
-    return true;
+    bool is_input_sent;
+
+    Py_BEGIN_ALLOW_THREADS
+
+    /* The stdin listener signals under this lock, so no wakeup is lost */
+    const ULONGLONG start_tick = GetTickCount64();
+    AcquireSRWLockExclusive(&self->write_buffer_lock);
+    while ((!(is_input_sent = ((self->write_buffer.data_length == 0)
+                            && (!atomic_load(&self->is_input_pending)))))
+        && ((self->process_status == STARTING)
+         || (self->process_status == RUNNING))
+    ) {
+        DWORD remaining_period = INFINITE;
+        if (wait_period != INFINITE) {
+            const ULONGLONG elapsed_period = GetTickCount64() - start_tick;
+            if (elapsed_period >= wait_period) {
+                break;
+            }
+            remaining_period = wait_period - (DWORD)elapsed_period;
+        }
+        SleepConditionVariableSRW(&self->input_sent_condition,
+            &self->write_buffer_lock, remaining_period, 0);
+    }
+    ReleaseSRWLockExclusive(&self->write_buffer_lock);
+
+    Py_END_ALLOW_THREADS
+
+    if (is_input_sent) {
+        Py_RETURN_TRUE;
+    } else {
+        Py_RETURN_FALSE;
+    }
+}
+
+static PyObject *get_output_line_count(
+        ConPTYBriefcase *self, PyObject *Py_UNUSED(args)
+) {
+    size_t output_line_count;
+    AcquireSRWLockShared(&self->read_buffer_lock);
+    output_line_count = self->output_line_count;
+    ReleaseSRWLockShared(&self->read_buffer_lock);
+    return PyLong_FromSize_t(output_line_count);
+}
+
+static PyObject *get_read_chunk_size(
+        ConPTYBriefcase *self, PyObject *Py_UNUSED(args)
+) {
+    return PyLong_FromUnsignedLong(atomic_load(&self->read_chunk_size));
+}
+
+static PyObject *get_buffered_byte_count(
+        ConPTYBriefcase *self, PyObject *Py_UNUSED(args)
+) {
+    size_t buffered_byte_count;
+    AcquireSRWLockShared(&self->read_buffer_lock);
+    buffered_byte_count = get_buffered_length_internal(self);
+    ReleaseSRWLockShared(&self->read_buffer_lock);
+    return PyLong_FromSize_t(buffered_byte_count);
 }
 
-static void free_iobuffer(ConPTYIOBuffer *iobuffer) {
-    if (iobuffer->data != NULL) {
-        free((void *)iobuffer->data);
-        iobuffer->data = NULL;
+static PyObject *get_is_output_paused(
+        ConPTYBriefcase *self, PyObject *Py_UNUSED(args)
+) {
+    if (atomic_load(&self->is_output_paused)) {
+        Py_RETURN_TRUE;
+    } else {
+        Py_RETURN_FALSE;
     }
-    iobuffer->cursor_position = 0;
-    iobuffer->data_length = 0;
-    iobuffer->max_size = 0;
 }
 
-static bool extend_iobuffer(
-            ConPTYIOBuffer *iobuffer, size_t required_free_size
+static PyObject *wait_for_output_lines(
+        ConPTYBriefcase *self, PyObject *const *args, Py_ssize_t nargs
 ) {
-    if (required_free_size == 0) {
-        return true;
+    if (nargs != 2) {
+        return NULL;
     }
-    if (iobuffer->max_size <= iobuffer->data_length) {
-        return false;
+    const size_t line_count = PyLong_AsSize_t(args[0]);
+    if ((line_count == (size_t)-1) && PyErr_Occurred()) {
+        return NULL;
     }
-    const size_t available_free_size = iobuffer->max_size - 1
-                                     - iobuffer->data_length;
-    if (available_free_size >= required_free_size) {
-        return true;
+    const DWORD wait_period = PyLong_AsUnsignedLong(args[1]);
+    if ((wait_period == (DWORD)-1) && PyErr_Occurred()) {
+        return NULL;
     }
-    const size_t incremental_size = required_free_size - available_free_size;
-    char *temp_pointer = (char *)realloc(iobuffer->data,
-            (iobuffer->max_size + incremental_size));
-    if (temp_pointer == NULL) {
-        free_iobuffer(iobuffer);
-        return false;
+    bool is_count_reached;
+
+    Py_BEGIN_ALLOW_THREADS
+
+    /* The stdout listener signals under this lock, so no wakeup is lost */
+    const ULONGLONG start_tick = GetTickCount64();
+    AcquireSRWLockExclusive(&self->read_buffer_lock);
+    while ((!(is_count_reached = (self->output_line_count >= line_count)))
+        && ((self->process_status == STARTING)
+         || (self->process_status == RUNNING))
+    ) {
+        DWORD remaining_period = INFINITE;
+        if (wait_period != INFINITE) {
+            const ULONGLONG elapsed_period = GetTickCount64() - start_tick;
+            if (elapsed_period >= wait_period) {
+                break;
+            }
+            remaining_period = wait_period - (DWORD)elapsed_period;
+        }
+        SleepConditionVariableSRW(&self->output_line_condition,
+            &self->read_buffer_lock, remaining_period, 0);
+    }
+    ReleaseSRWLockExclusive(&self->read_buffer_lock);
+
+    Py_END_ALLOW_THREADS
+
+    if (is_count_reached) {
+        Py_RETURN_TRUE;
+    } else {
+        Py_RETURN_FALSE;
     }
-    iobuffer->data = temp_pointer;
-    iobuffer->max_size += incremental_size;
-    return true;
 }
 
-static bool shrink_iobuffer(
-    ConPTYIOBuffer *iobuffer, size_t unused_size_at_start,
-    size_t min_buffer_size
+static PyObject *send_interrupt(
+        ConPTYBriefcase *self, PyObject *const *args, Py_ssize_t nargs
 ) {
-    if (unused_size_at_start == 0) {
-        return true;
+    if (nargs != 2) {
+        return NULL;
     }
-    if ((iobuffer->max_size - iobuffer->data_length) < 1) {
+    if (!PyUnicode_Check(args[0])) {
+        return NULL;
+    }
+    Py_ssize_t interrupt_length;
+    const char *interrupt_ref_pointer =
+        PyUnicode_AsUTF8AndSize(args[0], &interrupt_length);
+    if (interrupt_ref_pointer == NULL) {
+        return NULL;
+    }
+    const int discard_input = PyObject_IsTrue(args[1]);
+    if (discard_input < 0) {
+        return NULL;
+    }
+    bool is_interrupt_sent;
+
+    Py_BEGIN_ALLOW_THREADS
+
+    if (discard_input) {
+        AcquireSRWLockExclusive(&self->write_buffer_lock);
+        self->write_buffer.data_length = 0;
+        self->write_buffer.cursor_position = 0;
+        self->write_buffer.data[0] = '\0';
+        if (atomic_load(&self->is_input_pending)) {
+            atomic_store(&self->is_input_discard_pending, true);
+        }
+        ReleaseSRWLockExclusive(&self->write_buffer_lock);
+        WakeAllConditionVariable(&self->input_sent_condition);
+    }
+    /*
+        The stdin listener writes queued input one pipe-sized slice at a
+        time, and holds off its next slice while this flag is set, so the
+        interrupt waits for one slice at most. It bypasses the input
+        stripping, like the query responses do.
+    */
+    atomic_store(&self->is_interrupt_pending, true);
+    AcquireSRWLockExclusive(&self->stdin_pipe_lock);
+    DWORD sent_interrupt_size = 0;
+    is_interrupt_sent = WriteFile(self->client_stdin_pipe_handle,
+        interrupt_ref_pointer, (DWORD)interrupt_length,
+        &sent_interrupt_size, NULL)
+            && (sent_interrupt_size == (DWORD)interrupt_length);
+    ReleaseSRWLockExclusive(&self->stdin_pipe_lock);
+    /* Cleared under the lock, so the stdin listener cannot miss its wake */
+    AcquireSRWLockExclusive(&self->write_buffer_lock);
+    atomic_store(&self->is_interrupt_pending, false);
+    ReleaseSRWLockExclusive(&self->write_buffer_lock);
+    WakeAllConditionVariable(&self->stdin_wakeup_condition);
+
+    Py_END_ALLOW_THREADS
+
+    if (is_interrupt_sent) {
+        Py_RETURN_TRUE;
+    } else {
+        Py_RETURN_FALSE;
+    }
+}
+
+static void pyconptyinternal_dealloc(ConPTYBriefcase *self) {
+    kill_process_internal(self);
+    free_iobuffer(&self->read_buffer);
+    free_iobuffer(&self->raw_buffer);
+    free_iobuffer(&self->taken_buffer);
+    free_iobuffer(&self->stripped_buffer);
+    free_iobuffer(&self->twspaces_buffer);
+    free_iobuffer(&self->line_buffer);
+    free_iobuffer(&self->write_buffer);
+    free_iobuffer(&self->strip_input_buffer);
+    free_iobuffer(&self->strip_repeat_buffer);
+    free_iobuffer(&self->strip_repeat_vts_flags);
+    free_iobuffer(&self->screen_buffer);
+    free_iobuffer(&self->screen_vts_flags);
+    free_iobuffer(&self->response_buffer);
+    free_iobuffer(&self->mark_collector.payload);
+    free_iobuffer(&self->mark_collector.records);
+    free_iobuffer(&self->style_collector.records);
+    free_eager_stripper(&self->eager_stripper);
+    WaitForSingleObject(self->kill_lock, INFINITE);
+    CloseHandle(self->kill_lock);
+    WaitForSingleObject(self->destroy_lock, INFINITE);
+    CloseHandle(self->destroy_lock);
+    WaitForSingleObject(self->resize_lock, INFINITE);
+    CloseHandle(self->resize_lock);
+    WaitForSingleObject(self->response_lock, INFINITE);
+    CloseHandle(self->response_lock);
+    Py_TYPE(self)->tp_free((PyObject *) self);
+}
+
+/* ######################################################################## */
+/*  PRIVATE FUNCTIONS                                                       */
+/* ######################################################################## */
+
+static bool append_to_iobuffer(
+    ConPTYIOBuffer *iobuffer, const char *const data, size_t data_length
+) {
+    if (!extend_iobuffer(iobuffer, data_length)) {
+        return false;
+    }
+    iobuffer->cursor_position = iobuffer->data_length;
+    memcpy(&iobuffer->data[iobuffer->cursor_position], data, data_length);
+    iobuffer->data_length += data_length;
+    iobuffer->data[iobuffer->data_length] = '\0';
+    return true;
+}
+
+static bool shrink_iobuffer(
+    ConPTYIOBuffer *iobuffer, size_t unused_size_at_start,
+    size_t min_buffer_size
+) {
+    if (unused_size_at_start == 0) {
+        return true;
+    }
+    if ((iobuffer->max_size - iobuffer->data_length) < 1) {
         return false;
     }
     if (unused_size_at_start > iobuffer->data_length) {
@@ -879,8 +1470,8 @@ static bool shrink_iobuffer(
      && (iobuffer->max_size > min_buffer_size)
     ) {
         iobuffer->max_size = min_buffer_size;
-        char *temp_pointer = (char *)realloc(
-                iobuffer->data, min_buffer_size);
+        char *temp_pointer = reallocate_iobuffer_data(
+                iobuffer->allocation_count, iobuffer->data, min_buffer_size);
         if (temp_pointer == NULL) {
             free_iobuffer(iobuffer);
             return false;
@@ -890,6 +1481,57 @@ static bool shrink_iobuffer(
     return true;
 }
 
+static bool load_iobuffer(
+    ConPTYIOBuffer *iobuffer, const char *const data, size_t data_length
+) {
+    iobuffer->data_length = 0;
+    if (!append_to_iobuffer(iobuffer, data, data_length)) {
+        return false;
+    }
+    iobuffer->cursor_position = 0;
+    return true;
+}
+
+static bool take_from_iobuffer(
+    ConPTYIOBuffer *iobuffer, ConPTYIOBuffer *taken_buffer,
+    size_t taken_length
+) {
+    if ((taken_length == iobuffer->data_length)
+     && (taken_buffer->data != NULL)
+    ) {
+        /* Swapping the whole buffer saves copying it */
+        const ConPTYIOBuffer spare_buffer = *taken_buffer;
+        *taken_buffer = *iobuffer;
+        *iobuffer = spare_buffer;
+        iobuffer->cursor_position = 0;
+        iobuffer->data_length = 0;
+        iobuffer->data[0] = '\0';
+        return true;
+    }
+    taken_buffer->data_length = 0;
+    return append_to_iobuffer(taken_buffer, iobuffer->data, taken_length)
+        && shrink_iobuffer(iobuffer, taken_length, MAX_READ_BUFFER_SIZE);
+}
+
+static void release_excess_iobuffer(
+    ConPTYIOBuffer *iobuffer, size_t max_buffer_size
+) {
+    if (iobuffer->max_size <= max_buffer_size) {
+        return;
+    }
+    char *temp_pointer =
+        reallocate_iobuffer_data(
+            iobuffer->allocation_count, iobuffer->data, max_buffer_size);
+    if (temp_pointer == NULL) {
+        return;
+    }
+    iobuffer->data = temp_pointer;
+    iobuffer->max_size = max_buffer_size;
+    iobuffer->cursor_position = 0;
+    iobuffer->data_length = 0;
+    iobuffer->data[0] = '\0';
+}
+
 static bool set_up_pseudo_console(ConPTYBriefcase *conptybriefcase_obj) {
     bool is_operation_successful = false;
 
@@ -899,14 +1541,15 @@ static bool set_up_pseudo_console(ConPTYBriefcase *conptybriefcase_obj) {
     HANDLE server_stdin_pipe_handle = NULL;
 
     if (!CreatePipe(&conptybriefcase_obj->client_stdout_pipe_handle,
-            &server_stdout_pipe_handle, NULL, STDOUT_PIPE_BUFFER_SIZE)
+            &server_stdout_pipe_handle, NULL,
+            conptybriefcase_obj->stdout_pipe_size)
     ) {
         goto END_OF_FUNCTION;
     }
 
     if (!CreatePipe(&server_stdin_pipe_handle,
             &conptybriefcase_obj->client_stdin_pipe_handle, NULL,
-            STDIN_PIPE_BUFFER_SIZE)
+            conptybriefcase_obj->stdin_pipe_size)
     ) {
         goto END_OF_FUNCTION;
     }
@@ -1059,6 +1702,7 @@ static DWORD WINAPI wait_for_process_completion(LPVOID lpParam) {
     ) {
         Sleep(1);
     }
+    const ULONGLONG exit_tick = GetTickCount64();
     bool can_terminate = false;
     expected_status = RUNNING;
     if (atomic_compare_exchange_strong(
@@ -1071,8 +1715,6 @@ static DWORD WINAPI wait_for_process_completion(LPVOID lpParam) {
         DWORD code_ref;
         GetExitCodeProcess(conptybriefcase_obj->pi.hProcess, &code_ref);
         conptybriefcase_obj->process_exit_code = code_ref;
-        conptybriefcase_obj->is_read_buffer_available = true;
-        conptybriefcase_obj->is_write_buffer_available = true;
         if (conptybriefcase_obj->post_end_delay != 0) {
             DWORD delay_count = 0;
             DWORD previous_tickcount = GetTickCount();
@@ -1080,6 +1722,9 @@ static DWORD WINAPI wait_for_process_completion(LPVOID lpParam) {
                         != GRACEFULLY_TERMINATED)
                 && (conptybriefcase_obj->process_status != NOT_RUNNING)
                 && (delay_count <= conptybriefcase_obj->post_end_delay)
+                && ((conptybriefcase_obj->quiet_period == 0)
+                 || (!is_output_quiet_internal(conptybriefcase_obj,
+                        conptybriefcase_obj->quiet_period, exit_tick)))
             ) {
                 const DWORD current_tickcount = GetTickCount();
                 delay_count += current_tickcount - previous_tickcount;
@@ -1094,92 +1739,93 @@ static DWORD WINAPI wait_for_process_completion(LPVOID lpParam) {
 
 static DWORD WINAPI listen_for_stdin_stream(LPVOID lpParam) {
     ConPTYBriefcase *conptybriefcase_obj = (ConPTYBriefcase *)lpParam;
-    atomic_bool send_pending = false;
     ConPTYIOBuffer temp_buffer, dummy_twspaces_buffer;
-    if ((!initialize_iobuffer(&temp_buffer, true))
-     || (!initialize_iobuffer(&dummy_twspaces_buffer, true))
+    if ((!initialize_counted_iobuffer(
+            &temp_buffer, &conptybriefcase_obj->allocation_count))
+     || (!initialize_counted_iobuffer(
+            &dummy_twspaces_buffer, &conptybriefcase_obj->allocation_count))
     ) {
         kill_process_internal(conptybriefcase_obj);
         return 0;
     }
     const DWORD time_delta = conptybriefcase_obj->time_delta;
+    const DWORD stdin_pipe_size = conptybriefcase_obj->stdin_pipe_size;
     while ((conptybriefcase_obj->process_status == STARTING)
         || (conptybriefcase_obj->process_status == RUNNING)
     ) {
-        if (atomic_load(&send_pending)) {
-            bool can_send = true;
-            if (conptybriefcase_obj->strip_input_buffer.data != NULL) {
-                bool expected_value = true;
-                if (!atomic_compare_exchange_strong(
-                        &conptybriefcase_obj->is_read_buffer_available,
-                        &expected_value, false)
-                ) {
-                    can_send = false;
-                }
+        if (atomic_load(&conptybriefcase_obj->is_resize_pending)) {
+            apply_pending_resize(conptybriefcase_obj);
+        }
+        if (atomic_load(&conptybriefcase_obj->is_response_pending)) {
+            if (!send_pending_response(conptybriefcase_obj)) {
+                break;
             }
-            if (can_send) {
-                DWORD sent_output_buffer_size;
-                if (!WriteFile(conptybriefcase_obj->client_stdin_pipe_handle,
-                        temp_buffer.data, (DWORD)temp_buffer.data_length,
-                        &sent_output_buffer_size,
-                        NULL)
-                ) {
-                    if (GetLastError() != ERROR_BROKEN_PIPE) {
-                        kill_process_internal(conptybriefcase_obj);
-                    }
-                    break;
-                }
-                if (conptybriefcase_obj->strip_input_buffer.data != NULL) {
-                    if (!extend_iobuffer(
-                            &conptybriefcase_obj->strip_input_buffer,
-                            sent_output_buffer_size)
-                    ) {
-                        kill_process_internal(conptybriefcase_obj);
-                        break;
-                    }
-                    conptybriefcase_obj->strip_input_buffer.cursor_position =
-                        conptybriefcase_obj->strip_input_buffer.data_length;
-                    memcpy(&conptybriefcase_obj->strip_input_buffer.data[
-                        conptybriefcase_obj->
-                            strip_input_buffer.cursor_position],
-                        temp_buffer.data, sent_output_buffer_size
-                    );
-                    conptybriefcase_obj->strip_input_buffer.data_length +=
-                        sent_output_buffer_size;
-                    conptybriefcase_obj->strip_input_buffer.data[
-                        conptybriefcase_obj->strip_input_buffer.data_length] =
-                            '\0';
-                }
-                if (sent_output_buffer_size == temp_buffer.data_length) {
-                    atomic_store(&send_pending, false);
+            continue;
+        }
+        if (atomic_load(&conptybriefcase_obj->is_input_pending)) {
+            if (atomic_load(&conptybriefcase_obj->is_interrupt_pending)) {
+                /* Lets send_interrupt take the pipe ahead of this input */
+                /* Woken by send_interrupt, else re-checked after a delta */
+                AcquireSRWLockExclusive(
+                    &conptybriefcase_obj->write_buffer_lock);
+                if (atomic_load(&conptybriefcase_obj->is_interrupt_pending)) {
+                    SleepConditionVariableSRW(
+                        &conptybriefcase_obj->stdin_wakeup_condition,
+                        &conptybriefcase_obj->write_buffer_lock,
+                        (time_delta == 0) ? 1 : time_delta, 0);
                 }
-                if (!shrink_iobuffer(&temp_buffer,
-                        sent_output_buffer_size, 1)
+                ReleaseSRWLockExclusive(
+                    &conptybriefcase_obj->write_buffer_lock);
+                continue;
+            }
+            DWORD sent_output_buffer_size = 0;
+            bool is_send_successful = true;
+            AcquireSRWLockExclusive(&conptybriefcase_obj->stdin_pipe_lock);
+            if (atomic_load(&conptybriefcase_obj->is_input_discard_pending)) {
+                sent_output_buffer_size = (DWORD)temp_buffer.data_length;
+            } else {
+                is_send_successful = write_into_stdin_pipe(
+                    conptybriefcase_obj, temp_buffer.data,
+                    (temp_buffer.data_length < stdin_pipe_size) ?
+                        temp_buffer.data_length : stdin_pipe_size,
+                    &sent_output_buffer_size);
+            }
+            ReleaseSRWLockExclusive(&conptybriefcase_obj->stdin_pipe_lock);
+            if ((!is_send_successful)
+             || (!shrink_iobuffer(&temp_buffer, sent_output_buffer_size, 1))
+            ) {
+                if (is_send_successful
+                 || (GetLastError() != ERROR_BROKEN_PIPE)
                 ) {
                     kill_process_internal(conptybriefcase_obj);
-                    break;
-                }
-                if (conptybriefcase_obj->strip_input_buffer.data != NULL) {
-                    atomic_store(
-                        &conptybriefcase_obj->is_read_buffer_available, true
-                    );
                 }
-                continue;
+                break;
+            }
+            if (temp_buffer.data_length == 0) {
+                AcquireSRWLockExclusive(
+                    &conptybriefcase_obj->write_buffer_lock);
+                atomic_store(&conptybriefcase_obj->is_input_pending, false);
+                atomic_store(
+                    &conptybriefcase_obj->is_input_discard_pending, false);
+                ReleaseSRWLockExclusive(
+                    &conptybriefcase_obj->write_buffer_lock);
+                WakeAllConditionVariable(
+                    &conptybriefcase_obj->input_sent_condition);
             }
         } else {
-            bool expected_value = true;
-            if (atomic_compare_exchange_strong(
-                    &conptybriefcase_obj->is_write_buffer_available,
-                    &expected_value, false)
-            ) {
-                if (conptybriefcase_obj->write_buffer.data_length != 0) {
-                    conptybriefcase_obj->write_buffer.cursor_position = 0;
-                    if (!extend_iobuffer(&temp_buffer,
-                            conptybriefcase_obj->write_buffer.data_length)
-                    ) {
-                        kill_process_internal(conptybriefcase_obj);
-                        break;
-                    }
+            bool is_buffer_taken = true;
+            AcquireSRWLockExclusive(&conptybriefcase_obj->write_buffer_lock);
+            if (conptybriefcase_obj->write_buffer.data_length == 0) {
+                /* Woken by write_to_buffer, else re-polled after a delta */
+                SleepConditionVariableSRW(
+                    &conptybriefcase_obj->stdin_wakeup_condition,
+                    &conptybriefcase_obj->write_buffer_lock, time_delta, 0);
+            }
+            if (conptybriefcase_obj->write_buffer.data_length != 0) {
+                conptybriefcase_obj->write_buffer.cursor_position = 0;
+                if (extend_iobuffer(&temp_buffer,
+                        conptybriefcase_obj->write_buffer.data_length)
+                ) {
                     temp_buffer.data_length =
                         conptybriefcase_obj->write_buffer.data_length;
                     memcpy(temp_buffer.data,
@@ -1188,22 +1834,26 @@ static DWORD WINAPI listen_for_stdin_stream(LPVOID lpParam) {
                         conptybriefcase_obj->write_buffer.data_length
                     );
                     temp_buffer.data[temp_buffer.data_length] = '\0';
-                    if (!shrink_iobuffer(&conptybriefcase_obj->write_buffer,
-                            conptybriefcase_obj->write_buffer.data_length,
-                            MAX_WRITE_BUFFER_SIZE)
-                    ) {
-                        kill_process_internal(conptybriefcase_obj);
-                        break;
-                    }
-                    atomic_store(&send_pending, true);
-                    conptybriefcase_obj->is_write_buffer_available = true;
-                    continue;
+                    is_buffer_taken = shrink_iobuffer(
+                        &conptybriefcase_obj->write_buffer,
+                        conptybriefcase_obj->write_buffer.data_length,
+                        stdin_pipe_size);
+                } else {
+                    is_buffer_taken = false;
                 }
-                conptybriefcase_obj->is_write_buffer_available = true;
+                atomic_store(&conptybriefcase_obj->is_input_pending, true);
+            }
+            ReleaseSRWLockExclusive(&conptybriefcase_obj->write_buffer_lock);
+            if (!is_buffer_taken) {
+                kill_process_internal(conptybriefcase_obj);
+                break;
             }
         }
-        Sleep(time_delta);
     }
+    /* Release any wait_for_input_sent caller, as no input goes out now */
+    AcquireSRWLockExclusive(&conptybriefcase_obj->write_buffer_lock);
+    ReleaseSRWLockExclusive(&conptybriefcase_obj->write_buffer_lock);
+    WakeAllConditionVariable(&conptybriefcase_obj->input_sent_condition);
     return 0;
 }
 
@@ -1211,182 +1861,245 @@ static DWORD WINAPI listen_for_stdout_stream(LPVOID lpParam) {
     static const char HTAB = '\x09';
     static const char SPACE = '\x20';
     ConPTYBriefcase *conptybriefcase_obj = (ConPTYBriefcase *)lpParam;
-    VTSMode dummy_vts_mode;
-    bool *is_vts_flags_1 = NULL;
-    bool *is_vts_flags_2 = NULL;
-    size_t i0, iN, dummy_length;
+    VTSMode chunk_vts_mode = VTSMODE_NONE;
+    size_t i0, iN;
+    size_t repaint_offset = 0;
     int strstr_result;
-    ConPTYIOBuffer dummy_twspaces_buffer, temp_buffer;
-    if ((!initialize_iobuffer(&dummy_twspaces_buffer, true))
-     || (!initialize_iobuffer(&temp_buffer, true))
+    ConPTYQueryTracker query_tracker;
+    initialize_query_tracker(&query_tracker);
+    ConPTYIOBuffer dummy_twspaces_buffer, temp_buffer, chunk_vts_flags;
+    if ((!initialize_counted_iobuffer(
+            &dummy_twspaces_buffer, &conptybriefcase_obj->allocation_count))
+     || (!initialize_counted_iobuffer(
+            &temp_buffer, &conptybriefcase_obj->allocation_count))
+     || (!initialize_counted_iobuffer(
+            &chunk_vts_flags, &conptybriefcase_obj->allocation_count))
     ) {
         kill_process_internal(conptybriefcase_obj);
         return 0;
     }
+    const bool *is_chunk_vts = (const bool *)chunk_vts_flags.data;
     bool data_available = false;
+    bool has_output_arrived = false;
+    bool is_read_full = false;
+    int read_size_streak = 0;
     const DWORD time_delta = conptybriefcase_obj->time_delta;
     DWORD readfile_error = 0;
     while (1) {
         if (data_available) {
-            bool expected_value = true;
-            if (atomic_compare_exchange_strong(
-                    &conptybriefcase_obj->is_read_buffer_available,
-                    &expected_value, false)
-            ) {
-                size_t total_strip_length = 0;
-                if (conptybriefcase_obj->strip_repeat_buffer.data_length
-                        != 0
+            AcquireSRWLockExclusive(&conptybriefcase_obj->read_buffer_lock);
+            /* Counted before any stripping, as echoed lines pace input */
+            const size_t previous_line_count =
+                conptybriefcase_obj->output_line_count;
+            for (size_t i = 0; i != temp_buffer.data_length; i++) {
+                if (temp_buffer.data[i] == '\n') {
+                    conptybriefcase_obj->output_line_count++;
+                }
+            }
+            const bool is_line_count_changed =
+                (conptybriefcase_obj->output_line_count
+                    != previous_line_count);
+            size_t total_strip_length = 0;
+            if (atomic_load(&conptybriefcase_obj->is_repaint_expected)) {
+                if (GetTickCount64() > atomic_load(
+                        &conptybriefcase_obj->repaint_deadline_tick)
+                ) {
+                    /* Too late to be the repaint of the resize */
+                    strstr_result = 0;
+                } else {
+                    strstr_result = strrepaint_internal(temp_buffer.data,
+                        conptybriefcase_obj->screen_buffer.data,
+                        temp_buffer.data_length,
+                        conptybriefcase_obj->screen_buffer.data_length,
+                        is_chunk_vts,
+                        (const bool *)
+                            conptybriefcase_obj->screen_vts_flags.data,
+                        &repaint_offset, &total_strip_length);
+                }
+                /* A repaint frame comes out whole, so a match that stops
+                 * short of the screen end carries on only from a full read;
+                 * otherwise, it is new output that repeats an older line. */
+                if ((strstr_result == 1) && (total_strip_length != 0)
+                 && !is_read_full
                 ) {
+                    strstr_result = 0;
+                    total_strip_length = 0;
+                }
+                if (strstr_result != 1) {
+                    repaint_offset = 0;
+                    atomic_store(
+                        &conptybriefcase_obj->is_repaint_expected, false
+                    );
+                }
+            }
+            if (conptybriefcase_obj->strip_repeat_buffer.data_length
+                    != 0
+            ) {
+                if (total_strip_length == 0) {
                     strstr_result = strstr_internal(temp_buffer.data,
                         conptybriefcase_obj->strip_repeat_buffer.data,
                         temp_buffer.data_length,
-                        conptybriefcase_obj->strip_repeat_buffer.data_length,
-                        &is_vts_flags_1, &is_vts_flags_2, &i0, &iN,
-                        &dummy_length, &dummy_twspaces_buffer,
-                        &dummy_vts_mode);
+                        conptybriefcase_obj->
+                            strip_repeat_buffer.data_length,
+                        is_chunk_vts,
+                        (const bool *)conptybriefcase_obj->
+                            strip_repeat_vts_flags.data,
+                        &i0, &iN);
                     if (strstr_result == 1) {
                         total_strip_length = iN + 1;
-                    } else if (strstr_result == -1) {
-                        kill_process_internal(conptybriefcase_obj);
-                        break;
                     }
-                    if (!shrink_iobuffer(
-                        &conptybriefcase_obj->strip_repeat_buffer,
-                        conptybriefcase_obj->strip_repeat_buffer.data_length,
-                        1)
+                }
+                if (!shrink_iobuffer(
+                    &conptybriefcase_obj->strip_repeat_buffer,
+                    conptybriefcase_obj->strip_repeat_buffer.data_length,
+                    1)
+                ) {
+                    ReleaseSRWLockExclusive(
+                        &conptybriefcase_obj->read_buffer_lock);
+                    kill_process_internal(conptybriefcase_obj);
+                    break;
+                }
+                conptybriefcase_obj->strip_repeat_vts_flags.data_length
+                    = 0;
+            }
+            if (!append_to_screen_buffer(
+                    &conptybriefcase_obj->screen_buffer,
+                    &conptybriefcase_obj->screen_vts_flags,
+                    &temp_buffer.data[total_strip_length],
+                    &is_chunk_vts[total_strip_length],
+                    temp_buffer.data_length - total_strip_length,
+                    atomic_load(&conptybriefcase_obj->screen_height))
+            ) {
+                ReleaseSRWLockExclusive(
+                    &conptybriefcase_obj->read_buffer_lock);
+                kill_process_internal(conptybriefcase_obj);
+                break;
+            }
+            if ((conptybriefcase_obj->strip_input_buffer.data != NULL)
+             && (total_strip_length < temp_buffer.data_length)
+            ) {
+                total_strip_length += match_echoed_input(
+                    &conptybriefcase_obj->echo_matcher,
+                    &conptybriefcase_obj->strip_input_buffer,
+                    &temp_buffer.data[total_strip_length],
+                    temp_buffer.data_length - total_strip_length);
+            }
+            const size_t read_length = temp_buffer.data_length
+                                     - total_strip_length;
+            if (read_length != 0) {
+                if (conptybriefcase_obj->eager_stripper.is_enabled) {
+                    if ((!strip_into_read_buffer(conptybriefcase_obj,
+                            &temp_buffer.data[total_strip_length],
+                            read_length))
+                     || (conptybriefcase_obj->eager_stripper.keep_raw_data
+                      && (!append_to_iobuffer(
+                            &conptybriefcase_obj->raw_buffer,
+                            &temp_buffer.data[total_strip_length],
+                            read_length)))
                     ) {
+                        ReleaseSRWLockExclusive(
+                            &conptybriefcase_obj->read_buffer_lock);
                         kill_process_internal(conptybriefcase_obj);
                         break;
                     }
+                } else if (!append_to_iobuffer(
+                            &conptybriefcase_obj->read_buffer,
+                            &temp_buffer.data[total_strip_length],
+                            read_length)
+                ) {
+                    ReleaseSRWLockExclusive(
+                        &conptybriefcase_obj->read_buffer_lock);
+                    kill_process_internal(conptybriefcase_obj);
+                    break;
                 }
-                if (conptybriefcase_obj->strip_input_buffer.data != NULL) {
-                    size_t shrink_amount = conptybriefcase_obj->
-                                            strip_input_buffer.data_length;
+                if (temp_buffer.data[temp_buffer.data_length-1] != '\n') {
                     char *ref_pointer =
                         &temp_buffer.data[total_strip_length];
-                    const size_t ref_pointer_string_length =
-                        temp_buffer.data_length - total_strip_length;
-                    strstr_result = strstr_internal(ref_pointer,
-                        conptybriefcase_obj->strip_input_buffer.data,
-                        ref_pointer_string_length,
-                        conptybriefcase_obj->strip_input_buffer.data_length,
-                        &is_vts_flags_1, &is_vts_flags_2, &i0, &iN,
-                        &dummy_length, &dummy_twspaces_buffer,
-                        &dummy_vts_mode);
-                    if (strstr_result == 1) {
-                        total_strip_length += iN + 1;
-                    } else if (strstr_result == -1) {
-                        kill_process_internal(conptybriefcase_obj);
-                        break;
-                    } else {
-                        strstr_result = strstr_internal(
-                            conptybriefcase_obj->strip_input_buffer.data,
-                            ref_pointer,
-                            conptybriefcase_obj->
-                                strip_input_buffer.data_length,
-                            ref_pointer_string_length,
-                            &is_vts_flags_1, &is_vts_flags_2, &i0, &iN,
-                            &dummy_length, &dummy_twspaces_buffer,
-                            &dummy_vts_mode);
-                        if (strstr_result == 1) {
-                            total_strip_length += ref_pointer_string_length;
-                            shrink_amount = iN + 1;
-                        } else if (strstr_result == -1) {
-                            kill_process_internal(conptybriefcase_obj);
-                            break;
-                        }
-                    }
-                    if (!shrink_iobuffer(
-                            &conptybriefcase_obj->strip_input_buffer,
-                            shrink_amount, 1)
+                    char *last_newline_ponter = NULL;
+                    if ((last_newline_ponter =
+                            strrchr(ref_pointer, '\n')) != NULL
                     ) {
-                        kill_process_internal(conptybriefcase_obj);
-                        break;
-                    }
-                }
-                const size_t read_length = temp_buffer.data_length
-                                         - total_strip_length;
-                if (read_length != 0) {
-                    if (!extend_iobuffer(&conptybriefcase_obj->read_buffer,
-                            read_length)
-                    ) {
-                        kill_process_internal(conptybriefcase_obj);
-                        break;
+                        last_newline_ponter++;
+                    } else {
+                        last_newline_ponter = ref_pointer;
                     }
-                    conptybriefcase_obj->read_buffer.cursor_position =
-                        conptybriefcase_obj->read_buffer.data_length;
-                    memcpy(&conptybriefcase_obj->read_buffer.data[
-                            conptybriefcase_obj->read_buffer.cursor_position],
-                        &temp_buffer.data[total_strip_length], read_length
-                    );
-                    conptybriefcase_obj->read_buffer.data_length +=
-                        read_length;
-                    conptybriefcase_obj->read_buffer.data[
-                        conptybriefcase_obj->read_buffer.data_length] = '\0';
-                    if (temp_buffer.data[temp_buffer.data_length-1] != '\n') {
-                        char *ref_pointer =
-                            &temp_buffer.data[total_strip_length];
-                        char *last_newline_ponter = NULL;
-                        if ((last_newline_ponter =
-                                strrchr(ref_pointer, '\n')) != NULL
+                    const size_t norepeat_length =
+                        last_newline_ponter - ref_pointer;
+                    const size_t discarded_length =
+                        ref_pointer - temp_buffer.data;
+                    const size_t possible_repeat_length =
+                        temp_buffer.data_length - discarded_length
+                                                - norepeat_length;
+                    if (possible_repeat_length != 0) {
+                        if ((!extend_iobuffer(
+                                &conptybriefcase_obj->strip_repeat_buffer,
+                                possible_repeat_length))
+                         || (!extend_iobuffer(
+                                &conptybriefcase_obj->
+                                    strip_repeat_vts_flags,
+                                possible_repeat_length))
                         ) {
-                            last_newline_ponter++;
-                        } else {
-                            last_newline_ponter = ref_pointer;
-                        }
-                        const size_t norepeat_length =
-                            last_newline_ponter - ref_pointer;
-                        const size_t discarded_length =
-                            ref_pointer - temp_buffer.data;
-                        const size_t possible_repeat_length =
-                            temp_buffer.data_length - discarded_length
-                                                    - norepeat_length;
-                        if (possible_repeat_length != 0) {
-                            if (!extend_iobuffer(
-                                    &conptybriefcase_obj->strip_repeat_buffer,
-                                    possible_repeat_length)
-                            ) {
-                                kill_process_internal(conptybriefcase_obj);
-                                break;
-                            }
-                            memcpy(
-                                conptybriefcase_obj->strip_repeat_buffer.data,
-                                last_newline_ponter, possible_repeat_length
-                            );
-                            conptybriefcase_obj->
-                                strip_repeat_buffer.data_length
-                                    = possible_repeat_length;
-                            conptybriefcase_obj->
-                                strip_repeat_buffer.data[
-                                    conptybriefcase_obj->
-                                        strip_repeat_buffer.data_length]
-                                            = '\0';
+                            ReleaseSRWLockExclusive(
+                                &conptybriefcase_obj->read_buffer_lock);
+                            kill_process_internal(conptybriefcase_obj);
+                            break;
                         }
+                        memcpy(conptybriefcase_obj->
+                                strip_repeat_vts_flags.data,
+                            &is_chunk_vts[
+                                last_newline_ponter - temp_buffer.data],
+                            possible_repeat_length
+                        );
+                        conptybriefcase_obj->
+                            strip_repeat_vts_flags.data_length
+                                = possible_repeat_length;
+                        memcpy(
+                            conptybriefcase_obj->strip_repeat_buffer.data,
+                            last_newline_ponter, possible_repeat_length
+                        );
+                        conptybriefcase_obj->
+                            strip_repeat_buffer.data_length
+                                = possible_repeat_length;
+                        conptybriefcase_obj->
+                            strip_repeat_buffer.data[
+                                conptybriefcase_obj->
+                                    strip_repeat_buffer.data_length]
+                                        = '\0';
                     }
                 }
-                if (temp_buffer.data_length != 0) {
-                    if (!shrink_iobuffer(&temp_buffer, 
-                            temp_buffer.data_length, 1)
-                    ) {
-                        kill_process_internal(conptybriefcase_obj);
-                        break;
-                    }
+            }
+            if (temp_buffer.data_length != 0) {
+                if (!shrink_iobuffer(&temp_buffer, 
+                        temp_buffer.data_length, 1)
+                ) {
+                    ReleaseSRWLockExclusive(
+                        &conptybriefcase_obj->read_buffer_lock);
+                    kill_process_internal(conptybriefcase_obj);
+                    break;
                 }
-                data_available = false;
-                atomic_store(
-                    &conptybriefcase_obj->is_read_buffer_available, true
-                );
+            }
+            data_available = false;
+            ReleaseSRWLockExclusive(&conptybriefcase_obj->read_buffer_lock);
+            if (is_line_count_changed) {
+                WakeAllConditionVariable(
+                    &conptybriefcase_obj->output_line_condition);
             }
             continue;
         } else {
-            if (!extend_iobuffer(&temp_buffer, MAX_READ_BUFFER_SIZE)) {
+            wait_for_read_buffer_drain(conptybriefcase_obj);
+            const DWORD read_chunk_size =
+                atomic_load(&conptybriefcase_obj->read_chunk_size);
+            if (conptybriefcase_obj->is_read_size_adaptive) {
+                release_excess_iobuffer(&temp_buffer, read_chunk_size + 1);
+            }
+            if (!extend_iobuffer(&temp_buffer, read_chunk_size)) {
                 kill_process_internal(conptybriefcase_obj);
                 break;
             }
             DWORD received_input_buffer_size = 0;
             if (!ReadFile(conptybriefcase_obj->client_stdout_pipe_handle,
                         temp_buffer.data,
-                        MAX_READ_BUFFER_SIZE,
+                        read_chunk_size,
                         &received_input_buffer_size,
                         NULL)
             ) {
@@ -1398,13 +2111,51 @@ static DWORD WINAPI listen_for_stdout_stream(LPVOID lpParam) {
             }
             temp_buffer.data_length = received_input_buffer_size;
             temp_buffer.data[temp_buffer.data_length] = '\0';
+            is_read_full = (received_input_buffer_size == read_chunk_size);
             if (received_input_buffer_size != 0) {
+                if (conptybriefcase_obj->is_read_size_adaptive) {
+                    adapt_read_chunk_size(conptybriefcase_obj,
+                        received_input_buffer_size, &read_size_streak);
+                }
+                learn_quiet_period(conptybriefcase_obj, GetTickCount64(),
+                    has_output_arrived);
+                has_output_arrived = true;
+                if (conptybriefcase_obj->answer_queries
+                 && (!answer_vts_queries(conptybriefcase_obj,
+                        &query_tracker, temp_buffer.data,
+                        temp_buffer.data_length))
+                ) {
+                    kill_process_internal(conptybriefcase_obj);
+                    break;
+                }
+                if (!classify_vts_bytes(temp_buffer.data,
+                        temp_buffer.data_length, &chunk_vts_flags,
+                        &chunk_vts_mode, &dummy_twspaces_buffer)
+                ) {
+                    kill_process_internal(conptybriefcase_obj);
+                    break;
+                }
+                is_chunk_vts = (const bool *)chunk_vts_flags.data;
                 data_available = true;
                 continue;
             }
         }
         Sleep(time_delta);
     }
+    free_iobuffer(&chunk_vts_flags);
+    if ((readfile_error == ERROR_BROKEN_PIPE)
+     && conptybriefcase_obj->eager_stripper.is_enabled
+     && conptybriefcase_obj->eager_stripper.collapse_lines
+    ) {
+        AcquireSRWLockExclusive(&conptybriefcase_obj->read_buffer_lock);
+        const bool is_flush_successful =
+            flush_eager_line_buffer(conptybriefcase_obj);
+        ReleaseSRWLockExclusive(&conptybriefcase_obj->read_buffer_lock);
+        if (!is_flush_successful) {
+            readfile_error = 0;
+            kill_process_internal(conptybriefcase_obj);
+        }
+    }
     close_client_io_pipes(conptybriefcase_obj);
     if (readfile_error == ERROR_BROKEN_PIPE) {
         while ((conptybriefcase_obj->process_status == STARTING)
@@ -1414,7 +2165,6 @@ static DWORD WINAPI listen_for_stdout_stream(LPVOID lpParam) {
         }
         kill_process_internal(conptybriefcase_obj);
     }
-    conptybriefcase_obj->is_read_buffer_available = true;
     return 0;
 }
 
@@ -1459,456 +2209,702 @@ static HRESULT launch_io_listeners(ConPTYBriefcase *conptybriefcase_obj) {
     return return_result;
 }
 
-static bool strip_vts_from_data(
-    const char *const read_data, size_t *data_length, char **write_data,
-    VTSMode *vts_mode, ConPTYIOBuffer *twspaces_buffer,
-    const SHORT *const bufferwidth, const SHORT *const bufferheight,
-    size_t *cursorx, size_t *cursory,
-    bool *is_vts_flags
-) {
-    static const char BELL = '\x07';
-    static const char HTAB = '\x09';
-    static const char LINEFEED = '\x0A';
-    static const char FORMFEED = '\x0C';
-    static const char ESCAPE = '\x1B';
-    static const char SPACE = '\x20';
-    static const char EXCLAMATION_MARK = '\x21';
-    static const char OPENING_ROUND_BRACKET = '\x28';
-    static const char ZERO = '\x30';
-    static const char FOUR = '\x34';
-    static const char NINE = '\x39';
-    static const char COLON = '\x3A';
-    static const char SEMICOLON = '\x3B';
-    static const char EQUALS_SIGN = '\x3D';
-    static const char GREATER_THAN_SIGN = '\x3E';
-    static const char QUESTION_MARK = '\x3F';
-    static const char AT_SIGN = '\x40';
-    static const char BIG_A = '\x41';
-    static const char BIG_C = '\x43';
-    static const char BIG_H = '\x48';
-    static const char BIG_O = '\x4F';
-    static const char BIG_Z = '\x5A';
-    static const char OPENING_SQUARE_BRACKET = '\x5B';
-    static const char BACKWARD_SLASH = '\x5C';
-    static const char CLOSING_SQUARE_BRACKET = '\x5D';
-    static const char SMALL_A = '\x61';
-    static const char SMALL_F = '\x66';
-    static const char SMALL_Z = '\x7A';
-    static const char TILDE = '\x7E';
-    static const char CTRL_CHAR_START = '\x00';
-    static const char CTRL_CHAR_UNIT_SEPARATOR = '\x1F';
-    static const char DEL = '\x7F';
-
-    if (*data_length == 0) {
+static bool apply_pseudoconsole_size(ConPTYBriefcase *conptybriefcase_obj) {
+    atomic_store(&conptybriefcase_obj->is_resize_pending, false);
+    if ((conptybriefcase_obj->applied_console_size.X
+            == conptybriefcase_obj->pseudo_console_size.X)
+     && (conptybriefcase_obj->applied_console_size.Y
+            == conptybriefcase_obj->pseudo_console_size.Y)
+    ) {
+        return true;
+    }
+    if (conptybriefcase_obj->process_status != RUNNING) {
         return true;
     }
-    if (!extend_iobuffer(twspaces_buffer, 100)) {
+    if (ResizePseudoConsole(conptybriefcase_obj->hPC,
+            conptybriefcase_obj->pseudo_console_size) != S_OK
+    ) {
         return false;
     }
-    const char *read_pointer = read_data;
-    char *write_pointer = NULL;
-    size_t write_data_length = *data_length;
-    if (is_vts_flags == NULL) {
-        if ((*write_data = (char *)malloc(write_data_length + 1)) == NULL) {
-            return false;
+    conptybriefcase_obj->applied_console_size =
+        conptybriefcase_obj->pseudo_console_size;
+    if (conptybriefcase_obj->applied_console_size.Y
+            > conptybriefcase_obj->screen_height
+    ) {
+        atomic_store(&conptybriefcase_obj->screen_height,
+            conptybriefcase_obj->applied_console_size.Y);
+    }
+    /* Only the frame that follows the resize may be taken as its repaint */
+    atomic_store(&conptybriefcase_obj->repaint_deadline_tick,
+        GetTickCount64() + REPAINT_EXPECTED_INTERVAL);
+    atomic_store(&conptybriefcase_obj->is_repaint_expected, true);
+    return true;
+}
+
+static void apply_pending_resize(ConPTYBriefcase *conptybriefcase_obj) {
+    WaitForSingleObject(conptybriefcase_obj->resize_lock, INFINITE);
+    if (atomic_load(&conptybriefcase_obj->is_resize_pending)
+     && ((GetTickCount64() - conptybriefcase_obj->last_resize_tick)
+            >= RESIZE_COALESCE_INTERVAL)
+    ) {
+        apply_pseudoconsole_size(conptybriefcase_obj);
+    }
+    ReleaseMutex(conptybriefcase_obj->resize_lock);
+}
+
+static void learn_quiet_period(
+        ConPTYBriefcase *conptybriefcase_obj, ULONGLONG current_tick,
+        bool is_gap_valid
+) {
+    const ULONGLONG gap = current_tick
+                        - atomic_load(&conptybriefcase_obj->last_output_tick);
+    atomic_store(&conptybriefcase_obj->last_output_tick, current_tick);
+    /* Longer gaps are idle time, not pauses within a burst of output */
+    if ((!is_gap_valid) || (gap > MAX_QUIET_PERIOD)) {
+        return;
+    }
+    /* Slowly decaying peak of twice the gap between output chunks */
+    DWORD learned_quiet_period =
+        atomic_load(&conptybriefcase_obj->learned_quiet_period);
+    learned_quiet_period -= learned_quiet_period / 8;
+    if (learned_quiet_period < (DWORD)gap * 2) {
+        learned_quiet_period = (DWORD)gap * 2;
+    }
+    if (learned_quiet_period < MIN_QUIET_PERIOD) {
+        learned_quiet_period = MIN_QUIET_PERIOD;
+    } else if (learned_quiet_period > MAX_QUIET_PERIOD) {
+        learned_quiet_period = MAX_QUIET_PERIOD;
+    }
+    atomic_store(&conptybriefcase_obj->learned_quiet_period,
+        learned_quiet_period);
+}
+
+static void adapt_read_chunk_size(
+        ConPTYBriefcase *conptybriefcase_obj, DWORD received_size,
+        int *read_size_streak
+) {
+    DWORD read_chunk_size =
+        atomic_load(&conptybriefcase_obj->read_chunk_size);
+    const DWORD max_read_chunk_size =
+        (conptybriefcase_obj->stdout_pipe_size > MAX_ADAPTIVE_READ_SIZE) ?
+            conptybriefcase_obj->stdout_pipe_size : MAX_ADAPTIVE_READ_SIZE;
+    /* Full reads mean more output is waiting; mostly empty ones do not */
+    if (received_size == read_chunk_size) {
+        *read_size_streak = (*read_size_streak < 0) ?
+            1 : (*read_size_streak + 1);
+    } else if (received_size < (read_chunk_size / 4)) {
+        *read_size_streak = (*read_size_streak > 0) ?
+            -1 : (*read_size_streak - 1);
+    } else {
+        *read_size_streak = 0;
+    }
+    if ((*read_size_streak >= ADAPTIVE_READ_GROW_STREAK)
+     && (read_chunk_size < max_read_chunk_size)
+    ) {
+        read_chunk_size = (read_chunk_size > (max_read_chunk_size / 2)) ?
+            max_read_chunk_size : (read_chunk_size * 2);
+        *read_size_streak = 0;
+    } else if ((*read_size_streak <= ADAPTIVE_READ_SHRINK_STREAK)
+            && (read_chunk_size > MIN_ADAPTIVE_READ_SIZE)
+    ) {
+        read_chunk_size /= 2;
+        if (read_chunk_size < MIN_ADAPTIVE_READ_SIZE) {
+            read_chunk_size = MIN_ADAPTIVE_READ_SIZE;
         }
-        write_pointer = *write_data;
+        *read_size_streak = 0;
     }
-    size_t jump_to_row_number = 1;
-    for (size_t i = 0; i != *data_length; i++) {
-        if (is_vts_flags != NULL) {
-            *is_vts_flags = 1;
+    atomic_store(&conptybriefcase_obj->read_chunk_size, read_chunk_size);
+}
+
+static size_t get_buffered_length_internal(
+        ConPTYBriefcase *conptybriefcase_obj
+) {
+    size_t buffered_length = conptybriefcase_obj->read_buffer.data_length;
+    if (conptybriefcase_obj->eager_stripper.keep_raw_data) {
+        buffered_length += conptybriefcase_obj->raw_buffer.data_length;
+    }
+    return buffered_length;
+}
+
+static void wait_for_read_buffer_drain(ConPTYBriefcase *conptybriefcase_obj) {
+    const size_t high_mark = conptybriefcase_obj->read_buffer_high_mark;
+    if (high_mark == 0) {
+        return;
+    }
+    /* Readers wake this wait, so the period only bounds missed kills */
+    const DWORD wait_period = (conptybriefcase_obj->time_delta != 0) ?
+        conptybriefcase_obj->time_delta : 1;
+    AcquireSRWLockExclusive(&conptybriefcase_obj->read_buffer_lock);
+    if (get_buffered_length_internal(conptybriefcase_obj) >= high_mark) {
+        /* Unread output stays in the pipe, so the child blocks on writes */
+        atomic_store(&conptybriefcase_obj->is_output_paused, true);
+        while ((get_buffered_length_internal(conptybriefcase_obj)
+                    > conptybriefcase_obj->read_buffer_low_mark)
+            && ((conptybriefcase_obj->process_status == STARTING)
+             || (conptybriefcase_obj->process_status == RUNNING))
+        ) {
+            SleepConditionVariableSRW(
+                &conptybriefcase_obj->read_drain_condition,
+                &conptybriefcase_obj->read_buffer_lock, wait_period, 0);
         }
-        switch (*vts_mode) {
-            case VTSMODE_NONE: {
-                jump_to_row_number = 1;
-                size_t k = twspaces_buffer->cursor_position;
-                while (--k != (size_t)-1) {
-                    if ((twspaces_buffer->data[k] == SPACE)
-                     || (twspaces_buffer->data[k] == HTAB)) {
-                        break;
+        atomic_store(&conptybriefcase_obj->is_output_paused, false);
+    }
+    ReleaseSRWLockExclusive(&conptybriefcase_obj->read_buffer_lock);
+}
+
+static bool is_output_quiet_internal(
+        ConPTYBriefcase *conptybriefcase_obj, DWORD quiet_period,
+        ULONGLONG since_tick
+) {
+    if (quiet_period == LEARNED_QUIET_PERIOD) {
+        quiet_period =
+            atomic_load(&conptybriefcase_obj->learned_quiet_period);
+    }
+    ULONGLONG last_tick =
+        atomic_load(&conptybriefcase_obj->last_output_tick);
+    if (last_tick < since_tick) {
+        last_tick = since_tick;
+    }
+    return (GetTickCount64() - last_tick) >= quiet_period;
+}
+
+static void initialize_query_tracker(ConPTYQueryTracker *query_tracker) {
+    query_tracker->mode = QUERYMODE_NONE;
+    query_tracker->params[0] = 0;
+    query_tracker->params[1] = 0;
+    query_tracker->param_count = 0;
+    query_tracker->private_marker = '\0';
+    query_tracker->has_intermediate = false;
+    query_tracker->is_wrap_pending = false;
+    query_tracker->cursorx = 1;
+    query_tracker->cursory = 1;
+}
+
+static bool answer_vts_queries(
+    ConPTYBriefcase *conptybriefcase_obj, ConPTYQueryTracker *query_tracker,
+    const char *const data, size_t data_length
+) {
+    static const char BELL = '\x07';
+    static const char BACKSPACE = '\x08';
+    static const char HTAB = '\x09';
+    static const char LINEFEED = '\x0A';
+    static const char VTAB = '\x0B';
+    static const char FORMFEED = '\x0C';
+    static const char CARRIAGE_RETURN = '\x0D';
+    static const char CANCEL = '\x18';
+    static const char SUBSTITUTE = '\x1A';
+    static const char ESCAPE = '\x1B';
+    static const char DEL = '\x7F';
+    const COORD size = conptybriefcase_obj->applied_console_size;
+    for (size_t i = 0; i < data_length; i++) {
+        const char c = data[i];
+        switch (query_tracker->mode) {
+            case QUERYMODE_NONE: {
+                if (c == ESCAPE) {
+                    query_tracker->mode = QUERYMODE_ESCAPE;
+                } else if (c == CARRIAGE_RETURN) {
+                    query_tracker->cursorx = 1;
+                    query_tracker->is_wrap_pending = false;
+                } else if ((c == LINEFEED) || (c == VTAB) || (c == FORMFEED)) {
+                    if (query_tracker->cursory < size.Y) {
+                        query_tracker->cursory++;
                     }
-                    twspaces_buffer->data_length--;
-                }
-                twspaces_buffer->cursor_position =
-                    twspaces_buffer->data_length;
-                twspaces_buffer->data[twspaces_buffer->data_length] = '\0';
-                if (*read_pointer == ESCAPE) {
-                    *vts_mode = VTSMODE_ESCAPE;
-                } else {
-                    const bool wspaces = ((*read_pointer == SPACE)
-                                       || (*read_pointer == HTAB));
-                    const bool flfeeds = ((*read_pointer == FORMFEED)
-                                       || (*read_pointer == LINEFEED));
-                    if (((*read_pointer > CTRL_CHAR_UNIT_SEPARATOR)
-                      && (*read_pointer != DEL)) || wspaces || flfeeds
-                    ) {
-                        if (flfeeds) {
-                            if (twspaces_buffer->data_length != 0) {
-                                twspaces_buffer->data_length = 0;
-                                twspaces_buffer->cursor_position = 0;
-                            }
-                            if (is_vts_flags == NULL) {
-                                *write_pointer++ = LINEFEED;
-                                if (cursory != NULL) {
-                                    if (*cursory < (size_t)*bufferheight) {
-                                        (*cursory)++;
-                                    }
-                                    *cursorx = 1;
-                                }
-                            } else {
-                                *is_vts_flags = 0;
-                            }
-                        } else if (wspaces) {
-                            if ((twspaces_buffer->data_length + 1)
-                                    == twspaces_buffer->max_size
-                            ) {
-                                if (!extend_iobuffer(twspaces_buffer, 100)) {
-                                    free((void *)(*write_data));
-                                    return false;
-                                }
-                            }
-                            twspaces_buffer->data[
-                                twspaces_buffer->cursor_position++] =
-                                    *read_pointer;
-                            twspaces_buffer->data[
-                                twspaces_buffer->cursor_position] = '\0';
-                            twspaces_buffer->data_length++;
-                        } else {
-                            if (twspaces_buffer->data_length != 0) {
-                                twspaces_buffer->data[
-                                    twspaces_buffer->cursor_position] = '\0';
-                                if (is_vts_flags != NULL) {
-                                    is_vts_flags -=
-                                        twspaces_buffer->data_length;
-                                    for (
-                                            size_t j = 0;
-                                            j < twspaces_buffer->data_length;
-                                            j++
-                                    ) {
-                                        *(is_vts_flags++) = 0;
-                                    }
-                                } else {
-                                    if (!extend_write_data_buffer(write_data,
-                                            &write_pointer,
-                                            &write_data_length,
-                                            &twspaces_buffer->data_length)
-                                    ) {
-                                        return false;
-                                    }
-                                    memcpy(
-                                        write_pointer,
-                                        &twspaces_buffer->data[0],
-                                        twspaces_buffer->data_length
-                                    );
-                                    write_pointer +=
-                                        twspaces_buffer->data_length;
-                                    if (cursorx != NULL) {
-                                        const size_t new_cursorx = *cursorx
-                                            + twspaces_buffer->data_length;
-                                        if (new_cursorx <=
-                                                (size_t)*bufferwidth
-                                        ) {
-                                            *cursorx = new_cursorx;
-                                        }
-                                    }
-                                }
-                                twspaces_buffer->data_length = 0;
-                                twspaces_buffer->cursor_position = 0;
-                            }
-                            if (is_vts_flags == NULL) {
-                                *write_pointer++ = *read_pointer;
-                                if (cursorx != NULL) {
-                                    if (*cursorx < (size_t)*bufferwidth) {
-                                        (*cursorx)++;
-                                    }
-                                }
-                            } else {
-                                *is_vts_flags = 0;
-                            }
+                    query_tracker->is_wrap_pending = false;
+                } else if (c == BACKSPACE) {
+                    if (query_tracker->cursorx > 1) {
+                        query_tracker->cursorx--;
+                    }
+                    query_tracker->is_wrap_pending = false;
+                } else if (c == HTAB) {
+                    query_tracker->cursorx = (SHORT)
+                        ((((query_tracker->cursorx - 1) / 8) + 1) * 8 + 1);
+                    if (query_tracker->cursorx > size.X) {
+                        query_tracker->cursorx = size.X;
+                    }
+                } else if ((((unsigned char)c) >= 0x20) && (c != DEL)
+                        && ((c & 0xC0) != 0x80)
+                ) {
+                    if (query_tracker->is_wrap_pending) {
+                        query_tracker->cursorx = 1;
+                        if (query_tracker->cursory < size.Y) {
+                            query_tracker->cursory++;
                         }
+                        query_tracker->is_wrap_pending = false;
+                    }
+                    if (query_tracker->cursorx < size.X) {
+                        query_tracker->cursorx++;
+                    } else {
+                        query_tracker->is_wrap_pending = true;
                     }
                 }
                 break;
             }
-            case VTSMODE_ESCAPE: {
-                if ((*read_pointer == BIG_O)
-                 || (*read_pointer == OPENING_ROUND_BRACKET)
+            case QUERYMODE_ESCAPE: {
+                if (c == '[') {
+                    query_tracker->mode = QUERYMODE_CSI;
+                    query_tracker->params[0] = 0;
+                    query_tracker->params[1] = 0;
+                    query_tracker->param_count = 0;
+                    query_tracker->private_marker = '\0';
+                    query_tracker->has_intermediate = false;
+                } else if ((c == ']') || (c == 'P') || (c == '_')
+                        || (c == '^') || (c == 'X')
                 ) {
-                    *vts_mode = VTSMODE_SKIP_1;
-                } else if (*read_pointer == OPENING_SQUARE_BRACKET) {
-                    *vts_mode = VTSMODE_OPENING_SQUARE_BRACKET;
-                } else if (*read_pointer == CLOSING_SQUARE_BRACKET) {
-                    *vts_mode = VTSMODE_CLOSING_SQUARE_BRACKET;
-                } else {
-                    *vts_mode = VTSMODE_NONE;
+                    query_tracker->mode = QUERYMODE_STRING;
+                } else if ((c < 0x20) || (c > 0x2F)) {
+                    query_tracker->mode = QUERYMODE_NONE;
                 }
                 break;
             }
-            case VTSMODE_OPENING_SQUARE_BRACKET: {
-                if (*read_pointer == EXCLAMATION_MARK) {
-                    *vts_mode = VTSMODE_SKIP_1;
-                } else if ((*read_pointer == QUESTION_MARK)
-                        || (*read_pointer == SEMICOLON)
-                ) {
-                    *vts_mode = VTSMODE_SEARCH_LETTER;
-                } else if ((*read_pointer >= ZERO)
-                        && (*read_pointer <= NINE)
-                ) {
-                    if (!append_to_twspaces_buffer(twspaces_buffer,
-                            *read_pointer)
+            case QUERYMODE_CSI: {
+                if ((c >= '0') && (c <= '9')) {
+                    if (query_tracker->param_count < 2) {
+                        int *param =
+                            &query_tracker->params[
+                                query_tracker->param_count];
+                        *param = (*param * 10) + (c - '0');
+                        if (*param > 9999) {
+                            *param = 9999;
+                        }
+                    }
+                } else if ((c == ';') || (c == ':')) {
+                    query_tracker->param_count++;
+                } else if ((c >= 0x3C) && (c <= 0x3F)) {
+                    query_tracker->private_marker = c;
+                } else if ((c >= 0x20) && (c <= 0x2F)) {
+                    query_tracker->has_intermediate = true;
+                } else if ((c >= 0x40) && (c <= 0x7E)) {
+                    query_tracker->mode = QUERYMODE_NONE;
+                    if (!dispatch_vts_query(conptybriefcase_obj,
+                            query_tracker, c, size)
                     ) {
-                        free((void *)(*write_data));
                         return false;
                     }
-                    *vts_mode = VTSMODE_OPENING_SQUARE_BRACKET_DIGIT;
-                } else {
-                    *vts_mode = VTSMODE_NONE;
+                } else if (c == ESCAPE) {
+                    query_tracker->mode = QUERYMODE_ESCAPE;
+                } else if ((c == CANCEL) || (c == SUBSTITUTE)) {
+                    query_tracker->mode = QUERYMODE_NONE;
                 }
                 break;
             }
-            case VTSMODE_CLOSING_SQUARE_BRACKET: {
-                if ((*read_pointer >= ZERO)
-                 && (*read_pointer <= NINE)
-                ) {
-                    *vts_mode = VTSMODE_SEARCH_ST;
-                } else {
-                    *vts_mode = VTSMODE_NONE;
+            case QUERYMODE_STRING: {
+                if (c == BELL) {
+                    query_tracker->mode = QUERYMODE_NONE;
+                } else if (c == ESCAPE) {
+                    query_tracker->mode = QUERYMODE_STRING_ESCAPE;
                 }
                 break;
             }
-            case VTSMODE_OPENING_SQUARE_BRACKET_DIGIT: {
-                if (*read_pointer == BIG_C) {
-                    const int num =
-                        get_number_from_twspaces_buffer(twspaces_buffer);
-                    if ((num != 0) && (is_vts_flags == NULL)) {
-                        if (!extend_iobuffer(twspaces_buffer, num)) {
-                            free((void *)(*write_data));
-                            return false;
-                        }
-                        for (int j = 0; j != num; j++) {
-                            twspaces_buffer->data[
-                                twspaces_buffer->cursor_position++]
-                                    = SPACE;
-                            twspaces_buffer->data[
-                                twspaces_buffer->cursor_position] = '\0';
-                            twspaces_buffer->data_length++;
-                            if (twspaces_buffer->data_length
-                                    == *data_length
-                            ) {
-                                break;
-                            }
-                        }
-                    }
-                    *vts_mode = VTSMODE_NONE;
-                } else if (*read_pointer == SPACE) {
-                    get_number_from_twspaces_buffer(twspaces_buffer);
-                    *vts_mode = VTSMODE_SKIP_1;
-                } else if (*read_pointer == SEMICOLON) {
-                    jump_to_row_number =
-                        get_number_from_twspaces_buffer(twspaces_buffer);
-                    *vts_mode = VTSMODE_SEARCH_Hf;
-                } else if ((*read_pointer < ZERO) || (*read_pointer > NINE)) {
-                    get_number_from_twspaces_buffer(twspaces_buffer);
-                    *vts_mode = VTSMODE_NONE;
-                } else {
-                    if (!append_to_twspaces_buffer(twspaces_buffer,
-                            *read_pointer)
-                    ) {
-                        free((void *)(*write_data));
-                        return false;
-                    }
+            case QUERYMODE_STRING_ESCAPE: {
+                if (c == '\\') {
+                    query_tracker->mode = QUERYMODE_NONE;
+                } else if (c != ESCAPE) {
+                    query_tracker->mode = QUERYMODE_STRING;
                 }
                 break;
             }
-            case VTSMODE_SKIP_1: {
-                *vts_mode = VTSMODE_NONE;
+        }
+    }
+    return true;
+}
+
+static bool dispatch_vts_query(
+    ConPTYBriefcase *conptybriefcase_obj, ConPTYQueryTracker *query_tracker,
+    char final_byte, COORD size
+) {
+    if (query_tracker->has_intermediate) {
+        return true;
+    }
+    const int param = query_tracker->params[0];
+    const SHORT count = (SHORT)((param == 0) ? 1 : param);
+    SHORT cursorx = query_tracker->cursorx;
+    SHORT cursory = query_tracker->cursory;
+    char response[64];
+    int response_length = 0;
+    if (query_tracker->private_marker == '?') {
+        if ((final_byte == 'n') && (param == 6)) {
+            response_length = snprintf(response, sizeof(response),
+                "\x1b[?%d;%d;1R", cursory, cursorx);
+        }
+    } else if (query_tracker->private_marker == '\0') {
+        switch (final_byte) {
+            case 'H':
+            case 'f': {
+                cursory = (SHORT)((param == 0) ? 1 : param);
+                cursorx = (SHORT)((query_tracker->params[1] == 0)
+                                    ? 1 : query_tracker->params[1]);
+                break;
+            }
+            case 'A': {
+                cursory = (SHORT)(cursory - count);
+                break;
+            }
+            case 'B':
+            case 'e': {
+                cursory = (SHORT)(cursory + count);
                 break;
             }
-            case VTSMODE_SEARCH_ST: {
-                if (*read_pointer == BELL) {
-                    *vts_mode = VTSMODE_NONE;
-                } else if (*read_pointer == ESCAPE) {
-                    *vts_mode = VTSMODE_SKIP_1;
+            case 'C':
+            case 'a': {
+                cursorx = (SHORT)(cursorx + count);
+                break;
+            }
+            case 'D': {
+                cursorx = (SHORT)(cursorx - count);
+                break;
+            }
+            case 'E': {
+                cursory = (SHORT)(cursory + count);
+                cursorx = 1;
+                break;
+            }
+            case 'F': {
+                cursory = (SHORT)(cursory - count);
+                cursorx = 1;
+                break;
+            }
+            case 'G':
+            case '`': {
+                cursorx = count;
+                break;
+            }
+            case 'd': {
+                cursory = count;
+                break;
+            }
+            case 'n': {
+                if (param == 5) {
+                    response_length = snprintf(response, sizeof(response),
+                        "\x1b[0n");
+                } else if (param == 6) {
+                    response_length = snprintf(response, sizeof(response),
+                        "\x1b[%d;%dR", cursory, cursorx);
                 }
                 break;
             }
-            case VTSMODE_SEARCH_LETTER: {
-                if (((*read_pointer >= BIG_A) && (*read_pointer <= BIG_Z))
-                 || ((*read_pointer >= SMALL_A) && (*read_pointer <= SMALL_Z))
-                ) {
-                    *vts_mode = VTSMODE_NONE;
+            case 'c': {
+                if (param == 0) {
+                    response_length = snprintf(response, sizeof(response),
+                        "\x1b[?1;0c");
                 }
                 break;
             }
-            case VTSMODE_SEARCH_Hf: {
-                if ((*read_pointer == BIG_H) || (*read_pointer == SMALL_F)) {
-                    const size_t num =
-                        get_number_from_twspaces_buffer(twspaces_buffer);
-                    if ((cursory != NULL) && (num == 1)) {
-                        if ((jump_to_row_number > *cursory)
-                         && (jump_to_row_number <= (size_t)*bufferheight)
-                        ) {
-                            const size_t number_of_rn = jump_to_row_number
-                                                      - *cursory;
-                            *cursory = jump_to_row_number;
-                            *cursorx = 1;
-                            if (!extend_write_data_buffer(write_data,
-                                    &write_pointer, &write_data_length,
-                                    &number_of_rn)
-                            ) {
-                                return false;
-                            }
-                            for (size_t j = 0; j < number_of_rn; j++) {
-                                *write_pointer++ = LINEFEED;
-                            }
-                        }
-                    }
-                    *vts_mode = VTSMODE_NONE;
-                } else if ((*read_pointer < ZERO) || (*read_pointer > NINE)) {
-                    get_number_from_twspaces_buffer(twspaces_buffer);
-                    *vts_mode = VTSMODE_NONE;
-                } else {
-                    if (!append_to_twspaces_buffer(twspaces_buffer,
-                            *read_pointer)
-                    ) {
-                        free((void *)(*write_data));
-                        return false;
-                    }
+            case 't': {
+                if ((param == 18) || (param == 19)) {
+                    response_length = snprintf(response, sizeof(response),
+                        "\x1b[%d;%d;%dt", param - 10, size.Y, size.X);
                 }
                 break;
             }
-        }
-        read_pointer++;
-        if (is_vts_flags != NULL) {
-            is_vts_flags++;
+            default: {
+                return true;
+            }
         }
     }
-    if (is_vts_flags == NULL) {
-        *write_pointer = '\0';
-        *data_length = write_pointer - *write_data;
-    } else if (twspaces_buffer->data_length != 0) {
-        for (size_t i = 0; i < twspaces_buffer->data_length; i++) {
-            if ((twspaces_buffer->data[i] == SPACE)
-             || (twspaces_buffer->data[i] == HTAB)
-            ) {
-                *(--is_vts_flags) = 0;
+    if ((cursorx != query_tracker->cursorx)
+     || (cursory != query_tracker->cursory)
+    ) {
+        query_tracker->cursorx = (SHORT)((cursorx < 1) ? 1
+                               : ((cursorx > size.X) ? size.X : cursorx));
+        query_tracker->cursory = (SHORT)((cursory < 1) ? 1
+                               : ((cursory > size.Y) ? size.Y : cursory));
+        query_tracker->is_wrap_pending = false;
+    }
+    if (response_length <= 0) {
+        return true;
+    }
+    bool is_operation_successful = true;
+    WaitForSingleObject(conptybriefcase_obj->response_lock, INFINITE);
+    ConPTYIOBuffer *response_buffer = &conptybriefcase_obj->response_buffer;
+    if (extend_iobuffer(response_buffer, (size_t)response_length)) {
+        memcpy(&response_buffer->data[response_buffer->data_length],
+            response, (size_t)response_length);
+        response_buffer->data_length += (size_t)response_length;
+        response_buffer->data[response_buffer->data_length] = '\0';
+        atomic_store(&conptybriefcase_obj->is_response_pending, true);
+        WakeConditionVariable(&conptybriefcase_obj->stdin_wakeup_condition);
+    } else {
+        is_operation_successful = false;
+    }
+    ReleaseMutex(conptybriefcase_obj->response_lock);
+    return is_operation_successful;
+}
+
+static bool send_pending_response(ConPTYBriefcase *conptybriefcase_obj) {
+    bool is_operation_successful = true;
+    WaitForSingleObject(conptybriefcase_obj->response_lock, INFINITE);
+    ConPTYIOBuffer *response_buffer = &conptybriefcase_obj->response_buffer;
+    if (response_buffer->data_length != 0) {
+        DWORD sent_response_size;
+        AcquireSRWLockExclusive(&conptybriefcase_obj->stdin_pipe_lock);
+        const BOOL is_write_successful = WriteFile(
+            conptybriefcase_obj->client_stdin_pipe_handle,
+            response_buffer->data, (DWORD)response_buffer->data_length,
+            &sent_response_size, NULL);
+        ReleaseSRWLockExclusive(&conptybriefcase_obj->stdin_pipe_lock);
+        if (!is_write_successful) {
+            if (GetLastError() != ERROR_BROKEN_PIPE) {
+                kill_process_internal(conptybriefcase_obj);
             }
+            is_operation_successful = false;
+        } else if (!shrink_iobuffer(response_buffer, sent_response_size, 1)) {
+            kill_process_internal(conptybriefcase_obj);
+            is_operation_successful = false;
         }
     }
-    return true;
+    if (response_buffer->data_length == 0) {
+        atomic_store(&conptybriefcase_obj->is_response_pending, false);
+    }
+    ReleaseMutex(conptybriefcase_obj->response_lock);
+    return is_operation_successful;
 }
 
-static bool extend_write_data_buffer(
-    char **write_data, char **write_pointer,
-    size_t *write_data_length,
-    const size_t *const additional_size
+static bool write_into_stdin_pipe(
+    ConPTYBriefcase *conptybriefcase_obj, const char *const data,
+    size_t data_length, DWORD *sent_length
 ) {
-    const size_t write_offset = *write_pointer - *write_data;
-    *write_data_length += *additional_size;
-    char *temp_pointer = (char *)realloc(*write_data, *write_data_length);
-    if (temp_pointer == NULL) {
-        free((void *)(*write_data));
-        return false;
+    /* Echoed input must not be read before it is recorded */
+    ConPTYIOBuffer *strip_input_buffer =
+        &conptybriefcase_obj->strip_input_buffer;
+    const bool is_input_stripped = (strip_input_buffer->data != NULL);
+    if (is_input_stripped) {
+        AcquireSRWLockExclusive(&conptybriefcase_obj->read_buffer_lock);
+    }
+    bool is_operation_successful = true;
+    if (!WriteFile(conptybriefcase_obj->client_stdin_pipe_handle,
+            data, (DWORD)data_length, sent_length, NULL)
+    ) {
+        is_operation_successful = false;
+    } else if (is_input_stripped) {
+        if (extend_iobuffer(strip_input_buffer, *sent_length)) {
+            strip_input_buffer->cursor_position =
+                strip_input_buffer->data_length;
+            memcpy(&strip_input_buffer->data[
+                strip_input_buffer->cursor_position], data, *sent_length);
+            strip_input_buffer->data_length += *sent_length;
+            strip_input_buffer->data[strip_input_buffer->data_length] = '\0';
+        } else {
+            SetLastError(ERROR_NOT_ENOUGH_MEMORY);
+            is_operation_successful = false;
+        }
     }
-    *write_data = temp_pointer;
-    *write_pointer = *write_data + write_offset;
-    return true;
+    if (is_input_stripped) {
+        ReleaseSRWLockExclusive(&conptybriefcase_obj->read_buffer_lock);
+    }
+    return is_operation_successful;
 }
 
-static bool append_to_twspaces_buffer(
-    ConPTYIOBuffer *twspaces_buffer, char data
+static bool write_into_idle_stdin_pipe(
+    ConPTYBriefcase *conptybriefcase_obj, const char *const data,
+    size_t data_length, size_t *sent_length
 ) {
-    if ((twspaces_buffer->data_length + 1) ==
-            twspaces_buffer->max_size
+    /*
+        Never blocks the caller: whatever does not fit into the pipe right
+        away is left for the stdin listener, as is everything upon errors.
+    */
+    *sent_length = 0;
+    DWORD pipe_mode = PIPE_READMODE_BYTE | PIPE_NOWAIT;
+    if ((data_length > conptybriefcase_obj->stdin_pipe_size)
+     || (!SetNamedPipeHandleState(
+            conptybriefcase_obj->client_stdin_pipe_handle, &pipe_mode,
+            NULL, NULL))
     ) {
-        if (!extend_iobuffer(twspaces_buffer, 100)) {
-            return false;
-        }
+        return true;
     }
-    twspaces_buffer->data[
-        twspaces_buffer->cursor_position++] = data;
-    twspaces_buffer->data[
-        twspaces_buffer->cursor_position] = '\0';
-    twspaces_buffer->data_length++;
-    return true;
+    DWORD written_length = 0;
+    bool is_operation_successful = true;
+    if (write_into_stdin_pipe(conptybriefcase_obj, data, data_length,
+            &written_length)
+    ) {
+        *sent_length = written_length;
+    } else if (GetLastError() == ERROR_NOT_ENOUGH_MEMORY) {
+        is_operation_successful = false;
+    }
+    pipe_mode = PIPE_READMODE_BYTE | PIPE_WAIT;
+    SetNamedPipeHandleState(conptybriefcase_obj->client_stdin_pipe_handle,
+        &pipe_mode, NULL, NULL);
+    return is_operation_successful;
 }
 
-static int get_number_from_twspaces_buffer(ConPTYIOBuffer *twspaces_buffer) {
-    static const char HTAB = '\x09';
-    static const char SPACE = '\x20';
-    char num_str[10] = {0};
-    size_t m = 9;
-    size_t k = twspaces_buffer->cursor_position;
-    while (--k != (size_t)-1) {
-        if ((twspaces_buffer->data[k] == SPACE)
-         || (twspaces_buffer->data[k] == HTAB)) {
+static bool append_to_screen_buffer(
+    ConPTYIOBuffer *screen_buffer, ConPTYIOBuffer *screen_vts_flags,
+    const char *const data, const bool *const is_vts_flags,
+    size_t data_length, int screen_height
+) {
+    if (data_length == 0) {
+        return true;
+    }
+    if ((!extend_iobuffer(screen_buffer, data_length))
+     || (!extend_iobuffer(screen_vts_flags, data_length))
+    ) {
+        return false;
+    }
+    memcpy(&screen_buffer->data[screen_buffer->data_length], data,
+        data_length);
+    screen_buffer->data_length += data_length;
+    screen_buffer->data[screen_buffer->data_length] = '\0';
+    memcpy(&screen_vts_flags->data[screen_vts_flags->data_length],
+        is_vts_flags, data_length);
+    screen_vts_flags->data_length += data_length;
+    size_t unused_size_at_start = 0;
+    int newline_count = 0;
+    for (size_t i = screen_buffer->data_length; i > 0; i--) {
+        if ((screen_buffer->data[i - 1] == '\n')
+         && (++newline_count == screen_height)
+        ) {
+            unused_size_at_start = i;
             break;
         }
-        twspaces_buffer->data_length--;
-        num_str[--m] = twspaces_buffer->data[k];
     }
-    int num = 0;
-    if (m != 9) {
-        twspaces_buffer->cursor_position =
-            twspaces_buffer->data_length;
-        twspaces_buffer->data[
-            twspaces_buffer->cursor_position] = '\0';
-        num = atoi(&num_str[m]);
+    if ((screen_buffer->data_length - unused_size_at_start)
+            > MAX_SCREEN_BUFFER_SIZE
+    ) {
+        unused_size_at_start = screen_buffer->data_length
+                             - MAX_SCREEN_BUFFER_SIZE;
     }
-    return num;
+    return shrink_iobuffer(screen_buffer, unused_size_at_start, 1)
+        && shrink_iobuffer(screen_vts_flags, unused_size_at_start, 1);
 }
 
-static int strstr_internal(
-    char *s1, char *s2, size_t s1_length, size_t s2_length,
-    bool **s1_is_vts_flags, bool **s2_is_vts_flags, size_t *i0,
-    size_t *iN, size_t *dummy_length,
-    ConPTYIOBuffer *dummy_twspaces_buffer, VTSMode *dummy_vts_mode
+static bool classify_vts_bytes(
+    const char *const data, size_t data_length,
+    ConPTYIOBuffer *vts_flags, VTSMode *vts_mode,
+    ConPTYIOBuffer *twspaces_buffer
 ) {
-    int return_code = -1;
-    if ((*s1_is_vts_flags = (bool *)malloc(s1_length * sizeof(bool)))
-            == NULL
-    ) {
-        goto CLEANUP;
+    vts_flags->data_length = 0;
+    if (!extend_iobuffer(vts_flags, data_length)) {
+        return false;
     }
-    if ((*s2_is_vts_flags = (bool *)malloc(s2_length * sizeof(bool)))
-            == NULL
-    ) {
-        goto CLEANUP;
-    }
-    *dummy_vts_mode = 0;
-    *dummy_length = s1_length;
-    dummy_twspaces_buffer->data_length = 0;
-    dummy_twspaces_buffer->cursor_position = 0;
-    if (!strip_vts_from_data(s1, dummy_length, NULL,
-            dummy_vts_mode, dummy_twspaces_buffer, 0, 0, NULL, NULL,
-            *s1_is_vts_flags)
-    ) {
-        goto CLEANUP;
-    }
-    *dummy_vts_mode = 0;
-    *dummy_length = s2_length;
-    dummy_twspaces_buffer->data_length = 0;
-    dummy_twspaces_buffer->cursor_position = 0;
-    if (!strip_vts_from_data(s2, dummy_length, NULL,
-            dummy_vts_mode, dummy_twspaces_buffer, 0, 0, NULL, NULL,
-            *s2_is_vts_flags)
+    vts_flags->data_length = data_length;
+    return strip_vts_from_data(data, &data_length, NULL, vts_mode,
+        twspaces_buffer, 0, 0, NULL, NULL, (bool *)vts_flags->data,
+        NULL, NULL, NULL, NULL);
+}
+
+static PyObject *get_marks_as_list(
+    ConPTYMarkCollector *mark_collector, const char *const output_data
+) {
+    const ConPTYIOBuffer *const records = &mark_collector->records;
+    if (records->data_length == 0) {
+        return Py_NewRef(Py_None);
+    }
+    PyObject *py_marks = PyList_New(0);
+    if (py_marks == NULL) {
+        return NULL;
+    }
+    size_t byte_offset = 0;
+    size_t char_offset = 0;
+    size_t i = 0;
+    while (i < records->data_length) {
+        size_t output_offset, payload_length;
+        memcpy(&output_offset, &records->data[i], sizeof(size_t));
+        i += sizeof(size_t);
+        memcpy(&payload_length, &records->data[i], sizeof(size_t));
+        i += sizeof(size_t);
+        for (; byte_offset < output_offset; byte_offset++) {
+            if ((output_data[byte_offset] & 0xC0) != 0x80) {
+                char_offset++;
+            }
+        }
+        PyObject *py_mark = Py_BuildValue("(nN)", (Py_ssize_t)char_offset,
+            PyUnicode_DecodeUTF8(&records->data[i],
+                (Py_ssize_t)payload_length, "replace"));
+        i += payload_length;
+        if ((py_mark == NULL) || (PyList_Append(py_marks, py_mark) != 0)) {
+            Py_XDECREF(py_mark);
+            Py_DECREF(py_marks);
+            return NULL;
+        }
+        Py_DECREF(py_mark);
+    }
+    return py_marks;
+}
+
+static PyObject *get_style_runs_as_bytes(
+    ConPTYStyleCollector *style_collector, const char *const output_data,
+    size_t output_length
+) {
+    static const size_t RUN_FIELD_COUNT = 5;
+    const ConPTYIOBuffer *const records = &style_collector->records;
+    const size_t record_count = records->data_length
+                              / sizeof(ConPTYStyleRecord);
+    PyObject *py_style_runs = PyBytes_FromStringAndSize(NULL,
+        (Py_ssize_t)(record_count * RUN_FIELD_COUNT * sizeof(unsigned int)));
+    if (py_style_runs == NULL) {
+        return NULL;
+    }
+    unsigned int *run = (unsigned int *)PyBytes_AS_STRING(py_style_runs);
+    size_t run_count = 0;
+    size_t byte_offset = 0;
+    size_t char_offset = 0;
+    for (size_t i = 0; i != record_count; i++) {
+        ConPTYStyleRecord record;
+        memcpy(&record, &records->data[i * sizeof(ConPTYStyleRecord)],
+            sizeof(ConPTYStyleRecord));
+        size_t end_offset = output_length;
+        if ((i + 1) != record_count) {
+            memcpy(&end_offset,
+                &records->data[(i + 1) * sizeof(ConPTYStyleRecord)],
+                sizeof(size_t));
+        }
+        if (end_offset > output_length) {
+            end_offset = output_length;
+        }
+        for (; (byte_offset < record.output_offset)
+            && (byte_offset < end_offset); byte_offset++
+        ) {
+            if ((output_data[byte_offset] & 0xC0) != 0x80) {
+                char_offset++;
+            }
+        }
+        const size_t start_offset = char_offset;
+        for (; byte_offset < end_offset; byte_offset++) {
+            if ((output_data[byte_offset] & 0xC0) != 0x80) {
+                char_offset++;
+            }
+        }
+        if ((char_offset == start_offset)
+         || ((record.foreground == 0) && (record.background == 0)
+                                      && (record.flags == 0))
+        ) {
+            continue;
+        }
+        run[0] = (unsigned int)start_offset;
+        run[1] = (unsigned int)(char_offset - start_offset);
+        run[2] = record.foreground;
+        run[3] = record.background;
+        run[4] = record.flags;
+        run += RUN_FIELD_COUNT;
+        run_count++;
+    }
+    if (_PyBytes_Resize(&py_style_runs,
+            (Py_ssize_t)(run_count * RUN_FIELD_COUNT * sizeof(unsigned int)))
+        != 0
     ) {
-        goto CLEANUP;
+        return NULL;
     }
-    return_code = 0;
+    return py_style_runs;
+}
+
+static int strstr_internal(
+    const char *const s1, const char *const s2,
+    size_t s1_length, size_t s2_length,
+    const bool *const s1_is_vts_flags, const bool *const s2_is_vts_flags,
+    size_t *i0, size_t *iN
+) {
     if ((s1_length == 0) || (s2_length == 0) || (s2_length > s1_length)) {
-        goto CLEANUP;
+        return 0;
     }
+    int return_code = 0;
     *iN = 0;
     size_t j = 0;
     for (size_t i = 0; i < s1_length; i++) {
-        if ((*s1_is_vts_flags)[i]) {
+        if (s1_is_vts_flags[i]) {
             continue;
         }
-        while ((*s2_is_vts_flags)[j]) {
+        while (s2_is_vts_flags[j]) {
             if (++j == s2_length) {
-                goto CLEANUP;
+                return return_code;
             }
         }
         if (s1[i] != s2[j]) {
@@ -1924,18 +2920,325 @@ static int strstr_internal(
             break;
         }
     }
+    return return_code;
+}
+
+static int strrepaint_internal(
+    const char *const s1, const char *const s2,
+    size_t s1_length, size_t s2_length,
+    const bool *const s1_is_vts_flags, const bool *const s2_is_vts_flags,
+    size_t *j0, size_t *repaint_length
+) {
+    *repaint_length = 0;
+    if ((s1_length == 0) || (s2_length == 0)) {
+        return 0;
+    }
+    bool has_vts = false;
+    size_t i0 = 0;
+    while ((i0 < s1_length)
+        && is_blank_in_repaint(s1[i0], s1_is_vts_flags[i0])
+    ) {
+        has_vts = has_vts || s1_is_vts_flags[i0];
+        i0++;
+    }
+    if (i0 == s1_length) {
+        /* Nothing visible yet, so the repaint could still follow. */
+        return 1;
+    }
+    if ((*j0 == 0) && !has_vts) {
+        /* A repaint frame always starts by positioning the cursor. */
+        return 0;
+    }
+    bool is_line_start = true;
+    for (size_t k = *j0; k < s2_length; k++) {
+        if (*j0 == 0) {
+            if (s2_is_vts_flags[k]) {
+                continue;
+            }
+            if (s2[k] == '\n') {
+                is_line_start = true;
+                continue;
+            }
+            if (is_blank_in_repaint(s2[k], false) || !is_line_start) {
+                continue;
+            }
+            is_line_start = false;
+        }
+        size_t i = i0;
+        size_t j = k;
+        while (1) {
+            while ((i < s1_length)
+                && is_blank_in_repaint(s1[i], s1_is_vts_flags[i])
+            ) {
+                i++;
+            }
+            while ((j < s2_length)
+                && is_blank_in_repaint(s2[j], s2_is_vts_flags[j])
+            ) {
+                j++;
+            }
+            if (j == s2_length) {
+                *repaint_length = i;
+                *j0 = 0;
+                return 2;
+            }
+            if (i == s1_length) {
+                *repaint_length = s1_length;
+                *j0 = j;
+                return 1;
+            }
+            if (s1[i] != s2[j]) {
+                break;
+            }
+            i++;
+            j++;
+        }
+        if (*j0 != 0) {
+            break;
+        }
+    }
+
+    return 0;
+}
 
-    CLEANUP:;
+static bool is_blank_in_repaint(char c, bool is_vts) {
+    return is_vts || (c == ' ') || (c == '\t') || (c == '\r') || (c == '\n');
+}
 
-    if (*s1_is_vts_flags != NULL) {
-        free((void *)(*s1_is_vts_flags));
-        *s1_is_vts_flags = NULL;
+static void reset_echo_matcher(
+    ConPTYEchoMatcher *echo_matcher, ConPTYIOBuffer *strip_input_buffer
+) {
+    echo_matcher->input_position = 0;
+    echo_matcher->input_vts_mode = VTSMODE_NONE;
+    echo_matcher->output_vts_mode = VTSMODE_NONE;
+    echo_matcher->is_matching = false;
+    if ((strip_input_buffer != NULL) && (strip_input_buffer->data != NULL)) {
+        strip_input_buffer->data_length = 0;
+        strip_input_buffer->data[0] = '\0';
     }
-    if (*s2_is_vts_flags != NULL) {
-        free((void *)(*s2_is_vts_flags));
-        *s2_is_vts_flags = NULL;
+}
+
+static size_t match_echoed_input(
+    ConPTYEchoMatcher *echo_matcher, ConPTYIOBuffer *strip_input_buffer,
+    const char *const data, size_t data_length
+) {
+    static const char LINEFEED = '\x0A';
+    static const char FORMFEED = '\x0C';
+
+    if (echo_matcher->input_position == strip_input_buffer->data_length) {
+        return 0;
     }
-    return return_code;
+    if (!echo_matcher->is_matching) {
+        echo_matcher->output_vts_mode = VTSMODE_NONE;
+        echo_matcher->is_matching = true;
+    }
+    size_t matched_length = 0;
+    for (size_t i = 0; i != data_length; i++) {
+        if (!is_significant_echo_byte(
+                &echo_matcher->output_vts_mode, data[i])
+        ) {
+            continue;
+        }
+        char input_byte;
+        do {
+            if (echo_matcher->input_position
+                    == strip_input_buffer->data_length
+            ) {
+                /* The entire pending input has been echoed. */
+                reset_echo_matcher(echo_matcher, strip_input_buffer);
+                return matched_length;
+            }
+            input_byte = strip_input_buffer->data[
+                echo_matcher->input_position++];
+        } while (!is_significant_echo_byte(
+                    &echo_matcher->input_vts_mode, input_byte));
+        const char output_byte = (data[i] == FORMFEED) ? LINEFEED : data[i];
+        if (input_byte == FORMFEED) {
+            input_byte = LINEFEED;
+        }
+        if (output_byte != input_byte) {
+            /* Not an echo, so the pending input is discarded. */
+            reset_echo_matcher(echo_matcher, strip_input_buffer);
+            return 0;
+        }
+        matched_length = i + 1;
+    }
+    if ((echo_matcher->input_position * 2)
+            >= strip_input_buffer->data_length
+    ) {
+        strip_input_buffer->data_length -= echo_matcher->input_position;
+        memmove(strip_input_buffer->data,
+            &strip_input_buffer->data[echo_matcher->input_position],
+            strip_input_buffer->data_length + 1);
+        echo_matcher->input_position = 0;
+    }
+    return matched_length;
+}
+
+static bool is_significant_echo_byte(VTSMode *vts_mode, char c) {
+    static const unsigned char LINEFEED = 0x0A;
+    static const unsigned char FORMFEED = 0x0C;
+    static const unsigned char SPACE = 0x20;
+
+    const unsigned char byte = (unsigned char)c;
+    switch (advance_vts_mode(vts_mode, c)) {
+        case VTSACTION_PRINT: {
+            return (byte != SPACE);
+        }
+        case VTSACTION_EXECUTE: {
+            return (byte == LINEFEED) || (byte == FORMFEED);
+        }
+        case VTSACTION_NONE:
+        case VTSACTION_PARAM:
+        case VTSACTION_CSI_DISPATCH:
+        case VTSACTION_OSC_PUT: {
+            break;
+        }
+    }
+    return false;
+}
+
+static bool initialize_eager_stripper(
+    ConPTYEagerStripper *eager_stripper, bool first_initialization,
+    atomic_size_t *allocation_count
+) {
+    eager_stripper->cursorx = 1;
+    eager_stripper->cursory = 1;
+    eager_stripper->line_column = 0;
+    eager_stripper->vts_mode = VTSMODE_NONE;
+    eager_stripper->collapse_lines = false;
+    eager_stripper->keep_raw_data = false;
+    eager_stripper->is_enabled = false;
+    eager_stripper->mark_collector.is_collecting = false;
+    ConPTYIOBuffer *const iobuffers[] = {
+        &eager_stripper->twspaces_buffer,
+        &eager_stripper->line_buffer,
+        &eager_stripper->stripped_buffer,
+        &eager_stripper->mark_collector.payload,
+        &eager_stripper->mark_collector.records
+    };
+    for (size_t i = 0; i != sizeof(iobuffers) / sizeof(iobuffers[0]); i++) {
+        if (!(first_initialization
+                ? initialize_counted_iobuffer(iobuffers[i], allocation_count)
+                : initialize_iobuffer(iobuffers[i], false))
+        ) {
+            return false;
+        }
+    }
+    return true;
+}
+
+static void free_eager_stripper(ConPTYEagerStripper *eager_stripper) {
+    free_iobuffer(&eager_stripper->twspaces_buffer);
+    free_iobuffer(&eager_stripper->line_buffer);
+    free_iobuffer(&eager_stripper->stripped_buffer);
+    free_iobuffer(&eager_stripper->mark_collector.payload);
+    free_iobuffer(&eager_stripper->mark_collector.records);
+}
+
+static bool strip_into_read_buffer(
+    ConPTYBriefcase *conptybriefcase_obj, const char *const data,
+    size_t data_length
+) {
+    ConPTYEagerStripper *eager_stripper = &conptybriefcase_obj->eager_stripper;
+    ConPTYIOBuffer *read_buffer = &conptybriefcase_obj->read_buffer;
+    const size_t records_length =
+        eager_stripper->mark_collector.records.data_length;
+    ConPTYIOBuffer *stripped_buffer = &eager_stripper->stripped_buffer;
+    size_t stripped_length = data_length;
+    if (conptybriefcase_obj->plain_strip) {
+        if (!plain_strip_vts_from_data(data, &stripped_length,
+                stripped_buffer, &eager_stripper->vts_mode,
+                &eager_stripper->mark_collector, NULL)
+        ) {
+            return false;
+        }
+    } else if (!strip_vts_from_data(data, &stripped_length, stripped_buffer,
+            &eager_stripper->vts_mode, &eager_stripper->twspaces_buffer,
+            &conptybriefcase_obj->pseudo_console_size.X,
+            &conptybriefcase_obj->pseudo_console_size.Y,
+            &eager_stripper->cursorx, &eager_stripper->cursory, NULL,
+            (eager_stripper->collapse_lines ?
+                &eager_stripper->line_buffer : NULL),
+            &eager_stripper->line_column, &eager_stripper->mark_collector,
+            NULL)
+    ) {
+        return false;
+    }
+    rebase_mark_records(&eager_stripper->mark_collector.records,
+        records_length, read_buffer->data_length);
+    return append_to_iobuffer(read_buffer, stripped_buffer->data,
+        stripped_length);
+}
+
+static bool flush_eager_line_buffer(ConPTYBriefcase *conptybriefcase_obj) {
+    static const char HTAB = '\x09';
+    static const char SPACE = '\x20';
+    ConPTYIOBuffer *line_buffer =
+        &conptybriefcase_obj->eager_stripper.line_buffer;
+    size_t line_length = line_buffer->data_length;
+    while ((line_length != 0)
+        && ((line_buffer->data[line_length - 1] == SPACE)
+         || (line_buffer->data[line_length - 1] == HTAB))
+    ) {
+        line_length--;
+    }
+    if (!append_to_iobuffer(
+            &conptybriefcase_obj->read_buffer, line_buffer->data, line_length)
+    ) {
+        return false;
+    }
+    line_buffer->data_length = 0;
+    line_buffer->cursor_position = 0;
+    line_buffer->data[0] = '\0';
+    conptybriefcase_obj->eager_stripper.line_column = 0;
+    return true;
+}
+
+static void rebase_mark_records(
+    ConPTYIOBuffer *records, size_t start_index, size_t base_offset
+) {
+    size_t i = start_index;
+    while (i < records->data_length) {
+        size_t output_offset, payload_length;
+        memcpy(&output_offset, &records->data[i], sizeof(size_t));
+        output_offset += base_offset;
+        memcpy(&records->data[i], &output_offset, sizeof(size_t));
+        i += sizeof(size_t);
+        memcpy(&payload_length, &records->data[i], sizeof(size_t));
+        i += sizeof(size_t) + payload_length;
+    }
+}
+
+static bool take_eager_marks(
+    ConPTYIOBuffer *source_records, ConPTYIOBuffer *target_records,
+    size_t consumed_length
+) {
+    size_t taken_length = 0;
+    while (taken_length < source_records->data_length) {
+        size_t output_offset, payload_length;
+        memcpy(&output_offset, &source_records->data[taken_length],
+            sizeof(size_t));
+        if (output_offset > consumed_length) {
+            break;
+        }
+        memcpy(&payload_length,
+            &source_records->data[taken_length + sizeof(size_t)],
+            sizeof(size_t));
+        taken_length += (2 * sizeof(size_t)) + payload_length;
+    }
+    if (!extend_iobuffer(target_records, taken_length)) {
+        return false;
+    }
+    memcpy(&target_records->data[target_records->data_length],
+        source_records->data, taken_length);
+    target_records->data_length += taken_length;
+    source_records->data_length -= taken_length;
+    memmove(source_records->data, &source_records->data[taken_length],
+        source_records->data_length);
+    /* Unsigned wrap-around turns the addition into a subtraction. */
+    rebase_mark_records(source_records, 0, (size_t)0 - consumed_length);
+    return true;
 }
 
 static void close_client_io_pipes(ConPTYBriefcase *conptybriefcase_obj) {
@@ -1960,7 +3263,14 @@ static bool kill_process_internal(ConPTYBriefcase *conptybriefcase_obj) {
         if ((conptybriefcase_obj->process_status == GRACEFULLY_TERMINATING)
          || (conptybriefcase_obj->process_status == FORCEFULLY_TERMINATING)
         ) {
-            conptybriefcase_obj->is_write_buffer_available = false;
+            WakeAllConditionVariable(
+                &conptybriefcase_obj->stdin_wakeup_condition);
+            WakeAllConditionVariable(
+                &conptybriefcase_obj->input_sent_condition);
+            WakeAllConditionVariable(
+                &conptybriefcase_obj->output_line_condition);
+            WakeAllConditionVariable(
+                &conptybriefcase_obj->read_drain_condition);
             if (conptybriefcase_obj->process_status ==
                     FORCEFULLY_TERMINATING
             ) {
@@ -0,0 +1,250 @@
+/*
+This code is part of the PyConPTY python package.
+PyConPTY: A Python wrapper for the ConPTY (Windows Pseudo-console) API
+Copyright (C) 2025  MELWYN FRANCIS CARLO
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+For queries, contact me at: melwyncarlo@gmail.com
+*/
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <stdbool.h>
+
+#include "_pyconptyvts.h"
+
+/*
+    A standalone VTS stripper, which runs the same parser as ConPTY reads
+    over any byte stream, chunk by chunk. It does not depend upon Windows.
+*/
+
+#ifndef UNREFERENCED_PARAMETER
+#define UNREFERENCED_PARAMETER(P) (void)(P)
+#endif
+
+/* ######################################################################## */
+/*  PRIVATE GLOBAL VARIABLES                                                */
+/* ######################################################################## */
+
+/* Mirrors ConPTY.StripLevel */
+typedef enum {
+    STRIPLEVEL_PLAIN,
+    STRIPLEVEL_LAYOUT,
+    STRIPLEVEL_SCREEN
+} StripLevel;
+
+/* Bytes Alignment Padding */
+__pragma(warning(disable: 4820))
+typedef struct {
+    PyObject_HEAD
+    ConPTYIOBuffer twspaces_buffer;
+    ConPTYIOBuffer line_buffer;
+    ConPTYIOBuffer stripped_buffer;
+    size_t cursorx;
+    size_t cursory;
+    size_t line_column;
+    VTSMode vts_mode;
+    short width;
+    short height;
+    StripLevel strip_level;
+} VTStripperBriefcase;
+__pragma(warning(default: 4820))
+
+/* ######################################################################## */
+/*  FUNCTION DECLARATIONS                                                   */
+/* ######################################################################## */
+
+/* Public Functions */
+PyMODINIT_FUNC PyInit__pyconptystripper(void);
+static int pyconptystripper_init(VTStripperBriefcase*, PyObject*, PyObject*);
+static PyObject *strip_data(VTStripperBriefcase*, PyObject* const*,
+                                                 Py_ssize_t);
+static PyObject *flush_data(VTStripperBriefcase*, PyObject*);
+static void pyconptystripper_dealloc(VTStripperBriefcase*);
+
+/* Private Functions */
+static void reset_stripper(VTStripperBriefcase*);
+
+/* ######################################################################## */
+/*  PUBLIC GLOBAL VARIABLES                                                 */
+/* ######################################################################## */
+
+/* Unsafe Conversion */
+__pragma(warning(disable: 4191))
+static PyMethodDef pyconptystripper_methods[] = {
+    {"strip_data", (PyCFunction) strip_data, METH_FASTCALL, NULL},
+    {"flush_data", (PyCFunction) flush_data, METH_NOARGS,   NULL},
+    {NULL, NULL, 0, NULL}
+};
+__pragma(warning(default: 4191))
+
+/* Non-static Runtime DLL Import */
+__pragma(warning(disable: 4232))
+static PyTypeObject VTStripperObject = {
+    .ob_base = PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "_pyconptystripper.VTStripperObject",
+    .tp_doc = NULL,
+    .tp_basicsize = sizeof(VTStripperBriefcase),
+    .tp_itemsize = 0,
+    .tp_flags = Py_TPFLAGS_DEFAULT & ~Py_TPFLAGS_BASETYPE,
+    .tp_new = PyType_GenericNew,
+    .tp_init = (initproc) pyconptystripper_init,
+    .tp_dealloc = (destructor) pyconptystripper_dealloc,
+    .tp_members = NULL,
+    .tp_methods = pyconptystripper_methods
+};
+__pragma(warning(default: 4232))
+
+static int pyconptystripper_module_exec(PyObject *m) {
+    if (PyType_Ready(&VTStripperObject) < 0) {
+        return -1;
+    }
+    if (PyModule_AddObjectRef(
+            m, "VTStripperObject", (PyObject*) &VTStripperObject) < 0
+    ) {
+        return -1;
+    }
+    return 0;
+}
+
+static PyModuleDef_Slot pyconptystripper_slots[] = {
+    {Py_mod_exec, (void *)pyconptystripper_module_exec},
+#ifdef Py_mod_multiple_interpreters
+    {Py_mod_multiple_interpreters, Py_MOD_PER_INTERPRETER_GIL_SUPPORTED},
+#endif
+    {0, NULL}
+};
+
+static struct PyModuleDef pyconptystripper_module = {
+    .m_base = PyModuleDef_HEAD_INIT,
+    .m_name = "_pyconptystripper",
+    .m_methods = NULL,
+    .m_size = 0,
+    .m_slots = pyconptystripper_slots,
+    .m_traverse = NULL,
+    .m_clear = NULL,
+    .m_free = NULL
+};
+
+/* ######################################################################## */
+/*  PUBLIC FUNCTIONS                                                        */
+/* ######################################################################## */
+
+PyMODINIT_FUNC PyInit__pyconptystripper(void) {
+    return PyModuleDef_Init(&pyconptystripper_module);
+}
+
+static int pyconptystripper_init(
+            VTStripperBriefcase *self, PyObject *args, PyObject *kwds
+) {
+    UNREFERENCED_PARAMETER(kwds);
+    int strip_level;
+    short width, height;
+    if (!PyArg_ParseTuple(args, "ihh", &strip_level, &width, &height)) {
+        return -1;
+    }
+    self->strip_level = (StripLevel)strip_level;
+    self->width = width;
+    self->height = height;
+    if ((!initialize_iobuffer(&self->twspaces_buffer, true))
+     || (!initialize_iobuffer(&self->line_buffer, true))
+     || (!initialize_iobuffer(&self->stripped_buffer, true))
+    ) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    reset_stripper(self);
+    return 0;
+}
+
+static PyObject *strip_data(
+    VTStripperBriefcase *self, PyObject *const *args, Py_ssize_t nargs
+) {
+    UNREFERENCED_PARAMETER(nargs);
+    char *read_data = NULL;
+    Py_ssize_t read_data_size = 0;
+    if (PyBytes_AsStringAndSize(args[0], &read_data, &read_data_size) < 0) {
+        return NULL;
+    }
+    if (read_data_size == 0) {
+        return PyBytes_FromStringAndSize(NULL, 0);
+    }
+    size_t data_length = (size_t)read_data_size;
+    bool is_operation_successful;
+    if (self->strip_level == STRIPLEVEL_PLAIN) {
+        is_operation_successful = plain_strip_vts_from_data(read_data,
+            &data_length, &self->stripped_buffer, &self->vts_mode,
+            NULL, NULL);
+    } else {
+        is_operation_successful = strip_vts_from_data(read_data,
+            &data_length, &self->stripped_buffer, &self->vts_mode,
+            &self->twspaces_buffer, &self->width, &self->height,
+            &self->cursorx, &self->cursory, NULL,
+            ((self->strip_level == STRIPLEVEL_SCREEN) ?
+                &self->line_buffer : NULL),
+            &self->line_column, NULL, NULL);
+    }
+    if (!is_operation_successful) {
+        reset_stripper(self);
+        Py_RETURN_NONE;
+    }
+    return PyBytes_FromStringAndSize(
+        self->stripped_buffer.data, (Py_ssize_t)data_length);
+}
+
+static PyObject *flush_data(VTStripperBriefcase *self, PyObject *args) {
+    UNREFERENCED_PARAMETER(args);
+    static const char HTAB = '\x09';
+    static const char SPACE = '\x20';
+    size_t line_length = self->line_buffer.data_length;
+    while ((line_length != 0)
+        && ((self->line_buffer.data[line_length - 1] == SPACE)
+         || (self->line_buffer.data[line_length - 1] == HTAB))
+    ) {
+        line_length--;
+    }
+    PyObject *remaining_data = PyBytes_FromStringAndSize(
+        self->line_buffer.data, (Py_ssize_t)line_length);
+    reset_stripper(self);
+    return remaining_data;
+}
+
+static void pyconptystripper_dealloc(VTStripperBriefcase *self) {
+    free_iobuffer(&self->twspaces_buffer);
+    free_iobuffer(&self->line_buffer);
+    free_iobuffer(&self->stripped_buffer);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+/* ######################################################################## */
+/*  PRIVATE FUNCTIONS                                                       */
+/* ######################################################################## */
+
+static void reset_stripper(VTStripperBriefcase *self) {
+    self->cursorx = 1;
+    self->cursory = 1;
+    self->line_column = 0;
+    self->vts_mode = VTSMODE_NONE;
+    self->twspaces_buffer.data_length = 0;
+    self->twspaces_buffer.cursor_position = 0;
+    self->twspaces_buffer.data[0] = '\0';
+    self->line_buffer.data_length = 0;
+    self->line_buffer.cursor_position = 0;
+    self->line_buffer.data[0] = '\0';
+}
@@ -0,0 +1,1351 @@
+/*
+This code is part of the PyConPTY python package.
+PyConPTY: A Python wrapper for the ConPTY (Windows Pseudo-console) API
+Copyright (C) 2025  MELWYN FRANCIS CARLO
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+For queries, contact me at: melwyncarlo@gmail.com
+*/
+
+#include "_pyconptyvts.h"
+
+/* ######################################################################## */
+/*  PRIVATE GLOBAL VARIABLES                                                */
+/* ######################################################################## */
+
+static const size_t MAX_MARK_PAYLOAD_SIZE = 4096;
+static const unsigned int MAX_SGR_PARAMETER_VALUE = 65535;
+static const unsigned int STYLE_COLOR_INDEXED = 0x01000000;
+static const unsigned int STYLE_COLOR_RGB = 0x02000000;
+static const unsigned int STYLE_FLAG_BOLD = 0x01;
+static const unsigned int STYLE_FLAG_FAINT = 0x02;
+static const unsigned int STYLE_FLAG_ITALIC = 0x04;
+static const unsigned int STYLE_FLAG_UNDERLINE = 0x08;
+static const unsigned int STYLE_FLAG_BLINK = 0x10;
+static const unsigned int STYLE_FLAG_INVERSE = 0x20;
+static const unsigned int STYLE_FLAG_HIDDEN = 0x40;
+static const unsigned int STYLE_FLAG_STRIKETHROUGH = 0x80;
+
+/*
+    VTS parser tables, after the DEC VT500 state machine (Paul Williams).
+    Every byte is first mapped to its class, and then (mode, class) gives
+    a transition byte: the action in the high nibble, the next mode in the
+    low nibble. DCS, SOS, PM and APC strings are swallowed whole.
+
+    Deviations from the reference table, all on purpose:
+      - ':' and private markers ('<' to '?') in a CSI go to CSI_IGNORE,
+        since no sequence the stripper acts upon uses them;
+      - bytes 0x80 to 0xFF print in the ground state and are collected
+        in an OSC string, as ConPTY writes UTF-8 and never C1 controls;
+      - DEL is ignored in the ground state;
+      - BEL terminates an OSC string, as in xterm.
+*/
+#define VC_C0  VTSCLASS_C0
+#define VC_BEL VTSCLASS_BELL
+#define VC_CAN VTSCLASS_CANCEL
+#define VC_ESC VTSCLASS_ESCAPE
+#define VC_INT VTSCLASS_INTERMEDIATE
+#define VC_DIG VTSCLASS_DIGIT
+#define VC_COL VTSCLASS_COLON
+#define VC_SEM VTSCLASS_SEMICOLON
+#define VC_PRI VTSCLASS_PRIVATE
+#define VC_FIN VTSCLASS_FINAL
+#define VC_DCS VTSCLASS_DCS
+#define VC_CSI VTSCLASS_CSI
+#define VC_OSC VTSCLASS_OSC
+#define VC_SOS VTSCLASS_SOS
+#define VC_DEL VTSCLASS_DEL
+#define VC_HIG VTSCLASS_HIGH
+
+static const unsigned char VTS_BYTE_CLASSES[256] = {
+    /* 00 */ VC_C0,  VC_C0,  VC_C0,  VC_C0,  VC_C0,  VC_C0,  VC_C0,  VC_BEL,
+    /* 08 */ VC_C0,  VC_C0,  VC_C0,  VC_C0,  VC_C0,  VC_C0,  VC_C0,  VC_C0,
+    /* 10 */ VC_C0,  VC_C0,  VC_C0,  VC_C0,  VC_C0,  VC_C0,  VC_C0,  VC_C0,
+    /* 18 */ VC_CAN, VC_C0,  VC_CAN, VC_ESC, VC_C0,  VC_C0,  VC_C0,  VC_C0,
+    /* 20 */ VC_INT, VC_INT, VC_INT, VC_INT, VC_INT, VC_INT, VC_INT, VC_INT,
+    /* 28 */ VC_INT, VC_INT, VC_INT, VC_INT, VC_INT, VC_INT, VC_INT, VC_INT,
+    /* 30 */ VC_DIG, VC_DIG, VC_DIG, VC_DIG, VC_DIG, VC_DIG, VC_DIG, VC_DIG,
+    /* 38 */ VC_DIG, VC_DIG, VC_COL, VC_SEM, VC_PRI, VC_PRI, VC_PRI, VC_PRI,
+    /* 40 */ VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN,
+    /* 48 */ VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN,
+    /* 50 */ VC_DCS, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN,
+    /* 58 */ VC_SOS, VC_FIN, VC_FIN, VC_CSI, VC_FIN, VC_OSC, VC_SOS, VC_SOS,
+    /* 60 */ VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN,
+    /* 68 */ VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN,
+    /* 70 */ VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN,
+    /* 78 */ VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_FIN, VC_DEL,
+    /* 80 */ VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG,
+    /* 88 */ VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG,
+    /* 90 */ VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG,
+    /* 98 */ VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG,
+    /* A0 */ VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG,
+    /* A8 */ VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG,
+    /* B0 */ VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG,
+    /* B8 */ VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG,
+    /* C0 */ VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG,
+    /* C8 */ VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG,
+    /* D0 */ VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG,
+    /* D8 */ VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG,
+    /* E0 */ VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG,
+    /* E8 */ VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG,
+    /* F0 */ VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG,
+    /* F8 */ VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG, VC_HIG
+};
+
+#define VA_NON VTSACTION_NONE
+#define VA_PRN VTSACTION_PRINT
+#define VA_EXE VTSACTION_EXECUTE
+#define VA_PAR VTSACTION_PARAM
+#define VA_DSP VTSACTION_CSI_DISPATCH
+#define VA_PUT VTSACTION_OSC_PUT
+#define VM_GR VTSMODE_NONE
+#define VM_ES VTSMODE_ESCAPE
+#define VM_EI VTSMODE_ESCAPE_INTERMEDIATE
+#define VM_CE VTSMODE_CSI_ENTRY
+#define VM_CP VTSMODE_CSI_PARAM
+#define VM_CI VTSMODE_CSI_INTERMEDIATE
+#define VM_CG VTSMODE_CSI_IGNORE
+#define VM_DE VTSMODE_DCS_ENTRY
+#define VM_DP VTSMODE_DCS_PARAM
+#define VM_DI VTSMODE_DCS_INTERMEDIATE
+#define VM_DT VTSMODE_DCS_PASSTHROUGH
+#define VM_DG VTSMODE_DCS_IGNORE
+#define VM_OS VTSMODE_OSC_STRING
+#define VM_SS VTSMODE_SOS_PM_APC_STRING
+#define VT(a, m) ((unsigned char)((VA_##a << 4) | VM_##m))
+
+/* Columns: C0, BEL, CAN/SUB, ESC, 20-2F, 0-9, :, ;, <=>?, finals,    */
+/*          P, [, ], X^_, DEL, 80-FF                                  */
+static const unsigned char VTS_TRANSITIONS[VTSMODE_COUNT][VTSCLASS_COUNT] = {
+    /* VTSMODE_NONE */
+    {VT(EXE, GR), VT(EXE, GR), VT(EXE, GR), VT(NON, ES),
+     VT(PRN, GR), VT(PRN, GR), VT(PRN, GR), VT(PRN, GR),
+     VT(PRN, GR), VT(PRN, GR), VT(PRN, GR), VT(PRN, GR),
+     VT(PRN, GR), VT(PRN, GR), VT(NON, GR), VT(PRN, GR)},
+    /* VTSMODE_ESCAPE */
+    {VT(EXE, ES), VT(EXE, ES), VT(EXE, GR), VT(NON, ES),
+     VT(NON, EI), VT(NON, GR), VT(NON, GR), VT(NON, GR),
+     VT(NON, GR), VT(NON, GR), VT(NON, DE), VT(NON, CE),
+     VT(NON, OS), VT(NON, SS), VT(NON, ES), VT(NON, ES)},
+    /* VTSMODE_ESCAPE_INTERMEDIATE */
+    {VT(EXE, EI), VT(EXE, EI), VT(EXE, GR), VT(NON, ES),
+     VT(NON, EI), VT(NON, GR), VT(NON, GR), VT(NON, GR),
+     VT(NON, GR), VT(NON, GR), VT(NON, GR), VT(NON, GR),
+     VT(NON, GR), VT(NON, GR), VT(NON, EI), VT(NON, EI)},
+    /* VTSMODE_CSI_ENTRY */
+    {VT(EXE, CE), VT(EXE, CE), VT(EXE, GR), VT(NON, ES),
+     VT(NON, CI), VT(PAR, CP), VT(NON, CG), VT(PAR, CP),
+     VT(NON, CG), VT(DSP, GR), VT(DSP, GR), VT(DSP, GR),
+     VT(DSP, GR), VT(DSP, GR), VT(NON, CE), VT(NON, CE)},
+    /* VTSMODE_CSI_PARAM */
+    {VT(EXE, CP), VT(EXE, CP), VT(EXE, GR), VT(NON, ES),
+     VT(NON, CI), VT(PAR, CP), VT(NON, CG), VT(PAR, CP),
+     VT(NON, CG), VT(DSP, GR), VT(DSP, GR), VT(DSP, GR),
+     VT(DSP, GR), VT(DSP, GR), VT(NON, CP), VT(NON, CP)},
+    /* VTSMODE_CSI_INTERMEDIATE */
+    {VT(EXE, CI), VT(EXE, CI), VT(EXE, GR), VT(NON, ES),
+     VT(NON, CI), VT(NON, CG), VT(NON, CG), VT(NON, CG),
+     VT(NON, CG), VT(NON, GR), VT(NON, GR), VT(NON, GR),
+     VT(NON, GR), VT(NON, GR), VT(NON, CI), VT(NON, CI)},
+    /* VTSMODE_CSI_IGNORE */
+    {VT(EXE, CG), VT(EXE, CG), VT(EXE, GR), VT(NON, ES),
+     VT(NON, CG), VT(NON, CG), VT(NON, CG), VT(NON, CG),
+     VT(NON, CG), VT(NON, GR), VT(NON, GR), VT(NON, GR),
+     VT(NON, GR), VT(NON, GR), VT(NON, CG), VT(NON, CG)},
+    /* VTSMODE_DCS_ENTRY */
+    {VT(NON, DE), VT(NON, DE), VT(EXE, GR), VT(NON, ES),
+     VT(NON, DI), VT(NON, DP), VT(NON, DG), VT(NON, DP),
+     VT(NON, DP), VT(NON, DT), VT(NON, DT), VT(NON, DT),
+     VT(NON, DT), VT(NON, DT), VT(NON, DE), VT(NON, DE)},
+    /* VTSMODE_DCS_PARAM */
+    {VT(NON, DP), VT(NON, DP), VT(EXE, GR), VT(NON, ES),
+     VT(NON, DI), VT(NON, DP), VT(NON, DG), VT(NON, DP),
+     VT(NON, DG), VT(NON, DT), VT(NON, DT), VT(NON, DT),
+     VT(NON, DT), VT(NON, DT), VT(NON, DP), VT(NON, DP)},
+    /* VTSMODE_DCS_INTERMEDIATE */
+    {VT(NON, DI), VT(NON, DI), VT(EXE, GR), VT(NON, ES),
+     VT(NON, DI), VT(NON, DG), VT(NON, DG), VT(NON, DG),
+     VT(NON, DG), VT(NON, DT), VT(NON, DT), VT(NON, DT),
+     VT(NON, DT), VT(NON, DT), VT(NON, DI), VT(NON, DI)},
+    /* VTSMODE_DCS_PASSTHROUGH */
+    {VT(NON, DT), VT(NON, DT), VT(EXE, GR), VT(NON, ES),
+     VT(NON, DT), VT(NON, DT), VT(NON, DT), VT(NON, DT),
+     VT(NON, DT), VT(NON, DT), VT(NON, DT), VT(NON, DT),
+     VT(NON, DT), VT(NON, DT), VT(NON, DT), VT(NON, DT)},
+    /* VTSMODE_DCS_IGNORE */
+    {VT(NON, DG), VT(NON, DG), VT(EXE, GR), VT(NON, ES),
+     VT(NON, DG), VT(NON, DG), VT(NON, DG), VT(NON, DG),
+     VT(NON, DG), VT(NON, DG), VT(NON, DG), VT(NON, DG),
+     VT(NON, DG), VT(NON, DG), VT(NON, DG), VT(NON, DG)},
+    /* VTSMODE_OSC_STRING */
+    {VT(NON, OS), VT(NON, GR), VT(EXE, GR), VT(NON, ES),
+     VT(PUT, OS), VT(PUT, OS), VT(PUT, OS), VT(PUT, OS),
+     VT(PUT, OS), VT(PUT, OS), VT(PUT, OS), VT(PUT, OS),
+     VT(PUT, OS), VT(PUT, OS), VT(PUT, OS), VT(PUT, OS)},
+    /* VTSMODE_SOS_PM_APC_STRING */
+    {VT(NON, SS), VT(NON, SS), VT(EXE, GR), VT(NON, ES),
+     VT(NON, SS), VT(NON, SS), VT(NON, SS), VT(NON, SS),
+     VT(NON, SS), VT(NON, SS), VT(NON, SS), VT(NON, SS),
+     VT(NON, SS), VT(NON, SS), VT(NON, SS), VT(NON, SS)}
+};
+
+#undef VT
+#undef VM_SS
+#undef VM_OS
+#undef VM_DG
+#undef VM_DT
+#undef VM_DI
+#undef VM_DP
+#undef VM_DE
+#undef VM_CG
+#undef VM_CI
+#undef VM_CP
+#undef VM_CE
+#undef VM_EI
+#undef VM_ES
+#undef VM_GR
+#undef VA_PUT
+#undef VA_DSP
+#undef VA_PAR
+#undef VA_EXE
+#undef VA_PRN
+#undef VA_NON
+#undef VC_HIG
+#undef VC_DEL
+#undef VC_SOS
+#undef VC_OSC
+#undef VC_CSI
+#undef VC_DCS
+#undef VC_FIN
+#undef VC_PRI
+#undef VC_SEM
+#undef VC_COL
+#undef VC_DIG
+#undef VC_INT
+#undef VC_ESC
+#undef VC_CAN
+#undef VC_BEL
+#undef VC_C0
+
+/* ######################################################################## */
+/*  FUNCTION DECLARATIONS                                                   */
+/* ######################################################################## */
+
+static bool record_style(ConPTYStyleCollector*, size_t);
+
+/* ######################################################################## */
+/*  FUNCTION DEFINITIONS                                                    */
+/* ######################################################################## */
+
+bool initialize_iobuffer(
+    ConPTYIOBuffer *iobuffer, bool first_initialization
+) {
+    if (first_initialization) {
+        iobuffer->data = NULL;
+        iobuffer->allocation_count = NULL;
+    } else {
+        free_iobuffer(iobuffer);
+    }
+    iobuffer->data = reallocate_iobuffer_data(
+                        iobuffer->allocation_count, NULL, 1);
+    if (iobuffer->data == NULL) {
+        return false;
+    }
+    iobuffer->data[0] = '\0';
+    iobuffer->cursor_position = 0;
+    iobuffer->data_length = 0;
+    iobuffer->max_size = 1;
+    return true;
+}
+
+/*
+    Initializes a buffer for the first time, as with initialize_iobuffer,
+    counting each of its (re)allocations into the owner's counter.
+*/
+bool initialize_counted_iobuffer(
+    ConPTYIOBuffer *iobuffer, atomic_size_t *allocation_count
+) {
+    iobuffer->data = NULL;
+    iobuffer->allocation_count = allocation_count;
+    return initialize_iobuffer(iobuffer, false);
+}
+
+void free_iobuffer(ConPTYIOBuffer *iobuffer) {
+    if (iobuffer->data != NULL) {
+        free((void *)iobuffer->data);
+        iobuffer->data = NULL;
+    }
+    iobuffer->cursor_position = 0;
+    iobuffer->data_length = 0;
+    iobuffer->max_size = 0;
+}
+
+char *reallocate_iobuffer_data(
+    atomic_size_t *allocation_count, char *data, size_t size
+) {
+    if (allocation_count != NULL) {
+        atomic_fetch_add(allocation_count, 1);
+    }
+    return (char *)realloc(data, size);
+}
+
+bool extend_iobuffer(
+            ConPTYIOBuffer *iobuffer, size_t required_free_size
+) {
+    if (required_free_size == 0) {
+        return true;
+    }
+    if (iobuffer->max_size <= iobuffer->data_length) {
+        return false;
+    }
+    const size_t available_free_size = iobuffer->max_size - 1
+                                     - iobuffer->data_length;
+    if (available_free_size >= required_free_size) {
+        return true;
+    }
+    const size_t incremental_size = required_free_size - available_free_size;
+    char *temp_pointer = reallocate_iobuffer_data(
+            iobuffer->allocation_count, iobuffer->data,
+            (iobuffer->max_size + incremental_size));
+    if (temp_pointer == NULL) {
+        free_iobuffer(iobuffer);
+        return false;
+    }
+    iobuffer->data = temp_pointer;
+    iobuffer->max_size += incremental_size;
+    return true;
+}
+
+/*
+    Moves a cut, made after the first data_length bytes, back to the start
+    of a UTF-8 sequence that the cut would leave incomplete.
+*/
+size_t get_utf8_boundary(const char *const data, size_t data_length) {
+    size_t k = data_length;
+    while ((k != 0) && ((data_length - k) < 4)) {
+        const unsigned char c = (unsigned char)data[--k];
+        if ((c & 0xC0) == 0x80) {
+            continue;
+        }
+        size_t sequence_length = 1;
+        if ((c & 0xE0) == 0xC0) {
+            sequence_length = 2;
+        } else if ((c & 0xF0) == 0xE0) {
+            sequence_length = 3;
+        } else if ((c & 0xF8) == 0xF0) {
+            sequence_length = 4;
+        }
+        return ((k + sequence_length) > data_length) ? k : data_length;
+    }
+    return data_length;
+}
+
+/* Counts the bytes taken by the first char_count UTF-8 characters */
+size_t get_utf8_byte_count(
+    const char *const data, size_t data_length, size_t char_count
+) {
+    size_t k = 0;
+    for (; k != data_length; k++) {
+        if ((((unsigned char)data[k] & 0xC0) != 0x80)
+         && (char_count-- == 0)
+        ) {
+            break;
+        }
+    }
+    return k;
+}
+
+VTSAction advance_vts_mode(VTSMode *vts_mode, char c) {
+    const unsigned char transition =
+        VTS_TRANSITIONS[*vts_mode][VTS_BYTE_CLASSES[(unsigned char)c]];
+    *vts_mode = (VTSMode)(transition & 0x0F);
+    return (VTSAction)(transition >> 4);
+}
+
+bool strip_vts_from_data(
+    const char *const read_data, size_t *data_length,
+    ConPTYIOBuffer *write_buffer, VTSMode *vts_mode,
+    ConPTYIOBuffer *twspaces_buffer,
+    const short *const bufferwidth, const short *const bufferheight,
+    size_t *cursorx, size_t *cursory,
+    bool *is_vts_flags, ConPTYIOBuffer *line_buffer, size_t *line_column,
+    ConPTYMarkCollector *mark_collector, ConPTYStyleCollector *style_collector
+) {
+    static const char BACKSPACE = '\x08';
+    static const char HTAB = '\x09';
+    static const char LINEFEED = '\x0A';
+    static const char FORMFEED = '\x0C';
+    static const char CARRIAGE_RETURN = '\x0D';
+    static const char SPACE = '\x20';
+    static const char SEMICOLON = '\x3B';
+    static const char BIG_A = '\x41';
+    static const char BIG_C = '\x43';
+    static const char BIG_D = '\x44';
+    static const char BIG_G = '\x47';
+    static const char BIG_H = '\x48';
+    static const char BIG_K = '\x4B';
+    static const char SMALL_F = '\x66';
+    static const char SMALL_M = '\x6D';
+
+    if (*data_length == 0) {
+        return true;
+    }
+    if (!extend_iobuffer(twspaces_buffer, 100)) {
+        return false;
+    }
+    const char *read_pointer = read_data;
+    char *write_pointer = NULL;
+    size_t write_data_length = *data_length;
+    if (is_vts_flags == NULL) {
+        write_buffer->data_length = 0;
+        if (!extend_iobuffer(write_buffer, write_data_length)) {
+            return false;
+        }
+        write_pointer = write_buffer->data;
+    } else {
+        line_buffer = NULL;
+    }
+    if (line_buffer != NULL) {
+        if (!seek_line_buffer_column(line_buffer, *line_column)) {
+            return false;
+        }
+    }
+    /* The line above the cursor, while it is still in the write buffer */
+    size_t last_line_start = 0;
+    bool is_last_line_unread = false;
+    const size_t read_data_length = *data_length;
+    VTSMode current_vts_mode = *vts_mode;
+    for (size_t i = 0; i != read_data_length; i++) {
+        if (is_vts_flags != NULL) {
+            *is_vts_flags = 1;
+        }
+        const unsigned char transition = VTS_TRANSITIONS[current_vts_mode][
+            VTS_BYTE_CLASSES[(unsigned char)*read_pointer]];
+        const VTSAction vts_action = (VTSAction)(transition >> 4);
+        const VTSMode next_vts_mode = (VTSMode)(transition & 0x0F);
+        bool is_operation_successful = true;
+        switch (vts_action) {
+            case VTSACTION_NONE: {
+                break;
+            }
+            case VTSACTION_PRINT:
+            case VTSACTION_EXECUTE: {
+                const bool wspaces = ((*read_pointer == SPACE)
+                                   || (*read_pointer == HTAB));
+                const bool flfeeds = ((*read_pointer == FORMFEED)
+                                   || (*read_pointer == LINEFEED));
+                const bool is_printable = (vts_action == VTSACTION_PRINT)
+                                       || wspaces;
+                if (line_buffer != NULL) {
+                    if (flfeeds) {
+                        last_line_start =
+                            (size_t)(write_pointer - write_buffer->data);
+                        is_last_line_unread = true;
+                        if (!flush_line_buffer(line_buffer, write_buffer,
+                                &write_pointer, &write_data_length)
+                        ) {
+                            return false;
+                        }
+                        *line_column = 0;
+                        if (*cursory < (size_t)*bufferheight) {
+                            (*cursory)++;
+                        }
+                    } else if (*read_pointer == CARRIAGE_RETURN) {
+                        *line_column = 0;
+                        line_buffer->cursor_position = 0;
+                    } else if (*read_pointer == BACKSPACE) {
+                        if (*line_column != 0) {
+                            is_operation_successful = seek_line_buffer_column(
+                                line_buffer, --(*line_column));
+                        }
+                    } else if (is_printable) {
+                        is_operation_successful = put_into_line_buffer(
+                            line_buffer, *read_pointer);
+                        if ((*read_pointer & 0xC0) != 0x80) {
+                            (*line_column)++;
+                        }
+                    }
+                    *cursorx = *line_column + 1;
+                    if (*cursorx > (size_t)*bufferwidth) {
+                        *cursorx = (size_t)*bufferwidth;
+                    }
+                } else if (flfeeds) {
+                    if (twspaces_buffer->data_length != 0) {
+                        twspaces_buffer->data_length = 0;
+                        twspaces_buffer->cursor_position = 0;
+                        if (style_collector != NULL) {
+                            /* Trailing whitespaces are dropped */
+                            clamp_style_records(style_collector,
+                                (size_t)(write_pointer - write_buffer->data));
+                        }
+                    }
+                    if (is_vts_flags == NULL) {
+                        *write_pointer++ = LINEFEED;
+                        if (cursory != NULL) {
+                            if (*cursory < (size_t)*bufferheight) {
+                                (*cursory)++;
+                            }
+                            *cursorx = 1;
+                        }
+                    } else {
+                        *is_vts_flags = 0;
+                    }
+                } else if (wspaces) {
+                    is_operation_successful = append_to_twspaces_buffer(
+                        twspaces_buffer, *read_pointer);
+                } else if (is_printable) {
+                    if (twspaces_buffer->data_length != 0) {
+                        twspaces_buffer->data[
+                            twspaces_buffer->cursor_position] = '\0';
+                        if (is_vts_flags != NULL) {
+                            unflag_twspaces(is_vts_flags, read_pointer,
+                                (size_t)(read_pointer - read_data));
+                        } else {
+                            if (!extend_write_data_buffer(write_buffer,
+                                    &write_pointer, &write_data_length,
+                                    &twspaces_buffer->data_length)
+                            ) {
+                                return false;
+                            }
+                            memcpy(write_pointer, &twspaces_buffer->data[0],
+                                twspaces_buffer->data_length);
+                            write_pointer += twspaces_buffer->data_length;
+                            if (cursorx != NULL) {
+                                const size_t new_cursorx = *cursorx
+                                    + twspaces_buffer->data_length;
+                                if (new_cursorx <= (size_t)*bufferwidth) {
+                                    *cursorx = new_cursorx;
+                                }
+                            }
+                        }
+                        twspaces_buffer->data_length = 0;
+                        twspaces_buffer->cursor_position = 0;
+                    }
+                    if (is_vts_flags == NULL) {
+                        *write_pointer++ = *read_pointer;
+                        if ((cursorx != NULL)
+                         && ((*read_pointer & 0xC0) != 0x80)
+                        ) {
+                            if (*cursorx < (size_t)*bufferwidth) {
+                                (*cursorx)++;
+                            }
+                        }
+                    } else {
+                        *is_vts_flags = 0;
+                    }
+                }
+                break;
+            }
+            case VTSACTION_PARAM: {
+                if (style_collector != NULL) {
+                    put_sgr_parameter(style_collector, *read_pointer);
+                }
+                if (*read_pointer == SEMICOLON) {
+                    is_operation_successful =
+                        shift_twspaces_parameters(twspaces_buffer);
+                } else {
+                    is_operation_successful = append_to_twspaces_buffer(
+                        twspaces_buffer, *read_pointer);
+                }
+                break;
+            }
+            case VTSACTION_CSI_DISPATCH: {
+                if ((style_collector != NULL) && (*read_pointer == SMALL_M)) {
+                    is_operation_successful = apply_sgr_parameters(
+                        style_collector,
+                        (size_t)(write_pointer - write_buffer->data)
+                            + count_twspaces(twspaces_buffer));
+                }
+                const int num =
+                    get_number_from_twspaces_buffer(twspaces_buffer);
+                size_t jump_to_row_number = 1;
+                if (get_row_number_from_twspaces_buffer(twspaces_buffer,
+                        &jump_to_row_number)
+                ) {
+                    /* Only cursor positioning takes two parameters */
+                    if ((*read_pointer != BIG_H)
+                     && (*read_pointer != SMALL_F)
+                    ) {
+                        break;
+                    }
+                    if (line_buffer != NULL) {
+                        if ((jump_to_row_number > *cursory)
+                         && (jump_to_row_number <= (size_t)*bufferheight)
+                        ) {
+                            const size_t number_of_rn = jump_to_row_number
+                                                      - *cursory - 1;
+                            *cursory = jump_to_row_number;
+                            last_line_start =
+                                (size_t)(write_pointer - write_buffer->data);
+                            is_last_line_unread = true;
+                            if (!flush_line_buffer(line_buffer, write_buffer,
+                                    &write_pointer, &write_data_length)
+                            ) {
+                                return false;
+                            }
+                            if (!extend_write_data_buffer(write_buffer,
+                                    &write_pointer, &write_data_length,
+                                    &number_of_rn)
+                            ) {
+                                return false;
+                            }
+                            for (size_t j = 0; j < number_of_rn; j++) {
+                                last_line_start = (size_t)(write_pointer
+                                                - write_buffer->data);
+                                *write_pointer++ = LINEFEED;
+                            }
+                        } else if ((jump_to_row_number + 1 == *cursory)
+                                && is_last_line_unread
+                                && (line_buffer->data_length == 0)
+                        ) {
+                            /* A redraw of the line above, yet to be read */
+                            *cursory = jump_to_row_number;
+                            is_last_line_unread = false;
+                            is_operation_successful = reopen_last_line(
+                                line_buffer, write_buffer, &write_pointer,
+                                last_line_start);
+                        }
+                        if (is_operation_successful
+                         && (jump_to_row_number == *cursory)
+                        ) {
+                            *line_column = (num > 0) ? (size_t)(num - 1) : 0;
+                            is_operation_successful = seek_line_buffer_column(
+                                line_buffer, *line_column);
+                        }
+                    } else if ((cursory != NULL) && (num == 1)) {
+                        if ((jump_to_row_number > *cursory)
+                         && (jump_to_row_number <= (size_t)*bufferheight)
+                        ) {
+                            const size_t number_of_rn = jump_to_row_number
+                                                      - *cursory;
+                            *cursory = jump_to_row_number;
+                            *cursorx = 1;
+                            if (!extend_write_data_buffer(write_buffer,
+                                    &write_pointer, &write_data_length,
+                                    &number_of_rn)
+                            ) {
+                                return false;
+                            }
+                            for (size_t j = 0; j < number_of_rn; j++) {
+                                *write_pointer++ = LINEFEED;
+                            }
+                        }
+                    }
+                } else if ((line_buffer != NULL)
+                        && (*read_pointer == BIG_A)
+                ) {
+                    /* Only a redraw of the line above, yet to be read */
+                    if ((num <= 1) && is_last_line_unread
+                     && (line_buffer->data_length == 0)
+                    ) {
+                        if (*cursory > 1) {
+                            (*cursory)--;
+                        }
+                        is_last_line_unread = false;
+                        is_operation_successful = reopen_last_line(
+                            line_buffer, write_buffer, &write_pointer,
+                            last_line_start);
+                        if (is_operation_successful) {
+                            is_operation_successful = seek_line_buffer_column(
+                                line_buffer, *line_column);
+                        }
+                    }
+                } else if ((line_buffer != NULL)
+                        && ((*read_pointer == BIG_C)
+                         || (*read_pointer == BIG_D)
+                         || (*read_pointer == BIG_G)
+                         || (*read_pointer == BIG_K))
+                ) {
+                    const size_t count = (num > 0) ? (size_t)num : 1;
+                    if (*read_pointer == BIG_K) {
+                        is_operation_successful = erase_in_line_buffer(
+                            line_buffer, num, *line_column);
+                    } else {
+                        if (*read_pointer == BIG_C) {
+                            *line_column += count;
+                        } else if (*read_pointer == BIG_D) {
+                            *line_column = (*line_column > count)
+                                         ? (*line_column - count) : 0;
+                        } else {
+                            *line_column = count - 1;
+                        }
+                        /* The cursor stops at the right margin */
+                        if (*line_column >= (size_t)*bufferwidth) {
+                            *line_column = (size_t)*bufferwidth - 1;
+                        }
+                        is_operation_successful = seek_line_buffer_column(
+                            line_buffer, *line_column);
+                    }
+                } else if ((*read_pointer == BIG_C) && (num != 0)
+                        && (is_vts_flags == NULL)
+                ) {
+                    /* Bounded by the width, so that splits do not matter */
+                    const size_t count = ((size_t)num < (size_t)*bufferwidth)
+                                       ? (size_t)num : (size_t)*bufferwidth;
+                    if (!extend_iobuffer(twspaces_buffer, count)) {
+                        return false;
+                    }
+                    for (size_t j = 0; j != count; j++) {
+                        twspaces_buffer->data[
+                            twspaces_buffer->cursor_position++]
+                                = SPACE;
+                        twspaces_buffer->data[
+                            twspaces_buffer->cursor_position] = '\0';
+                        twspaces_buffer->data_length++;
+                    }
+                }
+                break;
+            }
+            case VTSACTION_OSC_PUT: {
+                if ((mark_collector != NULL)
+                 && mark_collector->is_collecting
+                ) {
+                    is_operation_successful = append_to_mark_payload(
+                        mark_collector, *read_pointer);
+                }
+                break;
+            }
+        }
+        if (is_operation_successful && (next_vts_mode != current_vts_mode)) {
+            if (mark_collector != NULL) {
+                if (next_vts_mode == VTSMODE_OSC_STRING) {
+                    mark_collector->payload.data_length = 0;
+                    mark_collector->is_collecting = true;
+                } else if ((current_vts_mode == VTSMODE_OSC_STRING)
+                        && mark_collector->is_collecting
+                ) {
+                    is_operation_successful = finalize_mark(mark_collector,
+                        (size_t)(write_pointer - write_buffer->data));
+                }
+            }
+            if ((twspaces_buffer->data_length != 0)
+             && ((next_vts_mode == VTSMODE_NONE)
+              || (next_vts_mode == VTSMODE_ESCAPE))
+            ) {
+                discard_twspaces_parameters(twspaces_buffer);
+            }
+            if ((style_collector != NULL)
+             && (next_vts_mode == VTSMODE_CSI_ENTRY)
+            ) {
+                style_collector->parameter_count = 0;
+                style_collector->parameters[0] = 0;
+            }
+            *vts_mode = current_vts_mode = next_vts_mode;
+        }
+        if (!is_operation_successful) {
+            return false;
+        }
+        read_pointer++;
+        if (is_vts_flags != NULL) {
+            is_vts_flags++;
+        }
+    }
+    if (is_vts_flags == NULL) {
+        *write_pointer = '\0';
+        *data_length = write_buffer->data_length =
+            (size_t)(write_pointer - write_buffer->data);
+    } else if (twspaces_buffer->data_length != 0) {
+        unflag_twspaces(is_vts_flags, read_pointer, *data_length);
+    }
+    return true;
+}
+
+bool plain_strip_vts_from_data(
+    const char *const read_data, size_t *data_length,
+    ConPTYIOBuffer *write_buffer, VTSMode *vts_mode,
+    ConPTYMarkCollector *mark_collector,
+    ConPTYStyleCollector *style_collector
+) {
+    static const char HTAB = '\x09';
+    static const char LINEFEED = '\x0A';
+    static const char FORMFEED = '\x0C';
+    static const char SMALL_M = '\x6D';
+
+    if (*data_length == 0) {
+        return true;
+    }
+    write_buffer->data_length = 0;
+    if (!extend_iobuffer(write_buffer, *data_length)) {
+        return false;
+    }
+    char *write_pointer = write_buffer->data;
+    const size_t read_data_length = *data_length;
+    VTSMode current_vts_mode = *vts_mode;
+    for (size_t i = 0; i != read_data_length; i++) {
+        const char c = read_data[i];
+        const unsigned char transition = VTS_TRANSITIONS[current_vts_mode][
+            VTS_BYTE_CLASSES[(unsigned char)c]];
+        const VTSMode next_vts_mode = (VTSMode)(transition & 0x0F);
+        bool is_operation_successful = true;
+        switch ((VTSAction)(transition >> 4)) {
+            case VTSACTION_PRINT: {
+                *write_pointer++ = c;
+                break;
+            }
+            case VTSACTION_EXECUTE: {
+                if ((c == LINEFEED) || (c == FORMFEED)) {
+                    *write_pointer++ = LINEFEED;
+                } else if (c == HTAB) {
+                    *write_pointer++ = c;
+                }
+                break;
+            }
+            case VTSACTION_OSC_PUT: {
+                if ((mark_collector != NULL)
+                 && mark_collector->is_collecting
+                ) {
+                    is_operation_successful =
+                        append_to_mark_payload(mark_collector, c);
+                }
+                break;
+            }
+            case VTSACTION_PARAM: {
+                if (style_collector != NULL) {
+                    put_sgr_parameter(style_collector, c);
+                }
+                break;
+            }
+            case VTSACTION_CSI_DISPATCH: {
+                if ((style_collector != NULL) && (c == SMALL_M)) {
+                    is_operation_successful = apply_sgr_parameters(
+                        style_collector,
+                        (size_t)(write_pointer - write_buffer->data));
+                }
+                break;
+            }
+            case VTSACTION_NONE: {
+                break;
+            }
+        }
+        if (is_operation_successful && (next_vts_mode != current_vts_mode)) {
+            if ((style_collector != NULL)
+             && (next_vts_mode == VTSMODE_CSI_ENTRY)
+            ) {
+                style_collector->parameter_count = 0;
+                style_collector->parameters[0] = 0;
+            }
+            if (mark_collector != NULL) {
+                if (next_vts_mode == VTSMODE_OSC_STRING) {
+                    mark_collector->payload.data_length = 0;
+                    mark_collector->is_collecting = true;
+                } else if ((current_vts_mode == VTSMODE_OSC_STRING)
+                        && mark_collector->is_collecting
+                ) {
+                    is_operation_successful = finalize_mark(mark_collector,
+                        (size_t)(write_pointer - write_buffer->data));
+                }
+            }
+            *vts_mode = current_vts_mode = next_vts_mode;
+        }
+        if (!is_operation_successful) {
+            return false;
+        }
+    }
+    *write_pointer = '\0';
+    *data_length = write_buffer->data_length =
+        (size_t)(write_pointer - write_buffer->data);
+    return true;
+}
+
+void unflag_twspaces(
+    bool *is_vts_flags, const char *const read_pointer, size_t read_length
+) {
+    static const char HTAB = '\x09';
+    static const char SPACE = '\x20';
+    for (size_t k = 1; k <= read_length; k++) {
+        if (!*(is_vts_flags - k)) {
+            break;
+        }
+        if ((*(read_pointer - k) == SPACE) || (*(read_pointer - k) == HTAB)) {
+            *(is_vts_flags - k) = 0;
+        }
+    }
+}
+
+bool append_to_mark_payload(
+    ConPTYMarkCollector *mark_collector, char c
+) {
+    if (mark_collector->payload.data_length >= MAX_MARK_PAYLOAD_SIZE) {
+        mark_collector->is_collecting = false;
+        return true;
+    }
+    if (!extend_iobuffer(&mark_collector->payload, 1)) {
+        return false;
+    }
+    mark_collector->payload.data[mark_collector->payload.data_length++] = c;
+    mark_collector->payload.data[mark_collector->payload.data_length] = '\0';
+    return true;
+}
+
+bool finalize_mark(
+    ConPTYMarkCollector *mark_collector, size_t output_offset
+) {
+    mark_collector->is_collecting = false;
+    const char *const payload = mark_collector->payload.data;
+    const size_t payload_length = mark_collector->payload.data_length;
+    if ((strncmp(payload, "0;", 2) != 0) && (strncmp(payload, "2;", 2) != 0)
+     && (strncmp(payload, "133;", 4) != 0)
+    ) {
+        return true;
+    }
+    ConPTYIOBuffer *records = &mark_collector->records;
+    if (!extend_iobuffer(records, (2 * sizeof(size_t)) + payload_length)) {
+        return false;
+    }
+    memcpy(&records->data[records->data_length], &output_offset,
+        sizeof(size_t));
+    records->data_length += sizeof(size_t);
+    memcpy(&records->data[records->data_length], &payload_length,
+        sizeof(size_t));
+    records->data_length += sizeof(size_t);
+    memcpy(&records->data[records->data_length], payload, payload_length);
+    records->data_length += payload_length;
+    return true;
+}
+
+bool extend_write_data_buffer(
+    ConPTYIOBuffer *write_buffer, char **write_pointer,
+    size_t *write_data_length,
+    const size_t *const additional_size
+) {
+    const size_t write_offset = *write_pointer - write_buffer->data;
+    *write_data_length += *additional_size;
+    write_buffer->data_length = 0;
+    if (!extend_iobuffer(write_buffer, *write_data_length)) {
+        return false;
+    }
+    *write_pointer = write_buffer->data + write_offset;
+    return true;
+}
+
+bool seek_line_buffer_column(
+    ConPTYIOBuffer *line_buffer, size_t column
+) {
+    static const char SPACE = '\x20';
+    size_t k = 0;
+    size_t current_column = 0;
+    while (k != line_buffer->data_length) {
+        if ((line_buffer->data[k] & 0xC0) != 0x80) {
+            if (current_column == column) {
+                break;
+            }
+            current_column++;
+        }
+        k++;
+    }
+    if (current_column < column) {
+        const size_t padding_length = column - current_column;
+        if (!extend_iobuffer(line_buffer, padding_length)) {
+            return false;
+        }
+        memset(&line_buffer->data[line_buffer->data_length], SPACE,
+                padding_length);
+        line_buffer->data_length += padding_length;
+        line_buffer->data[line_buffer->data_length] = '\0';
+        k = line_buffer->data_length;
+    }
+    line_buffer->cursor_position = k;
+    return true;
+}
+
+bool put_into_line_buffer(ConPTYIOBuffer *line_buffer, char data) {
+    const size_t k = line_buffer->cursor_position;
+    if ((k == line_buffer->data_length) || ((data & 0xC0) == 0x80)) {
+        if ((line_buffer->data_length + 1) == line_buffer->max_size) {
+            if (!extend_iobuffer(line_buffer, 100)) {
+                return false;
+            }
+        }
+        memmove(&line_buffer->data[k + 1], &line_buffer->data[k],
+                line_buffer->data_length - k + 1);
+        line_buffer->data_length++;
+    } else {
+        size_t overwritten_length = 1;
+        while (((k + overwritten_length) != line_buffer->data_length)
+            && ((line_buffer->data[k + overwritten_length] & 0xC0) == 0x80)
+        ) {
+            overwritten_length++;
+        }
+        if (overwritten_length != 1) {
+            memmove(&line_buffer->data[k + 1],
+                    &line_buffer->data[k + overwritten_length],
+                    line_buffer->data_length - k - overwritten_length + 1);
+            line_buffer->data_length -= overwritten_length - 1;
+        }
+    }
+    line_buffer->data[k] = data;
+    line_buffer->cursor_position++;
+    return true;
+}
+
+bool erase_in_line_buffer(
+    ConPTYIOBuffer *line_buffer, int erase_mode, size_t column
+) {
+    static const char SPACE = '\x20';
+    const size_t k = line_buffer->cursor_position;
+    if (erase_mode == 0) {
+        line_buffer->data_length = k;
+        line_buffer->data[k] = '\0';
+    } else if (erase_mode == 1) {
+        memmove(&line_buffer->data[column], &line_buffer->data[k],
+                line_buffer->data_length - k + 1);
+        memset(&line_buffer->data[0], SPACE, column);
+        line_buffer->data_length -= k - column;
+        line_buffer->cursor_position = column;
+    } else {
+        line_buffer->data_length = 0;
+        line_buffer->data[0] = '\0';
+        return seek_line_buffer_column(line_buffer, column);
+    }
+    return true;
+}
+
+bool flush_line_buffer(
+    ConPTYIOBuffer *line_buffer, ConPTYIOBuffer *write_buffer,
+    char **write_pointer, size_t *write_data_length
+) {
+    static const char HTAB = '\x09';
+    static const char LINEFEED = '\x0A';
+    static const char SPACE = '\x20';
+    size_t line_length = line_buffer->data_length;
+    while ((line_length != 0)
+        && ((line_buffer->data[line_length - 1] == SPACE)
+         || (line_buffer->data[line_length - 1] == HTAB))
+    ) {
+        line_length--;
+    }
+    const size_t used_length = *write_pointer - write_buffer->data;
+    const size_t required_length = used_length + line_length + 2;
+    if (required_length > *write_data_length) {
+        const size_t additional_size = required_length - *write_data_length;
+        if (!extend_write_data_buffer(write_buffer, write_pointer,
+                write_data_length, &additional_size)
+        ) {
+            return false;
+        }
+    }
+    memcpy(*write_pointer, line_buffer->data, line_length);
+    *write_pointer += line_length;
+    *(*write_pointer)++ = LINEFEED;
+    line_buffer->data_length = 0;
+    line_buffer->cursor_position = 0;
+    line_buffer->data[0] = '\0';
+    return true;
+}
+
+bool reopen_last_line(
+    ConPTYIOBuffer *line_buffer, ConPTYIOBuffer *write_buffer,
+    char **write_pointer, size_t last_line_start
+) {
+    /* The line runs up to, but not including, its line feed */
+    const size_t line_length = (size_t)(*write_pointer - write_buffer->data)
+                             - last_line_start - 1;
+    line_buffer->data_length = 0;
+    if (!extend_iobuffer(line_buffer, line_length)) {
+        return false;
+    }
+    memcpy(line_buffer->data, &write_buffer->data[last_line_start],
+        line_length);
+    line_buffer->data_length = line_length;
+    line_buffer->cursor_position = 0;
+    line_buffer->data[line_length] = '\0';
+    *write_pointer = &write_buffer->data[last_line_start];
+    return true;
+}
+
+bool append_to_twspaces_buffer(
+    ConPTYIOBuffer *twspaces_buffer, char data
+) {
+    if ((twspaces_buffer->data_length + 1) ==
+            twspaces_buffer->max_size
+    ) {
+        if (!extend_iobuffer(twspaces_buffer, 100)) {
+            return false;
+        }
+    }
+    twspaces_buffer->data[
+        twspaces_buffer->cursor_position++] = data;
+    twspaces_buffer->data[
+        twspaces_buffer->cursor_position] = '\0';
+    twspaces_buffer->data_length++;
+    return true;
+}
+
+void discard_twspaces_parameters(ConPTYIOBuffer *twspaces_buffer) {
+    static const char HTAB = '\x09';
+    static const char SPACE = '\x20';
+    size_t k = twspaces_buffer->cursor_position;
+    while (--k != (size_t)-1) {
+        if ((twspaces_buffer->data[k] == SPACE)
+         || (twspaces_buffer->data[k] == HTAB)) {
+            break;
+        }
+        twspaces_buffer->data_length--;
+    }
+    twspaces_buffer->cursor_position = twspaces_buffer->data_length;
+    twspaces_buffer->data[twspaces_buffer->data_length] = '\0';
+}
+
+int get_number_from_twspaces_buffer(ConPTYIOBuffer *twspaces_buffer) {
+    static const char HTAB = '\x09';
+    static const char SPACE = '\x20';
+    static const char SEMICOLON = '\x3B';
+    char num_str[10] = {0};
+    size_t m = 9;
+    size_t k = twspaces_buffer->cursor_position;
+    while (--k != (size_t)-1) {
+        if ((twspaces_buffer->data[k] == SPACE)
+         || (twspaces_buffer->data[k] == HTAB)
+         || (twspaces_buffer->data[k] == SEMICOLON)) {
+            break;
+        }
+        twspaces_buffer->data_length--;
+        if (m != 0) {
+            num_str[--m] = twspaces_buffer->data[k];
+        }
+    }
+    int num = 0;
+    if (m != 9) {
+        twspaces_buffer->cursor_position =
+            twspaces_buffer->data_length;
+        twspaces_buffer->data[
+            twspaces_buffer->cursor_position] = '\0';
+        num = atoi(&num_str[m]);
+    }
+    return num;
+}
+
+size_t count_twspaces(const ConPTYIOBuffer *twspaces_buffer) {
+    static const char HTAB = '\x09';
+    static const char SPACE = '\x20';
+    size_t count = 0;
+    for (size_t k = 0; k != twspaces_buffer->data_length; k++) {
+        if ((twspaces_buffer->data[k] == SPACE)
+         || (twspaces_buffer->data[k] == HTAB)) {
+            count++;
+        }
+    }
+    return count;
+}
+
+bool shift_twspaces_parameters(ConPTYIOBuffer *twspaces_buffer) {
+    static const char HTAB = '\x09';
+    static const char SPACE = '\x20';
+    static const char SEMICOLON = '\x3B';
+    /* Only the parameter before the last ';' is ever needed */
+    char *const data = twspaces_buffer->data;
+    size_t param_start = twspaces_buffer->data_length;
+    while ((param_start != 0) && (data[param_start - 1] != SEMICOLON)
+        && (data[param_start - 1] != SPACE) && (data[param_start - 1] != HTAB)
+    ) {
+        param_start--;
+    }
+    size_t params_start = param_start;
+    while ((params_start != 0) && (data[params_start - 1] != SPACE)
+        && (data[params_start - 1] != HTAB)
+    ) {
+        params_start--;
+    }
+    const size_t param_length = twspaces_buffer->data_length - param_start;
+    memmove(&data[params_start], &data[param_start], param_length);
+    twspaces_buffer->data_length = params_start + param_length;
+    twspaces_buffer->cursor_position = twspaces_buffer->data_length;
+    return append_to_twspaces_buffer(twspaces_buffer, SEMICOLON);
+}
+
+bool get_row_number_from_twspaces_buffer(
+    ConPTYIOBuffer *twspaces_buffer, size_t *row_number
+) {
+    static const char SEMICOLON = '\x3B';
+    if ((twspaces_buffer->data_length == 0)
+     || (twspaces_buffer->data[twspaces_buffer->data_length - 1]
+            != SEMICOLON)
+    ) {
+        return false;
+    }
+    twspaces_buffer->data_length--;
+    twspaces_buffer->cursor_position = twspaces_buffer->data_length;
+    twspaces_buffer->data[twspaces_buffer->data_length] = '\0';
+    *row_number = (size_t)get_number_from_twspaces_buffer(twspaces_buffer);
+    return true;
+}
+
+void reset_style_collector(ConPTYStyleCollector *style_collector) {
+    style_collector->records.data_length = 0;
+    style_collector->parameter_count = 0;
+    style_collector->parameters[0] = 0;
+    style_collector->foreground = 0;
+    style_collector->background = 0;
+    style_collector->flags = 0;
+}
+
+bool begin_style_records(ConPTYStyleCollector *style_collector) {
+    style_collector->records.data_length = 0;
+    return record_style(style_collector, 0);
+}
+
+void clamp_style_records(
+    ConPTYStyleCollector *style_collector, size_t output_offset
+) {
+    ConPTYIOBuffer *records = &style_collector->records;
+    for (size_t k = 0; k != records->data_length;
+            k += sizeof(ConPTYStyleRecord)) {
+        ConPTYStyleRecord record;
+        memcpy(&record, &records->data[k], sizeof(ConPTYStyleRecord));
+        if (record.output_offset > output_offset) {
+            record.output_offset = output_offset;
+            memcpy(&records->data[k], &record, sizeof(ConPTYStyleRecord));
+        }
+    }
+}
+
+void put_sgr_parameter(ConPTYStyleCollector *style_collector, char c) {
+    static const char SEMICOLON = '\x3B';
+    unsigned int *parameter =
+        &style_collector->parameters[style_collector->parameter_count];
+    if (c == SEMICOLON) {
+        if (style_collector->parameter_count + 1 < MAX_SGR_PARAMETERS) {
+            style_collector->parameters[
+                ++style_collector->parameter_count] = 0;
+        }
+    } else if (*parameter < MAX_SGR_PARAMETER_VALUE) {
+        *parameter = (*parameter * 10) + (unsigned int)(c - '0');
+    }
+}
+
+/*
+    Colors are 0 for the default color, STYLE_COLOR_INDEXED plus the
+    256-color palette index, or STYLE_COLOR_RGB plus 0xRRGGBB.
+*/
+bool apply_sgr_parameters(
+    ConPTYStyleCollector *style_collector, size_t output_offset
+) {
+    const unsigned int *const parameters = style_collector->parameters;
+    const size_t parameter_count = style_collector->parameter_count + 1;
+    unsigned int foreground = style_collector->foreground;
+    unsigned int background = style_collector->background;
+    unsigned int flags = style_collector->flags;
+    for (size_t i = 0; i < parameter_count; i++) {
+        const unsigned int parameter = parameters[i];
+        if (parameter == 0) {
+            foreground = background = flags = 0;
+        } else if (parameter == 1) {
+            flags |= STYLE_FLAG_BOLD;
+        } else if (parameter == 2) {
+            flags |= STYLE_FLAG_FAINT;
+        } else if (parameter == 3) {
+            flags |= STYLE_FLAG_ITALIC;
+        } else if (parameter == 4) {
+            flags |= STYLE_FLAG_UNDERLINE;
+        } else if ((parameter == 5) || (parameter == 6)) {
+            flags |= STYLE_FLAG_BLINK;
+        } else if (parameter == 7) {
+            flags |= STYLE_FLAG_INVERSE;
+        } else if (parameter == 8) {
+            flags |= STYLE_FLAG_HIDDEN;
+        } else if (parameter == 9) {
+            flags |= STYLE_FLAG_STRIKETHROUGH;
+        } else if (parameter == 22) {
+            flags &= ~(STYLE_FLAG_BOLD | STYLE_FLAG_FAINT);
+        } else if (parameter == 23) {
+            flags &= ~STYLE_FLAG_ITALIC;
+        } else if (parameter == 24) {
+            flags &= ~STYLE_FLAG_UNDERLINE;
+        } else if (parameter == 25) {
+            flags &= ~STYLE_FLAG_BLINK;
+        } else if (parameter == 27) {
+            flags &= ~STYLE_FLAG_INVERSE;
+        } else if (parameter == 28) {
+            flags &= ~STYLE_FLAG_HIDDEN;
+        } else if (parameter == 29) {
+            flags &= ~STYLE_FLAG_STRIKETHROUGH;
+        } else if ((parameter >= 30) && (parameter <= 37)) {
+            foreground = STYLE_COLOR_INDEXED + (parameter - 30);
+        } else if ((parameter >= 40) && (parameter <= 47)) {
+            background = STYLE_COLOR_INDEXED + (parameter - 40);
+        } else if ((parameter >= 90) && (parameter <= 97)) {
+            foreground = STYLE_COLOR_INDEXED + (parameter - 90 + 8);
+        } else if ((parameter >= 100) && (parameter <= 107)) {
+            background = STYLE_COLOR_INDEXED + (parameter - 100 + 8);
+        } else if (parameter == 39) {
+            foreground = 0;
+        } else if (parameter == 49) {
+            background = 0;
+        } else if ((parameter == 38) || (parameter == 48)) {
+            unsigned int color = 0;
+            if ((i + 2 < parameter_count) && (parameters[i + 1] == 5)) {
+                color = STYLE_COLOR_INDEXED + (parameters[i + 2] & 0xFF);
+                i += 2;
+            } else if ((i + 4 < parameter_count) && (parameters[i + 1] == 2)) {
+                color = STYLE_COLOR_RGB
+                      + ((parameters[i + 2] & 0xFF) << 16)
+                      + ((parameters[i + 3] & 0xFF) << 8)
+                      + (parameters[i + 4] & 0xFF);
+                i += 4;
+            } else {
+                break;
+            }
+            if (parameter == 38) {
+                foreground = color;
+            } else {
+                background = color;
+            }
+        }
+    }
+    style_collector->parameter_count = 0;
+    style_collector->parameters[0] = 0;
+    style_collector->foreground = foreground;
+    style_collector->background = background;
+    style_collector->flags = flags;
+
+    return record_style(style_collector, output_offset);
+}
+
+static bool record_style(
+    ConPTYStyleCollector *style_collector, size_t output_offset
+) {
+    ConPTYIOBuffer *records = &style_collector->records;
+    const ConPTYStyleRecord record = {
+        output_offset, style_collector->foreground,
+        style_collector->background, style_collector->flags
+    };
+    ConPTYStyleRecord last_record;
+    if (records->data_length != 0) {
+        memcpy(&last_record,
+            &records->data[records->data_length - sizeof(ConPTYStyleRecord)],
+            sizeof(ConPTYStyleRecord));
+        if (last_record.output_offset == output_offset) {
+            records->data_length -= sizeof(ConPTYStyleRecord);
+        }
+    }
+    if (records->data_length != 0) {
+        memcpy(&last_record,
+            &records->data[records->data_length - sizeof(ConPTYStyleRecord)],
+            sizeof(ConPTYStyleRecord));
+        if ((last_record.foreground == record.foreground)
+         && (last_record.background == record.background)
+         && (last_record.flags == record.flags)
+        ) {
+            return true;
+        }
+    }
+    if (!extend_iobuffer(records, sizeof(ConPTYStyleRecord))) {
+        return false;
+    }
+    memcpy(&records->data[records->data_length], &record,
+        sizeof(ConPTYStyleRecord));
+    records->data_length += sizeof(ConPTYStyleRecord);
+    return true;
+}
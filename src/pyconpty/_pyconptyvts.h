@@ -0,0 +1,173 @@
+/*
+This code is part of the PyConPTY python package.
+PyConPTY: A Python wrapper for the ConPTY (Windows Pseudo-console) API
+Copyright (C) 2025  MELWYN FRANCIS CARLO
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+For queries, contact me at: melwyncarlo@gmail.com
+*/
+
+#ifndef PYCONPTYVTS_H
+#define PYCONPTYVTS_H
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <stdbool.h>
+#include <stdatomic.h>
+
+#ifndef _MSC_VER
+#define __pragma(x)
+#endif
+
+/*
+    The VTS parser and stripper, shared by the _pyconptyinternal and
+    _pyconptystripper extensions. Nothing in here depends upon Windows
+    or upon Python, so that the stripper also builds on other platforms.
+*/
+
+/* ######################################################################## */
+/*  PUBLIC DATA TYPES                                                       */
+/* ######################################################################## */
+
+typedef enum {
+    VTSMODE_NONE,
+    VTSMODE_ESCAPE,
+    VTSMODE_ESCAPE_INTERMEDIATE,
+    VTSMODE_CSI_ENTRY,
+    VTSMODE_CSI_PARAM,
+    VTSMODE_CSI_INTERMEDIATE,
+    VTSMODE_CSI_IGNORE,
+    VTSMODE_DCS_ENTRY,
+    VTSMODE_DCS_PARAM,
+    VTSMODE_DCS_INTERMEDIATE,
+    VTSMODE_DCS_PASSTHROUGH,
+    VTSMODE_DCS_IGNORE,
+    VTSMODE_OSC_STRING,
+    VTSMODE_SOS_PM_APC_STRING,
+    VTSMODE_COUNT
+} VTSMode;
+
+typedef enum {
+    VTSACTION_NONE,
+    VTSACTION_PRINT,
+    VTSACTION_EXECUTE,
+    VTSACTION_PARAM,
+    VTSACTION_CSI_DISPATCH,
+    VTSACTION_OSC_PUT
+} VTSAction;
+
+typedef enum {
+    VTSCLASS_C0,
+    VTSCLASS_BELL,
+    VTSCLASS_CANCEL,
+    VTSCLASS_ESCAPE,
+    VTSCLASS_INTERMEDIATE,
+    VTSCLASS_DIGIT,
+    VTSCLASS_COLON,
+    VTSCLASS_SEMICOLON,
+    VTSCLASS_PRIVATE,
+    VTSCLASS_FINAL,
+    VTSCLASS_DCS,
+    VTSCLASS_CSI,
+    VTSCLASS_OSC,
+    VTSCLASS_SOS,
+    VTSCLASS_DEL,
+    VTSCLASS_HIGH,
+    VTSCLASS_COUNT
+} VTSClass;
+
+typedef struct {
+    char *data;
+    size_t cursor_position;
+    size_t data_length;
+    size_t max_size;
+    /* The (re)allocation counter of the buffer's owner, if any */
+    atomic_size_t *allocation_count;
+} ConPTYIOBuffer;
+
+/* Bytes Alignment Padding */
+__pragma(warning(disable: 4820))
+typedef struct {
+    ConPTYIOBuffer payload;
+    ConPTYIOBuffer records;
+    bool is_collecting;
+} ConPTYMarkCollector;
+__pragma(warning(default: 4820))
+
+#define MAX_SGR_PARAMETERS 16
+
+/* Bytes Alignment Padding */
+__pragma(warning(disable: 4820))
+typedef struct {
+    size_t output_offset;
+    unsigned int foreground;
+    unsigned int background;
+    unsigned int flags;
+} ConPTYStyleRecord;
+
+typedef struct {
+    ConPTYIOBuffer records;
+    unsigned int parameters[MAX_SGR_PARAMETERS];
+    size_t parameter_count;
+    unsigned int foreground;
+    unsigned int background;
+    unsigned int flags;
+} ConPTYStyleCollector;
+__pragma(warning(default: 4820))
+
+/* ######################################################################## */
+/*  FUNCTION DECLARATIONS                                                   */
+/* ######################################################################## */
+
+bool initialize_iobuffer(ConPTYIOBuffer*, bool);
+bool initialize_counted_iobuffer(ConPTYIOBuffer*, atomic_size_t*);
+void free_iobuffer(ConPTYIOBuffer*);
+char *reallocate_iobuffer_data(atomic_size_t*, char*, size_t);
+bool extend_iobuffer(ConPTYIOBuffer*, size_t);
+size_t get_utf8_boundary(const char* const, size_t);
+size_t get_utf8_byte_count(const char* const, size_t, size_t);
+bool strip_vts_from_data(const char* const, size_t*, ConPTYIOBuffer*,
+                         VTSMode*, ConPTYIOBuffer*, const short* const,
+                         const short* const, size_t*, size_t*, bool*,
+                         ConPTYIOBuffer*, size_t*, ConPTYMarkCollector*,
+                         ConPTYStyleCollector*);
+bool plain_strip_vts_from_data(const char* const, size_t*, ConPTYIOBuffer*,
+                               VTSMode*, ConPTYMarkCollector*,
+                               ConPTYStyleCollector*);
+void unflag_twspaces(bool*, const char* const, size_t);
+bool append_to_mark_payload(ConPTYMarkCollector*, char);
+bool finalize_mark(ConPTYMarkCollector*, size_t);
+bool extend_write_data_buffer(ConPTYIOBuffer*, char**, size_t*,
+                              const size_t* const);
+bool seek_line_buffer_column(ConPTYIOBuffer*, size_t);
+bool put_into_line_buffer(ConPTYIOBuffer*, char);
+bool erase_in_line_buffer(ConPTYIOBuffer*, int, size_t);
+bool flush_line_buffer(ConPTYIOBuffer*, ConPTYIOBuffer*, char**, size_t*);
+bool reopen_last_line(ConPTYIOBuffer*, ConPTYIOBuffer*, char**, size_t);
+bool append_to_twspaces_buffer(ConPTYIOBuffer*, char);
+void discard_twspaces_parameters(ConPTYIOBuffer*);
+int get_number_from_twspaces_buffer(ConPTYIOBuffer*);
+size_t count_twspaces(const ConPTYIOBuffer*);
+bool shift_twspaces_parameters(ConPTYIOBuffer*);
+bool get_row_number_from_twspaces_buffer(ConPTYIOBuffer*, size_t*);
+VTSAction advance_vts_mode(VTSMode*, char);
+void reset_style_collector(ConPTYStyleCollector*);
+bool begin_style_records(ConPTYStyleCollector*);
+void clamp_style_records(ConPTYStyleCollector*, size_t);
+void put_sgr_parameter(ConPTYStyleCollector*, char);
+bool apply_sgr_parameters(ConPTYStyleCollector*, size_t);
+
+#endif
@@ -44,17 +44,22 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 For queries, contact me at: melwyncarlo@gmail.com
 ------------------------------------------------------------------------------
 
-This package contains only one module: pyconpty
 This module contains only one class: ConPTY
 
 Usage: from pyconpty import ConPTY
 """
 
 import time
+import array
+import codecs
 import platform
+import tempfile
+import threading
+import contextlib
 import dataclasses
-from enum import Enum
+from enum import Enum, IntFlag
 import _pyconptyinternal
+from .vtstripper import VTStripper
 
 
 class ConPTY:
@@ -131,6 +136,31 @@ class ConPTY:
             (37)  STRIPINPUT_NOT_A_BOOLEAN
             (38)  TRAILINGSPACES_NOT_A_BOOLEAN
             (39)  CONSOLE_MODE_ERROR
+            (40)  COLLAPSELINES_NOT_A_BOOLEAN
+            (41)  ANSWERQUERIES_NOT_A_BOOLEAN
+            (42)  QUIETPERIOD_NOT_A_NUMBER
+            (43)  EAGERSTRIP_NOT_A_BOOLEAN
+            (44)  KEEPRAWDATA_NOT_A_BOOLEAN
+            (45)  STRIPLEVEL_NOT_A_STRIPLEVEL
+            (46)  STYLES_UNAVAILABLE
+            (47)  COUNTCHARS_NOT_A_BOOLEAN
+            (48)  SOURCE_NOT_A_FILE_OR_ITERABLE
+            (49)  CHUNKSIZE_NOT_AN_INT
+            (50)  BACKGROUND_NOT_A_BOOLEAN
+            (51)  PROGRESS_NOT_CALLABLE
+            (52)  INPUT_ALREADY_STREAMING
+            (53)  PACED_NOT_A_BOOLEAN
+            (54)  PACEFOR_NOT_A_NUMBER
+            (55)  SIGNAL_NOT_A_SIGNAL
+            (56)  DISCARD_NOT_A_BOOLEAN
+            (57)  OUTPUTPIPESIZE_NOT_AN_INT
+            (58)  INPUTPIPESIZE_NOT_AN_INT
+            (59)  ADAPTIVEREADS_NOT_A_BOOLEAN
+            (60)  HIGHWATERMARK_NOT_AN_INT
+            (61)  LOWWATERMARK_NOT_AN_INT
+            (62)  SPILLSIZE_NOT_AN_INT
+            (63)  SPILLDIR_NOT_A_STRING
+            (64)  CAPTURE_IO_ERROR
         """
 
         # fmt: off
@@ -174,8 +204,123 @@ class ConPTY:
         STRIPINPUT_NOT_A_BOOLEAN        = 37
         TRAILINGSPACES_NOT_A_BOOLEAN    = 38
         CONSOLE_MODE_ERROR              = 39
+        COLLAPSELINES_NOT_A_BOOLEAN     = 40
+        ANSWERQUERIES_NOT_A_BOOLEAN     = 41
+        QUIETPERIOD_NOT_A_NUMBER        = 42
+        EAGERSTRIP_NOT_A_BOOLEAN        = 43
+        KEEPRAWDATA_NOT_A_BOOLEAN       = 44
+        STRIPLEVEL_NOT_A_STRIPLEVEL     = 45
+        STYLES_UNAVAILABLE              = 46
+        COUNTCHARS_NOT_A_BOOLEAN        = 47
+        SOURCE_NOT_A_FILE_OR_ITERABLE   = 48
+        CHUNKSIZE_NOT_AN_INT            = 49
+        BACKGROUND_NOT_A_BOOLEAN        = 50
+        PROGRESS_NOT_CALLABLE           = 51
+        INPUT_ALREADY_STREAMING         = 52
+        PACED_NOT_A_BOOLEAN             = 53
+        PACEFOR_NOT_A_NUMBER            = 54
+        SIGNAL_NOT_A_SIGNAL             = 55
+        DISCARD_NOT_A_BOOLEAN           = 56
+        OUTPUTPIPESIZE_NOT_AN_INT       = 57
+        INPUTPIPESIZE_NOT_AN_INT        = 58
+        ADAPTIVEREADS_NOT_A_BOOLEAN     = 59
+        HIGHWATERMARK_NOT_AN_INT        = 60
+        LOWWATERMARK_NOT_AN_INT         = 61
+        SPILLSIZE_NOT_AN_INT            = 62
+        SPILLDIR_NOT_A_STRING           = 63
+        CAPTURE_IO_ERROR                = 64
         # fmt: on
 
+    class Event(Enum):
+        """
+        This is an enumeration class enumerating a list of terminal events.
+
+        Constants:
+        ----------------------------------------------------------------------
+             (0)  TITLE
+             (1)  PROMPT_START
+             (2)  COMMAND_START
+             (3)  COMMAND_EXECUTED
+             (4)  COMMAND_FINISHED
+        """
+
+        # fmt: off
+        TITLE                           = 0
+        PROMPT_START                    = 1
+        COMMAND_START                   = 2
+        COMMAND_EXECUTED                = 3
+        COMMAND_FINISHED                = 4
+        # fmt: on
+
+    class Signal(Enum):
+        """
+        This is an enumeration class enumerating a list of console signals.
+
+        Constants:
+        ----------------------------------------------------------------------
+             (0)  CTRL_C
+             (1)  CTRL_BREAK
+        """
+
+        # fmt: off
+        CTRL_C                          = 0
+        CTRL_BREAK                      = 1
+        # fmt: on
+
+    # Shared with the standalone VTStripper.
+    StripLevel = VTStripper.StripLevel
+
+    class StyleFlag(IntFlag):
+        """
+        This is a flag class enumerating the text attributes of a style run.
+
+        Constants:
+        ----------------------------------------------------------------------
+             (1)  BOLD
+             (2)  FAINT
+             (4)  ITALIC
+             (8)  UNDERLINE
+            (16)  BLINK
+            (32)  INVERSE
+            (64)  HIDDEN
+           (128)  STRIKETHROUGH
+        """
+
+        # fmt: off
+        BOLD                            = 0x01
+        FAINT                           = 0x02
+        ITALIC                          = 0x04
+        UNDERLINE                       = 0x08
+        BLINK                           = 0x10
+        INVERSE                         = 0x20
+        HIDDEN                          = 0x40
+        STRIKETHROUGH                   = 0x80
+        # fmt: on
+
+    # A style run's color is 0 (default), STYLE_COLOR_INDEXED plus a
+    # 256-color palette index, or STYLE_COLOR_RGB plus 0xRRGGBB.
+    STYLE_COLOR_INDEXED = 0x01000000
+    STYLE_COLOR_RGB = 0x02000000
+
+    # The defaults, types, and type errors of the options of `run` and
+    # `runandwait` that follow `postenddelay`, in the order checked.
+    # fmt: off
+    __RUN_OPTIONS = {
+        "collapselines":  (False, (bool,), Error.COLLAPSELINES_NOT_A_BOOLEAN),
+        "answerqueries":  (True,  (bool,), Error.ANSWERQUERIES_NOT_A_BOOLEAN),
+        "quietperiod":    (0, (int, float), Error.QUIETPERIOD_NOT_A_NUMBER),
+        "eagerstrip":     (False, (bool,), Error.EAGERSTRIP_NOT_A_BOOLEAN),
+        "keeprawdata":    (False, (bool,), Error.KEEPRAWDATA_NOT_A_BOOLEAN),
+        "striplevel":     (StripLevel.LAYOUT, (StripLevel,),
+                           Error.STRIPLEVEL_NOT_A_STRIPLEVEL),
+        "outputpipesize": (65536, (int,), Error.OUTPUTPIPESIZE_NOT_AN_INT),
+        "inputpipesize":  (8192,  (int,), Error.INPUTPIPESIZE_NOT_AN_INT),
+        "adaptivereads":  (False, (bool,), Error.ADAPTIVEREADS_NOT_A_BOOLEAN),
+        "highwatermark":  (0,  (int,), Error.HIGHWATERMARK_NOT_AN_INT),
+        "lowwatermark":   (-1, (int,), Error.LOWWATERMARK_NOT_AN_INT),
+    }
+    # fmt: on
+
     @dataclasses.dataclass
     class PrivateStatus:
         """Private Class! Do NOT use!"""
@@ -202,6 +347,25 @@ class ConPTY:
         twspaces: str
         cursorx: int
         cursory: int
+        linebuffer: bytes | None
+        linecolumn: int
+
+    @dataclasses.dataclass
+    class PrivateMarkup:
+        """Private Class! Do NOT use!"""
+
+        events: list
+        outputoffset: int
+        styleable: bool
+        styleruns: array.array | None
+
+    @dataclasses.dataclass
+    class PrivateInput:
+        """Private Class! Do NOT use!"""
+
+        batch: list | None
+        stream: threading.Thread | None
+        error: "ConPTY.Error"
 
     @property
     def isinitialized(self):
@@ -274,7 +438,18 @@ class ConPTY:
             TIMEDELTA_NOT_A_NUMBER, INTERNALTIMEDELTA_NOT_A_NUMBER,
             POSTENDDELAY_NOT_A_NUMBER, RAWDATA_NOT_A_BOOLEAN,
             STRIPINPUT_NOT_A_BOOLEAN, TRAILINGSPACES_NOT_A_BOOLEAN,
-            CONSOLE_MODE_ERROR
+            CONSOLE_MODE_ERROR, COLLAPSELINES_NOT_A_BOOLEAN,
+            ANSWERQUERIES_NOT_A_BOOLEAN, QUIETPERIOD_NOT_A_NUMBER,
+            EAGERSTRIP_NOT_A_BOOLEAN, KEEPRAWDATA_NOT_A_BOOLEAN,
+            STRIPLEVEL_NOT_A_STRIPLEVEL, STYLES_UNAVAILABLE,
+            COUNTCHARS_NOT_A_BOOLEAN, SOURCE_NOT_A_FILE_OR_ITERABLE,
+            CHUNKSIZE_NOT_AN_INT, BACKGROUND_NOT_A_BOOLEAN,
+            PROGRESS_NOT_CALLABLE, INPUT_ALREADY_STREAMING,
+            PACED_NOT_A_BOOLEAN, PACEFOR_NOT_A_NUMBER, SIGNAL_NOT_A_SIGNAL,
+            DISCARD_NOT_A_BOOLEAN, OUTPUTPIPESIZE_NOT_AN_INT,
+            INPUTPIPESIZE_NOT_AN_INT, ADAPTIVEREADS_NOT_A_BOOLEAN,
+            HIGHWATERMARK_NOT_AN_INT, LOWWATERMARK_NOT_AN_INT,
+            SPILLSIZE_NOT_AN_INT, SPILLDIR_NOT_A_STRING, CAPTURE_IO_ERROR
         """
         error_code = self.__status.lasterror
         if self.__status.islasterrorreserved:
@@ -399,6 +574,127 @@ class ConPTY:
             return False
         return self.__pyconptyinternal.get_is_input_sent()
 
+    @property
+    def inputstreaming(self):
+        """
+        An attribute/property of the class ConPTY.
+
+        Once the streaming is over, `lasterror` indicates why it stopped
+        early, if it did.
+
+        Returns:
+        ----------------------------------------------------------------------
+            inputstreaming  (bool) :  Indicates whether or not a `writefrom`
+                                      call is still streaming input in the
+                                      background.
+
+        Possible Errors:
+        ----------------------------------------------------------------------
+            NONE, CONPTY_UNINITIALIZED, NO_PROCESS_FOUND, DATA_NOT_A_STRING,
+            WRITE_INTERNAL_ERROR
+        """
+        self.__status.lasterror = ConPTY.Error.NONE
+        self.__status.islasterrorreserved = False
+        if not self.isinitialized:
+            return False
+        inputstream = self.__input.stream
+        is_input_streaming = inputstream is not None and inputstream.is_alive()
+        if inputstream is not None and not is_input_streaming:
+            self.__status.lasterror = self.__input.error
+        return is_input_streaming
+
+    @property
+    def allocationcount(self):
+        """
+        An attribute/property of the class ConPTY.
+
+        The count covers every buffer owned by this ConPTY instance, and it
+        only ever increases. Buffers are reused across reads and writes, so
+        this count remains unchanged once they have grown to fit the output
+        of a process.
+
+        Returns:
+        ----------------------------------------------------------------------
+            allocationcount  (int or None) :  Indicates the number of buffer
+                                              (re)allocations made so far.
+
+        Possible Errors:
+        ----------------------------------------------------------------------
+            NONE, CONPTY_UNINITIALIZED
+        """
+        self.__status.lasterror = ConPTY.Error.NONE
+        self.__status.islasterrorreserved = False
+        if not self.isinitialized:
+            return None
+        return self.__pyconptyinternal.get_allocation_count()
+
+    @property
+    def readchunksize(self):
+        """
+        An attribute/property of the class ConPTY.
+
+        With `adaptivereads = True`, this grows and shrinks with the output
+        volume. Otherwise, it is the `outputpipesize` of the last run.
+
+        Returns:
+        ----------------------------------------------------------------------
+            readchunksize  (int or None) :  Indicates the maximum number of
+                                            bytes of output read at a time.
+
+        Possible Errors:
+        ----------------------------------------------------------------------
+            NONE, CONPTY_UNINITIALIZED
+        """
+        self.__status.lasterror = ConPTY.Error.NONE
+        self.__status.islasterrorreserved = False
+        if not self.isinitialized:
+            return None
+        return self.__pyconptyinternal.get_read_chunk_size()
+
+    @property
+    def bufferedbytes(self):
+        """
+        An attribute/property of the class ConPTY.
+
+        Consoles with the most unread output may be read first, as those
+        that reach their `highwatermark` pause their programs.
+
+        Returns:
+        ----------------------------------------------------------------------
+            bufferedbytes  (int or None) :  Indicates the number of bytes of
+                                            output waiting to be read.
+
+        Possible Errors:
+        ----------------------------------------------------------------------
+            NONE, CONPTY_UNINITIALIZED
+        """
+        self.__status.lasterror = ConPTY.Error.NONE
+        self.__status.islasterrorreserved = False
+        if not self.isinitialized:
+            return None
+        return self.__pyconptyinternal.get_buffered_byte_count()
+
+    @property
+    def outputpaused(self):
+        """
+        An attribute/property of the class ConPTY.
+
+        Returns:
+        ----------------------------------------------------------------------
+            outputpaused  (bool) :  Indicates whether or not reading output
+                                    from the program is paused, because the
+                                    unread output reached `highwatermark`.
+
+        Possible Errors:
+        ----------------------------------------------------------------------
+            NONE, CONPTY_UNINITIALIZED
+        """
+        self.__status.lasterror = ConPTY.Error.NONE
+        self.__status.islasterrorreserved = False
+        if not self.isinitialized:
+            return False
+        return self.__pyconptyinternal.get_is_output_paused()
+
     @property
     def exitcode(self):
         """
@@ -508,6 +804,19 @@ class ConPTY:
             twspaces="",
             cursorx=1,
             cursory=1,
+            linebuffer=None,
+            linecolumn=0,
+        )
+        self.__markup = ConPTY.PrivateMarkup(
+            events=[],
+            outputoffset=0,
+            styleable=True,
+            styleruns=None,
+        )
+        self.__input = ConPTY.PrivateInput(
+            batch=None,
+            stream=None,
+            error=ConPTY.Error.NONE,
         )
         if platform.system().lower().strip() != "windows":  # pragma: no cover
             self.__status.lasterror = ConPTY.Error.NOT_WINDOWS_OS
@@ -544,6 +853,7 @@ class ConPTY:
         stripinput=False,
         internaltimedelta=100,
         postenddelay=-1,
+        **options,
     ):
         """
          What do I do?
@@ -572,9 +882,77 @@ class ConPTY:
         `postenddelay >= 1` implies that the value is in milliseconds.
         `postenddelay = -1` is equivalent to `postenddelay = SIZE_4B_MAX`.
 
+        `0 <= quietperiod < 1` implies that the value is in seconds,
+                               truncated to 3 decimal places.
+        `quietperiod >= 1` implies that the value is in milliseconds.
+        `quietperiod = -1` implies that the value is learned from the gaps
+                           between consecutive chunks of output.
+
          Set `internaltimedelta = 0` with caution.
          Set `postenddelay > -1` with caution.
 
+        `quietperiod > 0` ends the `postenddelay` early, as soon as no output
+         has been received for `quietperiod` after the program ends, so that
+         short programs finish quickly without losing any trailing output.
+        `quietperiod = 0` disables this, and only `postenddelay` is used.
+
+        `collapselines = True` applies carriage return, backspace and in-line
+         cursor movement/erasure while stripping, so that only the final
+         state of each line (e.g., of a progress bar) is read. A redraw of
+         the line above, one line up, is applied as well, while that line is
+         yet to be read. An incomplete last line is then held back until it
+         is completed by a new-line character, or until the pseudo-console
+         closes.
+         It has no effect on raw data.
+
+        `answerqueries = True` automatically answers the device status
+         (`ESC[5n`), cursor position (`ESC[6n`), primary device attributes
+         (`ESC[c`) and window size (`ESC[18t`) queries found in the output,
+         using the tracked cursor position and the pseudo-console's size,
+         so that programs waiting on them do not stall.
+
+        `eagerstrip = True` strips the output as soon as it arrives, in the
+         background, instead of when it is read, so that reading it merely
+         hands over the already-stripped text. In this mode, `trailingspaces`
+         has no effect on reading, and trailing spaces and tabs at the very
+         end of the output are discarded. `rawdata` has no effect either,
+         unless `keeprawdata = True`.
+
+        `keeprawdata = True` implies `eagerstrip = True`, and also keeps the
+         raw output, so that reading with `rawdata = True` returns the raw
+         output, and reading with `rawdata = False` returns the stripped
+         output. Both are derived from the same output, and each is consumed
+         independently of the other.
+
+        `striplevel` selects how much of the layout is reconstructed while
+         stripping, so that reading pays only for the fidelity it needs.
+        `striplevel = StripLevel.PLAIN` only removes the VTS's, without
+         tracking the cursor, and without turning cursor movements into
+         spaces and new-line characters.
+        `striplevel = StripLevel.LAYOUT` also tracks the cursor, and turns
+         cursor movements into spaces and new-line characters.
+        `striplevel = StripLevel.SCREEN` is the same as `collapselines = True`.
+
+        `outputpipesize` and `inputpipesize` set the sizes of the pipes that
+         carry the output and the input, in bytes. Output is read, and input
+         is written, one pipe-sized chunk at a time. Larger pipes suit
+         high-volume programs, while smaller ones save memory across many
+         mostly idle pseudo-consoles.
+        `adaptivereads = True` starts reading output in small chunks, and
+         doubles the chunk size whenever reads keep coming back full, up to
+         the larger of `outputpipesize` and 4 MiB. It halves it again after
+         a long run of mostly empty reads.
+
+        `highwatermark` bounds the output that is kept unread, in bytes. Once
+         this many bytes are waiting to be read, no more output is taken from
+         the pipe, so that the program blocks upon its next writes, until the
+         unread output falls to `lowwatermark` bytes.
+        `highwatermark = 0` keeps all of the output, however large.
+        `lowwatermark = -1` sets it to half of `highwatermark`.
+         Note that a single read may exceed `highwatermark` by up to one
+         chunk, and that, with `keeprawdata = True`, both views count towards
+         it until they are read.
+
          Note that `stripinput` is attempted, and its success not guaranteed.
          Note that, 1e-3 seconds = 0.001 seconds = 1 millisecond.
          Note that, SIZE_4B_MAX = 4294967295 = 4 Bytes = 32 Bits.
@@ -605,6 +983,43 @@ class ConPTY:
                                            but just before shutting down the
                                            I/O buffer and releasing resources.
                                            (default = -1)
+            6.  collapselines     (bool) : Whether or not overwritten line
+                                           contents are collapsed into their
+                                           final state. (default = False)
+            7.  answerqueries     (bool) : Whether or not terminal queries
+                                           in the output are automatically
+                                           answered. (default = True)
+            8.  quietperiod              : Amount of time, in seconds or
+               (int or float)              milliseconds, (-1 to SIZE_4B_MAX)
+                                           without any output, after a
+                                           program ends, that ends the
+                                           `postenddelay`. (default = 0)
+            9.  eagerstrip        (bool) : Whether or not the output is
+                                           stripped as soon as it arrives.
+                                           (default = False)
+           10.  keeprawdata       (bool) : Whether or not the raw output is
+                                           kept alongside the stripped output.
+                                           (default = False)
+           11.  striplevel               : How much of the layout is
+               (ConPTY.StripLevel)         reconstructed while stripping.
+                                           (default = StripLevel.LAYOUT)
+           12.  outputpipesize     (int) : Size of the output pipe, in bytes.
+                                           (4096 to 16777216)
+                                           (default = 65536)
+           13.  inputpipesize      (int) : Size of the input pipe, in bytes.
+                                           (4096 to 16777216)
+                                           (default = 8192)
+           14.  adaptivereads     (bool) : Whether or not the output read
+                                           size adapts to the output volume.
+                                           (default = False)
+           15.  highwatermark      (int) : Unread output size, in bytes, at
+                                           which reading the pipe pauses.
+                                           (0 to SIZE_4B_MAX)
+                                           (default = 0)
+           16.  lowwatermark       (int) : Unread output size, in bytes, at
+                                           which reading the pipe resumes.
+                                           (-1 to `highwatermark`)
+                                           (default = -1)
 
          Returns:
          ---------------------------------------------------------------------
@@ -620,14 +1035,20 @@ class ConPTY:
             NONE, CONPTY_UNINITIALIZED, COMMAND_NOT_A_STRING,
             WAITFOR_NOT_A_NUMBER, TIMEDELTA_NOT_A_NUMBER,
             STRIPINPUT_NOT_A_BOOLEAN, INTERNALTIMEDELTA_NOT_A_NUMBER,
-            POSTENDDELAY_NOT_A_NUMBER, COMMAND_LONGER_THAN_32766_CHARS,
-            RUN_INTERNAL_ERROR, RUN_PROGRAM_NOT_FOUND,
-            RUN_PROGRAM_ACCESS_DENIED, RUN_PROGRAM_NAME_TOO_LONG,
-            RUN_PROGRAM_ERROR
+            POSTENDDELAY_NOT_A_NUMBER, COLLAPSELINES_NOT_A_BOOLEAN,
+            ANSWERQUERIES_NOT_A_BOOLEAN, QUIETPERIOD_NOT_A_NUMBER,
+            EAGERSTRIP_NOT_A_BOOLEAN, KEEPRAWDATA_NOT_A_BOOLEAN,
+            STRIPLEVEL_NOT_A_STRIPLEVEL, OUTPUTPIPESIZE_NOT_AN_INT,
+            INPUTPIPESIZE_NOT_AN_INT, ADAPTIVEREADS_NOT_A_BOOLEAN,
+            HIGHWATERMARK_NOT_AN_INT, LOWWATERMARK_NOT_AN_INT,
+            COMMAND_LONGER_THAN_32766_CHARS, RUN_INTERNAL_ERROR,
+            RUN_PROGRAM_NOT_FOUND, RUN_PROGRAM_ACCESS_DENIED,
+            RUN_PROGRAM_NAME_TOO_LONG, RUN_PROGRAM_ERROR
         """
         self.__status.islasterrorreserved = False
         self.__status.exitcode = None
         self.__status.forcedtermination = False
+        options = self.__get_run_options(options)
         if not self.__check_run_arguments(
             command,
             waitfor=waitfor,
@@ -635,7 +1056,7 @@ class ConPTY:
             stripinput=stripinput,
             internaltimedelta=internaltimedelta,
             postenddelay=postenddelay,
-        ):
+        ) or not self.__check_run_options(options):
             return False
         if waitfor <= -2:
             wait_till_console_dies = False
@@ -644,22 +1065,41 @@ class ConPTY:
         if waitfor < 0:
             waitfor = ConPTY.SIZE_4B_MAX
         timedelta = max(timedelta, 1e-3)
-        if internaltimedelta != 0 and internaltimedelta <= 1e-3:
-            internaltimedelta = 1
-        elif internaltimedelta < 1:
-            internaltimedelta *= 1000
-        internaltimedelta = int(internaltimedelta)
-        if postenddelay < 0:
-            postenddelay = ConPTY.SIZE_4B_MAX
-        elif postenddelay != 0 and postenddelay <= 1e-3:
-            postenddelay = 1
-        elif postenddelay < 1:
-            postenddelay *= 1000
-        postenddelay = int(postenddelay)
+        options = self.__adjust_run_options(options)
         self.__internal.vtsmode = 0
         self.__internal.twspaces = ""
+        self.__internal.linebuffer = (
+            b""
+            if options["collapselines"] and not options["eagerstrip"]
+            else None
+        )
+        self.__internal.linecolumn = 0
+        self.__markup.events = []
+        self.__markup.outputoffset = 0
+        self.__markup.styleable = (
+            not options["eagerstrip"] and not options["collapselines"]
+        )
         run_result = self.__pyconptyinternal.run_process(
-            command, stripinput, internaltimedelta, postenddelay
+            command,
+            stripinput,
+            self.__to_milliseconds(internaltimedelta),
+            (
+                ConPTY.SIZE_4B_MAX
+                if postenddelay < 0
+                else self.__to_milliseconds(postenddelay)
+            ),
+            options["answerqueries"],
+            options["quietperiod"],
+            options["eagerstrip"],
+            options["collapselines"],
+            options["keeprawdata"],
+            options["striplevel"] == ConPTY.StripLevel.PLAIN
+            and not options["collapselines"],
+            options["outputpipesize"],
+            options["inputpipesize"],
+            options["adaptivereads"],
+            options["highwatermark"],
+            options["lowwatermark"],
         )
         errors_list = [
             ConPTY.Error.NONE,
@@ -691,6 +1131,7 @@ class ConPTY:
         stripinput=False,
         internaltimedelta=100,
         postenddelay=-1,
+        **options,
     ):
         """
          What do I do?
@@ -708,9 +1149,77 @@ class ConPTY:
         `postenddelay >= 1` implies that the value is in milliseconds.
         `postenddelay = -1` is equivalent to `postenddelay = SIZE_4B_MAX`.
 
+        `0 <= quietperiod < 1` implies that the value is in seconds,
+                               truncated to 3 decimal places.
+        `quietperiod >= 1` implies that the value is in milliseconds.
+        `quietperiod = -1` implies that the value is learned from the gaps
+                           between consecutive chunks of output.
+
          Set `internaltimedelta = 0` with caution.
          Set `postenddelay > -1` with caution.
 
+        `quietperiod > 0` ends the `postenddelay` early, as soon as no output
+         has been received for `quietperiod` after the program ends, so that
+         short programs finish quickly without losing any trailing output.
+        `quietperiod = 0` disables this, and only `postenddelay` is used.
+
+        `collapselines = True` applies carriage return, backspace and in-line
+         cursor movement/erasure while stripping, so that only the final
+         state of each line (e.g., of a progress bar) is read. A redraw of
+         the line above, one line up, is applied as well, while that line is
+         yet to be read. An incomplete last line is then held back until it
+         is completed by a new-line character, or until the pseudo-console
+         closes.
+         It has no effect on raw data.
+
+        `answerqueries = True` automatically answers the device status
+         (`ESC[5n`), cursor position (`ESC[6n`), primary device attributes
+         (`ESC[c`) and window size (`ESC[18t`) queries found in the output,
+         using the tracked cursor position and the pseudo-console's size,
+         so that programs waiting on them do not stall.
+
+        `eagerstrip = True` strips the output as soon as it arrives, in the
+         background, instead of when it is read, so that reading it merely
+         hands over the already-stripped text. In this mode, `trailingspaces`
+         has no effect on reading, and trailing spaces and tabs at the very
+         end of the output are discarded. `rawdata` has no effect either,
+         unless `keeprawdata = True`.
+
+        `keeprawdata = True` implies `eagerstrip = True`, and also keeps the
+         raw output, so that reading with `rawdata = True` returns the raw
+         output, and reading with `rawdata = False` returns the stripped
+         output. Both are derived from the same output, and each is consumed
+         independently of the other.
+
+        `striplevel` selects how much of the layout is reconstructed while
+         stripping, so that reading pays only for the fidelity it needs.
+        `striplevel = StripLevel.PLAIN` only removes the VTS's, without
+         tracking the cursor, and without turning cursor movements into
+         spaces and new-line characters.
+        `striplevel = StripLevel.LAYOUT` also tracks the cursor, and turns
+         cursor movements into spaces and new-line characters.
+        `striplevel = StripLevel.SCREEN` is the same as `collapselines = True`.
+
+        `outputpipesize` and `inputpipesize` set the sizes of the pipes that
+         carry the output and the input, in bytes. Output is read, and input
+         is written, one pipe-sized chunk at a time. Larger pipes suit
+         high-volume programs, while smaller ones save memory across many
+         mostly idle pseudo-consoles.
+        `adaptivereads = True` starts reading output in small chunks, and
+         doubles the chunk size whenever reads keep coming back full, up to
+         the larger of `outputpipesize` and 4 MiB. It halves it again after
+         a long run of mostly empty reads.
+
+        `highwatermark` bounds the output that is kept unread, in bytes. Once
+         this many bytes are waiting to be read, no more output is taken from
+         the pipe, so that the program blocks upon its next writes, until the
+         unread output falls to `lowwatermark` bytes.
+        `highwatermark = 0` keeps all of the output, however large.
+        `lowwatermark = -1` sets it to half of `highwatermark`.
+         Note that a single read may exceed `highwatermark` by up to one
+         chunk, and that, with `keeprawdata = True`, both views count towards
+         it until they are read.
+
          Note that `stripinput` is attempted, and its success not guaranteed.
          Note that, 1e-3 seconds = 0.001 seconds = 1 millisecond.
          Note that, SIZE_4B_MAX = 4294967295 = 4 Bytes = 32 Bits.
@@ -738,6 +1247,43 @@ class ConPTY:
                                            but just before shutting down the
                                            I/O buffer and releasing resources.
                                            (default = -1)
+            6.  collapselines     (bool) : Whether or not overwritten line
+                                           contents are collapsed into their
+                                           final state. (default = False)
+            7.  answerqueries     (bool) : Whether or not terminal queries
+                                           in the output are automatically
+                                           answered. (default = True)
+            8.  quietperiod              : Amount of time, in seconds or
+               (int or float)              milliseconds, (-1 to SIZE_4B_MAX)
+                                           without any output, after a
+                                           program ends, that ends the
+                                           `postenddelay`. (default = 0)
+            9.  eagerstrip        (bool) : Whether or not the output is
+                                           stripped as soon as it arrives.
+                                           (default = False)
+           10.  keeprawdata       (bool) : Whether or not the raw output is
+                                           kept alongside the stripped output.
+                                           (default = False)
+           11.  striplevel               : How much of the layout is
+               (ConPTY.StripLevel)         reconstructed while stripping.
+                                           (default = StripLevel.LAYOUT)
+           12.  outputpipesize     (int) : Size of the output pipe, in bytes.
+                                           (4096 to 16777216)
+                                           (default = 65536)
+           13.  inputpipesize      (int) : Size of the input pipe, in bytes.
+                                           (4096 to 16777216)
+                                           (default = 8192)
+           14.  adaptivereads     (bool) : Whether or not the output read
+                                           size adapts to the output volume.
+                                           (default = False)
+           15.  highwatermark      (int) : Unread output size, in bytes, at
+                                           which reading the pipe pauses.
+                                           (0 to SIZE_4B_MAX)
+                                           (default = 0)
+           16.  lowwatermark       (int) : Unread output size, in bytes, at
+                                           which reading the pipe resumes.
+                                           (-1 to `highwatermark`)
+                                           (default = -1)
 
          Returns:
          ---------------------------------------------------------------------
@@ -753,18 +1299,28 @@ class ConPTY:
             NONE, CONPTY_UNINITIALIZED, COMMAND_NOT_A_STRING,
             WAITFOR_NOT_A_NUMBER, TIMEDELTA_NOT_A_NUMBER,
             STRIPINPUT_NOT_A_BOOLEAN, INTERNALTIMEDELTA_NOT_A_NUMBER,
-            POSTENDDELAY_NOT_A_NUMBER, COMMAND_LONGER_THAN_32766_CHARS,
-            RUN_INTERNAL_ERROR, RUN_PROGRAM_NOT_FOUND,
-            RUN_PROGRAM_ACCESS_DENIED, RUN_PROGRAM_NAME_TOO_LONG,
-            RUN_PROGRAM_ERROR
+            POSTENDDELAY_NOT_A_NUMBER, COLLAPSELINES_NOT_A_BOOLEAN,
+            ANSWERQUERIES_NOT_A_BOOLEAN, QUIETPERIOD_NOT_A_NUMBER,
+            EAGERSTRIP_NOT_A_BOOLEAN, KEEPRAWDATA_NOT_A_BOOLEAN,
+            STRIPLEVEL_NOT_A_STRIPLEVEL, OUTPUTPIPESIZE_NOT_AN_INT,
+            INPUTPIPESIZE_NOT_AN_INT, ADAPTIVEREADS_NOT_A_BOOLEAN,
+            HIGHWATERMARK_NOT_AN_INT, LOWWATERMARK_NOT_AN_INT,
+            COMMAND_LONGER_THAN_32766_CHARS, RUN_INTERNAL_ERROR,
+            RUN_PROGRAM_NOT_FOUND, RUN_PROGRAM_ACCESS_DENIED,
+            RUN_PROGRAM_NAME_TOO_LONG, RUN_PROGRAM_ERROR
         """
         return self.run(
             command,
-            waitfor=(-2 if postenddelay == -1 else -1),
+            waitfor=(
+                -2
+                if postenddelay == -1 and options.get("quietperiod", 0) == 0
+                else -1
+            ),
             timedelta=timedelta,
             stripinput=stripinput,
             internaltimedelta=internaltimedelta,
             postenddelay=postenddelay,
+            **options,
         )
 
     def waittocomplete(self, *, waitfor=-2, timedelta=0.1):
@@ -842,6 +1398,90 @@ class ConPTY:
         self.__status.lasterror = ConPTY.Error.NONE
         return True
 
+    def waitquiet(self, quietperiod=100, *, waitfor=-1, timedelta=0.1):
+        """
+         What do I do?
+         ---------------------------------------------------------------------
+         I wait for the output of a command or program to go quiet, i.e.,
+         for no output to be received for `quietperiod`.
+
+        `0 <= quietperiod < 1` implies that the value is in seconds,
+                               truncated to 3 decimal places.
+        `quietperiod >= 1` implies that the value is in milliseconds.
+        `quietperiod = -1` implies that the value is learned from the gaps
+                           between consecutive chunks of output.
+
+        `waitfor =  0` sets it to `waitfor = 1e-3`.
+        `waitfor =  0` indicates non-blocking mode.
+        `waitfor =  N` indicates blocking for N seconds.
+        `waitfor = -1` indicates indefinite blocking mode.
+
+        `timedelta` governs the accuracy of the `waitfor` time period.
+
+         The output is always quiet once the pseudo-console has closed.
+
+         Note that, 1e-3 seconds = 0.001 seconds = 1 millisecond.
+         Note that out-of-bounds values are automatically capped to their
+         respective limits.
+
+         Parameters:
+         ---------------------------------------------------------------------
+            1.  quietperiod              : Amount of time, in seconds or
+               (int or float)              milliseconds, (-1 to SIZE_4B_MAX)
+                                           without any output. (default = 100)
+            2.  waitfor   (int or float) : Maximum amount of time, in seconds,
+                                           to wait for the output to go quiet.
+                                           (1e-3 to SIZE_4B_MAX)
+                                           (default = -1)
+            3.  timedelta (int or float) : Time lapse (delay), in seconds,
+                                           (1e-3 to SIZE_4B_MAX) between any
+                                           two consecutive output-status
+                                           checks. (default = 0.1)
+
+         Returns:
+         ---------------------------------------------------------------------
+            Result  (bool) :  Indicates whether or not the output went quiet
+                              within the `waitfor` time period.
+
+                              If `False`, then check the `lasterror` class
+                              attribute/property to determine the reason for
+                              failure. (`NONE` indicates a timeout)
+
+         Possible Errors:
+         ---------------------------------------------------------------------
+            NONE, CONPTY_UNINITIALIZED, NO_PROCESS_FOUND,
+            QUIETPERIOD_NOT_A_NUMBER, WAITFOR_NOT_A_NUMBER,
+            TIMEDELTA_NOT_A_NUMBER
+        """
+        self.__status.islasterrorreserved = False
+        if not self.__is_process_initialised_and_running(pasttense=True):
+            return False
+        if type(quietperiod) not in (int, float):
+            self.__status.lasterror = ConPTY.Error.QUIETPERIOD_NOT_A_NUMBER
+            return False
+        if type(waitfor) not in (int, float):
+            self.__status.lasterror = ConPTY.Error.WAITFOR_NOT_A_NUMBER
+            return False
+        if type(timedelta) not in (int, float):
+            self.__status.lasterror = ConPTY.Error.TIMEDELTA_NOT_A_NUMBER
+            return False
+        if quietperiod < 0:
+            quietperiod = ConPTY.SIZE_4B_MAX
+        elif quietperiod <= 1e-3:
+            quietperiod = 1
+        elif quietperiod < 1:
+            quietperiod *= 1000
+        quietperiod = min(int(quietperiod), ConPTY.SIZE_4B_MAX)
+        waitfor, timedelta = self.__adjust_wait_time_input(waitfor, timedelta)
+        self.__status.lasterror = ConPTY.Error.NONE
+        total_time_elapsed = 0
+        while not self.__pyconptyinternal.get_is_output_quiet(quietperiod):
+            if total_time_elapsed >= waitfor:
+                return False
+            time.sleep(timedelta)
+            total_time_elapsed += timedelta
+        return True
+
     def resize(self, width, height):
         """
         What do I do?
@@ -851,6 +1491,12 @@ class ConPTY:
         It is recommended to resize either at initialization (best),
         or after the read buffer has been cleared.
 
+        While a program is running, resizes requested within 100 milliseconds
+        of each other are coalesced, and only the latest size is applied.
+        The screen repaint that follows a resize is left out of the output;
+        only the first frame, within half a second of the resize, is taken
+        as that repaint, so new output that repeats a line still comes out.
+
         Note that out-of-bounds values are automatically capped to their
         respective limits.
 
@@ -895,6 +1541,7 @@ class ConPTY:
         timedelta=0.1,
         trailingspaces=False,
         min_bytes_to_read=0,
+        countchars=False,
     ):
         """
          What do I do?
@@ -910,6 +1557,8 @@ class ConPTY:
         `max_bytes_to_read = -1` returns the entire saved buffer.
 
          For ASCII/ANSI encoding, 1 byte = 1 character.
+         For UTF-8 encoding, N counts bytes, unless `countchars = True`.
+         Either way, a multibyte character is never split between reads.
 
         `waitfor =  0` sets it to `waitfor = 1e-3`.
         `waitfor =  0` indicates non-blocking mode.
@@ -950,6 +1599,9 @@ class ConPTY:
             6.  min_bytes_to_read  (int) : Minimum number of output bytes to
                                            read (0 to SIZE_4B_MAX) from the
                                            saved buffer. (default = 0)
+            7.  countchars        (bool) : Whether `max_bytes_to_read` counts
+                                           characters rather than bytes.
+                                           (default = False)
 
          Returns:
          ---------------------------------------------------------------------
@@ -962,7 +1614,8 @@ class ConPTY:
             MAX_READ_BYTES_NOT_AN_INT, WAITFOR_NOT_A_NUMBER,
             RAWDATA_NOT_A_BOOLEAN, TIMEDELTA_NOT_A_NUMBER,
             TRAILINGSPACES_NOT_A_BOOLEAN, MIN_READ_BYTES_NOT_AN_INT,
-            MIN_MORE_THAN_MAX_READ_BYTES, READ_ERROR
+            MIN_MORE_THAN_MAX_READ_BYTES, COUNTCHARS_NOT_A_BOOLEAN,
+            READ_ERROR
         """
         self.__status.islasterrorreserved = False
         if not self.__check_read_arguments(
@@ -972,6 +1625,7 @@ class ConPTY:
             timedelta=timedelta,
             trailingspaces=trailingspaces,
             min_bytes_to_read=min_bytes_to_read,
+            countchars=countchars,
         ):
             return None
         if max_bytes_to_read < 0:
@@ -980,42 +1634,33 @@ class ConPTY:
         if min_bytes_to_read > max_bytes_to_read:
             self.__status.lasterror = ConPTY.Error.MIN_MORE_THAN_MAX_READ_BYTES
             return None
-        if waitfor < 0:
-            waitfor = ConPTY.SIZE_4B_MAX
-        elif waitfor < 1e-3:
-            waitfor = 1e-3
-        timedelta = max(timedelta, 1e-3)
+        waitfor, timedelta = self.__adjust_wait_time_input(waitfor, timedelta)
         total_data = ""
         if max_bytes_to_read:
             total_time_elapsed = 0
             while total_time_elapsed < waitfor:
-                result_bundle = self.__pyconptyinternal.read_from_buffer(
+                result_bundle = self.__read_from_buffer(
                     False,
                     0,
                     max_bytes_to_read,
                     rawdata,
-                    self.__internal.vtsmode,
-                    self.__internal.twspaces,
-                    self.__internal.cursorx,
-                    self.__internal.cursory,
+                    styled=self.__markup.styleruns is not None,
+                    countchars=countchars,
                 )
                 if result_bundle is None:  # pragma: no cover
-                    self.__internal.vtsmode = 0
-                    self.__internal.twspaces = ""
-                    self.__status.lasterror = ConPTY.Error.READ_ERROR
                     return None
-                data = ""
-                if result_bundle != 0:
-                    (
-                        data,
-                        self.__internal.vtsmode,
-                        self.__internal.twspaces,
-                        self.__internal.cursorx,
-                        self.__internal.cursory,
-                    ) = result_bundle
+                data, marks, styleruns = result_bundle
+                if (
+                    not data or max_bytes_to_read == ConPTY.SIZE_4B_MAX
+                ) and self.__is_collapsed_line_complete(rawdata):
+                    data += self.__pop_collapsed_line(trailingspaces)
+                self.__record_events(marks, data, rawdata)
+                if styleruns and self.__markup.styleruns is not None:
+                    self.__record_style_runs(styleruns, len(total_data))
                 total_data += data
                 if trailingspaces and self.__internal.twspaces.isspace():
                     total_data += self.__internal.twspaces
+                    self.__record_events(None, self.__internal.twspaces)
                     self.__internal.twspaces = ""
                 if data:
                     if len(total_data) >= min_bytes_to_read:
@@ -1100,38 +1745,51 @@ class ConPTY:
             min_bytes_to_read=min_bytes_to_read,
         )
 
-    def readline(self, *, waitfor=0, rawdata=False, timedelta=0.1):
+    def captureoutput(
+        self,
+        *,
+        waitfor=-1,
+        rawdata=False,
+        timedelta=0.1,
+        trailingspaces=True,
+        chunksize=65536,
+        spillsize=1048576,
+        spilldir=None,
+    ):
         """
-         What do I do?
-         ---------------------------------------------------------------------
-         Read a line of output from the pseudo-console, if available, else,
-         an empty string.
-
-         If the trailing data in the saved buffer does not contain a newline
-         character:
-         - If a process is running, then that trailing data is considered
-           unavailable.
-         - If no process is running, then that trailing data is considered
-           available.
-
-        `waitfor =  0` sets it to `waitfor = 1e-3`.
-        `waitfor =  0` indicates non-blocking mode.
-        `waitfor =  N` indicates blocking for N seconds.
-        `waitfor = -1` indicates indefinite blocking mode.
-
-         Set `waitfor = -1` only if output is guaranteed.
-
-        `timedelta` governs the accuracy of the `waitfor` time period.
-
-         Note that, 1e-3 seconds = 0.001 seconds = 1 millisecond.
-         Note that out-of-bounds values are automatically capped to their
-         respective limits.
+        What do I do?
+        ----------------------------------------------------------------------
+        Capture the entire stream of output from the pseudo-console into a
+        file-like object, one chunk at a time, so that very large outputs
+        need not be held in memory as a whole.
+
+        The output is kept in memory up to `spillsize` bytes, and it is
+        then moved to a temporary file in `spilldir` (or in the default
+        temporary directory), which is deleted once closed.
+        `spillsize = 0` writes it straight to the temporary file.
+
+        The capture is a binary file object, holding UTF-8 encoded text,
+        rewound to its start. Iterate over it to get the lines one at a
+        time, or, once it has spilled to disk, map it into memory with
+        `mmap.mmap(capture.fileno(), 0, access=mmap.ACCESS_READ)`.
+        Close it once done.
+
+        `waitfor = -1` captures until the pseudo-console closes, or until
+        the process ends and its output falls silent for `timedelta`.
+        `waitfor = N` also stops the capture once N seconds have passed
+        since it began, even while output is still incoming.
+
+        Note that the unread output of the pseudo-console itself grows as
+        fast as the process writes it. Run the process with a
+        `highwatermark` to bound it as well.
+        Note that, with `keeprawdata = True`, the other view is not read.
 
-         Parameters:
-         ---------------------------------------------------------------------
-            1.  waitfor   (int or float) : Minimum amount of time, in seconds,
-                                           to wait for incoming data (1e-3 to
-                                           SIZE_4B_MAX). (default = 0)
+        Parameters:
+        ----------------------------------------------------------------------
+            1.  waitfor   (int or float) : Maximum amount of time, in seconds,
+                                           to capture for, whether or not
+                                           data is incoming (1e-3 to
+                                           SIZE_4B_MAX). (default = -1)
             2.  rawdata           (bool) : Whether or not the output is in its
                                            raw format, i.e., containing
                                            Virtual Terminal Sequences, aka,
@@ -1140,14 +1798,206 @@ class ConPTY:
                                            (1e-3 to SIZE_4B_MAX) between any
                                            two consecutive read-status checks.
                                            (default = 0.1)
+            4.  trailingspaces    (bool) : Whether or not trailing whitespace
+                                           characters, if any, should be
+                                           included in the output.
+                                           (default = True)
+            5.  chunksize          (int) : Maximum number of output bytes
+                                           (1 to SIZE_4B_MAX) to read at a
+                                           time. (default = 65536)
+            6.  spillsize          (int) : Number of bytes (0 to SIZE_4B_MAX)
+                                           kept in memory before spilling to
+                                           disk. (default = 1048576)
+            7.  spilldir   (str or None) : Directory of the temporary file.
+                                           (default = None)
 
-         Returns:
-         ---------------------------------------------------------------------
-            Result  (str or None) :  Returns a line of text (string) upon
-                                     success, or None upon failure.
+        Returns:
+        ----------------------------------------------------------------------
+            Result  (file or None) :  Returns a binary file object upon
+                                      success, or None upon failure.
 
-         Possible Errors:
-         ---------------------------------------------------------------------
+        Possible Errors:
+        ----------------------------------------------------------------------
+            NONE, CONPTY_UNINITIALIZED, NO_PROCESS_FOUND,
+            WAITFOR_NOT_A_NUMBER, RAWDATA_NOT_A_BOOLEAN,
+            TIMEDELTA_NOT_A_NUMBER, TRAILINGSPACES_NOT_A_BOOLEAN,
+            CHUNKSIZE_NOT_AN_INT, SPILLSIZE_NOT_AN_INT,
+            SPILLDIR_NOT_A_STRING, CAPTURE_IO_ERROR, READ_ERROR
+        """
+        self.__status.islasterrorreserved = False
+        if not self.__check_read_arguments(
+            max_bytes_to_read=-1,
+            waitfor=waitfor,
+            rawdata=rawdata,
+            timedelta=timedelta,
+            trailingspaces=trailingspaces,
+            min_bytes_to_read=0,
+            countchars=False,
+        ) or not self.__check_captureoutput_arguments(
+            chunksize=chunksize,
+            spillsize=spillsize,
+            spilldir=spilldir,
+        ):
+            return None
+        waitfor, timedelta = self.__adjust_wait_time_input(waitfor, timedelta)
+        chunksize = max(1, min(chunksize, ConPTY.SIZE_4B_MAX))
+        spillsize = max(0, min(spillsize, ConPTY.SIZE_4B_MAX))
+        try:
+            # The capture is closed upon any failure, else handed over.
+            with contextlib.ExitStack() as capture_stack:
+                capture = capture_stack.enter_context(
+                    tempfile.SpooledTemporaryFile(
+                        max_size=spillsize, dir=spilldir
+                    )
+                )
+                if spillsize == 0:
+                    capture.rollover()
+                if not self.__capture_output(
+                    capture,
+                    waitfor=waitfor,
+                    rawdata=rawdata,
+                    timedelta=timedelta,
+                    trailingspaces=trailingspaces,
+                    chunksize=chunksize,
+                ):  # pragma: no cover
+                    return None
+                capture.seek(0)
+                capture_stack.pop_all()
+        except OSError:  # pragma: no cover
+            self.__status.lasterror = ConPTY.Error.CAPTURE_IO_ERROR
+            return None
+        self.__status.lasterror = ConPTY.Error.NONE
+        return capture
+
+    def readstyled(
+        self,
+        *,
+        max_bytes_to_read=-1,
+        waitfor=0,
+        timedelta=0.1,
+        min_bytes_to_read=0,
+        countchars=False,
+    ):
+        """
+         What do I do?
+         ---------------------------------------------------------------------
+         Read a stream of stripped output from the pseudo-console, along
+         with the text styles that its Select Graphic Rendition (SGR)
+         sequences applied, else an empty string and no style runs.
+         I behave like the `read` function otherwise.
+
+         The style runs are an `array.array("I")` of flat quintuples:
+        (start, length, foreground, background, flags), where `start` and
+        `length` count characters of the returned text.
+         Only text with a non-default style is covered by a run.
+
+         A color is 0 for the default color, `STYLE_COLOR_INDEXED` plus a
+         256-color palette index, or `STYLE_COLOR_RGB` plus 0xRRGGBB.
+         The flags are a combination of `ConPTY.StyleFlag` values.
+
+         Styles are unavailable if the process was run with `eagerstrip`,
+        `keeprawdata`, `collapselines`, or `striplevel = StripLevel.SCREEN`.
+         Styles set in the output consumed by other read functions are not
+         tracked.
+
+         Parameters:
+         ---------------------------------------------------------------------
+            1.  max_bytes_to_read  (int) : Maximum number of output bytes to
+                                           read (-1 to SIZE_4B_MAX) from the
+                                           saved buffer. (default = -1)
+            2.  waitfor   (int or float) : Minimum amount of time, in seconds,
+                                           to wait for incoming data (1e-3 to
+                                           SIZE_4B_MAX). (default = 0)
+            3.  timedelta (int or float) : Time lapse (delay), in seconds,
+                                           (1e-3 to SIZE_4B_MAX) between any
+                                           two consecutive read-status checks.
+                                           (default = 0.1)
+            4.  min_bytes_to_read  (int) : Minimum number of output bytes to
+                                           read (0 to SIZE_4B_MAX) from the
+                                           saved buffer. (default = 0)
+            5.  countchars        (bool) : Whether `max_bytes_to_read` counts
+                                           characters rather than bytes.
+                                           (default = False)
+
+         Returns:
+         ---------------------------------------------------------------------
+            Result  (tuple or None) :  Returns a (text, style runs) tuple
+                                       upon success, or None upon failure.
+
+         Possible Errors:
+         ---------------------------------------------------------------------
+            NONE, CONPTY_UNINITIALIZED, NO_PROCESS_FOUND,
+            MAX_READ_BYTES_NOT_AN_INT, WAITFOR_NOT_A_NUMBER,
+            TIMEDELTA_NOT_A_NUMBER, MIN_READ_BYTES_NOT_AN_INT,
+            MIN_MORE_THAN_MAX_READ_BYTES, STYLES_UNAVAILABLE,
+            COUNTCHARS_NOT_A_BOOLEAN, READ_ERROR
+        """
+        if not self.__markup.styleable:
+            self.__status.islasterrorreserved = False
+            self.__status.lasterror = ConPTY.Error.STYLES_UNAVAILABLE
+            return None
+        self.__markup.styleruns = array.array("I")
+        data = self.read(
+            max_bytes_to_read=max_bytes_to_read,
+            waitfor=waitfor,
+            timedelta=timedelta,
+            min_bytes_to_read=min_bytes_to_read,
+            countchars=countchars,
+        )
+        styleruns = self.__markup.styleruns
+        self.__markup.styleruns = None
+        if data is None:
+            return None
+        return data, styleruns
+
+    def readline(self, *, waitfor=0, rawdata=False, timedelta=0.1):
+        """
+         What do I do?
+         ---------------------------------------------------------------------
+         Read a line of output from the pseudo-console, if available, else,
+         an empty string.
+
+         If the trailing data in the saved buffer does not contain a newline
+         character:
+         - If a process is running, then that trailing data is considered
+           unavailable.
+         - If no process is running, then that trailing data is considered
+           available.
+
+        `waitfor =  0` sets it to `waitfor = 1e-3`.
+        `waitfor =  0` indicates non-blocking mode.
+        `waitfor =  N` indicates blocking for N seconds.
+        `waitfor = -1` indicates indefinite blocking mode.
+
+         Set `waitfor = -1` only if output is guaranteed.
+
+        `timedelta` governs the accuracy of the `waitfor` time period.
+
+         Note that, 1e-3 seconds = 0.001 seconds = 1 millisecond.
+         Note that out-of-bounds values are automatically capped to their
+         respective limits.
+
+         Parameters:
+         ---------------------------------------------------------------------
+            1.  waitfor   (int or float) : Minimum amount of time, in seconds,
+                                           to wait for incoming data (1e-3 to
+                                           SIZE_4B_MAX). (default = 0)
+            2.  rawdata           (bool) : Whether or not the output is in its
+                                           raw format, i.e., containing
+                                           Virtual Terminal Sequences, aka,
+                                           VTS. (default = False)
+            3.  timedelta (int or float) : Time lapse (delay), in seconds,
+                                           (1e-3 to SIZE_4B_MAX) between any
+                                           two consecutive read-status checks.
+                                           (default = 0.1)
+
+         Returns:
+         ---------------------------------------------------------------------
+            Result  (str or None) :  Returns a line of text (string) upon
+                                     success, or None upon failure.
+
+         Possible Errors:
+         ---------------------------------------------------------------------
             NONE, CONPTY_UNINITIALIZED, NO_PROCESS_FOUND,
             WAITFOR_NOT_A_NUMBER, RAWDATA_NOT_A_BOOLEAN,
             TIMEDELTA_NOT_A_NUMBER, READ_ERROR
@@ -1164,38 +2014,17 @@ class ConPTY:
         if type(timedelta) not in (int, float):
             self.__status.lasterror = ConPTY.Error.TIMEDELTA_NOT_A_NUMBER
             return None
-        if waitfor < 0:
-            waitfor = ConPTY.SIZE_4B_MAX
-        elif waitfor < 1e-3:
-            waitfor = 1e-3
-        timedelta = max(timedelta, 1e-3)
+        waitfor, timedelta = self.__adjust_wait_time_input(waitfor, timedelta)
         data = ""
         total_time_elapsed = 0
         while total_time_elapsed < waitfor:
-            result_bundle = self.__pyconptyinternal.read_from_buffer(
-                True,
-                1,
-                0,
-                rawdata,
-                self.__internal.vtsmode,
-                self.__internal.twspaces,
-                self.__internal.cursorx,
-                self.__internal.cursory,
-            )
+            result_bundle = self.__read_from_buffer(True, 1, 0, rawdata)
             if result_bundle is None:  # pragma: no cover
-                self.__internal.vtsmode = 0
-                self.__internal.twspaces = ""
-                self.__status.lasterror = ConPTY.Error.READ_ERROR
                 return None
-            data = ""
-            if result_bundle != 0:
-                (
-                    data,
-                    self.__internal.vtsmode,
-                    self.__internal.twspaces,
-                    self.__internal.cursorx,
-                    self.__internal.cursory,
-                ) = result_bundle
+            data, marks, _ = result_bundle
+            if not data and self.__is_collapsed_line_complete(rawdata):
+                data = self.__pop_collapsed_line(False)
+            self.__record_events(marks, data, rawdata)
             if data:
                 break
             time.sleep(timedelta)
@@ -1296,39 +2125,20 @@ class ConPTY:
         if min_lines_to_read > max_lines_to_read:
             self.__status.lasterror = ConPTY.Error.MIN_MORE_THAN_MAX_READ_LINES
             return None
-        if waitfor < 0:
-            waitfor = ConPTY.SIZE_4B_MAX
-        elif waitfor < 1e-3:
-            waitfor = 1e-3
-        timedelta = max(timedelta, 1e-3)
+        waitfor, timedelta = self.__adjust_wait_time_input(waitfor, timedelta)
         total_lines = []
         if max_lines_to_read:
             total_time_elapsed = 0
             while total_time_elapsed < waitfor:
-                result_bundle = self.__pyconptyinternal.read_from_buffer(
-                    True,
-                    max_lines_to_read,
-                    0,
-                    rawdata,
-                    self.__internal.vtsmode,
-                    self.__internal.twspaces,
-                    self.__internal.cursorx,
-                    self.__internal.cursory,
+                result_bundle = self.__read_from_buffer(
+                    True, max_lines_to_read, 0, rawdata
                 )
                 if result_bundle is None:  # pragma: no cover
-                    self.__internal.vtsmode = 0
-                    self.__internal.twspaces = ""
-                    self.__status.lasterror = ConPTY.Error.READ_ERROR
                     return None
-                lines = []
-                if result_bundle != 0:
-                    (
-                        lines,
-                        self.__internal.vtsmode,
-                        self.__internal.twspaces,
-                        self.__internal.cursorx,
-                        self.__internal.cursory,
-                    ) = result_bundle
+                lines, marks, _ = result_bundle
+                if not lines and self.__is_collapsed_line_complete(rawdata):
+                    lines = self.__pop_collapsed_line(False)
+                self.__record_events(marks, lines, rawdata)
                 if lines:
                     total_lines.extend(lines.splitlines())
                     if len(total_lines) >= min_lines_to_read:
@@ -1338,6 +2148,45 @@ class ConPTY:
         self.__status.lasterror = ConPTY.Error.NONE
         return total_lines
 
+    def getevents(self):
+        """
+        What do I do?
+        ----------------------------------------------------------------------
+        Get, and clear, the list of terminal events seen so far in the
+        stripped output of the current (or last) process.
+
+        Events are gathered from the OSC 133 shell-integration marks (prompt
+        start, command start, command executed, and command finished) and
+        the OSC 0/2 window-title sequences, which are otherwise discarded
+        while stripping. They are therefore only gathered when reading
+        with `rawdata = False`.
+
+        Each event is a tuple of `(event, offset, value)`, where `event` is a
+        `ConPTY.Event` enumeration, `offset` is the number of stripped output
+        characters read before the event (counted before any trimming done
+        by `readline()` and `readlines()`, and excluding any output read with
+        `rawdata = True`), and `value` is the title string for `TITLE`, the
+        exit code (int or None) for `COMMAND_FINISHED`, and None otherwise.
+
+        No Parameters.
+        ----------------------------------------------------------------------
+
+        Returns:
+        ----------------------------------------------------------------------
+            Result  (list or None) :  Returns a list of event tuples upon
+                                      success, or None upon failure.
+
+        Possible Errors:
+        ----------------------------------------------------------------------
+            NONE, CONPTY_UNINITIALIZED
+        """
+        self.__status.islasterrorreserved = False
+        if not self.isinitialized:
+            return None
+        events = self.__markup.events
+        self.__markup.events = []
+        return events
+
     def write(
         self, data_to_write, *, waittillsent=False, waitfor=0, timedelta=0.1
     ):
@@ -1351,6 +2200,11 @@ class ConPTY:
 
          Note that an empty string send nothing.
 
+         If no earlier input is still pending, then the input is written
+         into the pseudo-console directly, before this function returns.
+         Otherwise, or if the pseudo-console is not accepting any more
+         input, the rest is queued and sent in the background.
+
         `waitfor =  0` sets it to `waitfor = 1e-3`.
         `waitfor =  0` indicates non-blocking mode.
         `waitfor =  N` indicates blocking for N seconds.
@@ -1397,14 +2251,14 @@ class ConPTY:
             timedelta=timedelta,
         ):
             return False
-        if waitfor < 0:
-            waitfor = ConPTY.SIZE_4B_MAX
-        elif waitfor < 1e-3:
-            waitfor = 1e-3
-        timedelta = max(timedelta, 1e-3)
+        if self.__input.batch is not None:
+            self.__input.batch.append(data_to_write)
+            self.__status.lasterror = ConPTY.Error.NONE
+            return True
+        waitfor, timedelta = self.__adjust_wait_time_input(waitfor, timedelta)
         if data_to_write:
             result_code = self.__pyconptyinternal.write_to_buffer(
-                ("\r\n".join(("_" + data_to_write + "_").splitlines()))[1:-1]
+                self.__translate_newlines(data_to_write)
             )
             if result_code == 0:  # pragma: no cover
                 self.__status.lasterror = ConPTY.Error.WRITE_INTERNAL_ERROR
@@ -1552,6 +2406,8 @@ class ConPTY:
         waittillsent=False,
         waitfor=0,
         timedelta=0.1,
+        paced=False,
+        pacefor=1,
     ):
         """
          What do I do?
@@ -1561,6 +2417,13 @@ class ConPTY:
 
          Note that an empty list or empty strings within the list do nothing.
 
+         Some programs read one line at a time, and lose any input that
+         arrives before they ask for it. If paced, then each line is sent
+         only once a new line of output has arrived since the previous line
+         was sent, which is usually its echo, or else once `pacefor` seconds
+         have passed. `pacefor = -1` indicates indefinite waiting.
+         Within an `inputbatch` block, the lines are collected unpaced.
+
         `waitfor =  0` sets it to `waitfor = 1e-3`.
         `waitfor =  0` indicates non-blocking mode.
         `waitfor =  N` indicates blocking for N seconds.
@@ -1592,6 +2455,12 @@ class ConPTY:
                                            (1e-3 to SIZE_4B_MAX) between any
                                            two consecutive write-status
                                            checks. (default = 0.1)
+            5.  paced             (bool) : Whether or not to send each line
+                                           only once the previous one has
+                                           been echoed. (default = False)
+            6.  pacefor   (int or float) : Maximum amount of time, in seconds,
+                                           (-1 to SIZE_4B_MAX) to wait for the
+                                           echo of each line. (default = 1)
 
          Returns:
          ---------------------------------------------------------------------
@@ -1602,22 +2471,272 @@ class ConPTY:
             NONE, CONPTY_UNINITIALIZED, NO_PROCESS_FOUND,
             DATA_NOT_A_LIST_OF_STRINGS, WAITTILLSENT_NOT_A_BOOLEAN,
             WAITFOR_NOT_A_NUMBER, TIMEDELTA_NOT_A_NUMBER,
+            PACED_NOT_A_BOOLEAN, PACEFOR_NOT_A_NUMBER,
             WRITE_INTERNAL_ERROR, WRITE_TIMEOUT
         """
         self.__status.islasterrorreserved = False
-        if type(datalines_list_to_write) is not list:
+        if type(datalines_list_to_write) is not list or not all(
+            type(item) is str for item in datalines_list_to_write
+        ):
             self.__status.lasterror = ConPTY.Error.DATA_NOT_A_LIST_OF_STRINGS
             return False
-        if not all(type(item) is str for item in datalines_list_to_write):
-            self.__status.lasterror = ConPTY.Error.DATA_NOT_A_LIST_OF_STRINGS
+        if type(paced) is not bool:
+            self.__status.lasterror = ConPTY.Error.PACED_NOT_A_BOOLEAN
             return False
-        return self.write(
-            "\r\n".join(datalines_list_to_write) + "\r\n",
+        if type(pacefor) not in (int, float):
+            self.__status.lasterror = ConPTY.Error.PACEFOR_NOT_A_NUMBER
+            return False
+        if (
+            not paced
+            or len(datalines_list_to_write) < 2
+            or self.__input.batch is not None
+        ):
+            return self.write(
+                "\r\n".join(datalines_list_to_write) + "\r\n",
+                waittillsent=waittillsent,
+                waitfor=waitfor,
+                timedelta=timedelta,
+            )
+        if not self.__is_process_initialised_and_running():
+            return False
+        return self.__write_paced_lines(
+            datalines_list_to_write,
             waittillsent=waittillsent,
             waitfor=waitfor,
             timedelta=timedelta,
+            pacefor=pacefor,
         )
 
+    @contextlib.contextmanager
+    def inputbatch(self, *, waittillsent=False, waitfor=0, timedelta=0.1):
+        """
+         What do I do?
+         ---------------------------------------------------------------------
+         Collect the input of every `write`, `writeline`, `sendinput`, and
+         `writelines` call made within a `with` block, and send it to the
+         pseudo-console all at once, at the end of the block.
+
+         Within the block, those calls only check their arguments, and they
+         neither send nor wait, regardless of their `waittillsent` option.
+         If the block raises an exception, then the collected input is
+         discarded. Nested blocks join the outermost block.
+
+         Check the `lasterror` class attribute/property after the block to
+         determine whether the collected input was sent.
+
+        `waitfor =  0` sets it to `waitfor = 1e-3`.
+        `waitfor =  0` indicates non-blocking mode.
+        `waitfor =  N` indicates blocking for N seconds.
+        `waitfor = -1` indicates indefinite blocking mode.
+
+         Set `waitfor = -1` only if input (NOT output) is guaranteed.
+
+        `timedelta` governs the accuracy of the `waitfor` time period.
+
+         Note that, 1e-3 seconds = 0.001 seconds = 1 millisecond.
+         Note that out-of-bounds values are automatically capped to their
+         respective limits.
+
+         Parameters:
+         ---------------------------------------------------------------------
+            1.  waittillsent      (bool) : Whether or not to wait until the
+                                           collected input has truly been sent
+                                           to the requesting process.
+                                           (default = False)
+            2.  waitfor   (int or float) : Minimum amount of time, in seconds,
+                                           to wait until data has been sent.
+                                           (1e-3 to SIZE_4B_MAX) (default = 0)
+            3.  timedelta (int or float) : Time lapse (delay), in seconds,
+                                           (1e-3 to SIZE_4B_MAX) between any
+                                           two consecutive write-status
+                                           checks. (default = 0.1)
+
+         Returns:
+         ---------------------------------------------------------------------
+            Context Manager  :  Yields this ConPTY instance.
+
+         Possible Errors:
+         ---------------------------------------------------------------------
+            NONE, CONPTY_UNINITIALIZED, NO_PROCESS_FOUND,
+            WAITTILLSENT_NOT_A_BOOLEAN, WAITFOR_NOT_A_NUMBER,
+            TIMEDELTA_NOT_A_NUMBER, WRITE_INTERNAL_ERROR, WRITE_TIMEOUT
+        """
+        if self.__input.batch is not None:
+            yield self
+            return
+        self.__input.batch = []
+        try:
+            yield self
+        except BaseException:
+            self.__input.batch = None
+            raise
+        inputbatch = self.__input.batch
+        self.__input.batch = None
+        self.write(
+            "".join(inputbatch),
+            waittillsent=waittillsent,
+            waitfor=waitfor,
+            timedelta=timedelta,
+        )
+
+    def writefrom(
+        self, source, *, chunksize=8192, background=False, progress=None
+    ):
+        """
+        What do I do?
+        ----------------------------------------------------------------------
+        Stream input from a file or an iterable to the pseudo-console, one
+        chunk at a time, as fast as the process accepts it.
+
+        The source is either an object with a `read` function, such as an
+        open text or binary file, or an iterable of strings and/or bytes,
+        such as a generator. A string or bytes object is sent as a whole.
+        Bytes are decoded as UTF-8, even across chunks.
+
+        The next chunk is read only once the previous one has been sent,
+        so that no more than about one chunk is ever held in memory.
+        Large strings are sliced into chunks as well.
+
+        In the background, the streaming runs on a separate thread, and this
+        function returns at once. Check the `inputstreaming` class
+        attribute/property to determine whether it is over, and then the
+        `lasterror` class attribute/property to determine why it stopped
+        early, if it did. Streaming stops early if the process ends, or if
+        the source yields anything other than strings or bytes.
+
+        Streaming in the foreground blocks until all input has been sent,
+        or until the process ends. The `progress` function, if any, is
+        called with the number of characters sent so far, after each chunk.
+        In the background, it is called from the streaming thread.
+
+        Note that the input is not collected by `inputbatch` blocks, and
+        that other writes may interleave with it.
+
+        Parameters:
+        ----------------------------------------------------------------------
+            1.  source                   : Your file or iterable of input.
+               (file or iterable)
+            2.  chunksize          (int) : Maximum number of characters
+                                           (1 to SIZE_4B_MAX) to send at a
+                                           time. (default = 8192)
+            3.  background        (bool) : Whether or not to stream the input
+                                           on a separate thread.
+                                           (default = False)
+            4.  progress    (callable or : A function that accepts the number
+                               None)       of characters sent so far.
+                                           (default = None)
+
+        Returns:
+        ----------------------------------------------------------------------
+            Result  (bool) :  Indicates write success/failure.
+
+        Possible Errors:
+        ----------------------------------------------------------------------
+            NONE, CONPTY_UNINITIALIZED, NO_PROCESS_FOUND, DATA_NOT_A_STRING,
+            SOURCE_NOT_A_FILE_OR_ITERABLE, CHUNKSIZE_NOT_AN_INT,
+            BACKGROUND_NOT_A_BOOLEAN, PROGRESS_NOT_CALLABLE,
+            INPUT_ALREADY_STREAMING, WRITE_INTERNAL_ERROR
+        """
+        self.__status.islasterrorreserved = False
+        if not self.__check_writefrom_arguments(
+            source,
+            chunksize=chunksize,
+            background=background,
+            progress=progress,
+        ):
+            return False
+        chunksize = max(1, min(chunksize, ConPTY.SIZE_4B_MAX))
+        if background:
+            self.__input.error = ConPTY.Error.NONE
+            self.__input.stream = threading.Thread(
+                target=self.__stream_input_in_background,
+                args=(source, chunksize, progress),
+                daemon=True,
+            )
+            self.__input.stream.start()
+            self.__status.lasterror = ConPTY.Error.NONE
+            return True
+        self.__status.lasterror = self.__stream_input(
+            source, chunksize, progress
+        )
+        return self.__status.lasterror == ConPTY.Error.NONE
+
+    def sendsignal(self, signal, *, discard=False):
+        """
+        What do I do?
+        ----------------------------------------------------------------------
+        Send a Ctrl-C or Ctrl-Break signal to the pseudo-console, ahead of
+        any input that is still queued.
+
+        The signal is written into the pseudo-console before this function
+        returns, after at most one pipe-sized slice of the queued input.
+        If discarded, then the queued input is dropped instead of being sent
+        after the signal. Input still to come from a `writefrom` call in the
+        background is not affected. Signals are never collected by
+        `inputbatch` blocks.
+
+        Parameters:
+        ----------------------------------------------------------------------
+            1.  signal                   : The signal to send.
+               (ConPTY.Signal)
+            2.  discard           (bool) : Whether or not to drop the input
+                                           that has not been sent yet.
+                                           (default = False)
+
+        Returns:
+        ----------------------------------------------------------------------
+            Result  (bool) :  Indicates signal success/failure.
+
+        Possible Errors:
+        ----------------------------------------------------------------------
+            NONE, CONPTY_UNINITIALIZED, NO_PROCESS_FOUND, SIGNAL_NOT_A_SIGNAL,
+            DISCARD_NOT_A_BOOLEAN, WRITE_INTERNAL_ERROR
+        """
+        self.__status.islasterrorreserved = False
+        if not self.__is_process_initialised_and_running():
+            return False
+        if type(signal) is not ConPTY.Signal:
+            self.__status.lasterror = ConPTY.Error.SIGNAL_NOT_A_SIGNAL
+            return False
+        if type(discard) is not bool:
+            self.__status.lasterror = ConPTY.Error.DISCARD_NOT_A_BOOLEAN
+            return False
+        if signal == ConPTY.Signal.CTRL_C:
+            signal_input = "\x03"
+        else:
+            # Ctrl+Break key down and up, in the win32-input-mode encoding.
+            signal_input = "\x1b[3;70;0;1;8;1_\x1b[3;70;0;0;8;1_"
+        if not self.__pyconptyinternal.send_interrupt(signal_input, discard):
+            self.__status.lasterror = ConPTY.Error.WRITE_INTERNAL_ERROR
+            return False
+        self.__status.lasterror = ConPTY.Error.NONE
+        return True
+
+    def interrupt(self, *, discard=False):
+        """
+        What do I do?
+        ----------------------------------------------------------------------
+        Send a Ctrl-C signal to the pseudo-console, ahead of any input that
+        is still queued. I am an alias for the
+        `sendsignal(ConPTY.Signal.CTRL_C)` function.
+
+        Parameters:
+        ----------------------------------------------------------------------
+            1.  discard           (bool) : Whether or not to drop the input
+                                           that has not been sent yet.
+                                           (default = False)
+
+        Returns:
+        ----------------------------------------------------------------------
+            Result  (bool) :  Indicates signal success/failure.
+
+        Possible Errors:
+        ----------------------------------------------------------------------
+            NONE, CONPTY_UNINITIALIZED, NO_PROCESS_FOUND,
+            DISCARD_NOT_A_BOOLEAN, WRITE_INTERNAL_ERROR
+        """
+        return self.sendsignal(ConPTY.Signal.CTRL_C, discard=discard)
+
     def kill(self):
         """
         What do I do?
@@ -1753,6 +2872,14 @@ class ConPTY:
         height = max(1, min(height, 32767))
         return (width, height)
 
+    def __adjust_wait_time_input(self, waitfor, timedelta):
+        """Private Function! Do NOT use!"""
+        if waitfor < 0:
+            waitfor = ConPTY.SIZE_4B_MAX
+        elif waitfor < 1e-3:
+            waitfor = 1e-3
+        return (waitfor, max(timedelta, 1e-3))
+
     def __is_process_initialised_and_running(self, pasttense=False):
         """Private Function! Do NOT use!"""
         if not self.isinitialized:
@@ -1770,6 +2897,238 @@ class ConPTY:
             return self.isrunning
         return not self.processended
 
+    def __is_collapsed_line_complete(self, rawdata):
+        """Private Function! Do NOT use!"""
+        if rawdata or not self.__internal.linebuffer:
+            return False
+        return not self.isrunning
+
+    def __pop_collapsed_line(self, trailingspaces):
+        """Private Function! Do NOT use!"""
+        line = self.__internal.linebuffer.decode("utf-8", "replace")
+        self.__internal.linebuffer = b""
+        self.__internal.linecolumn = 0
+        return line if trailingspaces else line.rstrip(" \t")
+
+    def __read_from_buffer(
+        self,
+        linesmode,
+        max_lines_to_read,
+        max_bytes_to_read,
+        rawdata,
+        *,
+        styled=False,
+        countchars=False,
+    ):
+        """Private Function! Do NOT use!"""
+        result_bundle = self.__pyconptyinternal.read_from_buffer(
+            linesmode,
+            max_lines_to_read,
+            max_bytes_to_read,
+            rawdata,
+            self.__internal.vtsmode,
+            self.__internal.twspaces,
+            self.__internal.cursorx,
+            self.__internal.cursory,
+            self.__internal.linebuffer,
+            self.__internal.linecolumn,
+            styled,
+            countchars,
+        )
+        if result_bundle is None:  # pragma: no cover
+            self.__internal.vtsmode = 0
+            self.__internal.twspaces = ""
+            self.__internal.linecolumn = 0
+            if self.__internal.linebuffer is not None:
+                self.__internal.linebuffer = b""
+            self.__status.lasterror = ConPTY.Error.READ_ERROR
+            return None
+        if result_bundle == 0:
+            return ("", None, None)
+        (
+            data,
+            self.__internal.vtsmode,
+            self.__internal.twspaces,
+            self.__internal.cursorx,
+            self.__internal.cursory,
+            self.__internal.linebuffer,
+            self.__internal.linecolumn,
+            marks,
+            styleruns,
+        ) = result_bundle
+        return (data, marks, styleruns)
+
+    def __translate_newlines(self, data):
+        """Private Function! Do NOT use!"""
+        return ("\r\n".join(("_" + data + "_").splitlines()))[1:-1]
+
+    def __write_paced_lines(
+        self,
+        datalines_list_to_write,
+        *,
+        waittillsent,
+        waitfor,
+        timedelta,
+        pacefor,
+    ):
+        """Private Function! Do NOT use!"""
+        if pacefor < 0:
+            pacefor = ConPTY.SIZE_4B_MAX
+        else:
+            pacefor = min(int(pacefor * 1000), ConPTY.SIZE_4B_MAX)
+        last_index = len(datalines_list_to_write) - 1
+        # Counted ahead of each write, so that its own echo is not missed.
+        output_line_count = self.__pyconptyinternal.get_output_line_count()
+        for index, dataline_to_write in enumerate(datalines_list_to_write):
+            if index != 0:
+                # A timeout sends the line regardless, as not all echo.
+                self.__pyconptyinternal.wait_for_output_lines(
+                    output_line_count + 1, pacefor
+                )
+                output_line_count = (
+                    self.__pyconptyinternal.get_output_line_count()
+                )
+            if not self.write(
+                f"{dataline_to_write}\r\n",
+                waittillsent=waittillsent and index == last_index,
+                waitfor=waitfor,
+                timedelta=timedelta,
+            ):
+                return False
+        return True
+
+    def __read_input_chunks(self, source, chunksize):
+        """Private Function! Do NOT use!"""
+        if type(source) in (str, bytes, bytearray):
+            items = (source,)
+        elif callable(getattr(source, "read", None)):
+            items = iter(lambda: source.read(chunksize) or None, None)
+        else:
+            items = source
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        for item in items:
+            if type(item) in (bytes, bytearray):
+                item = decoder.decode(item)
+            elif type(item) is not str:
+                yield None
+                return
+            for i in range(0, len(item), chunksize):
+                yield item[i : i + chunksize]
+        yield decoder.decode(b"", final=True)
+
+    def __stream_input(self, source, chunksize, progress):
+        """Private Function! Do NOT use!"""
+        # May run on a separate thread, so it leaves the status untouched.
+        pyconptyinternal = self.__pyconptyinternal
+        sentcount = 0
+        pendingcount = 0
+        carriedreturn = ""
+        for chunk in self.__read_input_chunks(source, chunksize):
+            if chunk is None:
+                return ConPTY.Error.DATA_NOT_A_STRING
+            chunk = carriedreturn + chunk
+            # Keeps a split "\r\n" together, for the newline translation.
+            carriedreturn = "\r" if chunk.endswith("\r") else ""
+            chunk = chunk[: len(chunk) - len(carriedreturn)]
+            if not chunk:
+                continue
+            if not pyconptyinternal.wait_for_input_sent(ConPTY.SIZE_4B_MAX):
+                return ConPTY.Error.NO_PROCESS_FOUND
+            if pendingcount != 0:
+                sentcount += pendingcount
+                pendingcount = 0
+                if progress is not None:
+                    progress(sentcount)
+            result_code = pyconptyinternal.write_to_buffer(
+                self.__translate_newlines(chunk)
+            )
+            if result_code == 0:  # pragma: no cover
+                return ConPTY.Error.WRITE_INTERNAL_ERROR
+            pendingcount = len(chunk)
+        if carriedreturn:
+            result_code = pyconptyinternal.write_to_buffer("\r\n")
+            if result_code == 0:  # pragma: no cover
+                return ConPTY.Error.WRITE_INTERNAL_ERROR
+            pendingcount += 1
+        if not pyconptyinternal.wait_for_input_sent(ConPTY.SIZE_4B_MAX):
+            return ConPTY.Error.NO_PROCESS_FOUND
+        if pendingcount != 0:
+            sentcount += pendingcount
+            if progress is not None:
+                progress(sentcount)
+        return ConPTY.Error.NONE
+
+    def __stream_input_in_background(self, source, chunksize, progress):
+        """Private Function! Do NOT use!"""
+        # Kept for the `inputstreaming` property, as the status is volatile.
+        self.__input.error = self.__stream_input(source, chunksize, progress)
+
+    def __capture_output(
+        self,
+        capture,
+        *,
+        waitfor,
+        rawdata,
+        timedelta,
+        trailingspaces,
+        chunksize,
+    ):
+        """Private Function! Do NOT use!"""
+        # Timed by the clock, as reads that return data take time as well.
+        start_time = time.monotonic()
+        while time.monotonic() - start_time < waitfor:
+            has_output_ended = not self.isrunning or self.processended
+            data = self.read(
+                max_bytes_to_read=chunksize,
+                rawdata=rawdata,
+                timedelta=timedelta,
+                trailingspaces=trailingspaces,
+            )
+            if data is None:  # pragma: no cover
+                return False
+            if not data:
+                if has_output_ended:
+                    break
+                continue
+            capture.write(data.encode("utf-8"))
+        return True
+
+    def __record_events(self, marks, data, rawdata=False):
+        """Private Function! Do NOT use!"""
+        # Offsets only count stripped output, which raw reads never produce
+        if rawdata:
+            return
+        for offset, payload in marks or []:
+            offset += self.__markup.outputoffset
+            code, _, value = payload.partition(";")
+            event = ConPTY.Event.TITLE
+            if code == "133":
+                kind, _, value = value.partition(";")
+                event = {
+                    "A": ConPTY.Event.PROMPT_START,
+                    "B": ConPTY.Event.COMMAND_START,
+                    "C": ConPTY.Event.COMMAND_EXECUTED,
+                    "D": ConPTY.Event.COMMAND_FINISHED,
+                }.get(kind)
+                value = value.partition(";")[0]
+                if event != ConPTY.Event.COMMAND_FINISHED:
+                    value = None
+                elif value.lstrip("-").isdigit():
+                    value = int(value)
+                else:
+                    value = None
+                if event is None:
+                    continue
+            self.__markup.events.append((event, offset, value))
+        self.__markup.outputoffset += len(data)
+
+    def __record_style_runs(self, styleruns, offset):
+        """Private Function! Do NOT use!"""
+        runs = array.array("I", styleruns)
+        for i in range(0, len(runs), 5):
+            runs[i] += offset
+        self.__markup.styleruns.extend(runs)
+
     def __check_run_arguments(
         self,
         command,
@@ -1812,6 +3171,60 @@ class ConPTY:
             error_found = False
         return not error_found
 
+    def __get_run_options(self, options):
+        """Private Function! Do NOT use!"""
+        for name in options:
+            if name not in ConPTY.__RUN_OPTIONS:
+                raise TypeError(
+                    f"run() got an unexpected keyword argument '{name}'"
+                )
+        return {
+            name: options.get(name, default)
+            for name, (default, _, _) in ConPTY.__RUN_OPTIONS.items()
+        }
+
+    def __check_run_options(self, options):
+        """Private Function! Do NOT use!"""
+        for name, option in ConPTY.__RUN_OPTIONS.items():
+            _, option_types, error = option
+            if type(options[name]) not in option_types:
+                self.__status.lasterror = error
+                return False
+        return True
+
+    def __adjust_run_options(self, options):
+        """Private Function! Do NOT use!"""
+        options["eagerstrip"] = options["eagerstrip"] or options["keeprawdata"]
+        options["collapselines"] = (
+            options["collapselines"]
+            or options["striplevel"] == ConPTY.StripLevel.SCREEN
+        )
+        if options["quietperiod"] < 0:
+            options["quietperiod"] = ConPTY.SIZE_4B_MAX
+        else:
+            options["quietperiod"] = self.__to_milliseconds(
+                options["quietperiod"]
+            )
+        for name in ("outputpipesize", "inputpipesize"):
+            options[name] = max(4096, min(options[name], 16777216))
+        options["highwatermark"] = max(
+            0, min(options["highwatermark"], ConPTY.SIZE_4B_MAX)
+        )
+        if options["lowwatermark"] < 0:
+            options["lowwatermark"] = options["highwatermark"] // 2
+        options["lowwatermark"] = min(
+            options["lowwatermark"], options["highwatermark"]
+        )
+        return options
+
+    def __to_milliseconds(self, seconds_or_milliseconds):
+        """Private Function! Do NOT use!"""
+        if seconds_or_milliseconds != 0 and seconds_or_milliseconds <= 1e-3:
+            return 1
+        if seconds_or_milliseconds < 1:
+            return int(seconds_or_milliseconds * 1000)
+        return int(seconds_or_milliseconds)
+
     def __check_read_arguments(
         self,
         *,
@@ -1821,6 +3234,7 @@ class ConPTY:
         timedelta,
         trailingspaces,
         min_bytes_to_read,
+        countchars,
     ):
         """Private Function! Do NOT use!"""
         if not self.__is_process_initialised_and_running(True):
@@ -1843,6 +3257,9 @@ class ConPTY:
         elif type(min_bytes_to_read) is not int:
             self.__status.lasterror = ConPTY.Error.MIN_READ_BYTES_NOT_AN_INT
             error_found = True
+        elif type(countchars) is not bool:
+            self.__status.lasterror = ConPTY.Error.COUNTCHARS_NOT_A_BOOLEAN
+            error_found = True
         else:
             error_found = False
         return not error_found
@@ -1904,3 +3321,59 @@ class ConPTY:
         else:
             error_found = False
         return not error_found
+
+    def __check_writefrom_arguments(
+        self,
+        source,
+        *,
+        chunksize,
+        background,
+        progress,
+    ):
+        """Private Function! Do NOT use!"""
+        if not self.__is_process_initialised_and_running():
+            error_found = True
+        elif self.inputstreaming:
+            self.__status.lasterror = ConPTY.Error.INPUT_ALREADY_STREAMING
+            error_found = True
+        elif not (
+            callable(getattr(source, "read", None))
+            or hasattr(source, "__iter__")
+        ):
+            self.__status.lasterror = (
+                ConPTY.Error.SOURCE_NOT_A_FILE_OR_ITERABLE
+            )
+            error_found = True
+        elif type(chunksize) is not int:
+            self.__status.lasterror = ConPTY.Error.CHUNKSIZE_NOT_AN_INT
+            error_found = True
+        elif type(background) is not bool:
+            self.__status.lasterror = ConPTY.Error.BACKGROUND_NOT_A_BOOLEAN
+            error_found = True
+        elif progress is not None and not callable(progress):
+            self.__status.lasterror = ConPTY.Error.PROGRESS_NOT_CALLABLE
+            error_found = True
+        else:
+            error_found = False
+        return not error_found
+
+    def __check_captureoutput_arguments(
+        self,
+        *,
+        chunksize,
+        spillsize,
+        spilldir,
+    ):
+        """Private Function! Do NOT use!"""
+        if type(chunksize) is not int:
+            self.__status.lasterror = ConPTY.Error.CHUNKSIZE_NOT_AN_INT
+            error_found = True
+        elif type(spillsize) is not int:
+            self.__status.lasterror = ConPTY.Error.SPILLSIZE_NOT_AN_INT
+            error_found = True
+        elif spilldir is not None and type(spilldir) is not str:
+            self.__status.lasterror = ConPTY.Error.SPILLDIR_NOT_A_STRING
+            error_found = True
+        else:
+            error_found = False
+        return not error_found
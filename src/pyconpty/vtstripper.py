@@ -0,0 +1,306 @@
+# This code is part of the PyConPTY python package.
+# PyConPTY: A Python wrapper for the ConPTY (Windows Pseudo-console) API
+# Copyright (C) 2025  MELWYN FRANCIS CARLO
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# For queries, contact me at: melwyncarlo@gmail.com
+
+
+# pylint: disable=unidiomatic-typecheck
+
+
+"""
+PyConPTY: A Python wrapper for the ConPTY (Windows Pseudo-console) API
+------------------------------------------------------------------------------
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+For queries, contact me at: melwyncarlo@gmail.com
+------------------------------------------------------------------------------
+
+This module contains only one class: VTStripper
+
+Usage: from pyconpty import VTStripper
+"""
+
+import codecs
+import dataclasses
+from enum import Enum
+import _pyconptystripper
+
+
+class VTStripper:
+    """
+    This is a standalone class for stripping VTS's (Virtual Terminal
+    Sequences) from any byte stream, such as a log file or a socket.
+    It runs the same parser as ConPTY's reads, and keeps its state across
+    chunks, so a stream may be fed in pieces of any size.
+    It does not depend upon Windows.
+
+    Attributes:
+    --------------------------------------------------------------------------
+        1.  isinitialized  (bool) :  Indicates whether or not the
+                                     initialization was successful.
+        2.  lasterror     (Error) :  Indicates either success or reason for
+                                     error for the last operation.
+    """
+
+    ##########################################################################
+    ##  PUBLIC GLOBAL VARIABLES                                             ##
+    ##########################################################################
+
+    class Error(Enum):
+        """
+        This is an enumeration class enumerating a list of operational errors.
+
+        Constants:
+        ----------------------------------------------------------------------
+             (0)  NONE
+             (1)  VTSTRIPPER_UNINITIALIZED
+             (2)  STRIPLEVEL_NOT_A_STRIPLEVEL
+             (3)  WIDTH_NOT_INT
+             (4)  HEIGHT_NOT_INT
+             (5)  DATA_NOT_BYTES
+             (6)  STRIP_ERROR
+        """
+
+        # fmt: off
+        NONE                            = 0
+        VTSTRIPPER_UNINITIALIZED        = 1
+        STRIPLEVEL_NOT_A_STRIPLEVEL     = 2
+        WIDTH_NOT_INT                   = 3
+        HEIGHT_NOT_INT                  = 4
+        DATA_NOT_BYTES                  = 5
+        STRIP_ERROR                     = 6
+        # fmt: on
+
+    class StripLevel(Enum):
+        """
+        This is an enumeration class enumerating a list of stripping levels.
+
+        Constants:
+        ----------------------------------------------------------------------
+             (0)  PLAIN
+             (1)  LAYOUT
+             (2)  SCREEN
+        """
+
+        # fmt: off
+        PLAIN                           = 0
+        LAYOUT                          = 1
+        SCREEN                          = 2
+        # fmt: on
+
+    @dataclasses.dataclass
+    class PrivateStatus:
+        """Private Class! Do NOT use!"""
+
+        isinitialized: bool
+        lasterror: "VTStripper.Error"
+
+    @property
+    def isinitialized(self):
+        """
+        An attribute/property of the class VTStripper.
+
+        This value indicates whether or not the initialization was
+        successful.
+
+        Using class functions when `isinitialized = False` results in error
+        set by the property
+        `lasterror = VTStripper.Error.VTSTRIPPER_UNINITIALIZED`.
+
+        Returns:
+        ----------------------------------------------------------------------
+            isinitialized  (bool) :  Indicates whether or not the
+                                     initialization was successful.
+        """
+        return self.__status.isinitialized
+
+    @property
+    def lasterror(self):
+        """
+        An attribute/property of the class VTStripper.
+
+        This value is one of the many `Error` Enumerations that is generated
+        after each function call.
+
+        This property is volatile and it must be read/copied immediately
+        after a function returns.
+
+        Returns:
+        ----------------------------------------------------------------------
+            lasterror  (Error) :  Indicates either success or reason for error
+                                  for the last operation.
+
+        Possible Errors:
+        ----------------------------------------------------------------------
+            NONE, VTSTRIPPER_UNINITIALIZED, STRIPLEVEL_NOT_A_STRIPLEVEL,
+            WIDTH_NOT_INT, HEIGHT_NOT_INT, DATA_NOT_BYTES, STRIP_ERROR
+        """
+        return self.__status.lasterror
+
+    ##########################################################################
+    ##  PUBLIC FUNCTIONS                                                    ##
+    ##########################################################################
+
+    def __init__(self, striplevel=StripLevel.LAYOUT, *, width=80, height=24):
+        """
+         What do I do?
+         ---------------------------------------------------------------------
+         Construct/initialize the VTStripper class.
+
+        `striplevel` selects how much of the terminal is reconstructed,
+         exactly as in `ConPTY.run()`:
+        `StripLevel.PLAIN` only removes the VTS's,
+        `StripLevel.LAYOUT` also tracks the cursor, and turns cursor
+         movements into spaces and new lines, and
+        `StripLevel.SCREEN` also collapses overwritten line contents into
+         their final text.
+
+        `width` and `height` are the size of the terminal that produced the
+         stream, and they bound the cursor movements.
+
+         Check the `isinitialized` class attribute/property to confirm the
+         initialization's success.
+
+         Note that out-of-bounds values are automatically capped to their
+         respective limits.
+
+         Parameters:
+         ---------------------------------------------------------------------
+            1.  striplevel    : The stripping level.
+               (VTStripper.StripLevel)  (default = StripLevel.LAYOUT)
+            2.  width   (int) :  The width (1 to 32767) of the terminal
+                                 in number of characters. (default = 80)
+            3.  height  (int) :  The height (1 to 32767) of the terminal
+                                 in number of characters. (default = 24)
+
+         No Return.
+         ---------------------------------------------------------------------
+
+         Possible Errors:
+         ---------------------------------------------------------------------
+            NONE, STRIPLEVEL_NOT_A_STRIPLEVEL, WIDTH_NOT_INT, HEIGHT_NOT_INT
+        """
+        self.__status = VTStripper.PrivateStatus(
+            isinitialized=False,
+            lasterror=VTStripper.Error.NONE,
+        )
+        if type(striplevel) is not VTStripper.StripLevel:
+            self.__status.lasterror = (
+                VTStripper.Error.STRIPLEVEL_NOT_A_STRIPLEVEL
+            )
+            return
+        if type(width) is not int:
+            self.__status.lasterror = VTStripper.Error.WIDTH_NOT_INT
+            return
+        if type(height) is not int:
+            self.__status.lasterror = VTStripper.Error.HEIGHT_NOT_INT
+            return
+        width  = max(1, min(width,  32767)) # fmt: skip
+        height = max(1, min(height, 32767))
+        self.__decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self.__pyconptystripper = _pyconptystripper.VTStripperObject(
+            striplevel.value, width, height
+        )
+        self.__status.isinitialized = True
+
+    def feed(self, data):
+        """
+        What do I do?
+        ----------------------------------------------------------------------
+        Strip the VTS's from the next chunk of the stream.
+
+        A VTS, a UTF-8 character or a line that is split across chunks is
+        held back, and completed by the following chunks.
+
+        Parameters:
+        ----------------------------------------------------------------------
+            1.  data  (bytes) :  The next chunk of the stream.
+                                 A bytearray is accepted too.
+
+        Returns:
+        ----------------------------------------------------------------------
+            Data  (str) :  The stripped text that is complete so far.
+            None        :  If an error occurred.
+
+        Possible Errors:
+        ----------------------------------------------------------------------
+            NONE, VTSTRIPPER_UNINITIALIZED, DATA_NOT_BYTES, STRIP_ERROR
+        """
+        if not self.__is_initialized():
+            return None
+        if type(data) not in (bytes, bytearray):
+            self.__status.lasterror = VTStripper.Error.DATA_NOT_BYTES
+            return None
+        stripped_data = self.__pyconptystripper.strip_data(bytes(data))
+        if stripped_data is None:  # pragma: no cover
+            self.__decoder.reset()
+            self.__status.lasterror = VTStripper.Error.STRIP_ERROR
+            return None
+        self.__status.lasterror = VTStripper.Error.NONE
+        return self.__decoder.decode(stripped_data)
+
+    def flush(self):
+        """
+        What do I do?
+        ----------------------------------------------------------------------
+        End the stream, and return whatever has been held back.
+
+        Trailing spaces of the last line are dropped, as in `ConPTY.read()`.
+        The stripper is then reset, and ready for a new stream.
+
+        No Parameters.
+        ----------------------------------------------------------------------
+
+        Returns:
+        ----------------------------------------------------------------------
+            Data  (str) :  The remaining stripped text.
+            None        :  If an error occurred.
+
+        Possible Errors:
+        ----------------------------------------------------------------------
+            NONE, VTSTRIPPER_UNINITIALIZED
+        """
+        if not self.__is_initialized():
+            return None
+        data = self.__decoder.decode(
+            self.__pyconptystripper.flush_data(), final=True
+        )
+        self.__decoder.reset()
+        self.__status.lasterror = VTStripper.Error.NONE
+        return data
+
+    ##########################################################################
+    ##  PRIVATE FUNCTIONS                                                   ##
+    ##########################################################################
+
+    def __is_initialized(self):
+        """Private Function! Do NOT use!"""
+        if not self.__status.isinitialized:
+            self.__status.lasterror = VTStripper.Error.VTSTRIPPER_UNINITIALIZED
+            return False
+        return True
@@ -0,0 +1,109 @@
+# This code is part of the PyConPTY python package.
+# PyConPTY: A Python wrapper for the ConPTY (Windows Pseudo-console) API
+# Copyright (C) 2025  MELWYN FRANCIS CARLO
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# For queries, contact me at: melwyncarlo@gmail.com
+
+
+
+"""
+Benchmarks the VTS parser through the standalone VTStripper, which also
+builds on Linux. Each corpus of 1 MiB is fed in chunks of 4 KiB, and the
+best of the interleaved runs is reported for every strip level.
+
+Run: python tests/benchmark_vtstripper.py [number_of_runs]
+"""
+
+
+###############################################################################
+
+
+import sys
+import time
+from pyconpty import VTStripper
+
+
+###############################################################################
+
+
+CORPUS_SIZE = 1048576
+CHUNK_SIZE = 4096
+DEFAULT_NUMBER_OF_RUNS = 61
+
+
+###############################################################################
+
+
+def make_corpus(line_function):
+    corpus = b""
+    i = 0
+    while len(corpus) < CORPUS_SIZE:
+        corpus += line_function(i)
+        i += 1
+    return corpus[:CORPUS_SIZE]
+
+
+def escape_heavy_line(i):
+    return (
+        b"\x1b[%d;1H\x1b[38;5;%dm%05d\x1b[0m \x1b[1;32mOK\x1b[0m"
+        b" \x1b]0;title %d\x07progress %d%%\x1b[K\r\n"
+        % (i % 24 + 1, i % 256, i, i, i % 101)
+    )
+
+
+def ls_like_line(i):
+    return b"-rw-r--r-- 1 user group %8d Jan %2d 12:%02d file_%06d.txt\r\n" % (
+        i * 37,
+        i % 31 + 1,
+        i % 60,
+        i,
+    )
+
+
+def strip_corpus(striplevel, corpus):
+    stripper = VTStripper(striplevel)
+    start_time = time.perf_counter()
+    for i in range(0, len(corpus), CHUNK_SIZE):
+        stripper.feed(corpus[i : i + CHUNK_SIZE])
+    stripper.flush()
+    return time.perf_counter() - start_time
+
+
+def main(number_of_runs):
+    corpora = {
+        "escape-heavy": make_corpus(escape_heavy_line),
+        "ls-like text": make_corpus(ls_like_line),
+    }
+    for name, corpus in corpora.items():
+        best_times = dict.fromkeys(VTStripper.StripLevel, float("inf"))
+        # Interleaved, so that any drift in the machine affects all alike
+        for _ in range(number_of_runs):
+            for striplevel in VTStripper.StripLevel:
+                best_times[striplevel] = min(
+                    best_times[striplevel], strip_corpus(striplevel, corpus)
+                )
+        print(
+            f"{name}: "
+            + ", ".join(
+                f"{striplevel.name.lower()} "
+                f"{CORPUS_SIZE / 1048576 / best_time:.1f} MiB/s"
+                for striplevel, best_time in best_times.items()
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUMBER_OF_RUNS)
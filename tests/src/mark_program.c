@@ -0,0 +1,30 @@
+#include <stdio.h>
+#include <windows.h>
+
+/* Build: gcc mark_program.c -o mark_program.exe */
+
+/* Prints a window title or shell-integration mark before each line */
+
+int main() {
+    const char *const marks[][2] = {
+        {"0;PyConPTY Marks", "Title"},
+        {"133;A", "Prompt"},
+        {"133;B", "Command"},
+        {"133;C", "Output"},
+        {"133;D;3", "Failure"},
+        {"133;D", "Finish"},
+        {"133;Z", "Unknown"},
+    };
+    SetConsoleMode(GetStdHandle(STD_OUTPUT_HANDLE),
+        ENABLE_PROCESSED_OUTPUT | ENABLE_VIRTUAL_TERMINAL_PROCESSING);
+    char input[200];
+    for (size_t i = 0; i < sizeof(marks) / sizeof(marks[0]); i++) {
+        /* Each line waits for a line of input, so it is read on its own */
+        if (fgets(input, sizeof(input), stdin) == NULL) {
+            return 1;
+        }
+        printf("\x1b]%s\x07%s\r\n", marks[i][0], marks[i][1]);
+        fflush(stdout);
+    }
+    return 0;
+}
@@ -0,0 +1,26 @@
+#include <stdio.h>
+#include <windows.h>
+
+/* Build: gcc print_progress_bars.c -o print_progress_bars.exe */
+
+int main() {
+    SetConsoleMode(GetStdHandle(STD_OUTPUT_HANDLE),
+        ENABLE_PROCESSED_OUTPUT | ENABLE_VIRTUAL_TERMINAL_PROCESSING);
+    printf("Downloading:\n");
+    for (int percent = 0; percent <= 100; percent += 10) {
+        /* Redrawn in place, after a carriage return */
+        printf("\r[%-10.*s] %3d%%", percent / 10, "##########", percent);
+        fflush(stdout);
+        /* So that the console host renders some in-between frames too */
+        Sleep(20);
+    }
+    printf("\nInstalling:\nStep 0 of 5\n");
+    for (int step = 1; step <= 5; step++) {
+        /* Redrawn one line up, after the line has been completed */
+        printf("\x1b[A\rStep %d of 5\x1b[K\n", step);
+        fflush(stdout);
+        Sleep(20);
+    }
+    printf("Done.");
+    return 0;
+}
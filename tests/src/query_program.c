@@ -0,0 +1,52 @@
+#include <stdio.h>
+#include <string.h>
+#include <windows.h>
+
+/* Build: gcc query_program.c -o query_program.exe */
+
+/* Sends a VT query, e.g. 6n, then prints every reply read within 2 s */
+
+int main(int argc, char *argv[]) {
+    if (argc != 2) {
+        return 1;
+    }
+    HANDLE input_handle = GetStdHandle(STD_INPUT_HANDLE);
+    /* The replies are read as they are sent, neither echoed nor buffered */
+    SetConsoleMode(input_handle, ENABLE_VIRTUAL_TERMINAL_INPUT);
+    SetConsoleMode(GetStdHandle(STD_OUTPUT_HANDLE),
+        ENABLE_PROCESSED_OUTPUT | ENABLE_VIRTUAL_TERMINAL_PROCESSING);
+    printf("\x1b[%s", argv[1]);
+    fflush(stdout);
+    char replies[1024] = {0};
+    size_t length = 0;
+    /* Read for the whole window, so that a second reply is not missed */
+    const ULONGLONG end_time = GetTickCount64() + 2000;
+    ULONGLONG current_time;
+    while ((current_time = GetTickCount64()) < end_time) {
+        if (WaitForSingleObject(input_handle,
+                (DWORD)(end_time - current_time)) != WAIT_OBJECT_0) {
+            break;
+        }
+        INPUT_RECORD input_record;
+        DWORD records_read = 0;
+        if (!ReadConsoleInputA(input_handle, &input_record, 1,
+                &records_read)) {
+            return 1;
+        }
+        if ((records_read == 0)
+         || (input_record.EventType != KEY_EVENT)
+         || (!input_record.Event.KeyEvent.bKeyDown)
+         || (input_record.Event.KeyEvent.uChar.AsciiChar == '\0')
+         || (length + 3 >= sizeof(replies))) {
+            continue;
+        }
+        if (input_record.Event.KeyEvent.uChar.AsciiChar == '\x1b') {
+            memcpy(&replies[length], "ESC", 3);
+            length += 3;
+        } else {
+            replies[length++] = input_record.Event.KeyEvent.uChar.AsciiChar;
+        }
+    }
+    printf("\r\nReplies: %s\r\n", replies);
+    return 0;
+}
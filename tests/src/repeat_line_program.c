@@ -0,0 +1,21 @@
+#include <stdio.h>
+#include <windows.h>
+
+/* Build: gcc repeat_line_program.c -o repeat_line_program.exe */
+
+/* Prints two lines, then the first one again after a line of input */
+
+int main() {
+    SetConsoleMode(GetStdHandle(STD_OUTPUT_HANDLE),
+        ENABLE_PROCESSED_OUTPUT | ENABLE_VIRTUAL_TERMINAL_PROCESSING);
+    printf("\x1b[32mRepeated line\x1b[0m\r\nAnother line\r\n");
+    fflush(stdout);
+    char input[200];
+    if (fgets(input, sizeof(input), stdin) == NULL) {
+        return 1;
+    }
+    /* Starts with a VT sequence, and matches a line still on the screen */
+    printf("\x1b[32mRepeated line\x1b[0m\r\n");
+    fflush(stdout);
+    return 0;
+}
@@ -28,9 +28,13 @@
 ###############################################################################
 
 
+import io
 import os
+import re
+import mmap
 import time
 import random
+import threading
 import concurrent.futures
 import pytest
 from pyconpty import ConPTY
@@ -46,6 +50,13 @@ FALSE_THEN_TRUE = [False, True]
 TRUE_THEN_FALSE = [True, False]
 TIMEDELTAS_LIST = [0.1, 0.01, 0]
 INTERNALTIMEDELTAS_LIST = [100, 0.01, 1e-3, 0]
+INPUT_NOTES = [
+    "Today is Sunday.",
+    "I have to do my chores.",
+    "I have to telephone my friend.",
+    " Hack the parental control system.",
+    "  Munch on some jelly beans.",
+]
 
 
 ###############################################################################
@@ -231,6 +242,8 @@ def invalid_init_size(console):
     assert console.lasterror == ConPTY.Error.CONPTY_UNINITIALIZED
     assert not console.resize("a", "b")
     assert console.lasterror == ConPTY.Error.CONPTY_UNINITIALIZED
+    assert console.getevents() is None
+    assert console.lasterror == ConPTY.Error.CONPTY_UNINITIALIZED
     assert console.width is None
     assert console.height is None
     console = ConPTY(80, 40.0)
@@ -335,6 +348,8 @@ def is_not_initialized_or_running(console):
     assert console.lasterror == ConPTY.Error.CONPTY_UNINITIALIZED
     assert console.readlines() is None
     assert console.lasterror == ConPTY.Error.CONPTY_UNINITIALIZED
+    assert not console.waitquiet()
+    assert console.lasterror == ConPTY.Error.CONPTY_UNINITIALIZED
     assert not console.run("abc")
     assert console.lasterror == ConPTY.Error.CONPTY_UNINITIALIZED
     assert console.exitcode is None
@@ -386,6 +401,8 @@ def is_initialized_but_not_running(console):
     assert console.lasterror == ConPTY.Error.NO_PROCESS_FOUND
     assert console.readlines() is None
     assert console.lasterror == ConPTY.Error.NO_PROCESS_FOUND
+    assert not console.waitquiet()
+    assert console.lasterror == ConPTY.Error.NO_PROCESS_FOUND
     assert not console.kill()
     assert console.lasterror == ConPTY.Error.NO_PROCESS_FOUND
     assert console.exitcode is None
@@ -439,6 +456,30 @@ def run_errors(console):
     assert console.lasterror == ConPTY.Error.POSTENDDELAY_NOT_A_NUMBER
     assert console.exitcode is None
     assert console.lasterror == ConPTY.Error.NO_PROCESS_FOUND
+    assert not console.run("abc", collapselines=1)
+    assert console.lasterror == ConPTY.Error.COLLAPSELINES_NOT_A_BOOLEAN
+    assert console.exitcode is None
+    assert console.lasterror == ConPTY.Error.NO_PROCESS_FOUND
+    assert not console.run("abc", answerqueries=None)
+    assert console.lasterror == ConPTY.Error.ANSWERQUERIES_NOT_A_BOOLEAN
+    assert console.exitcode is None
+    assert console.lasterror == ConPTY.Error.NO_PROCESS_FOUND
+    assert not console.run("abc", quietperiod="1")
+    assert console.lasterror == ConPTY.Error.QUIETPERIOD_NOT_A_NUMBER
+    assert console.exitcode is None
+    assert console.lasterror == ConPTY.Error.NO_PROCESS_FOUND
+    assert not console.run("abc", eagerstrip=None)
+    assert console.lasterror == ConPTY.Error.EAGERSTRIP_NOT_A_BOOLEAN
+    assert console.exitcode is None
+    assert console.lasterror == ConPTY.Error.NO_PROCESS_FOUND
+    assert not console.run("abc", keeprawdata=None)
+    assert console.lasterror == ConPTY.Error.KEEPRAWDATA_NOT_A_BOOLEAN
+    assert console.exitcode is None
+    assert console.lasterror == ConPTY.Error.NO_PROCESS_FOUND
+    assert not console.run("abc", striplevel=1)
+    assert console.lasterror == ConPTY.Error.STRIPLEVEL_NOT_A_STRIPLEVEL
+    assert console.exitcode is None
+    assert console.lasterror == ConPTY.Error.NO_PROCESS_FOUND
     assert not console.waittocomplete(waitfor="1")
     assert console.lasterror == ConPTY.Error.WAITFOR_NOT_A_NUMBER
     assert not console.waittocomplete(waitfor=1, timedelta="0.1")
@@ -785,6 +826,8 @@ def read_errors_read(console, timedelta):
     assert console.lasterror == ConPTY.Error.TRAILINGSPACES_NOT_A_BOOLEAN
     assert console.read(min_bytes_to_read=1.0, timedelta=timedelta) is None
     assert console.lasterror == ConPTY.Error.MIN_READ_BYTES_NOT_AN_INT
+    assert console.read(countchars=1, timedelta=timedelta) is None
+    assert console.lasterror == ConPTY.Error.COUNTCHARS_NOT_A_BOOLEAN
     assert (
         console.read(
             min_bytes_to_read=2, max_bytes_to_read=1, timedelta=timedelta
@@ -992,36 +1035,39 @@ def test_read_bgthread(
 ###############################################################################
 
 
-def read_and_kill(console, timedelta, internaltimedelta):
+def read_after_quiet_period(console, timedelta, internaltimedelta):
     if console is None:
         console = ConPTY()
-    assert console.run(
+    assert console.runandwait(
         os.path.join(
-            os.path.dirname(os.path.abspath(__file__)), "text_interaction.exe"
+            os.path.dirname(os.path.abspath(__file__)),
+            "print_lines_of_text.exe",
         ),
         timedelta=timedelta,
         internaltimedelta=internaltimedelta,
+        quietperiod=random.choice([-1, 0.1, 100]),
     )
-    assert console.isrunning
     assert console.lasterror == ConPTY.Error.NONE
-    assert console.exitcode is None
-    assert console.lasterror == ConPTY.Error.PROCESS_ALREADY_RUNNING
-    assert (
-        console.getoutput(timedelta=timedelta, trailingspaces=False)
-        == "What is your name?"
-    )
+    assert not console.isrunning
     assert console.lasterror == ConPTY.Error.NONE
-    assert console.read() == ""
+    assert console.exitcode == 0
+    assert console.lasterror == ConPTY.Error.RUNTIME_SUCCESS
+    assert not console.waitquiet("1")
+    assert console.lasterror == ConPTY.Error.QUIETPERIOD_NOT_A_NUMBER
+    assert not console.waitquiet(waitfor="1")
+    assert console.lasterror == ConPTY.Error.WAITFOR_NOT_A_NUMBER
+    assert not console.waitquiet(timedelta="1")
+    assert console.lasterror == ConPTY.Error.TIMEDELTA_NOT_A_NUMBER
+    assert console.waitquiet(random.choice([-1, 0, 0.1, 100]), waitfor=0)
     assert console.lasterror == ConPTY.Error.NONE
-    assert console.exitcode is None
-    assert console.lasterror == ConPTY.Error.PROCESS_ALREADY_RUNNING
-    assert console.kill()
-    assert console.lasterror == ConPTY.Error.FORCED_TERMINATION
-    assert console.exitcode == 1
-    assert console.lasterror == ConPTY.Error.FORCED_TERMINATION
-    assert console.exitcode is None
-    assert console.lasterror == ConPTY.Error.NO_PROCESS_FOUND
-    assert console.waittocomplete(waitfor=-1, timedelta=timedelta)
+    assert console.getoutput(trailingspaces=False, timedelta=timedelta) == (
+        "This is line 1 with newline.\n"
+        "This is line 2 with newline.\n"
+        "This is line 3 with newline.\n"
+        "\n"
+        "This is line 5 with newline.\n"
+        "This is line 6 WITHOUT newline."
+    )
     assert console.lasterror == ConPTY.Error.NONE
 
 
@@ -1029,279 +1075,1254 @@ def read_and_kill(console, timedelta, internaltimedelta):
 @pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
 @pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
 @pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
-def test_read_and_kill(console_args, timedelta, internaltimedelta):
+def test_read_after_quiet_period(console_args, timedelta, internaltimedelta):
     run_on_main_thread(
-        read_and_kill, (console_args, timedelta, internaltimedelta)
+        read_after_quiet_period, (console_args, timedelta, internaltimedelta)
     )
 
 
 @pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
 @pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
 @pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
-def test_read_and_kill_bgthread(console_args, timedelta, internaltimedelta):
+def test_read_after_quiet_period_bgthread(
+    console_args, timedelta, internaltimedelta
+):
     run_on_bg_thread(
-        read_and_kill, (console_args, timedelta, internaltimedelta)
+        read_after_quiet_period, (console_args, timedelta, internaltimedelta)
     )
 
 
 ###############################################################################
 
 
-def read_and_resize(console, resize, timedelta, internaltimedelta):
+def read_collapsed(console, timedelta, internaltimedelta):
     if console is None:
         console = ConPTY()
-    if resize:
-        assert console.resize(146 + 1, console.height)
     assert console.runandwait(
         os.path.join(
             os.path.dirname(os.path.abspath(__file__)),
-            "print_long_line_of_text.exe",
+            "print_lines_of_text.exe",
         ),
         timedelta=timedelta,
         internaltimedelta=internaltimedelta,
         postenddelay=100,
+        collapselines=True,
     )
+    assert console.lasterror == ConPTY.Error.NONE
     assert not console.isrunning
     assert console.lasterror == ConPTY.Error.NONE
-    assert console.exitcode == 0
-    assert console.lasterror == ConPTY.Error.RUNTIME_SUCCESS
-    output = console.getoutput(timedelta=timedelta)
-    assert len(output) == (146 + int(not resize))
-    assert output == (
-        "This is a very long line of text of 146 characters, "
-        + "containing five space charac"
-        + ("\n" if not resize else "")
-        + "ters at the end, and terminating without a newline character.     "
+    assert console.getoutput(trailingspaces=False, timedelta=timedelta) == (
+        "This is line 1 with newline.\n"
+        "This is line 2 with newline.\n"
+        "This is line 3 with newline.\n"
+        "\n"
+        "This is line 5 with newline.\n"
+        "This is line 6 WITHOUT newline."
     )
     assert console.lasterror == ConPTY.Error.NONE
-    assert console.read() == ""
+    assert console.read(waitfor=timedelta) == ""
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.runandwait(
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "print_progress_bars.exe",
+        ),
+        timedelta=timedelta,
+        internaltimedelta=internaltimedelta,
+        postenddelay=100,
+        collapselines=True,
+    )
+    assert console.lasterror == ConPTY.Error.NONE
+    # Redraws in place, and one line up, leave only their final state
+    assert console.getoutput(trailingspaces=False, timedelta=timedelta) == (
+        "Downloading:\n"
+        "[##########] 100%\n"
+        "Installing:\n"
+        "Step 5 of 5\n"
+        "Done."
+    )
     assert console.lasterror == ConPTY.Error.NONE
 
 
 @pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
-@pytest.mark.parametrize("resize", FALSE_THEN_TRUE)
 @pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
 @pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
 @pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
-def test_read_and_resize(console_args, resize, timedelta, internaltimedelta):
+def test_read_collapsed(console_args, timedelta, internaltimedelta):
     run_on_main_thread(
-        read_and_resize, (console_args, resize, timedelta, internaltimedelta)
+        read_collapsed, (console_args, timedelta, internaltimedelta)
     )
 
 
-@pytest.mark.parametrize("resize", FALSE_THEN_TRUE)
 @pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
 @pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
 @pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
-def test_read_and_resize_bgthread(
-    console_args, resize, timedelta, internaltimedelta
-):
+def test_read_collapsed_bgthread(console_args, timedelta, internaltimedelta):
     run_on_bg_thread(
-        read_and_resize, (console_args, resize, timedelta, internaltimedelta)
+        read_collapsed, (console_args, timedelta, internaltimedelta)
     )
 
 
 ###############################################################################
 
 
-def long_read(console, bulk_read, timedelta, internaltimedelta):
+def read_styled(console, timedelta, internaltimedelta):
     if console is None:
         console = ConPTY()
     assert console.runandwait(
-        os.path.join(
-            os.path.dirname(os.path.abspath(__file__)),
-            "print_many_lines_of_text.exe",
-        ),
+        "cmd /c echo \x1b[31mred\x1b[0m plain",
         timedelta=timedelta,
         internaltimedelta=internaltimedelta,
         postenddelay=100,
     )
-    assert not console.isrunning
     assert console.lasterror == ConPTY.Error.NONE
-    assert console.exitcode == 0
-    assert console.lasterror == ConPTY.Error.RUNTIME_SUCCESS
-    if bulk_read:
-        assert len(console.readlines()) == 100
-        assert console.lasterror == ConPTY.Error.NONE
-        assert console.readlines() == []
-    else:
-        for i in range(100):
-            assert console.readline() == f"Log {100+i+1}: This is line {i+1}."
-            assert console.lasterror == ConPTY.Error.NONE
-    assert console.read() == ""
+    text, styleruns = console.readstyled(timedelta=timedelta)
+    assert console.lasterror == ConPTY.Error.NONE
+    assert "red plain" in text
+    assert len(styleruns) % 5 == 0
+    red = text.index("red")
+    colors = set()
+    for i in range(0, len(styleruns), 5):
+        start, length, foreground = styleruns[i : i + 3]
+        assert start + length <= len(text)
+        if start <= red < start + length:
+            colors.add(foreground)
+    assert colors & {
+        ConPTY.STYLE_COLOR_INDEXED + 1,
+        ConPTY.STYLE_COLOR_INDEXED + 9,
+    }
+    text, styleruns = console.readstyled(timedelta=timedelta)
+    assert text == "" and not styleruns
     assert console.lasterror == ConPTY.Error.NONE
-    assert console.exitcode is None
-    assert console.lasterror == ConPTY.Error.NO_PROCESS_FOUND
+    assert console.runandwait(
+        "cmd /c echo styled",
+        timedelta=timedelta,
+        internaltimedelta=internaltimedelta,
+        collapselines=True,
+    )
+    assert console.readstyled(timedelta=timedelta) is None
+    assert console.lasterror == ConPTY.Error.STYLES_UNAVAILABLE
 
 
 @pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
-@pytest.mark.parametrize("bulk_read", FALSE_THEN_TRUE)
 @pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
 @pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
 @pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
-def test_long_read(console_args, bulk_read, timedelta, internaltimedelta):
+def test_read_styled(console_args, timedelta, internaltimedelta):
     run_on_main_thread(
-        long_read, (console_args, bulk_read, timedelta, internaltimedelta)
+        read_styled, (console_args, timedelta, internaltimedelta)
     )
 
 
-@pytest.mark.parametrize("bulk_read", FALSE_THEN_TRUE)
 @pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
 @pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
 @pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
-def test_long_read_bgthread(
-    console_args, bulk_read, timedelta, internaltimedelta
-):
-    run_on_bg_thread(
-        long_read, (console_args, bulk_read, timedelta, internaltimedelta)
-    )
+def test_read_styled_bgthread(console_args, timedelta, internaltimedelta):
+    run_on_bg_thread(read_styled, (console_args, timedelta, internaltimedelta))
 
 
 ###############################################################################
 
 
-def long_read_quick(console, timedelta, internaltimedelta):
+def read_eagerly(console, collapselines, timedelta, internaltimedelta):
     if console is None:
         console = ConPTY()
-    assert console.run(
+    assert console.runandwait(
         os.path.join(
             os.path.dirname(os.path.abspath(__file__)),
-            "print_many_lines_of_text.exe",
+            "print_lines_of_text.exe",
         ),
         timedelta=timedelta,
         internaltimedelta=internaltimedelta,
+        postenddelay=100,
+        collapselines=collapselines,
+        eagerstrip=True,
     )
-    assert (
-        len(
-            console.readlines(
-                waitfor=-1, timedelta=timedelta, min_lines_to_read=100
-            )
-        )
-        == 100
+    assert console.lasterror == ConPTY.Error.NONE
+    assert not console.isrunning
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.readline(rawdata=True, timedelta=timedelta) == (
+        "This is line 1 with newline."
     )
     assert console.lasterror == ConPTY.Error.NONE
-    while not console.processended:
-        time.sleep(timedelta)
-    assert console.kill()
-    assert console.lasterror == ConPTY.Error.RUNTIME_SUCCESS
-    while console.isrunning:
-        time.sleep(0.01)
+    assert console.getoutput(trailingspaces=True, timedelta=timedelta) == (
+        "This is line 2 with newline.\n"
+        "This is line 3 with newline.\n"
+        "\n"
+        "This is line 5 with newline.\n"
+        "This is line 6 WITHOUT newline."
+    )
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.read(waitfor=timedelta) == ""
+    assert console.lasterror == ConPTY.Error.NONE
 
 
 @pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("collapselines", TRUE_THEN_FALSE)
 @pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
 @pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
 @pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
-def test_long_read_quick(console_args, timedelta, internaltimedelta):
+def test_read_eagerly(
+    console_args, collapselines, timedelta, internaltimedelta
+):
     run_on_main_thread(
-        long_read_quick, (console_args, timedelta, internaltimedelta)
+        read_eagerly,
+        (console_args, collapselines, timedelta, internaltimedelta),
     )
 
 
+@pytest.mark.parametrize("collapselines", TRUE_THEN_FALSE)
 @pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
-@pytest.mark.parametrize("timedelta", [0])
-@pytest.mark.parametrize("internaltimedelta", [0])
-def test_long_read_quick_bgthread(console_args, timedelta, internaltimedelta):
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_read_eagerly_bgthread(
+    console_args, collapselines, timedelta, internaltimedelta
+):
     run_on_bg_thread(
-        long_read_quick, (console_args, timedelta, internaltimedelta)
+        read_eagerly,
+        (console_args, collapselines, timedelta, internaltimedelta),
     )
 
 
 ###############################################################################
 
 
-def read_and_write_part_1(console, stripinput, timedelta, internaltimedelta):
+def read_both_views(console, timedelta, internaltimedelta):
     if console is None:
         console = ConPTY()
-    assert console.run(
+    assert console.runandwait(
         os.path.join(
             os.path.dirname(os.path.abspath(__file__)),
-            "text_interaction.exe",
+            "print_lines_of_text.exe",
         ),
-        stripinput=stripinput,
         timedelta=timedelta,
         internaltimedelta=internaltimedelta,
+        postenddelay=100,
+        keeprawdata=True,
     )
-    assert console.isrunning
-    assert console.lasterror == ConPTY.Error.NONE
-    assert console.exitcode is None
-    assert console.lasterror == ConPTY.Error.PROCESS_ALREADY_RUNNING
-    return console
-
-
-def read_and_write_part_2(console, stripinput, timedelta, internaltimedelta):
-    assert console.readline() == ""
-    assert console.getoutput(timedelta=timedelta) == "What is your name? "
     assert console.lasterror == ConPTY.Error.NONE
-    assert console.exitcode is None
-    assert console.lasterror == ConPTY.Error.PROCESS_ALREADY_RUNNING
-    assert console.read() == ""
+    assert not console.isrunning
     assert console.lasterror == ConPTY.Error.NONE
-    assert console.exitcode is None
-    assert console.lasterror == ConPTY.Error.PROCESS_ALREADY_RUNNING
-    assert console.write(
-        "Mr. Melwyn Francis Carlo", waittillsent=True, waitfor=-1
+    assert console.readline(timedelta=timedelta) == (
+        "This is line 1 with newline."
     )
     assert console.lasterror == ConPTY.Error.NONE
-    assert console.exitcode is None
-    assert console.lasterror == ConPTY.Error.PROCESS_ALREADY_RUNNING
-    if timedelta > 0.1 and internaltimedelta > 0.1:
-        assert console.inputsent
-    if not stripinput:
-        assert (
-            console.getoutput(timedelta=timedelta, min_bytes_to_read=1)
-            == "Mr. Melwyn Francis Carlo"
-        )
-    assert console.write("\r\n")
+    rawoutput = console.getoutput(rawdata=True, timedelta=timedelta)
     assert console.lasterror == ConPTY.Error.NONE
-    while not console.inputsent:
-        time.sleep(0.1)
-    assert console.getoutput(timedelta=timedelta, min_bytes_to_read=10) == (
-        ("\n" if not stripinput else "")
-        + "Hi, Mr. Melwyn Francis Carlo! What's your age? "
-    )
+    assert "\x1b[" in rawoutput
+    assert "This is line 1 with newline." in rawoutput
+    assert "This is line 6 WITHOUT newline." in rawoutput
+    assert console.read(rawdata=True, waitfor=timedelta) == ""
     assert console.lasterror == ConPTY.Error.NONE
-    assert console.exitcode is None
-    assert console.lasterror == ConPTY.Error.PROCESS_ALREADY_RUNNING
-    if random.choice(TRUE_THEN_FALSE):
-        assert not console.writeline(100)
-        assert console.lasterror == ConPTY.Error.DATA_NOT_A_STRING
-        assert console.writeline("100")
-    else:
-        assert console.sendinput("100")
+    assert console.getoutput(timedelta=timedelta) == (
+        "This is line 2 with newline.\n"
+        "This is line 3 with newline.\n"
+        "\n"
+        "This is line 5 with newline.\n"
+        "This is line 6 WITHOUT newline."
+    )
     assert console.lasterror == ConPTY.Error.NONE
-    output = console.getoutput(timedelta=timedelta, trailingspaces=False)
-    possible_outputs_list = [
-        "" if stripinput else "100\n",
-        ("" if stripinput else "100\n")
-        + "Hmm, so you will be 110 years old in 10 years.",
-    ]
-    assert output in possible_outputs_list
-    if output == possible_outputs_list[0]:
-        assert console.exitcode is None
-        assert console.lasterror == ConPTY.Error.PROCESS_ALREADY_RUNNING
-        assert (
-            console.getoutput(timedelta=timedelta)
-            == "Hmm, so you will be 110 years old in 10 years."
-        )
-        assert console.lasterror == ConPTY.Error.NONE
 
 
-def read_and_write_part_3(console, timedelta):
-    assert console.waittocomplete(timedelta=timedelta)
-    assert console.lasterror == ConPTY.Error.NONE
-    assert console.kill()
-    assert console.lasterror == ConPTY.Error.RUNTIME_SUCCESS
-    assert console.exitcode == 0
-    assert console.lasterror == ConPTY.Error.RUNTIME_SUCCESS
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_read_both_views(console_args, timedelta, internaltimedelta):
+    run_on_main_thread(
+        read_both_views, (console_args, timedelta, internaltimedelta)
+    )
 
 
-def read_and_write(console, stripinput, timedelta, internaltimedelta):
-    console = read_and_write_part_1(
-        console, stripinput, timedelta, internaltimedelta
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_read_both_views_bgthread(console_args, timedelta, internaltimedelta):
+    run_on_bg_thread(
+        read_both_views, (console_args, timedelta, internaltimedelta)
+    )
+
+
+###############################################################################
+
+
+def read_multibyte(console, countchars, timedelta, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    assert console.runandwait(
+        "cmd /c echo h\u00e9llo \u2713 w\u00f6rld",
+        timedelta=timedelta,
+        internaltimedelta=internaltimedelta,
+        postenddelay=100,
+    )
+    assert console.lasterror == ConPTY.Error.NONE
+    total_data = ""
+    while True:
+        data = console.read(
+            max_bytes_to_read=1,
+            rawdata=True,
+            countchars=countchars,
+            waitfor=timedelta,
+        )
+        assert console.lasterror == ConPTY.Error.NONE
+        if not data:
+            break
+        if countchars:
+            assert len(data) <= 1
+        total_data += data
+    assert "h\u00e9llo \u2713 w\u00f6rld" in total_data
+    assert "\ufffd" not in total_data
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("countchars", FALSE_THEN_TRUE)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_read_multibyte(
+    console_args, countchars, timedelta, internaltimedelta
+):
+    run_on_main_thread(
+        read_multibyte,
+        (console_args, countchars, timedelta, internaltimedelta),
+    )
+
+
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("countchars", FALSE_THEN_TRUE)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_read_multibyte_bgthread(
+    console_args, countchars, timedelta, internaltimedelta
+):
+    run_on_bg_thread(
+        read_multibyte,
+        (console_args, countchars, timedelta, internaltimedelta),
+    )
+
+
+###############################################################################
+
+
+def read_allocation_free(console, timedelta, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    assert console.allocationcount is not None
+    assert console.runandwait(
+        "cmd /c echo Hello World",
+        timedelta=timedelta,
+        internaltimedelta=internaltimedelta,
+        postenddelay=100,
+    )
+    assert console.lasterror == ConPTY.Error.NONE
+    assert "Hello World" in console.read()
+    console.read()
+    allocation_count = console.allocationcount
+    for _ in range(10):
+        assert console.read() == ""
+        assert console.lasterror == ConPTY.Error.NONE
+    assert console.allocationcount == allocation_count
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_read_allocation_free(console_args, timedelta, internaltimedelta):
+    run_on_main_thread(
+        read_allocation_free, (console_args, timedelta, internaltimedelta)
+    )
+
+
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_read_allocation_free_bgthread(
+    console_args, timedelta, internaltimedelta
+):
+    run_on_bg_thread(
+        read_allocation_free, (console_args, timedelta, internaltimedelta)
+    )
+
+
+###############################################################################
+
+
+def read_with_strip_level(console, striplevel, timedelta, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    assert console.runandwait(
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "print_lines_of_text.exe",
+        ),
+        timedelta=timedelta,
+        internaltimedelta=internaltimedelta,
+        postenddelay=100,
+        eagerstrip=random.choice(TRUE_THEN_FALSE),
+        striplevel=striplevel,
+    )
+    assert console.lasterror == ConPTY.Error.NONE
+    assert not console.isrunning
+    assert console.lasterror == ConPTY.Error.NONE
+    output = console.getoutput(trailingspaces=False, timedelta=timedelta)
+    assert console.lasterror == ConPTY.Error.NONE
+    if striplevel == ConPTY.StripLevel.PLAIN:
+        assert "\x1b" not in output
+        for line in (
+            "This is line 1 with newline.",
+            "This is line 2 with newline.",
+            "This is line 3 with newline.",
+            "This is line 5 with newline.",
+            "This is line 6 WITHOUT newline.",
+        ):
+            assert line in output
+    else:
+        assert output == (
+            "This is line 1 with newline.\n"
+            "This is line 2 with newline.\n"
+            "This is line 3 with newline.\n"
+            "\n"
+            "This is line 5 with newline.\n"
+            "This is line 6 WITHOUT newline."
+        )
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("striplevel", list(ConPTY.StripLevel))
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_read_with_strip_level(
+    console_args, striplevel, timedelta, internaltimedelta
+):
+    run_on_main_thread(
+        read_with_strip_level,
+        (console_args, striplevel, timedelta, internaltimedelta),
+    )
+
+
+@pytest.mark.parametrize("striplevel", list(ConPTY.StripLevel))
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_read_with_strip_level_bgthread(
+    console_args, striplevel, timedelta, internaltimedelta
+):
+    run_on_bg_thread(
+        read_with_strip_level,
+        (console_args, striplevel, timedelta, internaltimedelta),
+    )
+
+
+###############################################################################
+
+
+def read_and_kill(console, timedelta, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    assert console.run(
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "text_interaction.exe"
+        ),
+        timedelta=timedelta,
+        internaltimedelta=internaltimedelta,
+    )
+    assert console.isrunning
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.exitcode is None
+    assert console.lasterror == ConPTY.Error.PROCESS_ALREADY_RUNNING
+    assert (
+        console.getoutput(timedelta=timedelta, trailingspaces=False)
+        == "What is your name?"
+    )
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.read() == ""
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.exitcode is None
+    assert console.lasterror == ConPTY.Error.PROCESS_ALREADY_RUNNING
+    assert console.kill()
+    assert console.lasterror == ConPTY.Error.FORCED_TERMINATION
+    assert console.exitcode == 1
+    assert console.lasterror == ConPTY.Error.FORCED_TERMINATION
+    assert console.exitcode is None
+    assert console.lasterror == ConPTY.Error.NO_PROCESS_FOUND
+    assert console.waittocomplete(waitfor=-1, timedelta=timedelta)
+    assert console.lasterror == ConPTY.Error.NONE
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_read_and_kill(console_args, timedelta, internaltimedelta):
+    run_on_main_thread(
+        read_and_kill, (console_args, timedelta, internaltimedelta)
+    )
+
+
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_read_and_kill_bgthread(console_args, timedelta, internaltimedelta):
+    run_on_bg_thread(
+        read_and_kill, (console_args, timedelta, internaltimedelta)
+    )
+
+
+###############################################################################
+
+
+def resize_while_running(console, timedelta, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    assert console.run(
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "text_interaction.exe"
+        ),
+        timedelta=timedelta,
+        internaltimedelta=internaltimedelta,
+    )
+    assert console.isrunning
+    assert console.lasterror == ConPTY.Error.NONE
+    assert (
+        console.getoutput(timedelta=timedelta, trailingspaces=False)
+        == "What is your name?"
+    )
+    assert console.lasterror == ConPTY.Error.NONE
+    for width, height in ((100, 30), (120, 30), (90, 40)):
+        assert console.resize(width, height)
+        assert console.lasterror == ConPTY.Error.NONE
+    assert console.width == 90
+    assert console.height == 40
+    assert console.read(waitfor=0.5, timedelta=timedelta) == ""
+    assert console.lasterror == ConPTY.Error.NONE
+    assert not console.waitquiet(60, waitfor=0.5, timedelta=timedelta)
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.waitquiet(0.5, timedelta=timedelta)
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.kill()
+    assert console.lasterror == ConPTY.Error.FORCED_TERMINATION
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_resize_while_running(console_args, timedelta, internaltimedelta):
+    run_on_main_thread(
+        resize_while_running, (console_args, timedelta, internaltimedelta)
+    )
+
+
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_resize_while_running_bgthread(
+    console_args, timedelta, internaltimedelta
+):
+    run_on_bg_thread(
+        resize_while_running, (console_args, timedelta, internaltimedelta)
+    )
+
+
+###############################################################################
+
+
+def repeat_line_after_resize(console, timedelta, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    assert console.run(
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "repeat_line_program.exe",
+        ),
+        stripinput=True,
+        timedelta=timedelta,
+        internaltimedelta=internaltimedelta,
+    )
+    assert console.readlines(min_lines_to_read=2, waitfor=-1) == [
+        "Repeated line",
+        "Another line",
+    ]
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.resize(100, 30)
+    assert console.lasterror == ConPTY.Error.NONE
+    # The line is printed again right after the resize, still on the screen.
+    assert console.writeline("again")
+    assert console.waittocomplete()
+    assert console.exitcode == 0
+    output = console.getoutput(timedelta=timedelta)
+    # The repaint is left out, but not the new line that repeats it.
+    assert output.count("Repeated line") == 1
+    assert "Another line" not in output
+    assert console.lasterror == ConPTY.Error.NONE
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_repeat_line_after_resize(console_args, timedelta, internaltimedelta):
+    run_on_main_thread(
+        repeat_line_after_resize, (console_args, timedelta, internaltimedelta)
+    )
+
+
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_repeat_line_after_resize_bgthread(
+    console_args, timedelta, internaltimedelta
+):
+    run_on_bg_thread(
+        repeat_line_after_resize, (console_args, timedelta, internaltimedelta)
+    )
+
+
+###############################################################################
+
+
+def read_and_resize(console, resize, timedelta, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    if resize:
+        assert console.resize(146 + 1, console.height)
+    assert console.runandwait(
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "print_long_line_of_text.exe",
+        ),
+        timedelta=timedelta,
+        internaltimedelta=internaltimedelta,
+        postenddelay=100,
+    )
+    assert not console.isrunning
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.exitcode == 0
+    assert console.lasterror == ConPTY.Error.RUNTIME_SUCCESS
+    output = console.getoutput(timedelta=timedelta)
+    assert len(output) == (146 + int(not resize))
+    assert output == (
+        "This is a very long line of text of 146 characters, "
+        + "containing five space charac"
+        + ("\n" if not resize else "")
+        + "ters at the end, and terminating without a newline character.     "
+    )
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.read() == ""
+    assert console.lasterror == ConPTY.Error.NONE
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("resize", FALSE_THEN_TRUE)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_read_and_resize(console_args, resize, timedelta, internaltimedelta):
+    run_on_main_thread(
+        read_and_resize, (console_args, resize, timedelta, internaltimedelta)
+    )
+
+
+@pytest.mark.parametrize("resize", FALSE_THEN_TRUE)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_read_and_resize_bgthread(
+    console_args, resize, timedelta, internaltimedelta
+):
+    run_on_bg_thread(
+        read_and_resize, (console_args, resize, timedelta, internaltimedelta)
+    )
+
+
+###############################################################################
+
+
+def long_read(console, bulk_read, timedelta, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    assert console.runandwait(
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "print_many_lines_of_text.exe",
+        ),
+        timedelta=timedelta,
+        internaltimedelta=internaltimedelta,
+        postenddelay=100,
+    )
+    assert not console.isrunning
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.exitcode == 0
+    assert console.lasterror == ConPTY.Error.RUNTIME_SUCCESS
+    if bulk_read:
+        assert len(console.readlines()) == 100
+        assert console.lasterror == ConPTY.Error.NONE
+        assert console.readlines() == []
+    else:
+        for i in range(100):
+            assert console.readline() == f"Log {100+i+1}: This is line {i+1}."
+            assert console.lasterror == ConPTY.Error.NONE
+    assert console.read() == ""
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.exitcode is None
+    assert console.lasterror == ConPTY.Error.NO_PROCESS_FOUND
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("bulk_read", FALSE_THEN_TRUE)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_long_read(console_args, bulk_read, timedelta, internaltimedelta):
+    run_on_main_thread(
+        long_read, (console_args, bulk_read, timedelta, internaltimedelta)
+    )
+
+
+@pytest.mark.parametrize("bulk_read", FALSE_THEN_TRUE)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_long_read_bgthread(
+    console_args, bulk_read, timedelta, internaltimedelta
+):
+    run_on_bg_thread(
+        long_read, (console_args, bulk_read, timedelta, internaltimedelta)
+    )
+
+
+###############################################################################
+
+
+def concurrent_reads(console, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    assert console.runandwait(
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "print_many_lines_of_text.exe",
+        ),
+        internaltimedelta=internaltimedelta,
+        postenddelay=100,
+    )
+    lines_read = []
+
+    def read_lines():
+        while True:
+            lines = console.readlines(max_lines_to_read=1)
+            if not lines:
+                break
+            lines_read.append(lines[0].strip())
+
+    # Each read strips into buffers that are reused across reads
+    readers = [threading.Thread(target=read_lines) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    assert sorted(
+        (line for line in lines_read if line.startswith("Log")),
+        key=lambda line: int(line.split(":")[0][4:]),
+    ) == [f"Log {100+i+1}: This is line {i+1}." for i in range(100)]
+    assert console.read() == ""
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_concurrent_reads(console_args, internaltimedelta):
+    run_on_main_thread(concurrent_reads, (console_args, internaltimedelta))
+
+
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("internaltimedelta", [0])
+def test_concurrent_reads_bgthread(console_args, internaltimedelta):
+    run_on_bg_thread(concurrent_reads, (console_args, internaltimedelta))
+
+
+###############################################################################
+
+
+def long_read_quick(console, timedelta, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    assert console.run(
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "print_many_lines_of_text.exe",
+        ),
+        timedelta=timedelta,
+        internaltimedelta=internaltimedelta,
+    )
+    assert (
+        len(
+            console.readlines(
+                waitfor=-1, timedelta=timedelta, min_lines_to_read=100
+            )
+        )
+        == 100
+    )
+    assert console.lasterror == ConPTY.Error.NONE
+    while not console.processended:
+        time.sleep(timedelta)
+    assert console.kill()
+    assert console.lasterror == ConPTY.Error.RUNTIME_SUCCESS
+    while console.isrunning:
+        time.sleep(0.01)
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_long_read_quick(console_args, timedelta, internaltimedelta):
+    run_on_main_thread(
+        long_read_quick, (console_args, timedelta, internaltimedelta)
+    )
+
+
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("timedelta", [0])
+@pytest.mark.parametrize("internaltimedelta", [0])
+def test_long_read_quick_bgthread(console_args, timedelta, internaltimedelta):
+    run_on_bg_thread(
+        long_read_quick, (console_args, timedelta, internaltimedelta)
+    )
+
+
+###############################################################################
+
+
+def long_read_sized(console, adaptivereads, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    program = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "print_many_lines_of_text.exe",
+    )
+    assert not console.run(program, outputpipesize=4096.0)
+    assert console.lasterror == ConPTY.Error.OUTPUTPIPESIZE_NOT_AN_INT
+    assert not console.run(program, inputpipesize="8192")
+    assert console.lasterror == ConPTY.Error.INPUTPIPESIZE_NOT_AN_INT
+    assert not console.run(program, adaptivereads=1)
+    assert console.lasterror == ConPTY.Error.ADAPTIVEREADS_NOT_A_BOOLEAN
+    # Out-of-bounds sizes are capped to 4096 bytes
+    assert console.run(
+        program,
+        internaltimedelta=internaltimedelta,
+        outputpipesize=1,
+        inputpipesize=1,
+        adaptivereads=adaptivereads,
+    )
+    assert console.readchunksize == 4096
+    lines = console.readlines(waitfor=-1, min_lines_to_read=100)
+    assert len(lines) == 100
+    assert lines[-1] == "Log 200: This is line 100."
+    assert console.lasterror == ConPTY.Error.NONE
+    if adaptivereads:
+        assert 4096 <= console.readchunksize <= 4194304
+    else:
+        assert console.readchunksize == 4096
+    assert console.waittocomplete(waitfor=-1)
+    assert console.exitcode == 0
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("adaptivereads", FALSE_THEN_TRUE)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_long_read_sized(console_args, adaptivereads, internaltimedelta):
+    run_on_main_thread(
+        long_read_sized, (console_args, adaptivereads, internaltimedelta)
+    )
+
+
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("adaptivereads", FALSE_THEN_TRUE)
+@pytest.mark.parametrize("internaltimedelta", [0])
+def test_long_read_sized_bgthread(
+    console_args, adaptivereads, internaltimedelta
+):
+    run_on_bg_thread(
+        long_read_sized, (console_args, adaptivereads, internaltimedelta)
+    )
+
+
+###############################################################################
+
+
+def bounded_read_buffer(console, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    command = "cmd /c for /l %i in (1,1,5000) do @echo Line %i"
+    assert not console.run(command, highwatermark=4096.0)
+    assert console.lasterror == ConPTY.Error.HIGHWATERMARK_NOT_AN_INT
+    assert not console.run(command, lowwatermark="0")
+    assert console.lasterror == ConPTY.Error.LOWWATERMARK_NOT_AN_INT
+    with pytest.raises(TypeError, match="'watermark'"):
+        console.run(command, watermark=4096)
+    with pytest.raises(TypeError, match="'watermark'"):
+        console.runandwait(command, watermark=4096)
+    assert console.bufferedbytes == 0
+    assert console.run(
+        command,
+        internaltimedelta=internaltimedelta,
+        highwatermark=4096,
+        lowwatermark=0,
+    )
+    start_time = time.perf_counter()
+    while not console.outputpaused:
+        assert time.perf_counter() - start_time < 10
+        time.sleep(0.01)
+    buffered_bytes = console.bufferedbytes
+    assert 4096 <= buffered_bytes < 4096 + 65536
+    # The program is held back, so the unread output stops growing
+    time.sleep(0.5)
+    assert console.outputpaused
+    assert console.bufferedbytes == buffered_bytes
+    assert console.isrunning
+    lines = console.readlines(waitfor=-1, min_lines_to_read=5000)
+    assert console.lasterror == ConPTY.Error.NONE
+    assert "Line 5000" in lines
+    assert console.waittocomplete(waitfor=-1)
+    assert console.exitcode == 0
+    assert not console.outputpaused
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_bounded_read_buffer(console_args, internaltimedelta):
+    run_on_main_thread(bounded_read_buffer, (console_args, internaltimedelta))
+
+
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("internaltimedelta", [0])
+def test_bounded_read_buffer_bgthread(console_args, internaltimedelta):
+    run_on_bg_thread(bounded_read_buffer, (console_args, internaltimedelta))
+
+
+###############################################################################
+
+
+def capture_output(console, spillsize, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    assert console.captureoutput() is None
+    assert console.lasterror == ConPTY.Error.NO_PROCESS_FOUND
+    assert console.run(
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "long_silent_program.exe",
+        ),
+        internaltimedelta=internaltimedelta,
+    )
+    start_time = time.monotonic()
+    with console.captureoutput(waitfor=0.3, spillsize=spillsize) as capture:
+        # The capture ends by the clock, a read's time delta at most late
+        assert time.monotonic() - start_time < 0.3 + 0.2
+        assert console.lasterror == ConPTY.Error.NONE
+        assert not capture.read().strip()
+    assert console.kill()
+    while console.isrunning:
+        time.sleep(0.01)
+    assert console.run(
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "print_many_lines_of_text.exe",
+        ),
+        internaltimedelta=internaltimedelta,
+        highwatermark=4096,
+    )
+    assert console.captureoutput(chunksize=1.0) is None
+    assert console.lasterror == ConPTY.Error.CHUNKSIZE_NOT_AN_INT
+    assert console.captureoutput(spillsize="0") is None
+    assert console.lasterror == ConPTY.Error.SPILLSIZE_NOT_AN_INT
+    assert console.captureoutput(spilldir=b".") is None
+    assert console.lasterror == ConPTY.Error.SPILLDIR_NOT_A_STRING
+    capture = console.captureoutput(chunksize=512, spillsize=spillsize)
+    assert console.lasterror == ConPTY.Error.NONE
+    with capture:
+        lines = [
+            line.rstrip(b"\r\n") for line in capture if line.startswith(b"Log")
+        ]
+        assert len(lines) == 100
+        assert lines[0] == b"Log 101: This is line 1."
+        assert lines[-1] == b"Log 200: This is line 100."
+        if spillsize == 0:
+            with mmap.mmap(
+                capture.fileno(), 0, access=mmap.ACCESS_READ
+            ) as view:
+                assert view.find(b"Log 200: This is line 100.") != -1
+    assert console.bufferedbytes == 0
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("spillsize", [0, 1048576])
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_capture_output(console_args, spillsize, internaltimedelta):
+    run_on_main_thread(
+        capture_output, (console_args, spillsize, internaltimedelta)
+    )
+
+
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("spillsize", [0, 1048576])
+@pytest.mark.parametrize("internaltimedelta", [0])
+def test_capture_output_bgthread(console_args, spillsize, internaltimedelta):
+    run_on_bg_thread(
+        capture_output, (console_args, spillsize, internaltimedelta)
+    )
+
+
+###############################################################################
+
+
+def read_and_write_part_1(console, stripinput, timedelta, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    assert console.run(
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "text_interaction.exe",
+        ),
+        stripinput=stripinput,
+        timedelta=timedelta,
+        internaltimedelta=internaltimedelta,
+    )
+    assert console.isrunning
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.exitcode is None
+    assert console.lasterror == ConPTY.Error.PROCESS_ALREADY_RUNNING
+    return console
+
+
+def read_and_write_part_2(console, stripinput, timedelta, internaltimedelta):
+    assert console.readline() == ""
+    assert console.getoutput(timedelta=timedelta) == "What is your name? "
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.exitcode is None
+    assert console.lasterror == ConPTY.Error.PROCESS_ALREADY_RUNNING
+    assert console.read() == ""
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.exitcode is None
+    assert console.lasterror == ConPTY.Error.PROCESS_ALREADY_RUNNING
+    assert console.write(
+        "Mr. Melwyn Francis Carlo", waittillsent=True, waitfor=-1
+    )
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.exitcode is None
+    assert console.lasterror == ConPTY.Error.PROCESS_ALREADY_RUNNING
+    if timedelta > 0.1 and internaltimedelta > 0.1:
+        assert console.inputsent
+    if not stripinput:
+        assert (
+            console.getoutput(timedelta=timedelta, min_bytes_to_read=1)
+            == "Mr. Melwyn Francis Carlo"
+        )
+    assert console.write("\r\n")
+    assert console.lasterror == ConPTY.Error.NONE
+    while not console.inputsent:
+        time.sleep(0.1)
+    assert console.getoutput(timedelta=timedelta, min_bytes_to_read=10) == (
+        ("\n" if not stripinput else "")
+        + "Hi, Mr. Melwyn Francis Carlo! What's your age? "
+    )
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.exitcode is None
+    assert console.lasterror == ConPTY.Error.PROCESS_ALREADY_RUNNING
+    if random.choice(TRUE_THEN_FALSE):
+        assert not console.writeline(100)
+        assert console.lasterror == ConPTY.Error.DATA_NOT_A_STRING
+        assert console.writeline("100")
+    else:
+        assert console.sendinput("100")
+    assert console.lasterror == ConPTY.Error.NONE
+    output = console.getoutput(timedelta=timedelta, trailingspaces=False)
+    possible_outputs_list = [
+        "" if stripinput else "100\n",
+        ("" if stripinput else "100\n")
+        + "Hmm, so you will be 110 years old in 10 years.",
+    ]
+    assert output in possible_outputs_list
+    if output == possible_outputs_list[0]:
+        assert console.exitcode is None
+        assert console.lasterror == ConPTY.Error.PROCESS_ALREADY_RUNNING
+        assert (
+            console.getoutput(timedelta=timedelta)
+            == "Hmm, so you will be 110 years old in 10 years."
+        )
+        assert console.lasterror == ConPTY.Error.NONE
+
+
+def read_and_write_part_3(console, timedelta):
+    assert console.waittocomplete(timedelta=timedelta)
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.kill()
+    assert console.lasterror == ConPTY.Error.RUNTIME_SUCCESS
+    assert console.exitcode == 0
+    assert console.lasterror == ConPTY.Error.RUNTIME_SUCCESS
+
+
+def read_and_write(console, stripinput, timedelta, internaltimedelta):
+    console = read_and_write_part_1(
+        console, stripinput, timedelta, internaltimedelta
+    )
+    read_and_write_part_2(console, stripinput, timedelta, internaltimedelta)
+    read_and_write_part_3(console, timedelta)
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("stripinput", FALSE_THEN_TRUE)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_read_and_write(
+    console_args, stripinput, timedelta, internaltimedelta
+):
+    run_on_main_thread(
+        read_and_write,
+        (console_args, stripinput, timedelta, internaltimedelta),
+    )
+
+
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("stripinput", FALSE_THEN_TRUE)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_read_and_write_bgthread(
+    console_args, stripinput, timedelta, internaltimedelta
+):
+    run_on_bg_thread(
+        read_and_write,
+        (console_args, stripinput, timedelta, internaltimedelta),
+    )
+
+
+###############################################################################
+
+
+def write_notes(console, stripinput, timedelta, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    assert not console.write("abc")
+    assert console.lasterror == ConPTY.Error.NO_PROCESS_FOUND
+    assert console.run(
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "write_notes.exe"
+        ),
+        stripinput=stripinput,
+        timedelta=timedelta,
+        internaltimedelta=internaltimedelta,
+    )
+    console.write(100)
+    assert console.lasterror == ConPTY.Error.DATA_NOT_A_STRING
+    console.write("My Notes\n", waitfor=True)
+    assert console.lasterror == ConPTY.Error.WAITFOR_NOT_A_NUMBER
+    console.write("My Notes\n", timedelta=False)
+    assert console.lasterror == ConPTY.Error.TIMEDELTA_NOT_A_NUMBER
+    console.write("My Notes\n", waittillsent=0)
+    assert console.lasterror == ConPTY.Error.WAITTILLSENT_NOT_A_BOOLEAN
+    waitfor = random.choice([-1, 0, 1000])
+    assert console.write("", waitfor=waitfor, timedelta=timedelta)
+    input_notes = INPUT_NOTES
+    notes_total_length = sum(len(text) for text in input_notes)
+    assert console.sendinput(
+        input_notes[0], waitfor=waitfor, timedelta=timedelta
+    )
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.writelines(
+        input_notes[1:], waitfor=waitfor, timedelta=timedelta
+    )
+    assert console.lasterror == ConPTY.Error.NONE
+    if random.choice(TRUE_THEN_FALSE):
+        while not console.inputsent:
+            time.sleep(0.1)
+    output_notes = [
+        f"Line #{str(i + 1).zfill(2)}: {note}"
+        for i, note in enumerate(input_notes)
+    ]
+    io_notes = ([] if stripinput else input_notes) + output_notes
+    if random.choice(TRUE_THEN_FALSE):
+        assert console.getoutput(
+            min_bytes_to_read=(notes_total_length * (1 if stripinput else 1))
+        ) == "\n".join(io_notes + [""])
+    else:
+        assert console.readlines(min_lines_to_read=5, waitfor=-1) == io_notes
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.waittocomplete()
+    assert console.kill()
+    assert console.exitcode == 0
+    assert console.lasterror == ConPTY.Error.RUNTIME_SUCCESS
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("stripinput", FALSE_THEN_TRUE)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_write_notes(console_args, stripinput, timedelta, internaltimedelta):
+    run_on_main_thread(
+        write_notes, (console_args, stripinput, timedelta, internaltimedelta)
     )
-    read_and_write_part_2(console, stripinput, timedelta, internaltimedelta)
-    read_and_write_part_3(console, timedelta)
+
+
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("stripinput", FALSE_THEN_TRUE)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_write_notes_bgthread(
+    console_args, stripinput, timedelta, internaltimedelta
+):
+    run_on_bg_thread(
+        write_notes, (console_args, stripinput, timedelta, internaltimedelta)
+    )
+
+
+###############################################################################
+
+
+def write_notes_batched(console, stripinput, timedelta, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    assert console.run(
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "write_notes.exe"
+        ),
+        stripinput=stripinput,
+        timedelta=timedelta,
+        internaltimedelta=internaltimedelta,
+    )
+    with pytest.raises(RuntimeError):
+        with console.inputbatch():
+            assert console.writeline("Discarded note.")
+            raise RuntimeError
+    with console.inputbatch(waittillsent=True, waitfor=-1) as batch_console:
+        assert batch_console is console
+        assert not console.write(100)
+        assert console.lasterror == ConPTY.Error.DATA_NOT_A_STRING
+        assert console.sendinput(INPUT_NOTES[0], waittillsent=True)
+        with console.inputbatch():
+            for note in INPUT_NOTES[1:3]:
+                assert console.writeline(note)
+        assert console.writelines(INPUT_NOTES[3:])
+        assert console.lasterror == ConPTY.Error.NONE
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.inputsent
+    output_notes = [
+        f"Line #{str(i + 1).zfill(2)}: {note}"
+        for i, note in enumerate(INPUT_NOTES)
+    ]
+    io_notes = ([] if stripinput else INPUT_NOTES) + output_notes
+    assert console.readlines(min_lines_to_read=5, waitfor=-1) == io_notes
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.waittocomplete()
+    assert console.kill()
+    assert console.exitcode == 0
+    assert console.lasterror == ConPTY.Error.RUNTIME_SUCCESS
 
 
 @pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
@@ -1309,11 +2330,11 @@ def read_and_write(console, stripinput, timedelta, internaltimedelta):
 @pytest.mark.parametrize("stripinput", FALSE_THEN_TRUE)
 @pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
 @pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
-def test_read_and_write(
+def test_write_notes_batched(
     console_args, stripinput, timedelta, internaltimedelta
 ):
     run_on_main_thread(
-        read_and_write,
+        write_notes_batched,
         (console_args, stripinput, timedelta, internaltimedelta),
     )
 
@@ -1322,11 +2343,11 @@ def test_read_and_write(
 @pytest.mark.parametrize("stripinput", FALSE_THEN_TRUE)
 @pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
 @pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
-def test_read_and_write_bgthread(
+def test_write_notes_batched_bgthread(
     console_args, stripinput, timedelta, internaltimedelta
 ):
     run_on_bg_thread(
-        read_and_write,
+        write_notes_batched,
         (console_args, stripinput, timedelta, internaltimedelta),
     )
 
@@ -1334,11 +2355,9 @@ def test_read_and_write_bgthread(
 ###############################################################################
 
 
-def write_notes(console, stripinput, timedelta, internaltimedelta):
+def write_notes_streamed(console, stripinput, timedelta, internaltimedelta):
     if console is None:
         console = ConPTY()
-    assert not console.write("abc")
-    assert console.lasterror == ConPTY.Error.NO_PROCESS_FOUND
     assert console.run(
         os.path.join(
             os.path.dirname(os.path.abspath(__file__)), "write_notes.exe"
@@ -1347,46 +2366,120 @@ def write_notes(console, stripinput, timedelta, internaltimedelta):
         timedelta=timedelta,
         internaltimedelta=internaltimedelta,
     )
-    console.write(100)
+    assert not console.writefrom(100)
+    assert console.lasterror == ConPTY.Error.SOURCE_NOT_A_FILE_OR_ITERABLE
+    assert not console.writefrom([], chunksize="8")
+    assert console.lasterror == ConPTY.Error.CHUNKSIZE_NOT_AN_INT
+    assert not console.writefrom([], background=1)
+    assert console.lasterror == ConPTY.Error.BACKGROUND_NOT_A_BOOLEAN
+    assert not console.writefrom([], progress=True)
+    assert console.lasterror == ConPTY.Error.PROGRESS_NOT_CALLABLE
+    assert not console.writefrom(["", 100])
     assert console.lasterror == ConPTY.Error.DATA_NOT_A_STRING
-    console.write("My Notes\n", waitfor=True)
-    assert console.lasterror == ConPTY.Error.WAITFOR_NOT_A_NUMBER
-    console.write("My Notes\n", timedelta=False)
-    assert console.lasterror == ConPTY.Error.TIMEDELTA_NOT_A_NUMBER
-    console.write("My Notes\n", waittillsent=0)
-    assert console.lasterror == ConPTY.Error.WAITTILLSENT_NOT_A_BOOLEAN
-    waitfor = random.choice([-1, 0, 1000])
-    assert console.write("", waitfor=waitfor, timedelta=timedelta)
-    input_notes = [
-        "Today is Sunday.",
-        "I have to do my chores.",
-        "I have to telephone my friend.",
-        " Hack the parental control system.",
-        "  Munch on some jelly beans.",
-    ]
-    notes_total_length = sum(len(text) for text in input_notes)
-    assert console.sendinput(
-        input_notes[0], waitfor=waitfor, timedelta=timedelta
+    assert console.writefrom(["", 100], background=True)
+    assert console.lasterror == ConPTY.Error.NONE
+    while console.inputstreaming:
+        time.sleep(0.01)
+    assert console.lasterror == ConPTY.Error.DATA_NOT_A_STRING
+    sent_counts = []
+    # A small odd chunk size splits both the notes and their "\r\n" pairs.
+    head_notes = io.BytesIO(
+        "".join(f"{n}\r\n" for n in INPUT_NOTES[:2]).encode()
+    )
+    assert console.writefrom(
+        head_notes, chunksize=7, progress=sent_counts.append
     )
     assert console.lasterror == ConPTY.Error.NONE
+    assert sent_counts == sorted(sent_counts)
+    assert sent_counts[-1] == sum(len(note) + 2 for note in INPUT_NOTES[:2])
+    tail_release = threading.Event()
+
+    def tail_notes():
+        tail_release.wait()
+        for note in INPUT_NOTES[2:]:
+            yield f"{note}\n"
+
+    assert console.writefrom(tail_notes(), chunksize=5, background=True)
+    assert console.inputstreaming
+    assert not console.writefrom([], background=True)
+    assert console.lasterror == ConPTY.Error.INPUT_ALREADY_STREAMING
+    tail_release.set()
+    while console.inputstreaming:
+        time.sleep(0.01)
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.inputsent
+    output_notes = [
+        f"Line #{str(i + 1).zfill(2)}: {note}"
+        for i, note in enumerate(INPUT_NOTES)
+    ]
+    io_notes = ([] if stripinput else INPUT_NOTES) + output_notes
+    assert console.readlines(min_lines_to_read=5, waitfor=-1) == io_notes
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.waittocomplete()
+    assert console.kill()
+    assert console.exitcode == 0
+    assert console.lasterror == ConPTY.Error.RUNTIME_SUCCESS
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("stripinput", FALSE_THEN_TRUE)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_write_notes_streamed(
+    console_args, stripinput, timedelta, internaltimedelta
+):
+    run_on_main_thread(
+        write_notes_streamed,
+        (console_args, stripinput, timedelta, internaltimedelta),
+    )
+
+
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("stripinput", FALSE_THEN_TRUE)
+@pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_write_notes_streamed_bgthread(
+    console_args, stripinput, timedelta, internaltimedelta
+):
+    run_on_bg_thread(
+        write_notes_streamed,
+        (console_args, stripinput, timedelta, internaltimedelta),
+    )
+
+
+###############################################################################
+
+
+def write_notes_paced(console, stripinput, timedelta, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    assert not console.writelines(INPUT_NOTES, paced=True)
+    assert console.lasterror == ConPTY.Error.NO_PROCESS_FOUND
+    assert console.run(
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "write_notes.exe"
+        ),
+        stripinput=stripinput,
+        timedelta=timedelta,
+        internaltimedelta=internaltimedelta,
+    )
+    assert not console.writelines(INPUT_NOTES, paced=1)
+    assert console.lasterror == ConPTY.Error.PACED_NOT_A_BOOLEAN
+    assert not console.writelines(INPUT_NOTES, paced=True, pacefor="1")
+    assert console.lasterror == ConPTY.Error.PACEFOR_NOT_A_NUMBER
+    # Each fgets() call echoes its line, which paces the next one.
     assert console.writelines(
-        input_notes[1:], waitfor=waitfor, timedelta=timedelta
+        INPUT_NOTES, waittillsent=True, waitfor=-1, paced=True, pacefor=10
     )
     assert console.lasterror == ConPTY.Error.NONE
-    if random.choice(TRUE_THEN_FALSE):
-        while not console.inputsent:
-            time.sleep(0.1)
+    assert console.inputsent
     output_notes = [
         f"Line #{str(i + 1).zfill(2)}: {note}"
-        for i, note in enumerate(input_notes)
+        for i, note in enumerate(INPUT_NOTES)
     ]
-    io_notes = ([] if stripinput else input_notes) + output_notes
-    if random.choice(TRUE_THEN_FALSE):
-        assert console.getoutput(
-            min_bytes_to_read=(notes_total_length * (1 if stripinput else 1))
-        ) == "\n".join(io_notes + [""])
-    else:
-        assert console.readlines(min_lines_to_read=5, waitfor=-1) == io_notes
+    io_notes = ([] if stripinput else INPUT_NOTES) + output_notes
+    assert console.readlines(min_lines_to_read=5, waitfor=-1) == io_notes
     assert console.lasterror == ConPTY.Error.NONE
     assert console.waittocomplete()
     assert console.kill()
@@ -1399,9 +2492,12 @@ def write_notes(console, stripinput, timedelta, internaltimedelta):
 @pytest.mark.parametrize("stripinput", FALSE_THEN_TRUE)
 @pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
 @pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
-def test_write_notes(console_args, stripinput, timedelta, internaltimedelta):
+def test_write_notes_paced(
+    console_args, stripinput, timedelta, internaltimedelta
+):
     run_on_main_thread(
-        write_notes, (console_args, stripinput, timedelta, internaltimedelta)
+        write_notes_paced,
+        (console_args, stripinput, timedelta, internaltimedelta),
     )
 
 
@@ -1409,11 +2505,254 @@ def test_write_notes(console_args, stripinput, timedelta, internaltimedelta):
 @pytest.mark.parametrize("stripinput", FALSE_THEN_TRUE)
 @pytest.mark.parametrize("timedelta", TIMEDELTAS_LIST)
 @pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
-def test_write_notes_bgthread(
+def test_write_notes_paced_bgthread(
     console_args, stripinput, timedelta, internaltimedelta
 ):
     run_on_bg_thread(
-        write_notes, (console_args, stripinput, timedelta, internaltimedelta)
+        write_notes_paced,
+        (console_args, stripinput, timedelta, internaltimedelta),
+    )
+
+
+###############################################################################
+
+
+def interrupt_queued_input(console, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    assert not console.interrupt()
+    assert console.lasterror == ConPTY.Error.NO_PROCESS_FOUND
+    assert console.run(
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "long_silent_program.exe",
+        ),
+        internaltimedelta=internaltimedelta,
+    )
+    assert not console.sendsignal("CTRL_C")
+    assert console.lasterror == ConPTY.Error.SIGNAL_NOT_A_SIGNAL
+    assert not console.interrupt(discard=1)
+    assert console.lasterror == ConPTY.Error.DISCARD_NOT_A_BOOLEAN
+    # A large paste, which the program never reads, is queued ahead.
+    assert console.write("a" * 1048576)
+    start_time = time.perf_counter()
+    assert console.interrupt(discard=True)
+    assert time.perf_counter() - start_time < 0.25
+    assert console.lasterror == ConPTY.Error.NONE
+    assert console.waittocomplete(waitfor=-1)
+    assert console.inputsent
+    # STATUS_CONTROL_C_EXIT
+    assert console.exitcode == 0xC000013A
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_interrupt_queued_input(console_args, internaltimedelta):
+    run_on_main_thread(
+        interrupt_queued_input, (console_args, internaltimedelta)
+    )
+
+
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("internaltimedelta", INTERNALTIMEDELTAS_LIST)
+def test_interrupt_queued_input_bgthread(console_args, internaltimedelta):
+    run_on_bg_thread(interrupt_queued_input, (console_args, internaltimedelta))
+
+
+###############################################################################
+
+
+def handoff_latency(console, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    assert console.run(
+        "cmd", internaltimedelta=internaltimedelta, inputpipesize=4096
+    )
+    assert console.lasterror == ConPTY.Error.NONE
+    # Larger than the input pipe, so that it is always queued for the
+    # stdin listener, instead of being written into the idle pipe directly
+    queued_line = "rem " + "x" * 5000 + "\r\n"
+    latencies = []
+    for _ in range(50):
+        start_time = time.perf_counter()
+        assert console.write(
+            queued_line, waittillsent=True, waitfor=-1, timedelta=1e-3
+        )
+        latencies.append(time.perf_counter() - start_time)
+        assert console.read() is not None
+        assert console.lasterror == ConPTY.Error.NONE
+    # Small writes into an idle pipe are sent before write() returns
+    for _ in range(10):
+        assert console.write("rem\r\n")
+        assert console.inputsent
+    assert console.kill()
+    assert console.lasterror == ConPTY.Error.FORCED_TERMINATION
+    latencies.sort()
+    p99_latency = latencies[int(0.99 * (len(latencies) - 1))]
+    # The stdin listener is woken by writes, so it never polls them late
+    assert (
+        p99_latency < internaltimedelta / 2000
+    ), f"p99 handoff latency = {p99_latency * 1000:.1f} ms"
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("internaltimedelta", [200, 500])
+def test_handoff_latency(console_args, internaltimedelta):
+    run_on_main_thread(handoff_latency, (console_args, internaltimedelta))
+
+
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("internaltimedelta", [200, 500])
+def test_handoff_latency_bgthread(console_args, internaltimedelta):
+    run_on_bg_thread(handoff_latency, (console_args, internaltimedelta))
+
+
+###############################################################################
+
+
+def answer_queries(console, query, answerqueries, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    assert console.run(
+        '"{}" {}'.format(
+            os.path.join(
+                os.path.dirname(os.path.abspath(__file__)),
+                "query_program.exe",
+            ),
+            query,
+        ),
+        internaltimedelta=internaltimedelta,
+        answerqueries=answerqueries,
+        keeprawdata=True,
+    )
+    assert console.lasterror == ConPTY.Error.NONE
+    with console.captureoutput() as capture:
+        replies_lines = [
+            line.decode("utf-8").rstrip("\r\n")[len("Replies: ") :]
+            for line in capture
+            if line.startswith(b"Replies: ")
+        ]
+    assert len(replies_lines) == 1
+    replies = ["ESC" + reply for reply in replies_lines[0].split("ESC")[1:]]
+    # A query that the console host answers itself is not passed on
+    is_query_passed_on = "\x1b[" + query in console.getoutput(rawdata=True)
+    assert console.lasterror == ConPTY.Error.NONE
+    if query == "18t":
+        assert is_query_passed_on
+    if is_query_passed_on and not answerqueries:
+        assert replies == []
+    else:
+        # Answered exactly once, by either the console host or the ConPTY
+        assert len(replies) == 1
+        if query == "18t":
+            assert replies[0] == "ESC[8;24;80t"
+        elif query == "6n":
+            assert re.fullmatch(r"ESC\[\d+;\d+R", replies[0])
+        else:
+            assert re.fullmatch(r"ESC\[\?[\d;]+c", replies[0])
+    assert console.waittocomplete(waitfor=-1)
+    assert console.exitcode == 0
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("query", ["6n", "c", "18t"])
+@pytest.mark.parametrize("answerqueries", TRUE_THEN_FALSE)
+@pytest.mark.parametrize("internaltimedelta", [100, 0])
+def test_answer_queries(console_args, query, answerqueries, internaltimedelta):
+    run_on_main_thread(
+        answer_queries,
+        (console_args, query, answerqueries, internaltimedelta),
+    )
+
+
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("query", ["6n", "c", "18t"])
+@pytest.mark.parametrize("answerqueries", TRUE_THEN_FALSE)
+@pytest.mark.parametrize("internaltimedelta", [0])
+def test_answer_queries_bgthread(
+    console_args, query, answerqueries, internaltimedelta
+):
+    run_on_bg_thread(
+        answer_queries,
+        (console_args, query, answerqueries, internaltimedelta),
+    )
+
+
+###############################################################################
+
+
+def output_events(console, keeprawdata, internaltimedelta):
+    if console is None:
+        console = ConPTY()
+    assert console.run(
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "mark_program.exe",
+        ),
+        internaltimedelta=internaltimedelta,
+        keeprawdata=keeprawdata,
+    )
+    assert console.lasterror == ConPTY.Error.NONE
+    # Output read raw is not counted in the offsets of the events
+    assert console.read(rawdata=True) is not None
+    output = ""
+    for line in [
+        "Title",
+        "Prompt",
+        "Command",
+        "Output",
+        "Failure",
+        "Finish",
+        "Unknown",
+    ]:
+        # Each line is printed only once asked for, after the last is read
+        assert console.writeline("")
+        while line not in output:
+            data = console.read(waitfor=-1)
+            assert data is not None
+            output += data
+    output += console.getoutput()
+    assert console.lasterror == ConPTY.Error.NONE
+    if keeprawdata:
+        assert "\x1b]133;A\x07" in console.getoutput(rawdata=True)
+    # The console host also sets a title of its own, when started
+    events = [
+        event
+        for event in console.getevents()
+        if event[0] != ConPTY.Event.TITLE or event[2] == "PyConPTY Marks"
+    ]
+    assert console.lasterror == ConPTY.Error.NONE
+    assert events == [
+        (ConPTY.Event.TITLE, output.index("Title"), "PyConPTY Marks"),
+        (ConPTY.Event.PROMPT_START, output.index("Prompt"), None),
+        (ConPTY.Event.COMMAND_START, output.index("Command"), None),
+        (ConPTY.Event.COMMAND_EXECUTED, output.index("Output"), None),
+        (ConPTY.Event.COMMAND_FINISHED, output.index("Failure"), 3),
+        (ConPTY.Event.COMMAND_FINISHED, output.index("Finish"), None),
+    ]
+    assert "Unknown" in output
+    assert console.getevents() == []
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("keeprawdata", FALSE_THEN_TRUE)
+@pytest.mark.parametrize("internaltimedelta", [100, 0])
+def test_output_events(console_args, keeprawdata, internaltimedelta):
+    run_on_main_thread(
+        output_events, (console_args, keeprawdata, internaltimedelta)
+    )
+
+
+@pytest.mark.parametrize("console_args", DEFAULT_CONSOLE_ARGS_LIST)
+@pytest.mark.parametrize("keeprawdata", FALSE_THEN_TRUE)
+@pytest.mark.parametrize("internaltimedelta", [0])
+def test_output_events_bgthread(console_args, keeprawdata, internaltimedelta):
+    run_on_bg_thread(
+        output_events, (console_args, keeprawdata, internaltimedelta)
     )
 
 
@@ -0,0 +1,263 @@
+# This code is part of the PyConPTY python package.
+# PyConPTY: A Python wrapper for the ConPTY (Windows Pseudo-console) API
+# Copyright (C) 2025  MELWYN FRANCIS CARLO
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# For queries, contact me at: melwyncarlo@gmail.com
+
+
+
+# pylint: disable=missing-module-docstring
+# pylint: disable=missing-function-docstring
+
+
+###############################################################################
+
+
+import os
+import random
+import concurrent.futures
+import pytest
+from pyconpty import VTStripper
+
+
+###############################################################################
+
+
+DEFAULT_NUMBER_OF_RERUNS = 10
+CHUNK_SIZES_LIST = [None, 1, 2, 7]
+STREAM = (
+    b"\x1b[?25l\x1b[2J\x1b[m\x1b[HThis is line 1 with newline.\x1b[K\r\n"
+    b"This is line 2 \x1b[1;31mwith\x1b[0m newline.  \x1b[K\r\n"
+    b"\x1b]0;C:\\Windows\\system32\\cmd.exe\x07"
+    b"This is line 3 with newline.\r\n"
+    b"\r\n"
+    b"Caf\xc3\xa9 \xe2\x9c\x93 10%\r20%\r100%\r\n"
+    b"This is line 6 WITHOUT newline.  \x1b[?25h"
+)
+
+# Each sample, with its expected PLAIN, LAYOUT and SCREEN outputs, as
+# recorded from the table-driven parser, whatever the chunk size.
+DIFFERENTIAL_CORPUS = [
+    # Extended colours, whose sub-parameters once leaked out as text
+    (
+        b"\x1b[38;5;208mOrange\x1b[0m text\r\n",
+        "Orange text\n",
+        "Orange text\n",
+        "Orange text\n",
+    ),
+    (b"\x1b[38;2;255;128;0mRGB\x1b[m\r\n", "RGB\n", "RGB\n", "RGB\n"),
+    # Character set designations take one more byte after the '('
+    (b"\x1b(BG0\x1b(0lqk\x1b(B\r\n", "G0lqk\n", "G0lqk\n", "G0lqk\n"),
+    # ESC O is a plain escape sequence, and the next byte is text
+    (b"\x1b[?1h\x1bOAup\x1b=\r\n", "Aup\n", "Aup\n", "Aup\n"),
+    # CAN and SUB abort a sequence
+    (
+        b"ab\x1b[31\x18cd\x1b[1;2\x1aef\r\n",
+        "abcdef\n",
+        "abcdef\n",
+        "abcdef\n",
+    ),
+    # A line feed inside a CSI is executed
+    (b"one\x1b[3\n1mtwo\r\n", "one\ntwo\n", "one\ntwo\n", "one\ntwo\n"),
+    # DCS, SOS, PM and APC strings are swallowed whole
+    (b"a\x1bPq#0;2;0;0;0#1!10~-\x1b\\b\r\n", "ab\n", "ab\n", "ab\n"),
+    (
+        b"a\x1bXsos\x1b\\b\x1b^pm\x1b\\c\x1b_apc\x1b\\d\r\n",
+        "abcd\n",
+        "abcd\n",
+        "abcd\n",
+    ),
+    (
+        b"a\x1b]8;;http://x\x07link\x1b]8;;\x07b\x1b]foo\x07c\r\n",
+        "alinkbc\n",
+        "alinkbc\n",
+        "alinkbc\n",
+    ),
+    # Private markers and sub-parameters are ignored
+    (
+        b"a\x1b[>0cb\x1b[?1049hc\x1b[1:2md\r\n",
+        "abcd\n",
+        "abcd\n",
+        "abcd\n",
+    ),
+    # Cursor movements, which no chunk boundary may shorten
+    (b"ab\x1b[5Cc\r\n", "abc\n", "ab     c\n", "ab     c\n"),
+    (
+        b"ab\x1b[999Cc\r\n",
+        "abc\n",
+        "ab" + " " * 80 + "c\n",
+        "ab" + " " * 77 + "c\n",
+    ),
+    (b"a\x1b[3;1Hb\r\n", "ab\n", "a\n\nb\n", "a\n\nb\n"),
+    (b"a\x1b[3;5Hb\r\n", "ab\n", "ab\n", "a\n\n    b\n"),
+    # UTF-8 text is kept, and DEL is ignored
+    (
+        b"Caf\xc3\xa9 \xe2\x9c\x93 \xf0\x9f\x98\x80\r\n",
+        "Caf\u00e9 \u2713 \U0001f600\n",
+        "Caf\u00e9 \u2713 \U0001f600\n",
+        "Caf\u00e9 \u2713 \U0001f600\n",
+    ),
+    (b"a\x7fb\x1b[3\x7f1mc\r\n", "abc\n", "abc\n", "abc\n"),
+]
+
+
+###############################################################################
+
+
+def feed_in_chunks(stripper, data, chunk_size):
+    if chunk_size is None:
+        chunk_size = random.randint(1, len(data))
+    output = ""
+    for i in range(0, len(data), chunk_size):
+        output += stripper.feed(data[i : i + chunk_size])
+        assert stripper.lasterror == VTStripper.Error.NONE
+    output += stripper.flush()
+    assert stripper.lasterror == VTStripper.Error.NONE
+    return output
+
+
+def strip_stream(striplevel, chunk_size):
+    stripper = VTStripper(striplevel)
+    assert stripper.isinitialized
+    assert stripper.lasterror == VTStripper.Error.NONE
+    output = feed_in_chunks(stripper, STREAM, chunk_size)
+    if striplevel == VTStripper.StripLevel.PLAIN:
+        assert output == (
+            "This is line 1 with newline.\n"
+            "This is line 2 with newline.  \n"
+            "This is line 3 with newline.\n"
+            "\n"
+            "Caf\u00e9 \u2713 10%20%100%\n"
+            "This is line 6 WITHOUT newline.  "
+        )
+    elif striplevel == VTStripper.StripLevel.LAYOUT:
+        assert output == (
+            "This is line 1 with newline.\n"
+            "This is line 2 with newline.\n"
+            "This is line 3 with newline.\n"
+            "\n"
+            "Caf\u00e9 \u2713 10%20%100%\n"
+            "This is line 6 WITHOUT newline."
+        )
+    else:
+        assert output == (
+            "This is line 1 with newline.\n"
+            "This is line 2 with newline.\n"
+            "This is line 3 with newline.\n"
+            "\n"
+            "100% \u2713 10%\n"
+            "This is line 6 WITHOUT newline."
+        )
+    # The stripper is reset by flush(), and is ready for a new stream.
+    assert feed_in_chunks(stripper, b"\x1b[32mok\x1b[0m\n", chunk_size) == (
+        "ok\n"
+    )
+
+
+@pytest.mark.repeat(DEFAULT_NUMBER_OF_RERUNS)
+@pytest.mark.parametrize("striplevel", list(VTStripper.StripLevel))
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES_LIST)
+def test_strip_stream(striplevel, chunk_size):
+    strip_stream(striplevel, chunk_size)
+
+
+@pytest.mark.parametrize("striplevel", list(VTStripper.StripLevel))
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES_LIST)
+def test_strip_stream_bgthread(striplevel, chunk_size):
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=os.cpu_count()
+    ) as executor:
+        futures = [
+            executor.submit(strip_stream, striplevel, chunk_size)
+            for i in range(DEFAULT_NUMBER_OF_RERUNS)
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            future.result()
+
+
+###############################################################################
+
+
+@pytest.mark.parametrize("sample", DIFFERENTIAL_CORPUS)
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES_LIST + [3])
+def test_differential_corpus(sample, chunk_size):
+    data, *expected_outputs = sample
+    for striplevel, expected_output in zip(
+        VTStripper.StripLevel, expected_outputs
+    ):
+        stripper = VTStripper(striplevel)
+        assert feed_in_chunks(stripper, data, chunk_size) == expected_output
+
+
+###############################################################################
+
+
+def test_split_utf8_character():
+    stripper = VTStripper()
+    assert stripper.feed(b"caf\xc3") == "caf"
+    assert stripper.feed(b"\xa9\n") == "\u00e9\n"
+    assert stripper.feed(b"\xe2\x9c") == ""
+    assert stripper.flush() == "\ufffd"
+
+
+def test_redraw_of_line_above():
+    stripper = VTStripper(VTStripper.StripLevel.SCREEN)
+    redraws = b"".join(
+        b"\x1b[A\rStep %d of 5\x1b[K\r\n" % step for step in range(1, 6)
+    )
+    assert stripper.feed(b"Step 0 of 5\r\n" + redraws + b"Done.\r\n") == (
+        "Step 5 of 5\nDone.\n"
+    )
+    # A line that has already been handed over is final
+    assert stripper.feed(b"\x1b[A\rAgain\r\n") == "Again\n"
+    assert stripper.flush() == ""
+    assert stripper.feed(b"a\r\nbb\r\n\x1b[2;1Hzz\x1b[3;1Hc\r\n") == (
+        "a\nzz\nc\n"
+    )
+    assert stripper.flush() == ""
+    # Redraws further up are not collapsed
+    assert stripper.feed(b"x\r\ny\r\n\x1b[2A\rz\r\n") == "x\ny\nz\n"
+    assert stripper.lasterror == VTStripper.Error.NONE
+
+
+def test_bytearray_and_empty_data():
+    stripper = VTStripper()
+    assert stripper.feed(bytearray(b"\x1b[31mred")) == "red"
+    assert stripper.feed(b"") == ""
+    assert stripper.lasterror == VTStripper.Error.NONE
+
+
+###############################################################################
+
+
+def test_invalid_arguments():
+    stripper = VTStripper(1)
+    assert not stripper.isinitialized
+    assert stripper.lasterror == VTStripper.Error.STRIPLEVEL_NOT_A_STRIPLEVEL
+    assert stripper.feed(b"abc") is None
+    assert stripper.lasterror == VTStripper.Error.VTSTRIPPER_UNINITIALIZED
+    assert stripper.flush() is None
+    assert stripper.lasterror == VTStripper.Error.VTSTRIPPER_UNINITIALIZED
+    stripper = VTStripper(width=80.0)
+    assert not stripper.isinitialized
+    assert stripper.lasterror == VTStripper.Error.WIDTH_NOT_INT
+    stripper = VTStripper(height="24")
+    assert not stripper.isinitialized
+    assert stripper.lasterror == VTStripper.Error.HEIGHT_NOT_INT
+    stripper = VTStripper(width=0, height=99999)
+    assert stripper.isinitialized
+    assert stripper.feed("abc") is None
+    assert stripper.lasterror == VTStripper.Error.DATA_NOT_BYTES